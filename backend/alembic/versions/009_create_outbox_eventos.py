@@ -0,0 +1,63 @@
+"""create outbox_eventos table
+
+Revision ID: 009_outbox_eventos
+Revises: 008_encrypt_whatsapp
+Create Date: 2026-10-18 09:00:00.000000
+
+Cria a fila transacional de efeitos colaterais das demandas:
+- outbox_eventos: eventos gravados junto com a demanda e processados
+  pelo worker (python -m app.workers)
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '009_outbox_eventos'
+down_revision = '008_encrypt_whatsapp'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """
+    Cria tabela outbox_eventos
+    """
+    op.create_table(
+        'outbox_eventos',
+        sa.Column('id', sa.String(36), primary_key=True),
+        
+        # Evento
+        sa.Column('tipo', sa.String(50), nullable=False, comment='Tipo do efeito colateral'),
+        sa.Column('demanda_id', sa.String(36), nullable=True, comment='ID da demanda relacionada (sem FK para sobreviver à exclusão)'),
+        sa.Column('payload', sa.Text(), nullable=True, comment='JSON com dados para executar o efeito'),
+        
+        # Processamento
+        sa.Column('status', sa.String(20), nullable=False, server_default='pendente', comment='pendente, processando, concluido, falhou'),
+        sa.Column('tentativas', sa.Integer(), nullable=False, server_default='0', comment='Número de tentativas já realizadas'),
+        sa.Column('proxima_tentativa_em', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now(), comment='Momento a partir do qual o evento pode ser processado'),
+        sa.Column('bloqueado_por', sa.String(100), nullable=True, comment='Identificador do worker que reivindicou o evento'),
+        sa.Column('bloqueado_em', sa.DateTime(timezone=True), nullable=True, comment='Momento em que o evento foi reivindicado'),
+        sa.Column('processado_em', sa.DateTime(timezone=True), nullable=True, comment='Momento da conclusão do evento'),
+        sa.Column('ultimo_erro', sa.Text(), nullable=True, comment='Mensagem do último erro'),
+        
+        # Metadados
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    
+    op.create_index('ix_outbox_eventos_tipo', 'outbox_eventos', ['tipo'])
+    op.create_index('ix_outbox_eventos_demanda_id', 'outbox_eventos', ['demanda_id'])
+    
+    # Reivindicação: WHERE status = 'pendente' AND proxima_tentativa_em <= now()
+    op.create_index('idx_outbox_status_proxima', 'outbox_eventos', ['status', 'proxima_tentativa_em'])
+
+
+def downgrade():
+    """
+    Remove tabela outbox_eventos
+    """
+    op.drop_index('idx_outbox_status_proxima', table_name='outbox_eventos')
+    op.drop_index('ix_outbox_eventos_demanda_id', table_name='outbox_eventos')
+    op.drop_index('ix_outbox_eventos_tipo', table_name='outbox_eventos')
+    op.drop_table('outbox_eventos')
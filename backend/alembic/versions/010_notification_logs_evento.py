@@ -0,0 +1,42 @@
+"""add usuario_id and evento_id to notification_logs
+
+Revision ID: 010_notification_logs_evento
+Revises: 009_outbox_eventos
+Create Date: 2026-10-18 11:00:00.000000
+
+Logs de notificação passam a guardar o destinatário e o evento da
+outbox, para que uma nova tentativa do evento pule quem já recebeu.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '010_notification_logs_evento'
+down_revision = '009_outbox_eventos'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """
+    Adiciona usuario_id e evento_id em notification_logs
+    """
+    op.add_column('notification_logs', sa.Column('usuario_id', sa.String(36), nullable=True, comment='ID do usuário destinatário'))
+    op.add_column('notification_logs', sa.Column('evento_id', sa.String(36), nullable=True, comment='ID do evento da outbox que originou o envio'))
+    
+    op.create_foreign_key(
+        'fk_notification_logs_usuario_id', 'notification_logs', 'users',
+        ['usuario_id'], ['id'], ondelete='SET NULL'
+    )
+    op.create_index('ix_notification_logs_evento_id', 'notification_logs', ['evento_id'])
+
+
+def downgrade():
+    """
+    Remove usuario_id e evento_id de notification_logs
+    """
+    op.drop_index('ix_notification_logs_evento_id', table_name='notification_logs')
+    op.drop_constraint('fk_notification_logs_usuario_id', 'notification_logs', type_='foreignkey')
+    op.drop_column('notification_logs', 'evento_id')
+    op.drop_column('notification_logs', 'usuario_id')
@@ -0,0 +1,67 @@
+"""create demandas_stats_daily
+
+Revision ID: 011_demandas_stats_daily
+Revises: 010_notification_logs_evento
+Create Date: 2026-10-18 12:00:00.000000
+
+Rollup diário de contagens de demandas (dia de criação x cliente x
+secretaria x tipo x prioridade x status), mantido a cada flush e
+reconstruído todas as noites pelo worker. A tabela é populada aqui a
+partir das demandas existentes.
+"""
+import os
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '011_demandas_stats_daily'
+down_revision = '010_notification_logs_evento'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """
+    Cria demandas_stats_daily e faz a carga inicial
+    """
+    op.create_table(
+        'demandas_stats_daily',
+        sa.Column('dia', sa.Date(), nullable=False, comment='Dia de criação da demanda'),
+        sa.Column('cliente_id', sa.String(36), nullable=False),
+        sa.Column('secretaria_id', sa.String(36), nullable=False, server_default='', comment="'' quando a demanda não tem secretaria"),
+        sa.Column('tipo_demanda_id', sa.String(36), nullable=False),
+        sa.Column('prioridade_id', sa.String(36), nullable=False),
+        sa.Column('status', sa.String(50), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('dia', 'cliente_id', 'secretaria_id', 'tipo_demanda_id', 'prioridade_id', 'status')
+    )
+    op.create_index('idx_stats_daily_cliente_dia', 'demandas_stats_daily', ['cliente_id', 'dia'])
+    op.create_index('idx_stats_daily_secretaria', 'demandas_stats_daily', ['secretaria_id'])
+    
+    op.get_bind().execute(
+        sa.text("""
+            INSERT INTO demandas_stats_daily
+                (dia, cliente_id, secretaria_id, tipo_demanda_id, prioridade_id, status, total)
+            SELECT
+                (created_at AT TIME ZONE :tz)::date,
+                cliente_id,
+                COALESCE(secretaria_id, ''),
+                tipo_demanda_id,
+                prioridade_id,
+                lower(status::text),
+                count(*)
+            FROM demandas
+            GROUP BY 1, 2, 3, 4, 5, 6
+        """),
+        {"tz": os.getenv("ESTATISTICAS_TIMEZONE", "UTC")}
+    )
+
+
+def downgrade():
+    """
+    Remove demandas_stats_daily
+    """
+    op.drop_index('idx_stats_daily_secretaria', table_name='demandas_stats_daily')
+    op.drop_index('idx_stats_daily_cliente_dia', table_name='demandas_stats_daily')
+    op.drop_table('demandas_stats_daily')
@@ -0,0 +1,58 @@
+"""create relatorio_jobs
+
+Revision ID: 012_relatorio_jobs
+Revises: 011_demandas_stats_daily
+Create Date: 2026-10-18 13:00:00.000000
+
+Jobs de geração assíncrona de relatórios PDF/Excel (pool de processos),
+com chave de cache para reaproveitar arquivos já gerados.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '012_relatorio_jobs'
+down_revision = '011_demandas_stats_daily'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """
+    Cria tabela relatorio_jobs
+    """
+    op.create_table(
+        'relatorio_jobs',
+        sa.Column('id', sa.String(36), primary_key=True),
+        
+        # Pedido
+        sa.Column('usuario_id', sa.String(36), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, comment='Usuário que solicitou o relatório'),
+        sa.Column('formato', sa.String(10), nullable=False, comment='pdf ou xlsx'),
+        sa.Column('filtros', sa.Text(), nullable=True, comment='JSON com os filtros normalizados'),
+        sa.Column('chave_cache', sa.String(64), nullable=False, comment='sha256 de formato, filtros, escopo e versão dos dados'),
+        
+        # Execução
+        sa.Column('status', sa.String(20), nullable=False, server_default='pendente', comment='pendente, processando, concluido, erro'),
+        sa.Column('arquivo', sa.String(500), nullable=True, comment='Caminho do arquivo gerado'),
+        sa.Column('tamanho_bytes', sa.Integer(), nullable=True, comment='Tamanho do arquivo gerado'),
+        sa.Column('iniciado_em', sa.DateTime(timezone=True), nullable=True, comment='Início da geração'),
+        sa.Column('concluido_em', sa.DateTime(timezone=True), nullable=True, comment='Fim da geração'),
+        sa.Column('mensagem_erro', sa.Text(), nullable=True, comment='Erro da geração'),
+        
+        # Metadados
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    
+    op.create_index('ix_relatorio_jobs_usuario_id', 'relatorio_jobs', ['usuario_id'])
+    op.create_index('idx_relatorio_jobs_chave_status', 'relatorio_jobs', ['chave_cache', 'status'])
+
+
+def downgrade():
+    """
+    Remove tabela relatorio_jobs
+    """
+    op.drop_index('idx_relatorio_jobs_chave_status', table_name='relatorio_jobs')
+    op.drop_index('ix_relatorio_jobs_usuario_id', table_name='relatorio_jobs')
+    op.drop_table('relatorio_jobs')
@@ -0,0 +1,33 @@
+"""demandas keyset indexes
+
+Revision ID: 013_demandas_keyset_indexes
+Revises: 012_relatorio_jobs
+Create Date: 2026-10-18 14:00:00.000000
+
+Índices para a paginação por cursor de GET /api/demandas
+(ORDER BY created_at DESC, id DESC, com ou sem filtro por usuário).
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '013_demandas_keyset_indexes'
+down_revision = '012_relatorio_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """
+    Cria índices (created_at, id) e (usuario_id, created_at, id) em demandas
+    """
+    op.create_index('idx_demanda_created_id', 'demandas', ['created_at', 'id'])
+    op.create_index('idx_demanda_usuario_created_id', 'demandas', ['usuario_id', 'created_at', 'id'])
+
+
+def downgrade():
+    """
+    Remove os índices de paginação por cursor
+    """
+    op.drop_index('idx_demanda_usuario_created_id', table_name='demandas')
+    op.drop_index('idx_demanda_created_id', table_name='demandas')
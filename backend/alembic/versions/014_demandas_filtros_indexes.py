@@ -0,0 +1,44 @@
+"""demandas filtros indexes
+
+Revision ID: 014_demandas_filtros_indexes
+Revises: 013_demandas_keyset_indexes
+Create Date: 2026-10-18 15:00:00.000000
+
+Índices para os filtros da listagem de demandas (GET /api/demandas):
+cliente/secretaria na ordem da paginação, updated_at e um índice
+parcial de prazo só com demandas pendentes (filtro de atrasadas).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '014_demandas_filtros_indexes'
+down_revision = '013_demandas_keyset_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """
+    Cria índices dos filtros de demandas
+    """
+    op.create_index('idx_demanda_cliente_created_id', 'demandas', ['cliente_id', 'created_at', 'id'])
+    op.create_index('idx_demanda_secretaria_created_id', 'demandas', ['secretaria_id', 'created_at', 'id'])
+    op.create_index('idx_demanda_updated_at', 'demandas', ['updated_at'])
+    op.create_index(
+        'idx_demanda_prazo_pendente',
+        'demandas',
+        ['prazo_final'],
+        postgresql_where=sa.text("status NOT IN ('concluida', 'cancelada')")
+    )
+
+
+def downgrade():
+    """
+    Remove os índices dos filtros de demandas
+    """
+    op.drop_index('idx_demanda_prazo_pendente', table_name='demandas')
+    op.drop_index('idx_demanda_updated_at', table_name='demandas')
+    op.drop_index('idx_demanda_secretaria_created_id', table_name='demandas')
+    op.drop_index('idx_demanda_cliente_created_id', table_name='demandas')
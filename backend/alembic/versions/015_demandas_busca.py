@@ -0,0 +1,159 @@
+"""demandas busca textual
+
+Revision ID: 015_demandas_busca
+Revises: 014_demandas_filtros_indexes
+Create Date: 2026-10-18 16:00:00.000000
+
+Busca textual de demandas (GET /api/demandas/busca):
+
+- extensões unaccent e pg_trgm
+- f_unaccent(text): unaccent IMMUTABLE (pode ser usado em índices)
+- configuração de texto pt_unaccent: português sem acentos
+- demandas.busca_vetor: tsvector de nome (A), descrição (B) e nomes do
+  cliente e da secretaria (C), mantido por triggers em demandas,
+  clientes e secretarias
+- índice GIN em busca_vetor e índice trigram em f_unaccent(lower(nome))
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '015_demandas_busca'
+down_revision = '014_demandas_filtros_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """
+    Cria a estrutura de busca textual e popula busca_vetor
+    """
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    
+    # unaccent() é STABLE; o wrapper com dicionário explícito é IMMUTABLE
+    op.execute("""
+        CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS
+        $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    """)
+    
+    op.execute("""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'pt_unaccent') THEN
+                CREATE TEXT SEARCH CONFIGURATION pt_unaccent (COPY = pg_catalog.portuguese);
+                ALTER TEXT SEARCH CONFIGURATION pt_unaccent
+                    ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+            END IF;
+        END
+        $$
+    """)
+    
+    op.add_column(
+        'demandas',
+        sa.Column('busca_vetor', postgresql.TSVECTOR(), nullable=True, comment='Busca textual (mantido por trigger)')
+    )
+    
+    op.execute("""
+        CREATE OR REPLACE FUNCTION demandas_busca_vetor(
+            p_nome text, p_descricao text, p_cliente_id varchar, p_secretaria_id varchar
+        ) RETURNS tsvector
+        LANGUAGE sql STABLE AS
+        $$
+            SELECT setweight(to_tsvector('pt_unaccent', coalesce(p_nome, '')), 'A')
+                || setweight(to_tsvector('pt_unaccent', coalesce(p_descricao, '')), 'B')
+                || setweight(to_tsvector('pt_unaccent', coalesce((SELECT nome FROM clientes WHERE id = p_cliente_id), '')), 'C')
+                || setweight(to_tsvector('pt_unaccent', coalesce((SELECT nome FROM secretarias WHERE id = p_secretaria_id), '')), 'C')
+        $$
+    """)
+    
+    # Demanda criada/alterada
+    op.execute("""
+        CREATE OR REPLACE FUNCTION demandas_busca_vetor_trigger() RETURNS trigger
+        LANGUAGE plpgsql AS
+        $$
+        BEGIN
+            NEW.busca_vetor := demandas_busca_vetor(NEW.nome, NEW.descricao, NEW.cliente_id, NEW.secretaria_id);
+            RETURN NEW;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_demandas_busca_vetor
+        BEFORE INSERT OR UPDATE OF nome, descricao, cliente_id, secretaria_id ON demandas
+        FOR EACH ROW EXECUTE FUNCTION demandas_busca_vetor_trigger()
+    """)
+    
+    # Cliente/secretaria renomeados: recalcular as demandas relacionadas
+    op.execute("""
+        CREATE OR REPLACE FUNCTION clientes_busca_vetor_trigger() RETURNS trigger
+        LANGUAGE plpgsql AS
+        $$
+        BEGIN
+            UPDATE demandas
+               SET busca_vetor = demandas_busca_vetor(nome, descricao, cliente_id, secretaria_id)
+             WHERE cliente_id = NEW.id;
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_clientes_busca_vetor
+        AFTER UPDATE OF nome ON clientes
+        FOR EACH ROW WHEN (OLD.nome IS DISTINCT FROM NEW.nome)
+        EXECUTE FUNCTION clientes_busca_vetor_trigger()
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION secretarias_busca_vetor_trigger() RETURNS trigger
+        LANGUAGE plpgsql AS
+        $$
+        BEGIN
+            UPDATE demandas
+               SET busca_vetor = demandas_busca_vetor(nome, descricao, cliente_id, secretaria_id)
+             WHERE secretaria_id = NEW.id;
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER trg_secretarias_busca_vetor
+        AFTER UPDATE OF nome ON secretarias
+        FOR EACH ROW WHEN (OLD.nome IS DISTINCT FROM NEW.nome)
+        EXECUTE FUNCTION secretarias_busca_vetor_trigger()
+    """)
+    
+    # Carga inicial
+    op.execute("""
+        UPDATE demandas
+           SET busca_vetor = demandas_busca_vetor(nome, descricao, cliente_id, secretaria_id)
+    """)
+    
+    op.create_index('idx_demanda_busca_vetor', 'demandas', ['busca_vetor'], postgresql_using='gin')
+    op.execute("""
+        CREATE INDEX idx_demanda_nome_trgm ON demandas
+        USING gin (f_unaccent(lower(nome)) gin_trgm_ops)
+    """)
+
+
+def downgrade():
+    """
+    Remove a estrutura de busca textual (as extensões são mantidas)
+    """
+    op.execute("DROP INDEX IF EXISTS idx_demanda_nome_trgm")
+    op.drop_index('idx_demanda_busca_vetor', table_name='demandas')
+    
+    op.execute("DROP TRIGGER IF EXISTS trg_secretarias_busca_vetor ON secretarias")
+    op.execute("DROP TRIGGER IF EXISTS trg_clientes_busca_vetor ON clientes")
+    op.execute("DROP TRIGGER IF EXISTS trg_demandas_busca_vetor ON demandas")
+    op.execute("DROP FUNCTION IF EXISTS secretarias_busca_vetor_trigger()")
+    op.execute("DROP FUNCTION IF EXISTS clientes_busca_vetor_trigger()")
+    op.execute("DROP FUNCTION IF EXISTS demandas_busca_vetor_trigger()")
+    op.execute("DROP FUNCTION IF EXISTS demandas_busca_vetor(text, text, varchar, varchar)")
+    
+    op.drop_column('demandas', 'busca_vetor')
+    
+    op.execute("DROP TEXT SEARCH CONFIGURATION IF EXISTS pt_unaccent")
+    op.execute("DROP FUNCTION IF EXISTS f_unaccent(text)")
@@ -0,0 +1,51 @@
+"""create arquivos_blob
+
+Revision ID: 016_arquivos_blob
+Revises: 015_demandas_busca
+Create Date: 2026-10-18 17:00:00.000000
+
+Armazenamento de anexos endereçado por conteúdo (SHA-256) com contagem
+de referências. Anexos antigos continuam com blob_sha256 NULL e o
+arquivo no caminho original.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '016_arquivos_blob'
+down_revision = '015_demandas_busca'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """
+    Cria arquivos_blob e anexos.blob_sha256
+    """
+    op.create_table(
+        'arquivos_blob',
+        sa.Column('sha256', sa.String(64), primary_key=True, comment='SHA-256 do conteúdo'),
+        sa.Column('caminho', sa.String(1000), nullable=False, comment='Caminho relativo a UPLOAD_DIR'),
+        sa.Column('tamanho', sa.Integer(), nullable=False, comment='Tamanho em bytes'),
+        sa.Column('tipo_mime', sa.String(100), nullable=False, comment='Tipo MIME do primeiro upload'),
+        sa.Column('referencias', sa.Integer(), nullable=False, server_default='0', comment='Anexos que usam o blob'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    )
+    
+    op.add_column(
+        'anexos',
+        sa.Column('blob_sha256', sa.String(64), nullable=True, comment='SHA-256 do conteúdo em arquivos_blob (NULL em anexos antigos)')
+    )
+    op.create_foreign_key('fk_anexos_blob_sha256', 'anexos', 'arquivos_blob', ['blob_sha256'], ['sha256'])
+    op.create_index('ix_anexos_blob_sha256', 'anexos', ['blob_sha256'])
+
+
+def downgrade():
+    """
+    Remove anexos.blob_sha256 e arquivos_blob
+    """
+    op.drop_index('ix_anexos_blob_sha256', table_name='anexos')
+    op.drop_constraint('fk_anexos_blob_sha256', 'anexos', type_='foreignkey')
+    op.drop_column('anexos', 'blob_sha256')
+    op.drop_table('arquivos_blob')
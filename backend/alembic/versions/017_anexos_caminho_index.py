@@ -0,0 +1,31 @@
+"""anexos caminho index
+
+Revision ID: 017_anexos_caminho_index
+Revises: 016_arquivos_blob
+Create Date: 2026-10-18 18:00:00.000000
+
+GET /uploads/{caminho} busca o anexo pelo caminho (Content-Type e
+SHA-256 para o ETag) a cada download.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '017_anexos_caminho_index'
+down_revision = '016_arquivos_blob'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """
+    Cria índice em anexos.caminho
+    """
+    op.create_index('idx_anexo_caminho', 'anexos', ['caminho'])
+
+
+def downgrade():
+    """
+    Remove índice em anexos.caminho
+    """
+    op.drop_index('idx_anexo_caminho', table_name='anexos')
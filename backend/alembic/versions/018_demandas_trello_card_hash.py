@@ -0,0 +1,36 @@
+"""demandas trello_card_hash
+
+Revision ID: 018_demandas_trello_card_hash
+Revises: 017_anexos_caminho_index
+Create Date: 2026-10-18 19:00:00.000000
+
+Impressão digital dos campos do card (nome, descrição, prazo) na última
+sincronização: atualizações sem mudança visível não enviam PUT ao Trello.
+Demandas existentes ficam com NULL e sincronizam na próxima edição.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '018_demandas_trello_card_hash'
+down_revision = '017_anexos_caminho_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """
+    Adiciona demandas.trello_card_hash
+    """
+    op.add_column(
+        'demandas',
+        sa.Column('trello_card_hash', sa.String(64), nullable=True, comment='SHA-256 dos campos do card na última sincronização')
+    )
+
+
+def downgrade():
+    """
+    Remove demandas.trello_card_hash
+    """
+    op.drop_column('demandas', 'trello_card_hash')
@@ -0,0 +1,64 @@
+"""create trello_webhook_eventos table
+
+Revision ID: 019_trello_webhook_eventos
+Revises: 018_demandas_trello_card_hash
+Create Date: 2026-10-18 20:00:00.000000
+
+Fila das ações recebidas pelo webhook do Trello: o endpoint só grava
+(deduplicado por action_id) e o worker aplica.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '019_trello_webhook_eventos'
+down_revision = '018_demandas_trello_card_hash'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """
+    Cria tabela trello_webhook_eventos
+    """
+    op.create_table(
+        'trello_webhook_eventos',
+        sa.Column('id', sa.String(36), primary_key=True),
+        
+        # Ação do Trello
+        sa.Column('action_id', sa.String(64), nullable=False, comment='ID da ação no Trello'),
+        sa.Column('tipo', sa.String(50), nullable=False, comment='Tipo da ação (ex: updateCard)'),
+        sa.Column('card_id', sa.String(100), nullable=True, comment='ID do card no Trello'),
+        sa.Column('lista_antes_id', sa.String(100), nullable=True, comment='Lista de origem'),
+        sa.Column('lista_depois_id', sa.String(100), nullable=True, comment='Lista de destino'),
+        sa.Column('lista_depois_nome', sa.String(200), nullable=True, comment='Nome da lista de destino'),
+        sa.Column('data_acao', sa.DateTime(timezone=True), nullable=True, comment='Momento da ação no Trello'),
+        
+        # Processamento
+        sa.Column('status', sa.String(20), nullable=False, server_default='pendente', comment='pendente, aplicado, ignorado, falhou'),
+        sa.Column('resultado', sa.String(50), nullable=True, comment='Resultado do processamento'),
+        sa.Column('processado_em', sa.DateTime(timezone=True), nullable=True, comment='Momento do processamento'),
+        sa.Column('ultimo_erro', sa.Text(), nullable=True, comment='Mensagem de erro'),
+        
+        # Metadados
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        
+        sa.UniqueConstraint('action_id', name='trello_webhook_eventos_action_id_key'),
+    )
+    
+    # Reivindicação: WHERE status = 'pendente' ORDER BY created_at
+    op.create_index('idx_trello_webhook_status_created', 'trello_webhook_eventos', ['status', 'created_at'])
+    
+    # Ações já aplicadas de um card (descartar ações atrasadas)
+    op.create_index('idx_trello_webhook_card_data', 'trello_webhook_eventos', ['card_id', 'data_acao'])
+
+
+def downgrade():
+    """
+    Remove tabela trello_webhook_eventos
+    """
+    op.drop_index('idx_trello_webhook_card_data', table_name='trello_webhook_eventos')
+    op.drop_index('idx_trello_webhook_status_created', table_name='trello_webhook_eventos')
+    op.drop_table('trello_webhook_eventos')
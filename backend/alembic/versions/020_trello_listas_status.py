@@ -0,0 +1,93 @@
+"""trello card index and trello_listas_status
+
+Revision ID: 020_trello_listas_status
+Revises: 019_trello_webhook_eventos
+Create Date: 2026-10-18 21:00:00.000000
+
+- Índice único parcial em demandas.trello_card_id: o webhook e a
+  sincronização buscam a demanda pelo card (antes, varredura da tabela).
+  Se o mesmo card estiver em mais de uma demanda, só a mais recente
+  mantém o vínculo.
+- trello_listas_status: mapeamento lista do Trello → status por
+  configuração, preenchido com as três listas que estavam fixas no
+  código para a configuração ativa.
+"""
+import uuid
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '020_trello_listas_status'
+down_revision = '019_trello_webhook_eventos'
+branch_labels = None
+depends_on = None
+
+# Mapeamento que estava fixo em mapear_lista_para_status
+LISTAS_PADRAO = [
+    ('6810f40131d456a240f184ba', 'ENVIOS DOS CLIENTES VIA DEBRIEF', 'aberta'),
+    ('68b82f29253b5480f0c06f3d', 'EM DESENVOLVIMENTO', 'em_andamento'),
+    ('5ea097406d864d89b0017aa3', 'EM ESPERA', 'concluida'),
+]
+
+
+def upgrade():
+    """
+    Cria índice em demandas.trello_card_id e tabela trello_listas_status
+    """
+    op.execute("""
+        UPDATE demandas d
+        SET trello_card_id = NULL, trello_card_url = NULL, trello_card_hash = NULL
+        FROM demandas mais_recente
+        WHERE mais_recente.trello_card_id = d.trello_card_id
+          AND (mais_recente.created_at, mais_recente.id) > (d.created_at, d.id)
+    """)
+    op.create_index(
+        'idx_demanda_trello_card_id',
+        'demandas',
+        ['trello_card_id'],
+        unique=True,
+        postgresql_where=sa.text("trello_card_id IS NOT NULL")
+    )
+    
+    op.create_table(
+        'trello_listas_status',
+        sa.Column('id', sa.String(36), primary_key=True),
+        sa.Column('configuracao_id', sa.String(36), sa.ForeignKey('configuracoes_trello.id', ondelete='CASCADE'), nullable=False, comment='ID da configuração do Trello'),
+        sa.Column('lista_id', sa.String(100), nullable=False, comment='ID da lista no Trello'),
+        sa.Column('lista_nome', sa.String(200), nullable=True, comment='Nome da lista (cache)'),
+        sa.Column('status', sa.String(50), nullable=False, comment='Status da demanda correspondente'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.UniqueConstraint('configuracao_id', 'lista_id', name='uq_trello_lista_status_config_lista'),
+    )
+    
+    conexao = op.get_bind()
+    config_id = conexao.execute(
+        sa.text("SELECT id FROM configuracoes_trello WHERE ativo = true LIMIT 1")
+    ).scalar()
+    if config_id:
+        conexao.execute(
+            sa.text(
+                "INSERT INTO trello_listas_status (id, configuracao_id, lista_id, lista_nome, status) "
+                "VALUES (:id, :configuracao_id, :lista_id, :lista_nome, :status)"
+            ),
+            [
+                {
+                    "id": str(uuid.uuid4()),
+                    "configuracao_id": config_id,
+                    "lista_id": lista_id,
+                    "lista_nome": lista_nome,
+                    "status": status,
+                }
+                for lista_id, lista_nome, status in LISTAS_PADRAO
+            ]
+        )
+
+
+def downgrade():
+    """
+    Remove tabela trello_listas_status e índice em demandas.trello_card_id
+    """
+    op.drop_table('trello_listas_status')
+    op.drop_index('idx_demanda_trello_card_id', table_name='demandas')
@@ -21,6 +21,7 @@ from app.core.security import (
     verify_totp_code
 )
 from app.core.dependencies import get_current_user, get_current_active_user
+from app.core.cache_autenticacao import cache_autenticacao
 from app.core.rate_limit import limiter
 from app.models.user import User
 from app.models.refresh_token import RefreshToken
@@ -431,6 +432,7 @@ async def update_current_user_profile(
     
     db.commit()
     db.refresh(current_user)
+    cache_autenticacao.invalidar_usuario(current_user.id)
     
     return UserResponse.from_orm(current_user)
 
@@ -603,6 +605,7 @@ async def register(
         
         db.commit()
         db.refresh(inactive_user)
+        cache_autenticacao.invalidar_usuario(inactive_user.id)
         
         return UserResponse.from_orm(inactive_user)
     
@@ -685,13 +688,4 @@ async def logout(
         "message": "Logout realizado com sucesso",
         "token_invalidated": token_invalidated
     }
-    except Exception as e:
-        import logging
-        logging.getLogger(__name__).warning(f"Erro ao extrair token no logout: {e}")
-    
-    return {
-        "message": "Logout realizado com sucesso",
-        "token_invalidated": False,
-        "note": "Token não pôde ser extraído, mas logout foi registrado"
-    }
 
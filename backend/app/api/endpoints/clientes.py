@@ -8,6 +8,7 @@ from typing import List, Optional
 
 from app.core.database import get_db
 from app.core.dependencies import get_current_user, require_master
+from app.core.cache_autenticacao import cache_autenticacao
 from app.models import Cliente, User
 from app.schemas import (
     ClienteCreate,
@@ -265,10 +266,12 @@ def deletar_cliente_permanente(
     
     # Verificar se tem usuários vinculados
     from app.models.user import User
-    usuarios_vinculados = db.query(User).filter(User.cliente_id == cliente_id).count()
+    usuarios_vinculados = [
+        user_id for (user_id,) in db.query(User.id).filter(User.cliente_id == cliente_id)
+    ]
     
     # Se houver usuários vinculados, definir cliente_id como NULL antes de deletar
-    if usuarios_vinculados > 0:
+    if usuarios_vinculados:
         # Atualizar todos os usuários vinculados para ter cliente_id = NULL
         db.query(User).filter(User.cliente_id == cliente_id).update(
             {User.cliente_id: None},
@@ -281,6 +284,10 @@ def deletar_cliente_permanente(
     db.delete(cliente)
     db.commit()
     
+    # Principais em cache ainda apontam para o cliente removido
+    for user_id in usuarios_vinculados:
+        cache_autenticacao.invalidar_usuario(user_id)
+    
     return None
 
 
@@ -384,8 +391,8 @@ def estatisticas_cliente(
     - Demandas por tipo
     - Demandas por prioridade
     """
-    from app.models import Demanda, StatusDemanda
-    from sqlalchemy import func
+    from app.models import StatusDemanda
+    from app.services.estatisticas import EstatisticasService
     
     cliente = db.query(Cliente).filter(Cliente.id == cliente_id).first()
     
@@ -395,20 +402,11 @@ def estatisticas_cliente(
             detail=f"Cliente ID {cliente_id} não encontrado"
         )
     
-    # Estatísticas de demandas por status
-    demandas_por_status = db.query(
-        Demanda.status,
-        func.count(Demanda.id).label('total')
-    ).filter(
-        Demanda.cliente_id == cliente_id
-    ).group_by(Demanda.status).all()
-    
-    stats_status = {status.value: 0 for status in StatusDemanda}
-    for status, total in demandas_por_status:
-        stats_status[status.value] = total
+    # Estatísticas de demandas por status (rollup diário)
+    demandas_por_status = EstatisticasService(db).contar_por_status_cliente(cliente_id)
     
-    # Contar demandas usando query explícita para evitar erro de enum
-    total_demandas = db.query(Demanda).filter(Demanda.cliente_id == cliente_id).count()
+    stats_status = {s.value: demandas_por_status.get(s.value, 0) for s in StatusDemanda}
+    total_demandas = sum(demandas_por_status.values())
     
     # Estatísticas gerais
     return {
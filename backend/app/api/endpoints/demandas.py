@@ -2,13 +2,18 @@
 Endpoints de Demandas
 CRUD completo de demandas com upload de arquivos e integração Trello/WhatsApp
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query, File, UploadFile, Form
+from fastapi import APIRouter, Depends, HTTPException, status, Query, File, UploadFile, Form, Response
+from fastapi import status as http_status
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 import json
-from datetime import datetime
+from datetime import date, datetime
+from pydantic import ValidationError
 
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.utils import codificar_cursor, decodificar_cursor
 from app.core.dependencies import get_current_user, get_current_master_user
 from app.models.user import User
 from app.models.demanda import Demanda, StatusDemanda
@@ -22,12 +27,19 @@ from app.schemas.demanda import (
     DemandaUpdate,
     DemandaResponse,
     DemandaDetalhada,
+    DemandaFilter,
+    DemandaBuscaItem,
+    DemandaBuscaResponse,
     DemandaListResponse
 )
-from app.services.trello import TrelloService
+from app.models.outbox_evento import OutboxEvento
 from app.services.whatsapp import WhatsAppService
 from app.services.notification import NotificationService
-from app.services.upload import UploadService
+from app.services.armazenamento import ArmazenamentoService
+from app.services.upload import tipo_mime_extensao
+from app.services.demanda_filtros import DemandaFiltroService
+from app.services.demanda_busca import DemandaBuscaService
+from app.services.variantes_imagem import VariantesImagemService
 import logging
 
 logger = logging.getLogger(__name__)
@@ -71,7 +83,7 @@ async def criar_demanda(
         files: Lista de arquivos anexados
         current_user: Usuário autenticado
         db: Sessão do banco
-        
+    
     Returns:
         dict: Dados da demanda criada
     """
@@ -137,62 +149,46 @@ async def criar_demanda(
         db.flush()  # Obter ID sem commit
         
         # Salvar arquivos, se houver
-        upload_service = UploadService()
+        armazenamento = ArmazenamentoService(db)
         anexos_criados = []
         
         for file in files:
             if file.filename:
                 try:
-                    # Salvar arquivo no disco
-                    caminho_relativo = await upload_service.save_file(
-                        file=file,
-                        cliente_id=cliente_id,
-                        demanda_id=nova_demanda.id
-                    )
+                    # Conteúdo deduplicado: só grava no disco se for novo
+                    blob = await armazenamento.armazenar(file)
                     
                     # Criar registro de anexo
                     anexo = Anexo(
                         demanda_id=nova_demanda.id,
                         nome_arquivo=file.filename,
-                        caminho=caminho_relativo,
-                        tamanho=file.size or 0,
-                        tipo_mime=file.content_type or 'application/octet-stream'
+                        caminho=blob.caminho,
+                        tamanho=blob.tamanho,
+                        tipo_mime=tipo_mime_extensao(blob.caminho.rsplit('.', 1)[-1]),
+                        blob_sha256=blob.sha256
                     )
                     db.add(anexo)
                     anexos_criados.append(anexo)
                     logger.info(f"Anexo salvo: {file.filename}")
-                    
+                
                 except Exception as e:
                     logger.error(f"Erro ao salvar arquivo {file.filename}: {e}")
                     # Continuar mesmo se falhar um arquivo
         
-        # Commit após salvar anexos
+        # Card no Trello e notificações WhatsApp são executados pelo worker
+        # da outbox (python -m app.workers), gravados na mesma transação
+        OutboxEvento.registrar(db, "trello_criar_card", demanda_id=nova_demanda.id)
+        OutboxEvento.registrar(db, "whatsapp_nova_demanda", demanda_id=nova_demanda.id)
+        
+        imagens = [a.caminho for a in anexos_criados if VariantesImagemService.suporta(a.tipo_mime)]
+        
+        # Commit único: demanda + anexos + eventos
         db.commit()
         db.refresh(nova_demanda)
         
-        # Criar card no Trello (async, não bloqueia)
-        try:
-            trello_service = TrelloService(db)
-            card_info = await trello_service.criar_card(nova_demanda, db)
-            
-            # Atualizar demanda com URL do card
-            nova_demanda.trello_card_id = card_info.get('id')
-            nova_demanda.trello_card_url = card_info.get('url')
-            db.commit()
-            
-            logger.info(f"Card criado no Trello: {card_info.get('url')}")
-        except Exception as e:
-            logger.error(f"Erro ao criar card no Trello: {e}")
-            # Não falhar a criação da demanda se Trello falhar
-        
-        # Enviar notificações individuais via WhatsApp (não bloqueia)
-        try:
-            notification_service = NotificationService(db)
-            enviados = notification_service.notificar_nova_demanda(nova_demanda)
-            logger.info(f"Notificações WhatsApp enviadas: {enviados} usuários")
-        except Exception as e:
-            logger.error(f"Erro ao enviar notificações WhatsApp: {e}")
-            # Não falhar a criação da demanda se notificações falharem
+        # Variantes reduzidas das imagens, em segundo plano
+        for caminho in imagens:
+            VariantesImagemService.enfileirar(caminho)
         
         # Retornar demanda criada
         return {
@@ -209,7 +205,7 @@ async def criar_demanda(
             "anexos_count": len(anexos_criados),
             "created_at": nova_demanda.created_at.isoformat(),
         }
-        
+    
     except HTTPException:
         raise
     except Exception as e:
@@ -221,26 +217,86 @@ async def criar_demanda(
         )
 
 
+def _valores(parametro: Optional[List[str]]) -> Optional[List[str]]:
+    """Aceitar `?x=a&x=b` e `?x=a,b` (sem vazios/duplicados)"""
+    if not parametro:
+        return None
+    valores = []
+    for item in parametro:
+        for valor in item.split(","):
+            valor = valor.strip()
+            if valor and valor not in valores:
+                valores.append(valor)
+    return valores or None
+
+
+def _detalhe_validacao(erro: ValidationError) -> str:
+    """Mensagem dos filtros inválidos (campo: motivo)"""
+    mensagens = []
+    for item in erro.errors():
+        campo = ".".join(str(parte) for parte in item.get("loc", ()) if not isinstance(parte, int))
+        mensagem = f"{campo}: {item.get('msg')}" if campo else str(item.get("msg"))
+        if mensagem not in mensagens:
+            mensagens.append(mensagem)
+    return "; ".join(mensagens) or "Filtros inválidos"
+
+
 @router.get("", response_model=List[DemandaDetalhada])
 async def listar_demandas(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    status: Optional[str] = Query(None),
-    prioridade: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="Cursor da próxima página (header X-Next-Cursor)"),
+    status: Optional[List[str]] = Query(None),
+    prioridade: Optional[str] = Query(None, description="ID ou nome da prioridade (use prioridade_id)"),
+    cliente_id: Optional[List[str]] = Query(None),
+    secretaria_id: Optional[List[str]] = Query(None),
+    tipo_demanda_id: Optional[List[str]] = Query(None),
+    prioridade_id: Optional[List[str]] = Query(None),
+    prazo_de: Optional[date] = Query(None),
+    prazo_ate: Optional[date] = Query(None),
+    atrasadas: bool = Query(False, description="Apenas demandas com prazo vencido e não concluídas/canceladas"),
+    criado_de: Optional[date] = Query(None),
+    criado_ate: Optional[date] = Query(None),
+    atualizado_de: Optional[date] = Query(None),
+    atualizado_ate: Optional[date] = Query(None),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Listar demandas do usuário
     
+    Paginação por cursor (recomendada): a primeira página vem sem `cursor`;
+    se houver mais demandas, o header `X-Next-Cursor` traz o cursor da
+    próxima. O custo não cresce com a profundidade e as linhas não
+    "pulam" entre páginas quando novas demandas são criadas.
+    `skip` continua aceito (compatibilidade) e é ignorado quando há `cursor`.
+    
+    Filtros com vários valores podem ser repetidos (`?cliente_id=a&cliente_id=b`)
+    ou separados por vírgula (`?cliente_id=a,b`). Intervalos de datas
+    (YYYY-MM-DD) são inclusivos.
+    
     Args:
-        skip: Número de registros para pular (paginação)
+        response: Resposta (header X-Next-Cursor)
+        skip: Número de registros para pular (paginação por offset)
         limit: Número máximo de registros
-        status: Filtrar por status (opcional)
-        prioridade: Filtrar por prioridade (opcional)
+        cursor: Cursor opaco recebido em X-Next-Cursor
+        status: Filtrar por status (um ou vários)
+        prioridade: Filtrar por ID ou nome da prioridade (compatibilidade)
+        cliente_id: Filtrar por cliente (um ou vários)
+        secretaria_id: Filtrar por secretaria (uma ou várias)
+        tipo_demanda_id: Filtrar por tipo de demanda (um ou vários)
+        prioridade_id: Filtrar por prioridade (uma ou várias)
+        prazo_de: Prazo final a partir de
+        prazo_ate: Prazo final até
+        atrasadas: Apenas demandas atrasadas
+        criado_de: Criadas a partir de
+        criado_ate: Criadas até
+        atualizado_de: Atualizadas a partir de
+        atualizado_ate: Atualizadas até
         current_user: Usuário autenticado
         db: Sessão do banco
-        
+    
     Returns:
         List[DemandaDetalhada]: Lista de demandas com relacionamentos
     """
@@ -253,26 +309,119 @@ async def listar_demandas(
         joinedload(Demanda.usuario)
     )
     
-    # Se não for master, filtrar apenas demandas do usuário
-    if not current_user.is_master():
-        query = query.filter(Demanda.usuario_id == current_user.id)
+    # Filtros opcionais (no servidor, apoiados pelos índices de Demanda)
+    try:
+        filtros = DemandaFilter(
+            status=_valores([s.lower() for s in status] if status else None),
+            prioridade=prioridade,
+            cliente_id=_valores(cliente_id),
+            secretaria_id=_valores(secretaria_id),
+            tipo_demanda_id=_valores(tipo_demanda_id),
+            prioridade_id=_valores(prioridade_id),
+            prazo_de=prazo_de,
+            prazo_ate=prazo_ate,
+            atrasadas=atrasadas,
+            criado_de=criado_de,
+            criado_ate=criado_ate,
+            atualizado_de=atualizado_de,
+            atualizado_ate=atualizado_ate,
+        )
+        # Se não for master, filtrar apenas demandas do usuário
+        query = DemandaFiltroService.aplicar(
+            query,
+            filtros,
+            None if current_user.is_master() else current_user.id
+        )
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST,
+            detail=_detalhe_validacao(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     
-    # Filtros opcionais
-    if status:
-        query = query.filter(Demanda.status == status)
+    # Ordenar por data de criação (mais recentes primeiro); id desempata
+    # (índices idx_demanda_created_id / idx_demanda_usuario_created_id)
+    query = query.order_by(Demanda.created_at.desc(), Demanda.id.desc())
     
-    if prioridade:
-        query = query.filter(Demanda.prioridade == prioridade)
+    # Paginação: por cursor (keyset) ou por offset
+    if cursor:
+        try:
+            cursor_created_at, cursor_id = decodificar_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=http_status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        query = query.filter(
+            tuple_(Demanda.created_at, Demanda.id) < tuple_(cursor_created_at, cursor_id)
+        )
+    else:
+        query = query.offset(skip)
     
-    # Ordenar por data de criação (mais recentes primeiro)
-    query = query.order_by(Demanda.created_at.desc())
+    # Uma linha a mais indica se existe próxima página
+    demandas = query.limit(limit + 1).all()
     
-    # Paginação
-    demandas = query.offset(skip).limit(limit).all()
+    if len(demandas) > limit:
+        demandas = demandas[:limit]
+        ultima = demandas[-1]
+        response.headers["X-Next-Cursor"] = codificar_cursor(ultima.created_at, ultima.id)
     
     return [DemandaDetalhada.from_orm(d) for d in demandas]
 
 
+@router.get("/busca", response_model=DemandaBuscaResponse)
+async def buscar_demandas(
+    q: str = Query(..., min_length=2, max_length=200, description="Texto a buscar"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Buscar demandas por texto
+    
+    Busca em nome, descrição, cliente e secretaria, ignorando acentos e
+    maiúsculas. Resultados ordenados por relevância (nome pesa mais que
+    descrição, que pesa mais que cliente/secretaria).
+    
+    Aceita a sintaxe de busca web: "frase exata", OR e -palavra.
+    
+    Args:
+        q: Texto a buscar
+        skip: Número de resultados para pular
+        limit: Número máximo de resultados
+        current_user: Usuário autenticado
+        db: Sessão do banco
+    
+    Returns:
+        DemandaBuscaResponse: Resultados com relevância e total
+    """
+    try:
+        resultados, total = DemandaBuscaService(db).buscar(
+            q,
+            usuario_id=None if current_user.is_master() else current_user.id,
+            skip=skip,
+            limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    items = []
+    for demanda, relevancia in resultados:
+        item = DemandaBuscaItem.model_validate(demanda)
+        item.relevancia = round(relevancia, 4)
+        items.append(item)
+    
+    return DemandaBuscaResponse(items=items, total=total, skip=skip, limit=limit)
+
+
 @router.get("/{demanda_id}", response_model=DemandaResponse)
 async def obter_demanda(
     demanda_id: str,
@@ -286,7 +435,7 @@ async def obter_demanda(
         demanda_id: ID da demanda
         current_user: Usuário autenticado
         db: Sessão do banco
-        
+    
     Returns:
         DemandaResponse: Dados da demanda
     """
@@ -323,7 +472,7 @@ async def atualizar_demanda(
         demanda_data: Dados para atualizar
         current_user: Usuário autenticado
         db: Sessão do banco
-        
+    
     Returns:
         DemandaResponse: Demanda atualizada
     """
@@ -354,40 +503,37 @@ async def atualizar_demanda(
     for field, value in dados_atualizacao.items():
         setattr(demanda, field, value)
     
-    db.commit()
-    db.refresh(demanda)
+    # Sincronização com Trello e notificações ficam a cargo da outbox
+    # Edições seguidas dentro da janela são sincronizadas uma única vez
+    OutboxEvento.registrar_coalescido(
+        db,
+        "trello_atualizar_card",
+        demanda_id=demanda.id,
+        janela_segundos=settings.TRELLO_ATUALIZACAO_JANELA_SECONDS
+    )
     
-    # Sincronizar com Trello (não bloqueia se falhar)
-    try:
-        trello_service = TrelloService(db)
-        await trello_service.atualizar_card(demanda, db)
-        logger.info(f"Card Trello atualizado para demanda {demanda_id}")
-    except Exception as e:
-        logger.error(f"Erro ao atualizar card Trello: {e}")
-        # Não falhar a atualização se Trello falhar
+    if status_vai_mudar and status_antigo and status_novo:
+        # Status mudou: notificar mudança específica de status
+        OutboxEvento.registrar(
+            db,
+            "whatsapp_mudanca_status",
+            demanda_id=demanda.id,
+            payload={
+                "status_antigo": status_antigo,
+                "status_novo": getattr(status_novo, 'value', status_novo)
+            }
+        )
+    else:
+        # Senão, notificar atualização genérica
+        OutboxEvento.registrar(
+            db,
+            "whatsapp_atualizacao_demanda",
+            demanda_id=demanda.id,
+            payload={"campos_alterados": list(dados_atualizacao.keys())}
+        )
     
-    # Enviar notificações individuais via WhatsApp
-    try:
-        notification_service = NotificationService(db)
-        
-        # Se status mudou, notificar mudança específica de status
-        if status_vai_mudar and status_antigo and status_novo:
-            enviados = notification_service.notificar_mudanca_status(
-                demanda=demanda,
-                status_antigo=status_antigo,
-                status_novo=status_novo
-            )
-            logger.info(f"Notificações de mudança de status enviadas: {enviados} usuários")
-        else:
-            # Senão, notificar atualização genérica
-            enviados = notification_service.notificar_atualizacao_demanda(
-                demanda=demanda,
-                campos_alterados=dados_atualizacao
-            )
-            logger.info(f"Notificações de atualização enviadas: {enviados} usuários")
-    except Exception as e:
-        logger.error(f"Erro ao enviar notificações WhatsApp: {e}")
-        # Não falhar a atualização se notificações falharem
+    db.commit()
+    db.refresh(demanda)
     
     return DemandaResponse.from_orm(demanda)
 
@@ -406,7 +552,7 @@ async def deletar_demanda(
     - Usuário comum pode deletar APENAS suas próprias demandas
     
     **Integração Trello:**
-    - Card do Trello é deletado automaticamente (se existir)
+    - Card do Trello é deletado automaticamente (se existir), via outbox
     
     Args:
         demanda_id: ID da demanda
@@ -429,25 +575,22 @@ async def deletar_demanda(
             detail="Você não tem permissão para excluir esta demanda"
         )
     
-    # Enviar notificações de exclusão ANTES de deletar (para ter acesso aos dados)
-    try:
-        notification_service = NotificationService(db)
-        enviados = notification_service.notificar_exclusao_demanda(demanda)
-        logger.info(f"Notificações de exclusão enviadas: {enviados} usuários")
-    except Exception as e:
-        logger.error(f"Erro ao enviar notificações de exclusão: {e}")
-        # Não falhar a exclusão se notificações falharem
+    # Notificação de exclusão usa um snapshot dos dados, capturado ANTES de deletar
+    OutboxEvento.registrar(
+        db,
+        "whatsapp_exclusao_demanda",
+        demanda_id=demanda.id,
+        payload=NotificationService.snapshot_exclusao(demanda)
+    )
     
-    # Deletar card do Trello (se existir)
+    # Deletar card do Trello (se existir) - worker recebe apenas o ID do card
     if demanda.trello_card_id:
-        try:
-            trello_service = TrelloService(db)
-            await trello_service.deletar_card(demanda)
-            logger.info(f"Card Trello {demanda.trello_card_id} deletado para demanda {demanda_id}")
-        except Exception as e:
-            logger.error(f"Erro ao deletar card Trello: {e}")
-            # Não falhar a exclusão da demanda se o Trello falhar
-            # O card pode não existir mais ou API pode estar indisponível
+        OutboxEvento.registrar(
+            db,
+            "trello_deletar_card",
+            demanda_id=demanda.id,
+            payload={"trello_card_id": demanda.trello_card_id}
+        )
     
     # Deletar logs de notificação relacionados ANTES de deletar a demanda
     # Isso evita erro de constraint NOT NULL no demanda_id
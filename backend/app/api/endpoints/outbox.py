@@ -0,0 +1,76 @@
+"""
+Endpoints da Outbox
+Monitoramento da fila de efeitos colaterais (Trello, WhatsApp) processada pelo worker
+"""
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from app.core.dependencies import get_db, require_master
+from app.models import User
+from app.services.outbox import OutboxService
+from app.services.trello_limites import agendador_trello
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/outbox", tags=["Outbox - Admin"])
+
+
+@router.get("/estado")
+def obter_estado_outbox(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_master)
+):
+    """
+    Estado da outbox
+    
+    - Eventos por status (pendente, processando, concluido, falhou)
+    - Atraso do evento pendente mais antigo (segundos)
+    - Workers com eventos em processamento
+    - Últimas falhas definitivas
+    - Requer permissão de Master
+    """
+    return OutboxService.obter_estado(db)
+
+
+@router.get("/trello")
+async def obter_estado_agendador_trello(
+    current_user: User = Depends(require_master)
+):
+    """
+    Fila de chamadas ao Trello (limites de taxa)
+    
+    - Chamadas aguardando ficha, por prioridade (interativa, segundo_plano)
+    - Com Redis: soma de todos os processos (API e workers)
+    - Respostas 429 recebidas por este processo
+    - Requer permissão de Master
+    """
+    return await agendador_trello.estado()
+
+
+@router.post("/{evento_id}/reprocessar")
+def reprocessar_evento_outbox(
+    evento_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_master)
+):
+    """
+    Recoloca um evento na fila (zera tentativas)
+    
+    - Útil para eventos que falharam definitivamente
+    - Requer permissão de Master
+    """
+    evento = OutboxService.reprocessar(db, evento_id)
+    
+    if not evento:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Evento não encontrado"
+        )
+    
+    logger.info(f"Evento {evento_id} recolocado na fila por {current_user.username}")
+    
+    return {
+        "id": evento.id,
+        "tipo": evento.tipo,
+        "status": evento.status,
+    }
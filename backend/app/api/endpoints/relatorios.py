@@ -3,25 +3,32 @@ Endpoints de Relatórios
 Geração de relatórios em PDF e Excel
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, and_, or_
-from typing import Optional, List
-from datetime import datetime, date
-from app.core.database import get_db
-from app.core.dependencies import get_current_user, get_current_master_user
+from fastapi import status as http_status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse, FileResponse
+from sqlalchemy.orm import Session
+from typing import BinaryIO, Optional, List
+from datetime import datetime
+from app.core.config import settings
+from app.core.database import SessionLocal, get_db
+from app.core.streaming import transmitir_de_thread
+from app.core.dependencies import get_current_user
 from app.models.user import User
-from app.models.demanda import Demanda, StatusDemanda
-from app.models.cliente import Cliente
+from app.models.demanda import Demanda
 from app.models.secretaria import Secretaria
-from app.models.tipo_demanda import TipoDemanda
-from app.models.prioridade import Prioridade
+from app.models.relatorio_job import StatusRelatorioJob, FormatoRelatorio
+from app.schemas.relatorio import RelatorioJobCreate
 from app.services.relatorio import RelatorioService
-import io
-import json
+from app.services.estatisticas import EstatisticasService
+from app.services.relatorio_jobs import RelatorioJobService
+import os
 
 router = APIRouter()
 
+# Demandas buscadas por lote no cursor do servidor (exportações PDF e Excel)
+EXCEL_YIELD_PER = 500
+PDF_YIELD_PER = 500
+
 
 @router.get("/demandas/estatisticas")
 async def get_demandas_estatisticas(
@@ -50,6 +57,7 @@ async def get_demandas_estatisticas(
     """
     # Query base
     query = db.query(Demanda)
+    data_ini = data_f = None
     
     # Se não for master, filtrar apenas demandas do usuário
     if not current_user.is_master():
@@ -85,60 +93,24 @@ async def get_demandas_estatisticas(
                 detail="Formato de data_fim inválido. Use YYYY-MM-DD"
             )
     
-    # Estatísticas gerais
-    total = query.count()
-    
-    # Por status
-    stats_status = {}
-    for status_enum in StatusDemanda:
-        count = query.filter(Demanda.status == status_enum).count()
-        stats_status[status_enum.value] = count
-    
-    # Por prioridade
-    stats_prioridade = {}
-    prioridades = db.query(Prioridade).all()
-    for prioridade in prioridades:
-        count = query.filter(Demanda.prioridade_id == prioridade.id).count()
-        stats_prioridade[prioridade.nome] = count
-    
-    # Por tipo de demanda
-    stats_tipo = {}
-    tipos = db.query(TipoDemanda).all()
-    for tipo in tipos:
-        count = query.filter(Demanda.tipo_demanda_id == tipo.id).count()
-        stats_tipo[tipo.nome] = count
-    
-    # Atrasadas
-    hoje = date.today()
-    atrasadas = query.filter(
-        Demanda.prazo_final < hoje,
-        Demanda.status.in_([StatusDemanda.ABERTA, StatusDemanda.EM_ANDAMENTO])
-    ).count()
-    
-    # Por mês (últimos 12 meses)
-    stats_mes = {}
-    for i in range(12):
-        mes_data = date.today().replace(day=1)
-        # Subtrair i meses
-        for _ in range(i):
-            if mes_data.month == 1:
-                mes_data = mes_data.replace(year=mes_data.year - 1, month=12)
-            else:
-                mes_data = mes_data.replace(month=mes_data.month - 1)
-        
-        mes_str = mes_data.strftime("%Y-%m")
-        count = query.filter(
-            func.date_trunc('month', Demanda.created_at) == mes_data
-        ).count()
-        stats_mes[mes_str] = count
+    service = EstatisticasService(db)
+    
+    # Master (escopo completo): rollup diário; demais: agregação ao vivo
+    if settings.ESTATISTICAS_ROLLUP_ENABLED and current_user.is_master():
+        estatisticas = service.calcular_rollup(
+            query,
+            cliente_id=cliente_id,
+            secretaria_ids=secretaria_id,
+            tipo_demanda_ids=tipo_demanda_id,
+            data_inicio=data_ini,
+            data_fim=data_f
+        )
+    else:
+        # Estatísticas em uma única agregação (GROUPING SETS)
+        estatisticas = service.calcular(query)
     
     return {
-        "total": total,
-        "por_status": stats_status,
-        "por_prioridade": stats_prioridade,
-        "por_tipo": stats_tipo,
-        "atrasadas": atrasadas,
-        "por_mes": stats_mes,
+        **estatisticas,
         "filtros": {
             "cliente_id": cliente_id,
             "secretaria_id": secretaria_id,
@@ -164,6 +136,7 @@ async def gerar_relatorio_pdf(
     Gerar relatório em PDF
     
     Retorna um arquivo PDF com as demandas filtradas.
+    Para relatórios grandes prefira POST /jobs (geração em segundo plano).
     
     Args:
         cliente_id: Filtrar por cliente
@@ -178,76 +151,43 @@ async def gerar_relatorio_pdf(
     Returns:
         StreamingResponse: Arquivo PDF
     """
-    # Construir query
-    query = db.query(Demanda)
+    try:
+        filtros = RelatorioService.normalizar_filtros(
+            cliente_id, secretaria_id, tipo_demanda_id, status, data_inicio, data_fim
+        )
+    except ValueError as e:
+        # (o parâmetro `status` esconde o módulo fastapi.status)
+        raise HTTPException(status_code=http_status.HTTP_400_BAD_REQUEST, detail=str(e))
     
     # Se não for master, filtrar apenas demandas do usuário
-    if not current_user.is_master():
-        query = query.filter(Demanda.usuario_id == current_user.id)
+    usuario_id = None if current_user.is_master() else current_user.id
+    base = RelatorioService.filtrar_demandas(db.query(Demanda), filtros, usuario_id)
     
-    # Aplicar filtros
-    if cliente_id:
-        query = query.join(Secretaria).filter(Secretaria.cliente_id == cliente_id)
-    if secretaria_id:
-        query = query.filter(Demanda.secretaria_id == secretaria_id)
-    if tipo_demanda_id:
-        query = query.filter(Demanda.tipo_demanda_id == tipo_demanda_id)
-    if status:
-        try:
-            status_enum = StatusDemanda(status.lower())
-            query = query.filter(Demanda.status == status_enum)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Status inválido. Valores válidos: {[s.value for s in StatusDemanda]}"
-            )
-    if data_inicio:
-        try:
-            data_ini = datetime.strptime(data_inicio, "%Y-%m-%d").date()
-            query = query.filter(Demanda.created_at >= data_ini)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Formato de data_inicio inválido. Use YYYY-MM-DD"
-            )
-    if data_fim:
-        try:
-            data_f = datetime.strptime(data_fim, "%Y-%m-%d").date()
-            query = query.filter(Demanda.created_at <= data_f)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Formato de data_fim inválido. Use YYYY-MM-DD"
-            )
+    # Relacionamentos no mesmo SELECT; cursor no servidor em lotes
+    demandas = RelatorioService.carregar_relacionamentos(base).order_by(
+        Demanda.created_at
+    ).yield_per(PDF_YIELD_PER)
     
-    # Carregar relacionamentos
-    demandas = query.options(
-        joinedload(Demanda.tipo_demanda),
-        joinedload(Demanda.prioridade),
-        joinedload(Demanda.secretaria).joinedload(Secretaria.cliente),
-        joinedload(Demanda.usuario)
-    ).all()
-    
-    # Preparar filtros para o relatório
-    filtros = {
-        "cliente_id": cliente_id,
-        "secretaria_id": secretaria_id,
-        "tipo_demanda_id": tipo_demanda_id,
-        "status": status,
-        "data_inicio": data_inicio,
-        "data_fim": data_fim
-    }
+    def gerar() -> BinaryIO:
+        resumo = RelatorioService.resumo_por_status(base)
+        return RelatorioService().gerar_pdf(demandas, filtros, current_user, resumo=resumo)
     
-    # Gerar PDF
-    relatorio_service = RelatorioService()
-    pdf_buffer = relatorio_service.gerar_pdf(demandas, filtros, current_user)
+    # ReportLab é síncrono: gerar fora do event loop (arquivo temporário)
+    pdf_arquivo = await run_in_threadpool(gerar)
     
     # Nome do arquivo
     filename = f"relatorio_demandas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
     
+    def ler_arquivo():
+        try:
+            while bloco := pdf_arquivo.read(64 * 1024):
+                yield bloco
+        finally:
+            pdf_arquivo.close()
+    
     # Retornar como streaming response
     return StreamingResponse(
-        io.BytesIO(pdf_buffer.read()),
+        ler_arquivo(),
         media_type="application/pdf",
         headers={
             "Content-Disposition": f"attachment; filename={filename}"
@@ -284,79 +224,148 @@ async def gerar_relatorio_excel(
     Returns:
         StreamingResponse: Arquivo Excel (.xlsx)
     """
-    # Construir query (mesmo código do PDF)
-    query = db.query(Demanda)
-    
-    # Se não for master, filtrar apenas demandas do usuário
-    if not current_user.is_master():
-        query = query.filter(Demanda.usuario_id == current_user.id)
-    
-    # Aplicar filtros
-    if cliente_id:
-        query = query.join(Secretaria).filter(Secretaria.cliente_id == cliente_id)
-    if secretaria_id:
-        query = query.filter(Demanda.secretaria_id.in_(secretaria_id))
-    if tipo_demanda_id:
-        query = query.filter(Demanda.tipo_demanda_id.in_(tipo_demanda_id))
-    if status:
-        try:
-            status_enum = StatusDemanda(status.lower())
-            query = query.filter(Demanda.status == status_enum)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Status inválido. Valores válidos: {[s.value for s in StatusDemanda]}"
-            )
-    if data_inicio:
+    # Validar filtros antes de começar a transmitir (depois disso o status já foi enviado)
+    try:
+        filtros = RelatorioService.normalizar_filtros(
+            cliente_id, secretaria_id, tipo_demanda_id, status, data_inicio, data_fim
+        )
+    except ValueError as e:
+        # (o parâmetro `status` esconde o módulo fastapi.status)
+        raise HTTPException(status_code=http_status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    usuario_id = None if current_user.is_master() else current_user.id
+    gerado_por = current_user.nome_completo or current_user.username
+    
+    def produzir(destino) -> None:
+        # Sessão própria: a da requisição é fechada antes do fim do streaming
+        db_export = SessionLocal()
         try:
-            data_ini = datetime.strptime(data_inicio, "%Y-%m-%d").date()
-            query = query.filter(Demanda.created_at >= data_ini)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Formato de data_inicio inválido. Use YYYY-MM-DD"
-            )
-    if data_fim:
-        try:
-            data_f = datetime.strptime(data_fim, "%Y-%m-%d").date()
-            query = query.filter(Demanda.created_at <= data_f)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Formato de data_fim inválido. Use YYYY-MM-DD"
-            )
-    
-    # Carregar relacionamentos
-    demandas = query.options(
-        joinedload(Demanda.tipo_demanda),
-        joinedload(Demanda.prioridade),
-        joinedload(Demanda.secretaria).joinedload(Secretaria.cliente),
-        joinedload(Demanda.usuario)
-    ).all()
-    
-    # Preparar filtros para o relatório
-    filtros = {
-        "cliente_id": cliente_id,
-        "secretaria_id": secretaria_id,
-        "tipo_demanda_id": tipo_demanda_id,
-        "status": status,
-        "data_inicio": data_inicio,
-        "data_fim": data_fim
-    }
-    
-    # Gerar Excel
-    relatorio_service = RelatorioService()
-    excel_buffer = relatorio_service.gerar_excel(demandas, filtros, current_user)
+            query = RelatorioService.filtrar_demandas(db_export.query(Demanda), filtros, usuario_id)
+            
+            # Relacionamentos no mesmo SELECT; cursor no servidor em lotes
+            demandas = RelatorioService.carregar_relacionamentos(query).order_by(
+                Demanda.created_at
+            ).yield_per(EXCEL_YIELD_PER)
+            
+            RelatorioService().escrever_excel(demandas, filtros, gerado_por, destino)
+        finally:
+            db_export.close()
     
     # Nome do arquivo
     filename = f"relatorio_demandas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
     
-    # Retornar como streaming response
+    # Arquivo enviado enquanto é gerado
     return StreamingResponse(
-        io.BytesIO(excel_buffer.read()),
+        transmitir_de_thread(produzir),
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         headers={
             "Content-Disposition": f"attachment; filename={filename}"
         }
     )
 
+
+
+# ==================== JOBS DE RELATÓRIO (ASSÍNCRONOS) ====================
+
+MEDIA_TYPES_RELATORIO = {
+    FormatoRelatorio.PDF.value: "application/pdf",
+    FormatoRelatorio.EXCEL.value: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+@router.post("/jobs", status_code=http_status.HTTP_202_ACCEPTED)
+async def criar_job_relatorio(
+    dados: RelatorioJobCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Solicitar relatório PDF/Excel em segundo plano
+    
+    - A geração roda no pool de processos (não bloqueia a API)
+    - Pedidos iguais (filtros, escopo e dados inalterados) reutilizam o
+      arquivo já gerado ou o job em andamento
+    - Consultar o status em GET /jobs/{id} e baixar em GET /jobs/{id}/arquivo
+    
+    Returns:
+        dict: Status do job
+    """
+    try:
+        filtros = RelatorioService.normalizar_filtros(
+            dados.cliente_id,
+            dados.secretaria_id,
+            dados.tipo_demanda_id,
+            dados.status,
+            dados.data_inicio,
+            dados.data_fim
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=http_status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    # Versão dos dados + busca no cache: consultas síncronas, fora do event loop
+    job, enfileirar = await run_in_threadpool(
+        RelatorioJobService(db).solicitar, current_user, dados.formato.value, filtros
+    )
+    
+    if enfileirar:
+        RelatorioJobService.enfileirar(job.id)
+    
+    return job.to_status_dict()
+
+
+@router.get("/jobs/{job_id}")
+def obter_job_relatorio(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Status de um job de relatório (pendente, processando, concluido, erro)
+    """
+    job = RelatorioJobService(db).obter(job_id, current_user)
+    
+    if not job:
+        raise HTTPException(
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            detail="Job de relatório não encontrado"
+        )
+    
+    return job.to_status_dict()
+
+
+@router.get("/jobs/{job_id}/arquivo")
+def baixar_job_relatorio(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Baixar o arquivo de um job concluído
+    """
+    job = RelatorioJobService(db).obter(job_id, current_user)
+    
+    if not job:
+        raise HTTPException(
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            detail="Job de relatório não encontrado"
+        )
+    
+    if job.status != StatusRelatorioJob.CONCLUIDO.value:
+        raise HTTPException(
+            status_code=http_status.HTTP_409_CONFLICT,
+            detail=f"Relatório ainda não disponível (status: {job.status})"
+        )
+    
+    if not job.arquivo or not os.path.exists(job.arquivo):
+        raise HTTPException(
+            status_code=http_status.HTTP_410_GONE,
+            detail="Arquivo do relatório expirou. Solicite novamente."
+        )
+    
+    filename = f"relatorio_demandas_{job.created_at.strftime('%Y%m%d_%H%M%S')}.{job.formato}"
+    
+    return FileResponse(
+        job.arquivo,
+        media_type=MEDIA_TYPES_RELATORIO.get(job.formato, "application/octet-stream"),
+        filename=filename
+    )
@@ -16,6 +16,7 @@ from app.schemas import (
     SecretariaResponse,
     SecretariaResponseComplete
 )
+from app.services.estatisticas import EstatisticasService
 
 router = APIRouter()
 
@@ -73,14 +74,11 @@ def listar_secretarias(
     secretarias = query.order_by(Secretaria.nome).offset(skip).limit(limit).all()
     
     # Montar resposta completa
-    # Usar query separada para contar demandas para evitar erro de enum
-    from app.models import Demanda
+    # Contagem de demandas de todas as secretarias em uma consulta (rollup diário)
+    totais = EstatisticasService(db).contar_por_secretaria([s.id for s in secretarias])
     response = []
     for secretaria in secretarias:
-        # Contar demandas sem carregar o relacionamento (evita erro de enum)
-        total_demandas = db.query(Demanda).filter(
-            Demanda.secretaria_id == secretaria.id
-        ).count()
+        total_demandas = totais.get(secretaria.id, 0)
         
         response.append(SecretariaResponseComplete(
             **secretaria.to_dict(),
@@ -148,10 +146,8 @@ def buscar_secretaria(
             detail=f"Secretaria ID {secretaria_id} não encontrada"
         )
     
-    # Contar demandas sem carregar o relacionamento (evita erro de enum)
-    total_demandas = db.query(Demanda).filter(
-        Demanda.secretaria_id == secretaria_id
-    ).count()
+    # Contar demandas sem carregar o relacionamento (rollup diário)
+    total_demandas = EstatisticasService(db).contar_por_secretaria([secretaria_id]).get(secretaria_id, 0)
     
     # Montar resposta completa
     response = SecretariaResponseComplete(
@@ -333,6 +329,8 @@ def deletar_secretaria_permanente(
             {Demanda.secretaria_id: None},
             synchronize_session=False
         )
+        # UPDATE em massa não passa pelo flush: ajustar o rollup de estatísticas
+        EstatisticasService(db).transferir_secretaria_rollup(secretaria_id)
         db.flush()  # Aplicar mudanças sem commit
     
     # Deletar permanentemente
@@ -7,12 +7,16 @@ from sqlalchemy.orm import Session
 from typing import List
 from trello import TrelloClient
 from app.core.dependencies import get_db, require_master
-from app.models import User, ConfiguracaoTrello
+from app.models import User, ConfiguracaoTrello, TrelloListaStatus
+from app.services.trello_cache import invalidar_cache_trello
+from app.services.trello_reconciliacao import ReconciliacaoTrelloService, ReconciliacaoEmAndamento
 from app.schemas.configuracao_trello import (
     ConfiguracaoTrelloCreate,
     ConfiguracaoTrelloUpdate,
     ConfiguracaoTrelloResponse,
     ConfiguracaoTrelloTest,
+    TrelloListaStatusItem,
+    TrelloListasStatusUpdate,
     TrelloBoardInfo,
     TrelloListaInfo,
     TrelloEtiquetaInfo
@@ -37,6 +41,8 @@ def salvar_configuracao_trello(
     
     - Desativa configurações anteriores automaticamente
     - Apenas uma configuração pode estar ativa por vez
+    - Mantém o mapeamento lista → status da configuração anterior
+      quando o board é o mesmo
     - Requer permissão de Master
     
     **Parâmetros:**
@@ -46,14 +52,23 @@ def salvar_configuracao_trello(
     - lista_id: ID da Lista
     """
     try:
+        anterior = ConfiguracaoTrello.get_ativa(db)
+        
         # Desativar todas as configurações existentes
-        ConfiguracaoTrello.desativar_todas(db)
+        ConfiguracaoTrello.desativar_todas(db, commit=False)
         
         # Criar nova configuração
         nova_config = ConfiguracaoTrello(**config.model_dump())
         db.add(nova_config)
+        db.flush()
+        
+        # Sem o mapeamento, o webhook ignoraria toda movimentação de card
+        if anterior and anterior.board_id == nova_config.board_id:
+            TrelloListaStatus.copiar(db, anterior.id, nova_config.id)
+        
         db.commit()
         db.refresh(nova_config)
+        invalidar_cache_trello(motivo="nova configuração")
         
         logger.info(f"Configuração Trello salva por {current_user.email}")
         
@@ -257,6 +272,118 @@ def listar_etiquetas_board(
         )
 
 
+# ==================== MAPEAMENTO LISTA → STATUS ====================
+
+@router.get("/{config_id}/listas-status", response_model=List[TrelloListaStatusItem])
+def listar_mapeamento_listas(
+    config_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_master)
+):
+    """
+    Lista o mapeamento lista do Trello → status da demanda
+    
+    Usado pelo webhook: card movido para uma lista mapeada muda o status
+    da demanda.
+    """
+    return db.query(TrelloListaStatus).filter(
+        TrelloListaStatus.configuracao_id == config_id
+    ).order_by(TrelloListaStatus.created_at).all()
+
+
+@router.put("/{config_id}/listas-status", response_model=List[TrelloListaStatusItem])
+def substituir_mapeamento_listas(
+    config_id: str,
+    mapeamento: TrelloListasStatusUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_master)
+):
+    """
+    Substitui o mapeamento lista do Trello → status da demanda
+    
+    - Listas fora do mapeamento deixam de alterar o status
+    - Vale na hora na API e no worker do webhook (invalidação publicada
+      no Redis); sem REDIS_URL, o worker usa o mapeamento antigo por até
+      TRELLO_CONFIG_CACHE_TTL_SECONDS
+    - Requer permissão de Master
+    """
+    config = db.query(ConfiguracaoTrello).filter(
+        ConfiguracaoTrello.id == config_id
+    ).first()
+    
+    if not config:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Configuração não encontrada"
+        )
+    
+    try:
+        db.query(TrelloListaStatus).filter(
+            TrelloListaStatus.configuracao_id == config_id
+        ).delete(synchronize_session=False)
+        
+        novos = [
+            TrelloListaStatus(
+                configuracao_id=config_id,
+                lista_id=item.lista_id,
+                lista_nome=item.lista_nome,
+                status=item.status.value
+            )
+            for item in mapeamento.listas
+        ]
+        db.add_all(novos)
+        db.commit()
+        invalidar_cache_trello(motivo="mapeamento de listas atualizado")
+        
+        logger.info(f"Mapeamento de listas da configuração {config_id} atualizado por {current_user.email}")
+        
+        return novos
+        
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Erro ao atualizar mapeamento de listas: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao atualizar mapeamento de listas: {str(e)}"
+        )
+
+
+# ==================== RECONCILIAÇÃO ====================
+
+@router.post("/reconciliar", response_model=dict)
+async def reconciliar_trello(
+    dry_run: bool = True,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_master)
+):
+    """
+    Compara as demandas com os cards do board configurado
+    
+    - dry_run=true (padrão): só devolve o relatório
+    - dry_run=false: remove vínculos com cards inexistentes, atualiza
+      status pela lista do card e enfileira a criação dos cards faltantes
+    - Requer permissão de Master
+    """
+    try:
+        relatorio = await ReconciliacaoTrelloService(db).reconciliar(dry_run=dry_run)
+    except ReconciliacaoEmAndamento:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Outra reconciliação está em andamento"
+        )
+    except Exception as e:
+        logger.error(f"Erro na reconciliação com o Trello: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Erro na reconciliação com o Trello: {str(e)}"
+        )
+    
+    if not dry_run:
+        logger.info(f"Reconciliação Trello aplicada por {current_user.email}: {relatorio['totais']}")
+    
+    return relatorio
+
+
 # ==================== ATUALIZAR CONFIGURAÇÃO ====================
 
 @router.patch("/{config_id}", response_model=ConfiguracaoTrelloResponse)
@@ -287,6 +414,7 @@ def atualizar_configuracao(
         
         db.commit()
         db.refresh(config)
+        invalidar_cache_trello(motivo="configuração atualizada")
         
         logger.info(f"Configuração Trello {config_id} atualizada por {current_user.email}")
         
@@ -326,6 +454,7 @@ def deletar_configuracao(
     try:
         config.delete()  # Soft delete (BaseModel)
         db.commit()
+        invalidar_cache_trello(motivo="configuração removida")
         
         logger.info(f"Configuração Trello {config_id} deletada por {current_user.email}")
         
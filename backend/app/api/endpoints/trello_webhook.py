@@ -1,65 +1,25 @@
 """
 Endpoints de Webhook do Trello
-Recebe e processa eventos do Trello (movimentação de cards, atualizações, etc)
+Recebe eventos do Trello (movimentação de cards, atualizações, etc); as
+movimentações são gravadas e aplicadas pelo worker (services/trello_webhook)
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Header
 from sqlalchemy.orm import Session
 from typing import Optional
 from app.core.dependencies import get_db
-from app.models.demanda import Demanda, StatusDemanda
-from app.models.configuracao_trello import ConfiguracaoTrello
-from app.services.notification_whatsapp import NotificationWhatsAppService
+from app.services.trello_cache import ACOES_ESTRUTURA_TRELLO, cache_trello, invalidar_cache_trello
+from app.services.trello_webhook import TrelloWebhookService
 import logging
 import hashlib
 import hmac
 import base64
+import json
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/trello", tags=["Webhook Trello"])
 
 
-# ==================== MAPEAMENTO LISTA → STATUS ====================
-
-def mapear_lista_para_status(lista_id: str, config: ConfiguracaoTrello, db: Session) -> Optional[str]:
-    """
-    Mapeia o ID de uma lista do Trello para um status do DeBrief
-    
-    Usa mapeamento direto por ID para evitar chamadas à API do Trello
-    que podem resultar em erro 403.
-    
-    Args:
-        lista_id: ID da lista do Trello
-        config: Configuração ativa do Trello (não usado, mantido por compatibilidade)
-        db: Sessão do banco (não usado, mantido por compatibilidade)
-    
-    Returns:
-        Status correspondente ou None
-    """
-    # Mapeamento DIRETO por ID de lista → status
-    # Configurado para as listas específicas do board DeBrief
-    mapeamento_por_id = {
-        # Lista: ENVIOS DOS CLIENTES VIA DEBRIEF
-        '6810f40131d456a240f184ba': StatusDemanda.ABERTA.value,
-        
-        # Lista: EM DESENVOLVIMENTO
-        '68b82f29253b5480f0c06f3d': StatusDemanda.EM_ANDAMENTO.value,
-        
-        # Lista: EM ESPERA (= CONCLUÍDA no DeBrief)
-        '5ea097406d864d89b0017aa3': StatusDemanda.CONCLUIDA.value,
-    }
-    
-    # Buscar status pelo ID da lista
-    status = mapeamento_por_id.get(lista_id)
-    
-    if status:
-        logger.info(f"Lista ID '{lista_id}' mapeada para status '{status}'")
-        return status
-    else:
-        logger.warning(f"Lista ID '{lista_id}' não encontrada no mapeamento")
-        return None
-
-
 # ==================== VALIDAR WEBHOOK ====================
 
 def validar_webhook_trello(
@@ -126,10 +86,15 @@ async def processar_webhook_trello(
     x_trello_webhook: Optional[str] = Header(None)
 ):
     """
-    Processar eventos do webhook do Trello
+    Receber eventos do webhook do Trello
+    
+    Responde em poucos milissegundos: movimentações de card são apenas
+    gravadas (uma vez por action.id) e aplicadas pelo worker, que reduz
+    várias movimentações do mesmo card ao estado final.
     
     Eventos suportados:
-    - updateCard: Quando um card é movido entre listas ou atualizado
+    - updateCard: Quando um card é movido entre listas
+    - Listas/etiquetas/board alterados: invalidam o cache do Trello
     - commentCard: Quando um comentário é adicionado (futuro)
     
     Args:
@@ -138,19 +103,25 @@ async def processar_webhook_trello(
         x_trello_webhook: Assinatura do webhook (header)
     
     Returns:
-        dict: Status do processamento
+        dict: Status do recebimento
     """
     try:
-        # Ler corpo da requisição
+        # Ler corpo da requisição (uma vez: bytes para a assinatura)
         payload_bytes = await request.body()
-        payload = await request.json()
+        try:
+            payload = json.loads(payload_bytes)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Payload inválido"
+            )
         
-        # Log do evento recebido
-        action_type = payload.get('action', {}).get('type')
+        action = payload.get('action') or {}
+        action_type = action.get('type')
         logger.info(f"Webhook Trello recebido: {action_type}")
         
-        # Buscar configuração ativa
-        config = ConfiguracaoTrello.get_ativa(db)
+        # Configuração ativa (cache do processo)
+        config = cache_trello.configuracao(db)
         if not config:
             logger.warning("Webhook recebido mas não há configuração Trello ativa")
             return {"status": "ignored", "reason": "no_active_config"}
@@ -163,85 +134,39 @@ async def processar_webhook_trello(
         #         detail="Assinatura inválida"
         #     )
         
-        # Processar evento
-        action = payload.get('action', {})
-        action_type = action.get('type')
+        # ========== ESTRUTURA DO BOARD (LISTAS/ETIQUETAS) ==========
+        if action_type in ACOES_ESTRUTURA_TRELLO:
+            board_id = action.get('data', {}).get('board', {}).get('id') or config.board_id
+            invalidar_cache_trello(board_id, configuracao=False, motivo=f"webhook {action_type}")
+            return {"status": "success", "reason": "cache_invalidated"}
         
         # ========== EVENTO: CARD MOVIDO ENTRE LISTAS ==========
         if action_type == 'updateCard':
-            # Verificar se houve mudança de lista
             data = action.get('data', {})
             old_list = data.get('listBefore')
             new_list = data.get('listAfter')
             card_id = data.get('card', {}).get('id')
             
-            if not card_id:
-                logger.warning("Card ID não encontrado no webhook")
+            if not card_id or not action.get('id'):
+                logger.warning("Card ID ou action ID não encontrado no webhook")
                 return {"status": "ignored", "reason": "no_card_id"}
             
-            # Se mudou de lista
-            if old_list and new_list and old_list.get('id') != new_list.get('id'):
-                logger.info(
-                    f"Card {card_id} movido de "
-                    f"'{old_list.get('name')}' para '{new_list.get('name')}'"
-                )
-                
-                # Buscar demanda pelo trello_card_id
-                demanda = db.query(Demanda).filter(
-                    Demanda.trello_card_id == card_id
-                ).first()
-                
-                if not demanda:
-                    logger.warning(f"Demanda não encontrada para card {card_id}")
-                    return {"status": "ignored", "reason": "demanda_not_found"}
-                
-                # Mapear nova lista para status
-                novo_status = mapear_lista_para_status(
-                    new_list.get('id'),
-                    config,
-                    db
-                )
-                
-                if not novo_status:
-                    logger.warning(f"Não foi possível mapear lista para status")
-                    return {"status": "ignored", "reason": "no_status_mapping"}
-                
-                # Guardar status antigo
-                status_antigo = demanda.status.value if demanda.status else None
-                
-                # Atualizar status da demanda
-                demanda.status = novo_status
-                db.commit()
-                db.refresh(demanda)
-                
-                logger.info(
-                    f"Demanda {demanda.id} atualizada: "
-                    f"{status_antigo} → {novo_status}"
-                )
-                
-                # Enviar notificação WhatsApp (opcional)
-                try:
-                    notification_service = NotificationWhatsAppService()
-                    await notification_service.notificar_mudanca_status(
-                        demanda=demanda,
-                        status_antigo=status_antigo,
-                        db=db
-                    )
-                    logger.info("Notificação WhatsApp enviada")
-                except Exception as e:
-                    logger.error(f"Erro ao enviar notificação: {e}")
-                    # Não falhar o webhook por erro de notificação
-                
-                return {
-                    "status": "success",
-                    "demanda_id": demanda.id,
-                    "status_antigo": status_antigo,
-                    "status_novo": novo_status,
-                    "card_id": card_id
-                }
+            # Só movimentações entre listas são aplicadas
+            if not (old_list and new_list and old_list.get('id') != new_list.get('id')):
+                return {"status": "ignored", "reason": "event_not_handled"}
+            
+            if not TrelloWebhookService.registrar(db, action):
+                logger.info(f"Ação {action['id']} já recebida (reenvio do Trello)")
+                return {"status": "duplicate", "action_id": action['id']}
+            
+            logger.info(
+                f"Card {card_id} movido de "
+                f"'{old_list.get('name')}' para '{new_list.get('name')}' (enfileirado)"
+            )
+            return {"status": "accepted", "action_id": action['id'], "card_id": card_id}
         
         # ========== OUTROS EVENTOS (FUTURO) ==========
-        elif action_type == 'commentCard':
+        if action_type == 'commentCard':
             # Processar comentários (implementação futura)
             logger.info("Evento de comentário recebido (não implementado)")
             return {"status": "ignored", "reason": "comment_not_implemented"}
@@ -250,6 +175,8 @@ async def processar_webhook_trello(
         logger.info(f"Evento '{action_type}' não tratado")
         return {"status": "ignored", "reason": "event_not_handled"}
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao processar webhook: {e}", exc_info=True)
         raise HTTPException(
@@ -9,6 +9,7 @@ import logging
 
 from app.core.database import get_db
 from app.core.dependencies import get_current_user, require_master
+from app.core.cache_autenticacao import cache_autenticacao
 from app.models import User
 from app.models.user import TipoUsuario
 from app.schemas.user import (
@@ -233,6 +234,7 @@ def criar_usuario(
         
         db.commit()
         db.refresh(inactive_user)
+        cache_autenticacao.invalidar_usuario(inactive_user.id)
         
         # Enviar notificação de cadastro via WhatsApp (se tiver WhatsApp cadastrado)
         try:
@@ -374,6 +376,7 @@ def atualizar_usuario(
     
     db.commit()
     db.refresh(usuario)
+    cache_autenticacao.invalidar_usuario(usuario.id)
     
     return UserResponse.from_orm(usuario)
 
@@ -408,6 +411,7 @@ def desativar_usuario(
     
     usuario.ativo = False
     db.commit()
+    cache_autenticacao.invalidar_usuario(usuario.id)
     
     return None
 
@@ -440,6 +444,7 @@ def reativar_usuario(
     usuario.ativo = True
     db.commit()
     db.refresh(usuario)
+    cache_autenticacao.invalidar_usuario(usuario.id)
     
     return UserResponse.from_orm(usuario)
 
@@ -488,6 +493,7 @@ def excluir_usuario_permanente(
     # Deletar permanentemente
     db.delete(usuario)
     db.commit()
+    cache_autenticacao.invalidar_usuario(usuario_id)
     
     return None
 
@@ -535,6 +541,7 @@ def resetar_senha(
     
     usuario.set_password(new_password)
     db.commit()
+    cache_autenticacao.invalidar_usuario(usuario.id)
     
     return {
         "message": "Senha resetada com sucesso",
@@ -0,0 +1,319 @@
+"""
+Armazenamento de tokens de segurança (blacklist de JWT e CSRF)
+
+A blacklist era um set em memória que só crescia e não era compartilhado
+entre workers: logout em um worker não revogava o token nos outros.
+
+Com REDIS_URL:
+- Token revogado: chave {TOKEN_BLACKLIST_PREFIX}:{sha256} com TTL até o
+  exp do token, mais o índice {prefixo}:indice (ZSET, score = exp) e as
+  revogações recentes {prefixo}:recentes (ZSET, score = momento da revogação)
+- Cada processo mantém um filtro de Bloom dos tokens revogados. Token
+  fora do filtro não está revogado (sem ida ao Redis); no filtro, a
+  chave no Redis confirma (falso positivo). Se o Redis falhar nessa
+  confirmação, o token é tratado como revogado
+- No máximo a cada TOKEN_BLACKLIST_SYNC_SECONDS o processo acrescenta ao
+  filtro as revogações recentes desde a última sincronização: revogações
+  feitas em outro worker valem em até esse intervalo. O filtro só é
+  reconstruído pelo índice na primeira sincronização, quando passa da
+  capacidade ou depois de um período sem sincronizar
+- CSRF: {CSRF_REDIS_PREFIX}:{session_id} com TTL de CSRF_TOKEN_EXPIRE_SECONDS
+
+Sem REDIS_URL (ou com o Redis fora do ar), fica tudo em memória no
+processo, com expiração.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from jose import jwt
+from app.core.config import settings
+from app.core.redis_cliente import obter_redis_sincrono
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(token: str) -> str:
+    """SHA-256 do token (o token nunca é gravado)"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class FiltroBloom:
+    """
+    Filtro de Bloom sobre hashes SHA-256 (hex)
+    
+    Sem falso negativo; falso positivo com probabilidade ~taxa_erro
+    enquanto o número de itens não passar da capacidade.
+    """
+    
+    def __init__(self, capacidade: int, taxa_erro: float):
+        capacidade = max(capacidade, 1)
+        self.capacidade = capacidade
+        self.itens = 0
+        self.bits = max(64, int(-capacidade * math.log(taxa_erro) / (math.log(2) ** 2)))
+        self.funcoes = max(1, round(self.bits / capacidade * math.log(2)))
+        self._dados = bytearray((self.bits + 7) // 8)
+    
+    def _posicoes(self, hash_hex: str):
+        # Hashing duplo: h1 + i*h2, com h1/h2 tirados do próprio SHA-256
+        h1 = int(hash_hex[:16], 16)
+        h2 = int(hash_hex[16:32], 16) | 1
+        for i in range(self.funcoes):
+            yield (h1 + i * h2) % self.bits
+    
+    def adicionar(self, hash_hex: str) -> None:
+        self.itens += 1
+        for posicao in self._posicoes(hash_hex):
+            self._dados[posicao >> 3] |= 1 << (posicao & 7)
+    
+    def __contains__(self, hash_hex: str) -> bool:
+        return all(self._dados[posicao >> 3] & (1 << (posicao & 7)) for posicao in self._posicoes(hash_hex))
+
+
+class _MemoriaComTTL:
+    """Dicionário com expiração por chave (alternativa sem Redis)"""
+    
+    INTERVALO_LIMPEZA_SECONDS = 60
+    
+    def __init__(self):
+        self._itens: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+        self._proxima_limpeza = 0.0
+    
+    def definir(self, chave: str, valor: str, ttl: float) -> None:
+        agora = time.time()
+        with self._lock:
+            self._itens[chave] = (valor, agora + ttl)
+            if agora >= self._proxima_limpeza:
+                self._itens = {k: item for k, item in self._itens.items() if item[1] > agora}
+                self._proxima_limpeza = agora + self.INTERVALO_LIMPEZA_SECONDS
+    
+    def obter(self, chave: str) -> Optional[str]:
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return None
+            if item[1] <= time.time():
+                del self._itens[chave]
+                return None
+            return item[0]
+    
+    def remover(self, chave: str) -> None:
+        with self._lock:
+            self._itens.pop(chave, None)
+    
+    def chaves(self) -> List[str]:
+        agora = time.time()
+        with self._lock:
+            return [k for k, item in self._itens.items() if item[1] > agora]
+    
+    def limpar(self) -> None:
+        with self._lock:
+            self._itens.clear()
+
+
+class BlacklistTokens:
+    """
+    Blacklist de JWT compartilhada (Redis) com filtro de Bloom local
+    
+    Exemplo de uso:
+        ```python
+        blacklist_tokens.adicionar(token)   # logout
+        blacklist_tokens.contem(token)      # verify_token
+        ```
+    """
+    
+    # Revogações mantidas em {prefixo}:recentes; sem sincronizar por mais
+    # tempo que isso, o filtro é reconstruído pelo índice
+    JANELA_RECENTES_SECONDS = 600
+    # Tolerância a diferença de relógio entre os processos
+    MARGEM_RELOGIO_SECONDS = 30
+    
+    def __init__(self):
+        # Revogações feitas neste processo (valem na hora, com ou sem Redis)
+        self._memoria = _MemoriaComTTL()
+        self._filtro: Optional[FiltroBloom] = None
+        self._ultima_sync = 0.0
+        self._proxima_sync = 0.0
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _expiracao(token: str) -> float:
+        """exp do token (epoch); sem exp legível, a duração padrão do access token"""
+        try:
+            exp = jwt.get_unverified_claims(token).get("exp")
+            if exp:
+                return float(exp)
+        except Exception:
+            pass
+        return time.time() + settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    
+    def adicionar(self, token: str) -> None:
+        """Revogar o token até o seu exp"""
+        prefixo = settings.TOKEN_BLACKLIST_PREFIX
+        chave = _hash(token)
+        expira_em = self._expiracao(token)
+        ttl = int(expira_em - time.time()) + 1
+        if ttl <= 0:
+            # Já expirado: jwt.decode rejeita
+            return
+        
+        self._memoria.definir(chave, "1", ttl)
+        with self._lock:
+            if self._filtro is not None:
+                self._filtro.adicionar(chave)
+        
+        redis = obter_redis_sincrono()
+        if redis is None:
+            return
+        
+        try:
+            agora = time.time()
+            pipe = redis.pipeline()
+            pipe.set(f"{prefixo}:{chave}", 1, ex=ttl)
+            pipe.zadd(f"{prefixo}:indice", {chave: expira_em})
+            pipe.zremrangebyscore(f"{prefixo}:indice", "-inf", agora)
+            pipe.zadd(f"{prefixo}:recentes", {chave: agora})
+            pipe.zremrangebyscore(f"{prefixo}:recentes", "-inf", agora - self.JANELA_RECENTES_SECONDS)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Erro ao gravar token na blacklist do Redis (revogado só neste processo): {e}")
+    
+    def _sincronizar(self, redis) -> Optional[FiltroBloom]:
+        """Acrescentar ao filtro as revogações novas (no máximo a cada intervalo)"""
+        agora = time.monotonic()
+        if agora < self._proxima_sync:
+            return self._filtro
+        
+        with self._lock:
+            if agora < self._proxima_sync:
+                return self._filtro
+            self._proxima_sync = agora + settings.TOKEN_BLACKLIST_SYNC_SECONDS
+            
+            prefixo = settings.TOKEN_BLACKLIST_PREFIX
+            relogio = time.time()
+            completa = (
+                self._filtro is None
+                or self._filtro.itens > self._filtro.capacidade
+                or relogio - self._ultima_sync > self.JANELA_RECENTES_SECONDS - self.MARGEM_RELOGIO_SECONDS
+            )
+            try:
+                if completa:
+                    hashes = redis.zrangebyscore(f"{prefixo}:indice", relogio, "+inf")
+                else:
+                    hashes = redis.zrangebyscore(
+                        f"{prefixo}:recentes", self._ultima_sync - self.MARGEM_RELOGIO_SECONDS, "+inf"
+                    )
+            except Exception as e:
+                logger.error(f"Erro ao sincronizar a blacklist de tokens com o Redis: {e}")
+                return self._filtro
+            
+            if completa:
+                # Reconstrução também descarta os tokens já expirados
+                filtro = FiltroBloom(
+                    max(settings.TOKEN_BLACKLIST_BLOOM_CAPACIDADE, 2 * len(hashes)),
+                    settings.TOKEN_BLACKLIST_BLOOM_TAXA_ERRO
+                )
+                for chave in self._memoria.chaves():
+                    filtro.adicionar(chave)
+                self._filtro = filtro
+            
+            for chave in hashes:
+                self._filtro.adicionar(chave)
+            self._ultima_sync = relogio
+            return self._filtro
+    
+    def contem(self, token: str) -> bool:
+        """Token revogado?"""
+        chave = _hash(token)
+        if self._memoria.obter(chave) is not None:
+            return True
+        
+        redis = obter_redis_sincrono()
+        if redis is None:
+            return False
+        
+        filtro = self._sincronizar(redis)
+        if filtro is None or chave not in filtro:
+            # Sem filtro, o Redis está fora do ar: só as revogações locais valem
+            return False
+        
+        try:
+            return bool(redis.exists(f"{settings.TOKEN_BLACKLIST_PREFIX}:{chave}"))
+        except Exception as e:
+            # No filtro, o token provavelmente foi revogado: na dúvida, recusar
+            logger.error(f"Erro ao consultar a blacklist de tokens no Redis (token recusado): {e}")
+            return True
+    
+    def limpar(self) -> None:
+        """Esvaziar a blacklist (local e no Redis)"""
+        self._memoria.limpar()
+        with self._lock:
+            self._filtro, self._ultima_sync, self._proxima_sync = None, 0.0, 0.0
+        
+        redis = obter_redis_sincrono()
+        if redis is None:
+            return
+        
+        try:
+            chaves = list(redis.scan_iter(match=f"{settings.TOKEN_BLACKLIST_PREFIX}:*", count=1000))
+            if chaves:
+                redis.delete(*chaves)
+        except Exception as e:
+            logger.error(f"Erro ao limpar a blacklist de tokens no Redis: {e}")
+
+
+class ArmazenamentoCSRF:
+    """
+    Tokens CSRF por sessão, com expiração de CSRF_TOKEN_EXPIRE_SECONDS
+    
+    Exemplo de uso:
+        ```python
+        armazenamento_csrf.salvar(session_id, token)
+        armazenamento_csrf.obter(session_id)
+        ```
+    """
+    
+    def __init__(self):
+        self._memoria = _MemoriaComTTL()
+    
+    @staticmethod
+    def _chave(session_id: str) -> str:
+        return f"{settings.CSRF_REDIS_PREFIX}:{session_id}"
+    
+    def salvar(self, session_id: str, token: str) -> None:
+        redis = obter_redis_sincrono()
+        if redis is not None:
+            try:
+                redis.set(self._chave(session_id), token, ex=settings.CSRF_TOKEN_EXPIRE_SECONDS)
+                return
+            except Exception as e:
+                logger.error(f"Erro ao gravar token CSRF no Redis (mantido neste processo): {e}")
+        self._memoria.definir(session_id, token, settings.CSRF_TOKEN_EXPIRE_SECONDS)
+    
+    def obter(self, session_id: str) -> Optional[str]:
+        redis = obter_redis_sincrono()
+        if redis is not None:
+            try:
+                token = redis.get(self._chave(session_id))
+                if token is not None:
+                    return token
+            except Exception as e:
+                logger.error(f"Erro ao ler token CSRF no Redis: {e}")
+        return self._memoria.obter(session_id)
+    
+    def remover(self, session_id: str) -> None:
+        self._memoria.remover(session_id)
+        redis = obter_redis_sincrono()
+        if redis is not None:
+            try:
+                redis.delete(self._chave(session_id))
+            except Exception as e:
+                logger.error(f"Erro ao remover token CSRF no Redis: {e}")
+
+
+# Instâncias globais (uma por processo)
+blacklist_tokens = BlacklistTokens()
+armazenamento_csrf = ArmazenamentoCSRF()
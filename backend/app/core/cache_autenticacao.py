@@ -0,0 +1,158 @@
+"""
+Cache da autenticação (tokens verificados e principais)
+
+Toda requisição autenticada decodificava o JWT (python-jose) e buscava o
+usuário no banco, com o JOIN em clientes e a descriptografia dos campos
+EncryptedString (whatsapp, mfa_secret), antes de qualquer lógica do endpoint.
+
+- Tokens verificados: LRU token -> payload (até AUTH_TOKENS_CACHE_TAMANHO).
+  Acerto só vale até o exp do token; a blacklist continua sendo
+  consultada a cada requisição (filtro de Bloom local)
+- Principais: user_id -> (id, tipo, cliente_id, ativo, username, email)
+  por AUTH_PRINCIPAL_CACHE_SECONDS. get_current_user monta o User a partir
+  desses campos, sem SELECT; os demais atributos são carregados do banco
+  só se o endpoint os acessar
+- Invalidação: usuarios.py/auth.py chamam invalidar_usuario() depois do
+  commit. A remoção é local e publicada no canal AUTH_CACHE_CANAL; cada
+  processo da API escuta o canal (iniciar_escuta() no startup). Sem
+  REDIS_URL, vale o TTL nos outros processos
+
+Autor: DeBrief Sistema
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from app.core.config import settings
+from app.core.redis_cliente import escutar_canal, obter_redis_sincrono
+
+logger = logging.getLogger(__name__)
+
+# Atributos do User guardados no cache de principais
+CAMPOS_PRINCIPAL = ("id", "tipo", "cliente_id", "ativo", "username", "email")
+
+
+class CacheAutenticacao:
+    """
+    Caches da autenticação, um por processo
+    
+    Exemplo de uso:
+        ```python
+        payload = cache_autenticacao.token_verificado(token)
+        dados = cache_autenticacao.principal(user_id)
+        cache_autenticacao.invalidar_usuario(usuario.id)
+        ```
+    """
+    
+    def __init__(self):
+        self._tokens: "OrderedDict[str, dict]" = OrderedDict()
+        self._principais: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._escuta: Optional[asyncio.Task] = None
+    
+    # ==================== TOKENS ====================
+    
+    def token_verificado(self, token: str) -> Optional[dict]:
+        """Payload de um token já verificado e ainda não expirado"""
+        with self._lock:
+            payload = self._tokens.get(token)
+            if payload is None:
+                return None
+            if payload["exp"] <= time.time():
+                del self._tokens[token]
+                return None
+            self._tokens.move_to_end(token)
+            return payload
+    
+    def guardar_token(self, token: str, payload: dict) -> None:
+        """Guardar o payload de um token recém-verificado (só com exp)"""
+        if not isinstance(payload.get("exp"), (int, float)):
+            return
+        with self._lock:
+            self._tokens[token] = payload
+            self._tokens.move_to_end(token)
+            while len(self._tokens) > settings.AUTH_TOKENS_CACHE_TAMANHO:
+                self._tokens.popitem(last=False)
+    
+    def remover_token(self, token: str) -> None:
+        with self._lock:
+            self._tokens.pop(token, None)
+    
+    # ==================== PRINCIPAIS ====================
+    
+    def principal(self, user_id: str) -> Optional[dict]:
+        """Campos do usuário em cache (None se ausente ou expirado)"""
+        with self._lock:
+            item = self._principais.get(user_id)
+            if item is None:
+                return None
+            dados, expira_em = item
+            if expira_em <= time.monotonic():
+                del self._principais[user_id]
+                return None
+            return dados
+    
+    def guardar_principal(self, user) -> None:
+        """Guardar os campos do principal de um User carregado do banco"""
+        dados = {campo: getattr(user, campo) for campo in CAMPOS_PRINCIPAL}
+        with self._lock:
+            self._principais[user.id] = (dados, time.monotonic() + settings.AUTH_PRINCIPAL_CACHE_SECONDS)
+            self._principais.move_to_end(user.id)
+            while len(self._principais) > settings.AUTH_PRINCIPAIS_CACHE_TAMANHO:
+                self._principais.popitem(last=False)
+    
+    def _remover_principal(self, user_id: str) -> None:
+        with self._lock:
+            self._principais.pop(user_id, None)
+    
+    def invalidar_usuario(self, user_id: str) -> None:
+        """
+        Descartar o principal do usuário neste e nos demais processos
+        
+        Chamar depois do commit que alterou, desativou ou removeu o usuário.
+        """
+        self._remover_principal(user_id)
+        
+        redis = obter_redis_sincrono()
+        if redis is None:
+            return
+        try:
+            redis.publish(settings.AUTH_CACHE_CANAL, user_id)
+        except Exception as e:
+            logger.error(f"Erro ao publicar invalidação do usuário {user_id} (demais processos esperam o TTL): {e}")
+    
+    def limpar(self) -> None:
+        with self._lock:
+            self._tokens.clear()
+            self._principais.clear()
+    
+    # ==================== ESCUTA DE INVALIDAÇÕES ====================
+    
+    def _limpar_principais(self) -> None:
+        with self._lock:
+            self._principais.clear()
+    
+    def iniciar_escuta(self) -> None:
+        """Iniciar a escuta do canal (startup da API; sem REDIS_URL, nada a fazer)"""
+        if settings.REDIS_URL and self._escuta is None:
+            self._escuta = asyncio.create_task(escutar_canal(
+                settings.AUTH_CACHE_CANAL,
+                ao_receber=self._remover_principal,
+                ao_conectar=self._limpar_principais
+            ))
+    
+    async def parar_escuta(self) -> None:
+        """Encerrar a escuta do canal (shutdown da API)"""
+        if self._escuta is not None:
+            self._escuta.cancel()
+            try:
+                await self._escuta
+            except asyncio.CancelledError:
+                pass
+            self._escuta = None
+
+
+# Instância global (uma por processo)
+cache_autenticacao = CacheAutenticacao()
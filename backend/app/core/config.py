@@ -17,6 +17,7 @@ load_external_secrets()
 
 BASE_DIR = Path(__file__).resolve().parents[2]
 DEFAULT_UPLOAD_DIR = os.getenv("DEBRIEF_UPLOAD_DIR") or str(BASE_DIR / "uploads")
+DEFAULT_RELATORIOS_DIR = os.getenv("DEBRIEF_RELATORIOS_DIR") or str(BASE_DIR / "relatorios")
 
 
 class Settings(BaseSettings):
@@ -56,6 +57,13 @@ class Settings(BaseSettings):
     RATE_LIMIT_STORAGE_URI: str = "memory://"
     REDIS_URL: Optional[str] = None
     TOKEN_BLACKLIST_PREFIX: str = "security:jwt:blacklist"
+    TOKEN_BLACKLIST_SYNC_SECONDS: float = 1.0  # revogações de outros workers valem em até esse intervalo
+    TOKEN_BLACKLIST_BLOOM_CAPACIDADE: int = 100000
+    TOKEN_BLACKLIST_BLOOM_TAXA_ERRO: float = 0.001
+    AUTH_TOKENS_CACHE_TAMANHO: int = 10000  # LRU de access tokens já verificados
+    AUTH_PRINCIPAL_CACHE_SECONDS: int = 30
+    AUTH_PRINCIPAIS_CACHE_TAMANHO: int = 10000
+    AUTH_CACHE_CANAL: str = "auth:usuarios:invalidar"
     CSRF_REDIS_PREFIX: str = "security:csrf"
     
     # CORS
@@ -68,11 +76,19 @@ class Settings(BaseSettings):
     # Uploads
     MAX_FILE_SIZE: int = 50 * 1024 * 1024
     MAX_UPLOAD_SIZE: int = 50 * 1024 * 1024
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024
     ALLOWED_EXTENSIONS: Union[str, list[str]] = ["pdf", "jpg", "jpeg", "png"]
     MAX_FILES_PER_DEMANDA: int = 5
     UPLOAD_DIR: str = DEFAULT_UPLOAD_DIR
+    UPLOADS_CACHE_MAX_AGE: int = 31536000  # blobs (conteúdo imutável)
+    UPLOADS_X_ACCEL_PREFIX: str = ""  # ex.: /_uploads_internos (vazio = API envia os bytes)
     ANTIVIRUS_ENABLED: bool = False
+    ANTIVIRUS_BACKEND: str = "comando"  # comando (ANTIVIRUS_COMMAND) ou clamd (socket INSTREAM, recomendado)
+    ANTIVIRUS_CLAMD_ADDRESS: str = "unix:///var/run/clamav/clamd.ctl"  # ou tcp://host:3310
     ANTIVIRUS_COMMAND: str = "clamscan --no-summary --stdout"
+    ANTIVIRUS_TIMEOUT_SECONDS: float = 30.0
+    ANTIVIRUS_CACHE_SIZE: int = 10000
+    ANTIVIRUS_CACHE_TTL_SECONDS: int = 86400
     
     # Paginação
     DEFAULT_PAGE_SIZE: int = 20
@@ -91,6 +107,24 @@ class Settings(BaseSettings):
     TRELLO_TOKEN: Optional[str] = None
     TRELLO_BOARD_ID: Optional[str] = None
     TRELLO_LIST_ID: Optional[str] = None
+    TRELLO_CACHE_TTL_SECONDS: int = 600  # board, listas e etiquetas
+    TRELLO_CONFIG_CACHE_TTL_SECONDS: int = 60  # configuração ativa e mapeamento de listas
+    TRELLO_CARDS_CACHE_TAMANHO: int = 10000  # card -> demanda (por processo)
+    TRELLO_LIMITE_POR_CHAVE: int = 300  # requisições por janela (limite do Trello por API key)
+    TRELLO_LIMITE_POR_TOKEN: int = 100  # requisições por janela (limite do Trello por token)
+    TRELLO_JANELA_LIMITE_SECONDS: float = 10.0
+    TRELLO_RESERVA_INTERATIVA: float = 0.2  # fração dos baldes que o segundo plano não usa
+    TRELLO_MAX_TENTATIVAS_429: int = 5
+    TRELLO_BACKOFF_BASE_SECONDS: float = 1.0  # 429 sem Retry-After
+    TRELLO_BACKOFF_MAX_SECONDS: float = 30.0
+    TRELLO_RATE_LIMIT_PREFIX: str = "trello:limite"
+    TRELLO_ATUALIZACAO_JANELA_SECONDS: int = 5  # edições seguidas viram um único PUT
+    TRELLO_WEBHOOK_POLL_INTERVAL_SECONDS: float = 1.0
+    TRELLO_WEBHOOK_LOTE: int = 200
+    TRELLO_WEBHOOK_ATRASO_SECONDS: int = 2  # movimentações seguidas do mesmo card no mesmo lote
+    TRELLO_WEBHOOK_RETENCAO_DIAS: int = 7  # deduplicação de reenvios
+    TRELLO_CACHE_CANAL: str = "trello:cache:invalidar"
+    TRELLO_RECONCILIACAO_CARENCIA_SECONDS: int = 600  # demanda recente ainda pode estar criando o card
     
     # Integrações WhatsApp
     ZAPI_INSTANCE_ID: Optional[str] = None
@@ -103,6 +137,29 @@ class Settings(BaseSettings):
     WPP_URL: Optional[str] = None
     WPP_INSTANCE: Optional[str] = None
     WPP_TOKEN: Optional[str] = None
+    WHATSAPP_HTTP_TIMEOUT_SECONDS: float = 15.0
+    WHATSAPP_FANOUT_CONCORRENCIA: int = 8
+    WHATSAPP_FANOUT_PRAZO_SECONDS: float = 60.0
+    NOTIFICATION_LOG_COPY_MINIMO: int = 200
+    
+    # Outbox (efeitos colaterais assíncronos das demandas)
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 1.0
+    OUTBOX_BATCH_SIZE: int = 20
+    OUTBOX_MAX_TENTATIVAS: int = 8
+    OUTBOX_BACKOFF_BASE_SECONDS: int = 5
+    OUTBOX_BACKOFF_MAX_SECONDS: int = 900
+    OUTBOX_LOCK_TIMEOUT_SECONDS: int = 300
+    
+    # Estatísticas (rollup diário de demandas)
+    ESTATISTICAS_ROLLUP_ENABLED: bool = True
+    ESTATISTICAS_TIMEZONE: str = "UTC"
+    ESTATISTICAS_REPARO_HORA: int = 3
+    
+    # Relatórios assíncronos (jobs no pool de processos)
+    PROCESS_POOL_WORKERS: int = 2
+    RELATORIOS_DIR: str = DEFAULT_RELATORIOS_DIR
+    RELATORIO_JOB_TIMEOUT_SECONDS: int = 900
+    RELATORIO_ARTEFATO_RETENCAO_HORAS: int = 24
     
     # reCAPTCHA
     RECAPTCHA_SECRET_KEY: Optional[str] = None
@@ -5,14 +5,12 @@ Proteção contra Cross-Site Request Forgery
 from fastapi import Request, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.core.security import generate_csrf_token, verify_csrf_token
+from app.core.armazenamento_tokens import armazenamento_csrf
 import secrets
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Armazenamento de tokens CSRF (em memória - para produção, usar Redis ou sessão)
-_csrf_tokens: dict[str, str] = {}
-
 
 def get_csrf_token(session_id: str = None) -> str:
     """
@@ -27,7 +25,7 @@ def get_csrf_token(session_id: str = None) -> str:
     token = generate_csrf_token()
     
     if session_id:
-        _csrf_tokens[session_id] = token
+        armazenamento_csrf.salvar(session_id, token)
     
     return token
 
@@ -62,7 +60,7 @@ def verify_csrf(request: Request, session_id: str = None) -> bool:
     
     # Obter token da sessão
     if session_id:
-        session_token = _csrf_tokens.get(session_id)
+        session_token = armazenamento_csrf.obter(session_id)
     else:
         # Tentar obter do cookie
         session_token = request.cookies.get("csrf_token")
@@ -92,6 +90,5 @@ def clear_csrf_token(session_id: str):
     Args:
         session_id: ID da sessão
     """
-    if session_id in _csrf_tokens:
-        del _csrf_tokens[session_id]
+    armazenamento_csrf.remover(session_id)
 
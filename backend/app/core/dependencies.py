@@ -5,9 +5,12 @@ Funções de dependência reutilizáveis
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.session import make_transient_to_detached
 from typing import Optional
 from app.core.database import get_db
 from app.core.security import verify_token
+from app.core.cache_autenticacao import cache_autenticacao
 from app.models.user import User
 from app.schemas.user import TokenData
 
@@ -15,6 +18,36 @@ from app.schemas.user import TokenData
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 
+def _carregar_usuario(db: Session, user_id: str) -> Optional[User]:
+    """
+    Usuário do token, pelo cache de principais quando possível
+    
+    No acerto, o User é montado com os campos em cache e anexado à sessão
+    sem SELECT (como se viesse de uma query); os demais atributos
+    (whatsapp, mfa_secret, cliente...) são carregados se forem acessados.
+    
+    Args:
+        db: Sessão do banco de dados
+        user_id: ID do usuário (sub do token)
+        
+    Returns:
+        User ou None se não existir
+    """
+    dados = cache_autenticacao.principal(user_id)
+    
+    if dados is None:
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is not None:
+            cache_autenticacao.guardar_principal(user)
+        return user
+    
+    user = User.__mapper__.class_manager.new_instance()
+    for campo, valor in dados.items():
+        set_committed_value(user, campo, valor)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
@@ -49,8 +82,8 @@ async def get_current_user(
     if user_id is None:
         raise credentials_exception
     
-    # Buscar usuário no banco
-    user = db.query(User).filter(User.id == user_id).first()
+    # Buscar usuário (cache de principais ou banco)
+    user = _carregar_usuario(db, user_id)
     
     if user is None:
         raise credentials_exception
@@ -139,7 +172,7 @@ def get_optional_user(
     if user_id is None:
         return None
     
-    return db.query(User).filter(User.id == user_id).first()
+    return _carregar_usuario(db, user_id)
 
 
 # Alias para compatibilidade
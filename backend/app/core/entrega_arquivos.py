@@ -0,0 +1,238 @@
+"""
+Entrega de arquivos com cache HTTP
+Respostas de GET /uploads/... com ETag, requisições condicionais e Range
+
+- ETag forte: SHA-256 do conteúdo (do blob, quando conhecido, ou
+  calculado uma vez por arquivo e memorizado por caminho/mtime/tamanho)
+- If-None-Match / If-Modified-Since -> 304 sem corpo
+- Range de um intervalo (bytes=a-b, a-, -n) -> 206; If-Range respeitado;
+  intervalo fora do arquivo -> 416. Vários intervalos: arquivo inteiro
+- Com UPLOADS_X_ACCEL_PREFIX configurado, os bytes são entregues pelo
+  proxy reverso (X-Accel-Redirect): a API só decide e devolve cabeçalhos
+- Content-Type pela extensão do arquivo gravado (validada pela assinatura
+  no upload), nunca pelo tipo informado pelo cliente. Fora de
+  TIPOS_INLINE o arquivo é baixado (attachment, application/octet-stream);
+  sempre com X-Content-Type-Options: nosniff
+"""
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import AsyncIterator, Optional, Tuple
+from urllib.parse import quote
+import aiofiles
+from fastapi import Request, Response, status
+from fastapi.responses import FileResponse, StreamingResponse
+from app.core.config import settings
+
+TAMANHO_BLOCO = 64 * 1024
+MAX_HASHES_MEMORIZADOS = 4096
+
+# Extensão -> Content-Type dos arquivos exibidos no navegador (inline):
+# as validadas no upload e as variantes WebP
+TIPOS_INLINE = {
+    ".pdf": "application/pdf",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".webp": "image/webp",
+}
+
+# (caminho, mtime_ns, tamanho) -> sha256 dos arquivos sem blob
+_hashes: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+
+
+class IntervaloInsatisfativel(Exception):
+    """Range fora do arquivo (416)"""
+    pass
+
+
+def _sha256_arquivo(caminho: Path) -> str:
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+async def hash_arquivo(caminho: Path, stat_result: os.stat_result) -> str:
+    """
+    SHA-256 de um arquivo sem blob (anexos antigos)
+    
+    Calculado em thread uma única vez enquanto o arquivo não mudar.
+    """
+    chave = (str(caminho), stat_result.st_mtime_ns, stat_result.st_size)
+    sha256 = _hashes.get(chave)
+    if sha256 is None:
+        sha256 = await asyncio.to_thread(_sha256_arquivo, caminho)
+        _hashes[chave] = sha256
+        while len(_hashes) > MAX_HASHES_MEMORIZADOS:
+            _hashes.popitem(last=False)
+    else:
+        _hashes.move_to_end(chave)
+    return sha256
+
+
+def _etag_confere(cabecalho: str, etag: str) -> bool:
+    """If-None-Match: lista de ETags (comparação fraca) ou *"""
+    for valor in cabecalho.split(","):
+        valor = valor.strip()
+        if valor == "*" or valor.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _nao_modificado(request: Request, etag: str, stat_result: os.stat_result) -> bool:
+    """Avaliar If-None-Match (prioritário) e If-Modified-Since"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_confere(if_none_match, etag)
+    
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(stat_result.st_mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _intervalo(cabecalho: str, tamanho: int) -> Optional[Tuple[int, int]]:
+    """
+    Interpretar Range (um único intervalo)
+    
+    Returns:
+        (inicio, fim) inclusivos, ou None para ignorar o cabeçalho
+    
+    Raises:
+        IntervaloInsatisfativel: Se o intervalo não cabe no arquivo
+    """
+    unidade, _, intervalos = cabecalho.partition("=")
+    if unidade.strip().lower() != "bytes" or "," in intervalos:
+        return None
+    
+    inicio, separador, fim = intervalos.strip().partition("-")
+    if not separador:
+        return None
+    try:
+        if not inicio:
+            # Sufixo: últimos N bytes
+            sufixo = int(fim)
+            if sufixo <= 0:
+                raise IntervaloInsatisfativel()
+            return max(tamanho - sufixo, 0), tamanho - 1
+        inicio = int(inicio)
+        fim = int(fim) if fim else tamanho - 1
+    except ValueError:
+        return None
+    
+    if inicio >= tamanho:
+        raise IntervaloInsatisfativel()
+    if inicio > fim:
+        return None
+    return inicio, min(fim, tamanho - 1)
+
+
+def tipo_inline(caminho: Path) -> Optional[str]:
+    """Content-Type do arquivo, se puder ser exibido inline (None: download)"""
+    return TIPOS_INLINE.get(caminho.suffix.lower())
+
+
+async def _ler_intervalo(caminho: Path, inicio: int, fim: int) -> AsyncIterator[bytes]:
+    """Ler os bytes [inicio, fim] em blocos"""
+    restante = fim - inicio + 1
+    async with aiofiles.open(caminho, "rb") as f:
+        await f.seek(inicio)
+        while restante > 0:
+            bloco = await f.read(min(TAMANHO_BLOCO, restante))
+            if not bloco:
+                break
+            restante -= len(bloco)
+            yield bloco
+
+
+def responder_arquivo(
+    request: Request,
+    caminho: Path,
+    caminho_relativo: str,
+    stat_result: os.stat_result,
+    sha256: str,
+    nome_arquivo: Optional[str] = None,
+    imutavel: bool = False
+) -> Response:
+    """
+    Montar a resposta de um arquivo de upload
+    
+    Args:
+        request: Requisição (cabeçalhos condicionais e Range)
+        caminho: Caminho absoluto do arquivo
+        caminho_relativo: Caminho relativo a UPLOAD_DIR (X-Accel-Redirect)
+        stat_result: os.stat do arquivo
+        sha256: Hash do conteúdo (ETag)
+        nome_arquivo: Nome original (Content-Disposition)
+        imutavel: Conteúdo nunca muda nesse caminho (blobs): cache longo
+    
+    Returns:
+        Response 200/206/304/416
+    """
+    etag = f'"{sha256}"'
+    last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": last_modified,
+        "Cache-Control": (
+            f"private, max-age={settings.UPLOADS_CACHE_MAX_AGE}, immutable" if imutavel
+            else "private, no-cache"
+        ),
+        "Accept-Ranges": "bytes",
+        "X-Content-Type-Options": "nosniff",
+    }
+    
+    if _nao_modificado(request, etag, stat_result):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    tipo_mime = tipo_inline(caminho)
+    if tipo_mime:
+        disposicao = "inline"
+    else:
+        tipo_mime = "application/octet-stream"
+        disposicao = "attachment"
+        nome_arquivo = nome_arquivo or caminho.name
+    if nome_arquivo:
+        headers["Content-Disposition"] = f"{disposicao}; filename*=utf-8''{quote(nome_arquivo)}"
+    
+    # Proxy reverso entrega os bytes (sendfile, Range) a partir do location interno
+    if settings.UPLOADS_X_ACCEL_PREFIX:
+        headers["X-Accel-Redirect"] = settings.UPLOADS_X_ACCEL_PREFIX.rstrip("/") + "/" + quote(caminho_relativo)
+        return Response(headers=headers, media_type=tipo_mime)
+    
+    tamanho = stat_result.st_size
+    cabecalho_range = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if cabecalho_range and if_range and if_range not in (etag, last_modified):
+        # Arquivo mudou desde a primeira parte: enviar inteiro
+        cabecalho_range = None
+    
+    if cabecalho_range and tamanho:
+        try:
+            intervalo = _intervalo(cabecalho_range, tamanho)
+        except IntervaloInsatisfativel:
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={**headers, "Content-Range": f"bytes */{tamanho}"}
+            )
+        
+        if intervalo:
+            inicio, fim = intervalo
+            headers["Content-Range"] = f"bytes {inicio}-{fim}/{tamanho}"
+            headers["Content-Length"] = str(fim - inicio + 1)
+            return StreamingResponse(
+                _ler_intervalo(caminho, inicio, fim),
+                status_code=status.HTTP_206_PARTIAL_CONTENT,
+                headers=headers,
+                media_type=tipo_mime
+            )
+    
+    return FileResponse(caminho, headers=headers, media_type=tipo_mime, stat_result=stat_result)
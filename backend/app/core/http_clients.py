@@ -0,0 +1,63 @@
+"""
+Clientes HTTP compartilhados
+Pools de conexões keep-alive (httpx.AsyncClient) reutilizados entre chamadas
+
+Um AsyncClient fica preso ao event loop em que abriu suas conexões, por
+isso os clientes são mantidos por loop (API e worker têm um loop cada).
+"""
+import asyncio
+import weakref
+from typing import Dict
+import httpx
+
+# Limites padrão do pool (por cliente)
+LIMITES_PADRAO = httpx.Limits(
+    max_connections=50,
+    max_keepalive_connections=20,
+    keepalive_expiry=30.0
+)
+
+TIMEOUT_PADRAO = httpx.Timeout(15.0, connect=5.0)
+
+_clientes: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def obter_cliente_http(nome: str = "padrao", **kwargs) -> httpx.AsyncClient:
+    """
+    Obter (ou criar) o cliente HTTP compartilhado do loop atual
+    
+    Args:
+        nome: Nome do pool (ex: "zapi", "trello") - um pool por integração
+        **kwargs: Argumentos do httpx.AsyncClient (usados só na criação)
+    
+    Returns:
+        httpx.AsyncClient reutilizável
+    
+    Exemplo:
+        ```python
+        client = obter_cliente_http("zapi")
+        response = await client.post(url, json=payload)
+        ```
+    """
+    loop = asyncio.get_running_loop()
+    clientes = _clientes.setdefault(loop, {})
+    
+    cliente = clientes.get(nome)
+    if cliente is None or cliente.is_closed:
+        kwargs.setdefault("limits", LIMITES_PADRAO)
+        kwargs.setdefault("timeout", TIMEOUT_PADRAO)
+        cliente = httpx.AsyncClient(**kwargs)
+        clientes[nome] = cliente
+    
+    return cliente
+
+
+async def fechar_clientes_http() -> None:
+    """Fechar todos os clientes do loop atual (chamar no shutdown)"""
+    loop = asyncio.get_running_loop()
+    clientes = _clientes.pop(loop, {})
+    
+    for cliente in clientes.values():
+        await cliente.aclose()
@@ -0,0 +1,58 @@
+"""
+Pool de processos compartilhado
+Trabalho pesado de CPU (ReportLab, openpyxl, Pillow) fora do event loop
+
+Os processos filhos são criados por fork e herdariam as conexões do
+pool do SQLAlchemy do processo pai; o inicializador descarta essas
+conexões sem fechá-las (elas continuam sendo do pai).
+"""
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _inicializar_processo() -> None:
+    """Executado em cada processo filho ao iniciar"""
+    from app.core.database import engine
+    engine.dispose(close=False)
+
+
+def obter_process_pool() -> ProcessPoolExecutor:
+    """
+    Obter (ou criar) o pool de processos
+    
+    Returns:
+        ProcessPoolExecutor com PROCESS_POOL_WORKERS processos
+    """
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.PROCESS_POOL_WORKERS,
+            initializer=_inicializar_processo
+        )
+    return _pool
+
+
+async def executar_em_processo(funcao: Callable[..., Any], *args) -> Any:
+    """
+    Executar `funcao(*args)` no pool de processos e aguardar o resultado
+    
+    A função e os argumentos precisam ser serializáveis (pickle): use
+    funções de módulo e passe IDs, não objetos do ORM.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(obter_process_pool(), funcao, *args)
+
+
+def fechar_process_pool() -> None:
+    """Encerrar o pool (chamar no shutdown)"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
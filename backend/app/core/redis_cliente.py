@@ -0,0 +1,125 @@
+"""
+Cliente Redis compartilhado
+Conexão assíncrona (redis.asyncio) usada por estado compartilhado entre
+processos da API e workers
+
+Sem REDIS_URL configurado, obter_redis() devolve None e cada chamador
+usa sua alternativa em memória. Como os clientes HTTP, um cliente por
+event loop.
+
+Código síncrono (verify_token, CSRF) usa obter_redis_sincrono(): um
+cliente por processo, com pool thread-safe.
+"""
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Callable
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_clientes: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, object]" = weakref.WeakKeyDictionary()
+_cliente_sincrono = None
+_lock_sincrono = threading.Lock()
+
+
+def obter_redis():
+    """
+    Obter (ou criar) o cliente Redis do loop atual
+    
+    Returns:
+        redis.asyncio.Redis, ou None se REDIS_URL não estiver configurado
+    
+    Exemplo:
+        ```python
+        redis = obter_redis()
+        if redis is not None:
+            await redis.incr("contador")
+        ```
+    """
+    if not settings.REDIS_URL:
+        return None
+    
+    loop = asyncio.get_running_loop()
+    cliente = _clientes.get(loop)
+    if cliente is None:
+        from redis import asyncio as redis_asyncio
+        cliente = redis_asyncio.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            socket_timeout=2.0,
+            socket_connect_timeout=2.0
+        )
+        _clientes[loop] = cliente
+    return cliente
+
+
+def obter_redis_sincrono():
+    """
+    Obter (ou criar) o cliente Redis síncrono do processo
+    
+    Timeouts curtos: é chamado no caminho da autenticação.
+    
+    Returns:
+        redis.Redis, ou None se REDIS_URL não estiver configurado
+    """
+    global _cliente_sincrono
+    
+    if not settings.REDIS_URL:
+        return None
+    
+    if _cliente_sincrono is None:
+        with _lock_sincrono:
+            if _cliente_sincrono is None:
+                import redis
+                _cliente_sincrono = redis.Redis.from_url(
+                    settings.REDIS_URL,
+                    decode_responses=True,
+                    socket_timeout=0.5,
+                    socket_connect_timeout=0.5
+                )
+    return _cliente_sincrono
+
+
+async def fechar_redis() -> None:
+    """Fechar o cliente do loop atual (chamar no shutdown)"""
+    cliente = _clientes.pop(asyncio.get_running_loop(), None)
+    if cliente is not None:
+        await cliente.aclose()
+
+
+async def escutar_canal(canal: str, ao_receber: Callable[[str], None], ao_conectar: Callable[[], None]) -> None:
+    """
+    Escutar um canal pub/sub até ser cancelado (reconecta após erros)
+    
+    Args:
+        canal: Nome do canal
+        ao_receber: Chamado com o conteúdo de cada mensagem
+        ao_conectar: Chamado a cada (re)inscrição - mensagens publicadas
+            enquanto desconectado se perderam
+    """
+    while True:
+        redis = obter_redis()
+        if redis is None:
+            return
+        
+        pubsub = redis.pubsub()
+        try:
+            await pubsub.subscribe(canal)
+            ao_conectar()
+            
+            while True:
+                mensagem = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if mensagem and mensagem.get("type") == "message":
+                    ao_receber(mensagem["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Erro na escuta do canal {canal}: {e}")
+            await asyncio.sleep(5)
+        finally:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
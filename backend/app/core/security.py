@@ -6,6 +6,8 @@ from datetime import datetime, timedelta
 from typing import Optional, Union
 from jose import JWTError, jwt
 from app.core.config import settings
+from app.core.armazenamento_tokens import blacklist_tokens
+from app.core.cache_autenticacao import cache_autenticacao
 import httpx
 import logging
 import uuid
@@ -14,9 +16,6 @@ import pyotp
 
 logger = logging.getLogger(__name__)
 
-# Blacklist de tokens (em memória - para produção, usar Redis)
-_token_blacklist: set[str] = set()
-
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
@@ -95,8 +94,12 @@ def verify_token(
             logger.warning(f"Token na blacklist tentou ser usado")
             return None
         
-        # Decodificar token
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        # Decodificar token (access token já verificado fica no LRU até o exp)
+        payload = cache_autenticacao.token_verificado(token) if token_type == "access" else None
+        if payload is None:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+            if token_type == "access":
+                cache_autenticacao.guardar_token(token, payload)
         
         # Verificar tipo do token
         if payload.get("type") != token_type:
@@ -124,7 +127,10 @@ def verify_token(
 
 def blacklist_token(token: str) -> bool:
     """
-    Adicionar token à blacklist
+    Adicionar token à blacklist (até o exp do token)
+    
+    Compartilhada entre workers quando REDIS_URL está configurado
+    (ver app/core/armazenamento_tokens.py).
     
     Args:
         token: Token JWT a ser invalidado
@@ -133,7 +139,8 @@ def blacklist_token(token: str) -> bool:
         bool: True se adicionado com sucesso
     """
     try:
-        _token_blacklist.add(token)
+        blacklist_tokens.adicionar(token)
+        cache_autenticacao.remover_token(token)
         logger.info(f"Token adicionado à blacklist")
         return True
     except Exception as e:
@@ -151,14 +158,14 @@ def is_token_blacklisted(token: str) -> bool:
     Returns:
         bool: True se está na blacklist
     """
-    return token in _token_blacklist
+    return blacklist_tokens.contem(token)
 
 
 def clear_blacklist():
     """
     Limpar blacklist (útil para testes ou limpeza periódica)
     """
-    _token_blacklist.clear()
+    blacklist_tokens.limpar()
     logger.info("Blacklist limpa")
 
 
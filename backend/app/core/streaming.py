@@ -0,0 +1,141 @@
+"""
+Streaming de arquivos gerados em thread
+Ponte entre um gerador síncrono (openpyxl, reportlab) e StreamingResponse
+
+O produtor escreve em um objeto file-like (sem seek); os bytes são
+agrupados em blocos e entregues ao cliente enquanto o arquivo é gerado.
+A fila é limitada: se o cliente lê devagar, o produtor espera (memória
+constante). Se o cliente desconecta, o produtor é interrompido na
+próxima escrita.
+"""
+import asyncio
+import logging
+import queue
+import threading
+from typing import AsyncIterator, BinaryIO, Callable
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_BLOCO_PADRAO = 64 * 1024
+MAX_BLOCOS_PADRAO = 16
+
+_FIM = object()
+
+
+class TransmissaoCancelada(Exception):
+    """Cliente desconectou: o produtor deve parar"""
+    pass
+
+
+class _EscritorFila:
+    """File-like somente escrita que envia blocos para uma fila limitada"""
+    
+    def __init__(self, fila: queue.Queue, cancelado: threading.Event, tamanho_bloco: int):
+        self._fila = fila
+        self._cancelado = cancelado
+        self._tamanho_bloco = tamanho_bloco
+        self._buffer = bytearray()
+    
+    def write(self, dados) -> int:
+        if self._cancelado.is_set():
+            raise TransmissaoCancelada()
+        
+        self._buffer += dados
+        if len(self._buffer) >= self._tamanho_bloco:
+            self.enviar(bytes(self._buffer))
+            self._buffer.clear()
+        return len(dados)
+    
+    def flush(self) -> None:
+        pass
+    
+    def fechar(self) -> None:
+        """Enviar o que restou no buffer"""
+        if self._buffer:
+            self.enviar(bytes(self._buffer))
+            self._buffer.clear()
+    
+    def enviar(self, item) -> None:
+        """Colocar item na fila, esperando espaço (ou cancelamento)"""
+        while True:
+            if self._cancelado.is_set():
+                raise TransmissaoCancelada()
+            try:
+                self._fila.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+
+async def transmitir_de_thread(
+    produtor: Callable[[BinaryIO], None],
+    tamanho_bloco: int = TAMANHO_BLOCO_PADRAO,
+    max_blocos: int = MAX_BLOCOS_PADRAO
+) -> AsyncIterator[bytes]:
+    """
+    Executar `produtor(arquivo)` em uma thread e transmitir o que ele escreve
+    
+    Args:
+        produtor: Função síncrona que escreve o arquivo no file-like recebido
+        tamanho_bloco: Tamanho mínimo dos blocos enviados ao cliente
+        max_blocos: Blocos em memória antes de o produtor esperar
+    
+    Yields:
+        Blocos de bytes
+    
+    Exemplo:
+        ```python
+        return StreamingResponse(
+            transmitir_de_thread(lambda arquivo: wb.save(arquivo)),
+            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+        ```
+    
+    Erros do produtor são registrados e interrompem a transmissão (o
+    cliente recebe um download incompleto - o status já foi enviado).
+    """
+    fila: queue.Queue = queue.Queue(maxsize=max_blocos)
+    cancelado = threading.Event()
+    escritor = _EscritorFila(fila, cancelado, tamanho_bloco)
+    
+    def _executar() -> None:
+        resultado = _FIM
+        try:
+            produtor(escritor)
+            escritor.fechar()
+        except TransmissaoCancelada:
+            return
+        except Exception as e:
+            logger.error(f"Erro ao gerar arquivo para streaming: {e}")
+            resultado = e
+        try:
+            escritor.enviar(resultado)
+        except TransmissaoCancelada:
+            pass
+    
+    thread = threading.Thread(target=_executar, name="streaming-arquivo", daemon=True)
+    thread.start()
+    
+    try:
+        while True:
+            item = await asyncio.to_thread(fila.get)
+            if item is _FIM:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Cliente desconectou (ou fim normal): liberar o produtor e o
+        # fila.get que pode ter ficado pendente na thread do executor
+        # (a await cancelada não interrompe a thread)
+        cancelado.set()
+        try:
+            while True:
+                fila.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            fila.put_nowait(_FIM)
+        except queue.Full:
+            # Produtor colocou um bloco depois de esvaziar: o get pendente recebe esse
+            pass
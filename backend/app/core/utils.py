@@ -2,8 +2,13 @@
 Utilitários gerais do sistema
 Funções auxiliares para normalização, validação, etc.
 """
+import base64
+import binascii
+import json
 import unicodedata
 import re
+from datetime import datetime
+from typing import Tuple
 
 
 def normalizar_nome(nome: str) -> str:
@@ -73,3 +78,44 @@ def comparar_nomes_ignorando_acentos(nome1: str, nome2: str) -> bool:
     """
     return normalizar_nome(nome1) == normalizar_nome(nome2)
 
+
+
+def codificar_cursor(created_at: datetime, registro_id: str) -> str:
+    """
+    Gera um cursor opaco de paginação a partir de (created_at, id)
+    
+    Args:
+        created_at: Data de criação do último registro da página
+        registro_id: ID do último registro da página
+    
+    Returns:
+        str: Cursor em base64 url-safe (sem padding)
+    
+    Exemplos:
+        >>> cursor = codificar_cursor(demanda.created_at, demanda.id)
+        >>> decodificar_cursor(cursor) == (demanda.created_at, demanda.id)
+        True
+    """
+    conteudo = json.dumps([created_at.isoformat(), registro_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(conteudo.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Lê um cursor gerado por codificar_cursor
+    
+    Args:
+        cursor: Cursor recebido do cliente
+    
+    Returns:
+        Tuple[datetime, str]: (created_at, id)
+    
+    Raises:
+        ValueError: Cursor inválido ou adulterado
+    """
+    try:
+        preenchimento = '=' * (-len(cursor) % 4)
+        created_at, registro_id = json.loads(base64.urlsafe_b64decode(cursor + preenchimento))
+        return datetime.fromisoformat(created_at), str(registro_id)
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise ValueError("Cursor de paginação inválido") from e
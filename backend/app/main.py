@@ -2,13 +2,22 @@
 DeBrief API - FastAPI Application
 Sistema de Gestão de Demandas e Briefings
 """
-from fastapi import FastAPI, Request
+from typing import Optional
+from fastapi import FastAPI, Request, Depends, HTTPException, Query, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
 from pathlib import Path
+from sqlalchemy.orm import Session
 from app.core.config import settings
-from app.core.database import init_db
+from app.core.database import init_db, get_db
+from app.core.entrega_arquivos import hash_arquivo, responder_arquivo, tipo_inline
+from app.models.anexo import Anexo
+from app.services.variantes_imagem import VARIANTES, VariantesImagemService
+from app.core.http_clients import fechar_clientes_http
+from app.core.redis_cliente import fechar_redis
+from app.core.cache_autenticacao import cache_autenticacao
+from app.services.trello_cache import cache_trello
+from app.core.process_pool import fechar_process_pool
 from app.core.rate_limit import setup_rate_limiting
 from app.api.endpoints import (
     auth,
@@ -23,7 +32,8 @@ from app.api.endpoints import (
     whatsapp,
     trello_config,
     trello_etiquetas,
-    trello_webhook
+    trello_webhook,
+    outbox
 )
 
 # Criar aplicação FastAPI
@@ -43,6 +53,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Paginação por cursor (GET /api/demandas)
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Configurar Rate Limiting
@@ -70,6 +82,10 @@ async def startup_event():
     except Exception as e:
         print(f"⚠️  Aviso na inicialização do banco: {e}")
         print("⚠️  A aplicação continuará, mas funcionalidades do banco podem não estar disponíveis")
+    
+    # Invalidações de cache publicadas por outros processos
+    cache_autenticacao.iniciar_escuta()
+    cache_trello.iniciar_escuta()
 
 
 @app.on_event("shutdown")
@@ -78,6 +94,16 @@ async def shutdown_event():
     Executar no encerramento da aplicação
     """
     print("👋 Encerrando aplicação...")
+    
+    await cache_autenticacao.parar_escuta()
+    await cache_trello.parar_escuta()
+    
+    # Fechar pools HTTP compartilhados (Z-API, Trello)
+    await fechar_clientes_http()
+    await fechar_redis()
+    
+    # Encerrar pool de processos (relatórios)
+    fechar_process_pool()
 
 
 # Rotas
@@ -199,28 +225,87 @@ app.include_router(
     # Já contém prefix="/api/trello" e tags=["Webhook Trello"]
 )
 
+# Outbox - Monitoramento do worker (Admin)
+app.include_router(
+    outbox.router
+    # Já contém prefix="/api/outbox" e tags=["Outbox - Admin"]
+)
+
 
 # Servir arquivos de upload estáticos
-@app.get("/uploads/{file_path:path}", tags=["Uploads"])
-async def servir_arquivo_upload(file_path: str):
+@app.api_route("/uploads/{file_path:path}", methods=["GET", "HEAD"], tags=["Uploads"])
+async def servir_arquivo_upload(
+    file_path: str,
+    request: Request,
+    variante: Optional[str] = Query(None, description="Variante de imagem: thumb, medio ou webp"),
+    db: Session = Depends(get_db)
+):
     """
     Servir arquivos de upload
     Exemplo: /uploads/cliente_id/demanda_id/arquivo.pdf
+    
+    ETag pelo SHA-256 do conteúdo, 304 para requisições condicionais,
+    Range (206) e Content-Type pela extensão do arquivo (nunca o tipo
+    informado no upload). Blobs (caminho endereçado por conteúdo) são
+    cacheáveis como imutáveis.
+    
+    Com ?variante=, imagens são servidas reduzidas em WebP (geradas na
+    primeira requisição se ainda não existirem); outros arquivos, ou
+    imagens que não puderam ser convertidas, são servidos no original.
     """
-    upload_dir = Path(settings.UPLOAD_DIR)
-    file_full_path = upload_dir / file_path
+    upload_dir = Path(settings.UPLOAD_DIR).resolve()
+    file_full_path = (upload_dir / file_path).resolve()
     
     # Verificar se arquivo existe e está dentro do diretório de uploads
-    if not file_full_path.exists() or not str(file_full_path).startswith(str(upload_dir)):
-        from fastapi import HTTPException, status
+    try:
+        if not file_full_path.is_relative_to(upload_dir) or file_full_path.name.startswith("."):
+            raise FileNotFoundError(file_path)
+        stat_result = file_full_path.stat()
+    except OSError:
+        stat_result = None
+    if stat_result is None or not file_full_path.is_file():
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Arquivo não encontrado"
         )
     
-    return FileResponse(
-        path=file_full_path,
-        media_type='application/octet-stream'
+    # Metadados do anexo (idx_anexo_caminho)
+    caminho_relativo = file_full_path.relative_to(upload_dir).as_posix()
+    anexo = db.query(Anexo.blob_sha256, Anexo.nome_arquivo).filter(
+        Anexo.caminho == caminho_relativo
+    ).first()
+    
+    sha256 = (anexo.blob_sha256 if anexo else None) or await hash_arquivo(file_full_path, stat_result)
+    nome_arquivo = anexo.nome_arquivo if anexo else None
+    imutavel = bool(anexo and anexo.blob_sha256)
+    
+    if variante:
+        if variante not in VARIANTES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Variante inválida. Use: {', '.join(VARIANTES)}"
+            )
+        
+        caminho_variante = None
+        if VariantesImagemService.suporta(tipo_inline(file_full_path)):
+            caminho_variante = await VariantesImagemService.obter(caminho_relativo, variante)
+        if caminho_variante:
+            # Revalidada pelo ETag: mudar os tamanhos não exige trocar a URL
+            file_full_path = upload_dir / caminho_variante
+            stat_result = file_full_path.stat()
+            caminho_relativo = caminho_variante
+            sha256 = f"{sha256}-{variante}"
+            nome_arquivo = f"{Path(nome_arquivo).stem}.webp" if nome_arquivo else None
+            imutavel = False
+    
+    return responder_arquivo(
+        request,
+        caminho=file_full_path,
+        caminho_relativo=caminho_relativo,
+        stat_result=stat_result,
+        sha256=sha256,
+        nome_arquivo=nome_arquivo,
+        imutavel=imutavel
     )
 
 
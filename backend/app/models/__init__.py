@@ -13,6 +13,12 @@ Modelos disponíveis:
 - Anexo: Arquivos anexados às demandas
 - Configuracao: Configurações do sistema
 - NotificationLog: Logs de notificações enviadas
+- OutboxEvento: Fila transacional de efeitos colaterais das demandas
+- DemandaStatsDaily: Rollup diário de contagens de demandas
+- RelatorioJob: Jobs de geração assíncrona de relatórios
+- ArquivoBlob: Conteúdo deduplicado dos anexos (SHA-256)
+- TrelloWebhookEvento: Ações recebidas pelo webhook do Trello
+- TrelloListaStatus: Mapeamento lista do Trello → status da demanda
 """
 
 from app.models.base import Base, BaseModel
@@ -32,6 +38,12 @@ from app.models.configuracao_trello import ConfiguracaoTrello
 from app.models.etiqueta_trello_cliente import EtiquetaTrelloCliente
 from app.models.refresh_token import RefreshToken
 from app.models.login_attempt import LoginAttempt
+from app.models.outbox_evento import OutboxEvento, StatusOutbox
+from app.models.demanda_stats_daily import DemandaStatsDaily
+from app.models.relatorio_job import RelatorioJob, StatusRelatorioJob, FormatoRelatorio
+from app.models.arquivo_blob import ArquivoBlob
+from app.models.trello_webhook_evento import TrelloWebhookEvento, StatusWebhookTrello
+from app.models.trello_lista_status import TrelloListaStatus
 
 __all__ = [
     'Base',
@@ -56,5 +68,15 @@ __all__ = [
     'EtiquetaTrelloCliente',
     'RefreshToken',
     'LoginAttempt',
+    'OutboxEvento',
+    'StatusOutbox',
+    'DemandaStatsDaily',
+    'RelatorioJob',
+    'StatusRelatorioJob',
+    'FormatoRelatorio',
+    'ArquivoBlob',
+    'TrelloWebhookEvento',
+    'StatusWebhookTrello',
+    'TrelloListaStatus',
 ]
 
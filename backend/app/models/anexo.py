@@ -18,6 +18,7 @@ class Anexo(BaseModel):
         demanda_id (str): ID da demanda (FK)
         nome_arquivo (str): Nome original do arquivo
         caminho (str): Path no servidor ou URL
+        blob_sha256 (str): Conteúdo deduplicado em arquivos_blob (se aplicável)
         tamanho (int): Tamanho em bytes
         tipo_mime (str): Tipo MIME (ex: application/pdf)
         trello_attachment_id (str): ID do anexo no Trello (se aplicável)
@@ -58,6 +59,14 @@ class Anexo(BaseModel):
         comment="Path relativo no servidor (ex: cliente_id/demanda_id/uuid.ext)"
     )
     
+    blob_sha256 = Column(
+        String(64),
+        ForeignKey("arquivos_blob.sha256"),
+        nullable=True,
+        index=True,
+        comment="SHA-256 do conteúdo em arquivos_blob (NULL em anexos antigos)"
+    )
+    
     tamanho = Column(
         Integer,
         nullable=False,
@@ -91,6 +100,24 @@ class Anexo(BaseModel):
         """Representação do objeto"""
         return f"<Anexo(id='{self.id}', nome='{self.nome_arquivo}', tamanho={self.tamanho})>"
     
+    @property
+    def url(self):
+        """URL do arquivo original (GET /uploads/...)"""
+        return f"/uploads/{self.caminho}"
+    
+    @property
+    def variantes(self):
+        """
+        URLs das variantes reduzidas (thumb, medio, webp)
+        
+        Returns:
+            dict ou None se o anexo não for imagem
+        """
+        from app.services.variantes_imagem import VariantesImagemService
+        if not VariantesImagemService.suporta(self.tipo_mime):
+            return None
+        return VariantesImagemService.urls(self.caminho)
+    
     def to_dict_summary(self):
         """
         Retorna dicionário resumido
@@ -103,6 +130,8 @@ class Anexo(BaseModel):
             'tamanho_formatado': self.formatar_tamanho(),
             'tipo_mime': self.tipo_mime,
             'extensao': self.get_extensao(),
+            'url': self.url,
+            'variantes': self.variantes,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
     
@@ -291,6 +320,9 @@ class Anexo(BaseModel):
 from sqlalchemy import Index
 Index('ix_anexos_tipo_mime', Anexo.tipo_mime)
 
+# Índice para servir /uploads/{caminho} (tipo MIME e hash do anexo)
+Index('idx_anexo_caminho', Anexo.caminho)
+
 # ==================== VALIDAÇÕES ====================
 from sqlalchemy import event
 
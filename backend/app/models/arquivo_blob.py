@@ -0,0 +1,133 @@
+"""
+Modelo de Blob de Arquivo
+Armazenamento de anexos endereçado por conteúdo (SHA-256), com deduplicação
+"""
+import logging
+from collections import Counter
+from pathlib import Path
+from sqlalchemy import Column, String, Integer, DateTime, event, text
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from app.core.config import settings
+from app.models.base import Base
+from app.models.anexo import Anexo
+from app.services.variantes_imagem import caminhos_variantes
+
+logger = logging.getLogger(__name__)
+
+# Chaves em Session.info com arquivos a remover depois do commit/rollback
+BLOBS_REMOVER_APOS_COMMIT = "blobs_remover_apos_commit"
+BLOBS_REMOVER_APOS_ROLLBACK = "blobs_remover_apos_rollback"
+
+
+class ArquivoBlob(Base):
+    """
+    Conteúdo de arquivo armazenado uma única vez
+    
+    Vários anexos (de demandas e clientes diferentes) com o mesmo conteúdo
+    apontam para o mesmo blob. `referencias` conta os anexos e é mantido
+    pelo listener abaixo, na mesma transação que insere/exclui os anexos;
+    quando chega a zero o blob é excluído e o arquivo removido do disco
+    depois do commit.
+    
+    Campos:
+        sha256: Hash do conteúdo (chave)
+        caminho: Caminho relativo a UPLOAD_DIR (blobs/ab/cd/<sha256>-<sufixo>.ext)
+        tamanho: Tamanho em bytes
+        tipo_mime: Tipo MIME (pela extensão validada no upload)
+        referencias: Número de anexos que usam o blob
+    """
+    
+    __tablename__ = "arquivos_blob"
+    
+    sha256 = Column(String(64), primary_key=True, comment="SHA-256 do conteúdo")
+    caminho = Column(String(1000), nullable=False, comment="Caminho relativo a UPLOAD_DIR")
+    tamanho = Column(Integer, nullable=False, comment="Tamanho em bytes")
+    tipo_mime = Column(String(100), nullable=False, comment="Tipo MIME do primeiro upload")
+    referencias = Column(Integer, nullable=False, default=0, comment="Anexos que usam o blob")
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<ArquivoBlob(sha256={self.sha256[:12]}, referencias={self.referencias})>"
+
+
+# ==================== CONTAGEM DE REFERÊNCIAS ====================
+
+def remover_arquivos_blob(caminhos) -> None:
+    """Remover arquivos de blob (e variantes de imagem) do disco; falhas só são registradas"""
+    base = Path(settings.UPLOAD_DIR)
+    for caminho in caminhos:
+        try:
+            (base / caminho).unlink(missing_ok=True)
+            for variante in caminhos_variantes(caminho):
+                (base / variante).unlink(missing_ok=True)
+            logger.info(f"Blob removido do disco: {caminho}")
+        except OSError as e:
+            logger.warning(f"Não foi possível remover o blob {caminho}: {e}")
+
+
+@event.listens_for(Session, "after_flush")
+def atualizar_referencias_blobs(session, flush_context):
+    """
+    Aplicar nos blobs os anexos criados/excluídos neste flush
+    
+    Inclui anexos excluídos em cascata com a demanda. Blobs sem
+    referências são excluídos na mesma transação; os arquivos só saem
+    do disco depois do commit.
+    """
+    deltas = Counter()
+    for obj in session.new:
+        if isinstance(obj, Anexo) and obj.blob_sha256:
+            deltas[obj.blob_sha256] += 1
+    for obj in session.deleted:
+        if isinstance(obj, Anexo) and obj.blob_sha256:
+            deltas[obj.blob_sha256] -= 1
+    
+    deltas = {sha256: delta for sha256, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    
+    connection = session.connection()
+    for sha256, delta in deltas.items():
+        connection.execute(
+            text("UPDATE arquivos_blob SET referencias = referencias + :delta WHERE sha256 = :sha256"),
+            {"delta": delta, "sha256": sha256}
+        )
+    
+    liberados = [sha256 for sha256, delta in deltas.items() if delta < 0]
+    if liberados:
+        removidos = connection.execute(
+            text("""
+                DELETE FROM arquivos_blob
+                WHERE sha256 = ANY(:liberados) AND referencias <= 0
+                RETURNING caminho
+            """),
+            {"liberados": liberados}
+        ).scalars().all()
+        session.info.setdefault(BLOBS_REMOVER_APOS_COMMIT, []).extend(removidos)
+
+
+@event.listens_for(Session, "after_commit")
+def remover_blobs_apos_commit(session):
+    """Commit da transação principal: remover arquivos dos blobs excluídos"""
+    if session.in_nested_transaction():
+        return
+    session.info.pop(BLOBS_REMOVER_APOS_ROLLBACK, None)
+    caminhos = session.info.pop(BLOBS_REMOVER_APOS_COMMIT, None)
+    if caminhos:
+        remover_arquivos_blob(caminhos)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def remover_blobs_sem_commit(session, transaction):
+    """
+    Transação principal encerrada sem commit (rollback ou close)
+    
+    Os blobs novos não foram gravados no banco: remover os arquivos.
+    """
+    if transaction.parent is not None:
+        return
+    session.info.pop(BLOBS_REMOVER_APOS_COMMIT, None)
+    caminhos = session.info.pop(BLOBS_REMOVER_APOS_ROLLBACK, None)
+    if caminhos:
+        remover_arquivos_blob(caminhos)
@@ -105,16 +105,18 @@ class ConfiguracaoTrello(BaseModel):
         ).first()
     
     @classmethod
-    def desativar_todas(cls, db):
+    def desativar_todas(cls, db, commit: bool = True):
         """
         Desativa todas as configurações
         Útil antes de ativar uma nova
         
         Args:
             db: Sessão do banco
+            commit: Fazer commit (False para incluir na transação do chamador)
         """
         db.query(cls).update({"ativo": False})
-        db.commit()
+        if commit:
+            db.commit()
     
     def pode_conectar(self) -> bool:
         """
@@ -2,8 +2,9 @@
 Modelo Demanda
 Representa uma solicitação/briefing no sistema
 """
-from sqlalchemy import Column, String, Text, Enum, Date, DateTime, ForeignKey, Index, TypeDecorator
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Text, Enum, Date, DateTime, ForeignKey, Index, TypeDecorator, and_, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 import enum
 import uuid
@@ -92,6 +93,11 @@ class Demanda(BaseModel):
     # Integração Trello
     trello_card_id = Column(String(100), nullable=True, comment="ID do card no Trello")
     trello_card_url = Column(String(500), nullable=True, comment="URL do card no Trello")
+    trello_card_hash = Column(String(64), nullable=True, comment="SHA-256 dos campos do card na última sincronização")
+    
+    # Busca textual: nome, descrição, cliente e secretaria (mantido por
+    # trigger no banco - ver migration 015). Não é carregado nas consultas.
+    busca_vetor = deferred(Column(TSVECTOR, nullable=True, comment="Busca textual (mantido por trigger)"))
     
     # Status
     # Usar TypeDecorator customizado para converter entre enum Python e string do banco
@@ -131,6 +137,28 @@ class Demanda(BaseModel):
         Index('idx_demanda_usuario_status', 'usuario_id', 'status'),
         Index('idx_demanda_status_prioridade', 'status', 'prioridade_id'),
         Index('idx_demanda_prazo', 'prazo_final', 'status'),
+        # Paginação por cursor: ORDER BY created_at DESC, id DESC
+        Index('idx_demanda_created_id', 'created_at', 'id'),
+        Index('idx_demanda_usuario_created_id', 'usuario_id', 'created_at', 'id'),
+        # Filtros da listagem (mesma ordenação da paginação)
+        Index('idx_demanda_cliente_created_id', 'cliente_id', 'created_at', 'id'),
+        Index('idx_demanda_secretaria_created_id', 'secretaria_id', 'created_at', 'id'),
+        Index('idx_demanda_updated_at', 'updated_at'),
+        # Webhook/sincronização do Trello: card -> demanda (um card por demanda)
+        Index(
+            'idx_demanda_trello_card_id',
+            'trello_card_id',
+            unique=True,
+            postgresql_where=text("trello_card_id IS NOT NULL")
+        ),
+        # Atrasadas: só demandas ainda pendentes entram no índice
+        Index(
+            'idx_demanda_prazo_pendente',
+            'prazo_final',
+            postgresql_where=text("status NOT IN ('concluida', 'cancelada')")
+        ),
+        # Busca textual (o índice trigram em f_unaccent(lower(nome)) fica só na migration)
+        Index('idx_demanda_busca_vetor', 'busca_vetor', postgresql_using='gin'),
     )
     
     def __repr__(self):
@@ -143,6 +171,15 @@ class Demanda(BaseModel):
             return date.today() > self.prazo_final
         return False
     
+    @classmethod
+    def filtro_atrasada(cls):
+        """Condição SQL equivalente a is_atrasada (usa idx_demanda_prazo_pendente)"""
+        from datetime import date
+        return and_(
+            cls.prazo_final < date.today(),
+            cls.status.notin_([StatusDemanda.CONCLUIDA, StatusDemanda.CANCELADA])
+        )
+    
     def pode_editar(self, user_id: str) -> bool:
         """Verificar se usuário pode editar demanda"""
         return self.usuario_id == user_id
@@ -0,0 +1,154 @@
+"""
+Modelo de Estatísticas Diárias de Demandas
+Rollup incremental usado pelas telas de estatísticas (dashboard, cliente, secretaria)
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+from sqlalchemy import Column, String, Integer, Date, Index, event, inspect
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.base import Base
+from app.models.demanda import Demanda
+
+logger = logging.getLogger(__name__)
+
+# Secretaria é opcional em Demanda, mas não pode ser NULL na chave primária
+SEM_SECRETARIA = ""
+
+
+class DemandaStatsDaily(Base):
+    """
+    Contagem de demandas por dia de criação e dimensões
+    
+    Chave: (dia, cliente_id, secretaria_id, tipo_demanda_id, prioridade_id, status)
+    
+    Mantida incrementalmente a cada flush que cria, altera ou exclui
+    demandas (listener abaixo, na mesma transação) e reconstruída todas
+    as noites pelo worker (EstatisticasService.reconstruir_rollup).
+    
+    Campos:
+        dia: Data de criação da demanda (fuso ESTATISTICAS_TIMEZONE)
+        cliente_id: Cliente da demanda
+        secretaria_id: Secretaria da demanda ('' quando não informada)
+        tipo_demanda_id: Tipo da demanda
+        prioridade_id: Prioridade da demanda
+        status: Status atual (valor de StatusDemanda)
+        total: Número de demandas nessa combinação
+    """
+    
+    __tablename__ = "demandas_stats_daily"
+    
+    dia = Column(Date, primary_key=True)
+    cliente_id = Column(String(36), primary_key=True)
+    secretaria_id = Column(String(36), primary_key=True, default=SEM_SECRETARIA)
+    tipo_demanda_id = Column(String(36), primary_key=True)
+    prioridade_id = Column(String(36), primary_key=True)
+    status = Column(String(50), primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        Index('idx_stats_daily_cliente_dia', 'cliente_id', 'dia'),
+        Index('idx_stats_daily_secretaria', 'secretaria_id'),
+    )
+    
+    def __repr__(self):
+        return f"<DemandaStatsDaily(dia={self.dia}, status={self.status}, total={self.total})>"
+
+
+# ==================== MANUTENÇÃO INCREMENTAL ====================
+
+_DIMENSOES = ("cliente_id", "secretaria_id", "tipo_demanda_id", "prioridade_id", "status")
+
+
+def _dia(created_at) -> "datetime.date":
+    """Dia de criação no fuso do rollup (demanda recém-inserida: agora)"""
+    if created_at is None:
+        created_at = datetime.now(timezone.utc)
+    return created_at.astimezone(ZoneInfo(settings.ESTATISTICAS_TIMEZONE)).date()
+
+
+def _chave(valores: dict) -> tuple:
+    status = valores["status"]
+    return (
+        _dia(valores.get("created_at")),
+        valores["cliente_id"],
+        valores["secretaria_id"] or SEM_SECRETARIA,
+        valores["tipo_demanda_id"],
+        valores["prioridade_id"],
+        getattr(status, "value", status),
+    )
+
+
+def _valores_atuais(demanda: Demanda) -> dict:
+    estado = inspect(demanda).dict
+    valores = {campo: getattr(demanda, campo) for campo in _DIMENSOES}
+    valores["created_at"] = estado.get("created_at")
+    return valores
+
+
+def _valores_anteriores(demanda: Demanda) -> dict:
+    """Valores antes do flush (histórico dos atributos alterados)"""
+    estado = inspect(demanda)
+    valores = _valores_atuais(demanda)
+    for campo in _DIMENSOES:
+        historico = estado.attrs[campo].history
+        if historico.deleted:
+            valores[campo] = historico.deleted[0]
+    return valores
+
+
+@event.listens_for(Session, "after_flush")
+def atualizar_rollup_estatisticas(session, flush_context):
+    """
+    Aplicar no rollup os deltas das demandas criadas/alteradas/excluídas
+    
+    Executa na conexão do flush: o rollup é commitado (ou desfeito)
+    junto com a alteração da demanda.
+    """
+    if not settings.ESTATISTICAS_ROLLUP_ENABLED:
+        return
+    
+    deltas = defaultdict(int)
+    
+    try:
+        for obj in session.new:
+            if isinstance(obj, Demanda):
+                deltas[_chave(_valores_atuais(obj))] += 1
+        
+        for obj in session.deleted:
+            if isinstance(obj, Demanda):
+                deltas[_chave(_valores_anteriores(obj))] -= 1
+        
+        for obj in session.dirty:
+            if isinstance(obj, Demanda) and session.is_modified(obj, include_collections=False):
+                antes = _chave(_valores_anteriores(obj))
+                depois = _chave(_valores_atuais(obj))
+                if antes != depois:
+                    deltas[antes] -= 1
+                    deltas[depois] += 1
+    except Exception as e:
+        # Reparo noturno corrige eventuais divergências
+        logger.error(f"Erro ao calcular deltas do rollup de estatísticas: {e}")
+        return
+    
+    linhas = [
+        dict(zip(("dia",) + _DIMENSOES, chave), total=delta)
+        for chave, delta in deltas.items()
+        if delta
+    ]
+    if not linhas:
+        return
+    
+    connection = session.connection()
+    if connection.dialect.name != "postgresql":
+        return
+    
+    stmt = pg_insert(DemandaStatsDaily.__table__).values(linhas)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["dia", *_DIMENSOES],
+        set_={"total": DemandaStatsDaily.__table__.c.total + stmt.excluded.total}
+    )
+    connection.execute(stmt)
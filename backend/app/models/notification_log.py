@@ -31,6 +31,8 @@ class NotificationLog(BaseModel):
     
     Campos:
         demanda_id: ID da demanda relacionada
+        usuario_id: ID do usuário destinatário
+        evento_id: ID do evento da outbox (envios repetidos são pulados)
         tipo: Tipo de notificação (whatsapp, trello, email)
         status: Status do envio (enviado, erro, pendente)
         mensagem_erro: Mensagem de erro se houver falha
@@ -64,6 +66,21 @@ class NotificationLog(BaseModel):
         comment="ID da demanda relacionada"
     )
     
+    # Destinatário e evento da outbox (permitem retomar um envio parcial)
+    usuario_id = Column(
+        String(36),
+        ForeignKey("users.id", ondelete="SET NULL"),
+        nullable=True,
+        comment="ID do usuário destinatário"
+    )
+    
+    evento_id = Column(
+        String(36),
+        nullable=True,
+        index=True,
+        comment="ID do evento da outbox que originou o envio"
+    )
+    
     # Tipo e status
     tipo = Column(
         Enum(TipoNotificacao),
@@ -135,6 +152,8 @@ class NotificationLog(BaseModel):
         return {
             "id": self.id,
             "demanda_id": self.demanda_id,
+            "usuario_id": self.usuario_id,
+            "evento_id": self.evento_id,
             "tipo": self.tipo.value if isinstance(self.tipo, enum.Enum) else self.tipo,
             "status": self.status.value if isinstance(self.status, enum.Enum) else self.status,
             "mensagem_erro": self.mensagem_erro,
@@ -0,0 +1,202 @@
+"""
+Modelo de Evento de Outbox
+Fila transacional de efeitos colaterais (Trello, WhatsApp) das demandas
+"""
+import enum
+import json
+from datetime import timedelta
+from sqlalchemy import Column, String, Text, Integer, DateTime, Index
+from sqlalchemy.sql import func
+from app.models.base import BaseModel
+
+
+class StatusOutbox(str, enum.Enum):
+    """Status de processamento de um evento da outbox"""
+    PENDENTE = "pendente"
+    PROCESSANDO = "processando"
+    CONCLUIDO = "concluido"
+    FALHOU = "falhou"
+
+
+class OutboxEvento(BaseModel):
+    """
+    Evento de Outbox
+    
+    Gravado na MESMA transação que altera a demanda. Um processo worker
+    separado (`python -m app.workers`) reivindica os eventos pendentes com
+    `SELECT ... FOR UPDATE SKIP LOCKED` e executa o efeito correspondente
+    (criar card no Trello, enviar WhatsApp, etc) com novas tentativas.
+    
+    Campos:
+        tipo: Tipo do efeito (ex: trello_criar_card, whatsapp_nova_demanda)
+        demanda_id: ID da demanda relacionada (sem FK: sobrevive à exclusão)
+        payload: JSON com os dados necessários para executar o efeito
+        status: pendente, processando, concluido, falhou
+        tentativas: Número de tentativas já realizadas
+        proxima_tentativa_em: Quando o evento pode ser reivindicado novamente
+        bloqueado_por: Identificador do worker que reivindicou o evento
+        bloqueado_em: Momento da reivindicação (para recuperar workers mortos)
+        processado_em: Momento da conclusão
+        ultimo_erro: Mensagem do último erro
+    
+    Exemplo:
+        ```python
+        OutboxEvento.registrar(db, "trello_criar_card", demanda_id=demanda.id)
+        db.commit()  # evento e demanda são gravados juntos
+        ```
+    """
+    
+    __tablename__ = "outbox_eventos"
+    
+    tipo = Column(
+        String(50),
+        nullable=False,
+        index=True,
+        comment="Tipo do efeito colateral"
+    )
+    
+    demanda_id = Column(
+        String(36),
+        nullable=True,
+        index=True,
+        comment="ID da demanda relacionada (sem FK para sobreviver à exclusão)"
+    )
+    
+    payload = Column(
+        Text,
+        nullable=True,
+        comment="JSON com dados para executar o efeito"
+    )
+    
+    status = Column(
+        String(20),
+        nullable=False,
+        default=StatusOutbox.PENDENTE.value,
+        comment="pendente, processando, concluido, falhou"
+    )
+    
+    tentativas = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        comment="Número de tentativas já realizadas"
+    )
+    
+    proxima_tentativa_em = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        comment="Momento a partir do qual o evento pode ser processado"
+    )
+    
+    bloqueado_por = Column(
+        String(100),
+        nullable=True,
+        comment="Identificador do worker que reivindicou o evento"
+    )
+    
+    bloqueado_em = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="Momento em que o evento foi reivindicado"
+    )
+    
+    processado_em = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="Momento da conclusão do evento"
+    )
+    
+    ultimo_erro = Column(
+        Text,
+        nullable=True,
+        comment="Mensagem do último erro"
+    )
+    
+    __table_args__ = (
+        # Reivindicação: WHERE status = 'pendente' AND proxima_tentativa_em <= now()
+        Index('idx_outbox_status_proxima', 'status', 'proxima_tentativa_em'),
+    )
+    
+    def __repr__(self):
+        return f"<OutboxEvento(id={self.id}, tipo={self.tipo}, status={self.status})>"
+    
+    @property
+    def dados(self) -> dict:
+        """Payload decodificado"""
+        return json.loads(self.payload) if self.payload else {}
+    
+    @classmethod
+    def registrar(
+        cls,
+        db,
+        tipo: str,
+        demanda_id: str = None,
+        payload: dict = None,
+        atraso_segundos: int = 0
+    ) -> "OutboxEvento":
+        """
+        Adiciona um evento à sessão (SEM commit)
+        
+        O commit é responsabilidade de quem altera a demanda, garantindo
+        que evento e alteração sejam persistidos atomicamente.
+        
+        Args:
+            db: Sessão do banco
+            tipo: Tipo do efeito
+            demanda_id: ID da demanda relacionada
+            payload: Dados adicionais (serializados em JSON)
+            atraso_segundos: Atraso mínimo antes do processamento
+        
+        Returns:
+            OutboxEvento adicionado à sessão
+        """
+        evento = cls(
+            tipo=tipo,
+            demanda_id=demanda_id,
+            payload=json.dumps(payload, default=str) if payload else None,
+            status=StatusOutbox.PENDENTE.value,
+            tentativas=0,
+            # Relógio do banco: evita divergência de fuso entre app e PostgreSQL
+            proxima_tentativa_em=func.now() + timedelta(seconds=atraso_segundos)
+        )
+        db.add(evento)
+        return evento
+    
+    @classmethod
+    def registrar_coalescido(
+        cls,
+        db,
+        tipo: str,
+        demanda_id: str,
+        janela_segundos: int
+    ) -> "OutboxEvento":
+        """
+        Registrar um evento, a menos que já haja um pendente igual (SEM commit)
+        
+        Para efeitos que sempre leem o estado atual da demanda (ex:
+        trello_atualizar_card): várias edições dentro da janela viram um
+        único processamento. O evento pendente fica travado (FOR UPDATE)
+        até o commit, então o worker (SKIP LOCKED) só o reivindica depois
+        que esta alteração estiver gravada. Eventos que já falharam (em
+        backoff) não absorvem edições novas: esperariam o backoff.
+        
+        Args:
+            db: Sessão do banco
+            tipo: Tipo do efeito
+            demanda_id: ID da demanda relacionada
+            janela_segundos: Atraso do evento novo (janela de coalescência)
+        
+        Returns:
+            Evento pendente existente ou o recém-adicionado
+        """
+        pendente = db.query(cls).filter(
+            cls.tipo == tipo,
+            cls.demanda_id == demanda_id,
+            cls.status == StatusOutbox.PENDENTE.value,
+            cls.tentativas == 0
+        ).with_for_update().first()
+        
+        if pendente is not None:
+            return pendente
+        return cls.registrar(db, tipo, demanda_id=demanda_id, atraso_segundos=janela_segundos)
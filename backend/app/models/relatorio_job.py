@@ -0,0 +1,140 @@
+"""
+Modelo de Job de Relatório
+Geração assíncrona de relatórios PDF/Excel (pool de processos)
+"""
+import enum
+import json
+from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey, Index
+from app.models.base import BaseModel
+
+
+class StatusRelatorioJob(str, enum.Enum):
+    """Status de um job de relatório"""
+    PENDENTE = "pendente"
+    PROCESSANDO = "processando"
+    CONCLUIDO = "concluido"
+    ERRO = "erro"
+
+
+class FormatoRelatorio(str, enum.Enum):
+    """Formatos de relatório suportados"""
+    PDF = "pdf"
+    EXCEL = "xlsx"
+
+
+class RelatorioJob(BaseModel):
+    """
+    Job de Relatório
+    
+    Criado pelo POST /api/relatorios/jobs e executado em um processo do
+    pool (fora do event loop). O arquivo gerado fica em RELATORIOS_DIR
+    com o nome `<chave_cache>.<formato>`: pedidos com os mesmos filtros,
+    o mesmo escopo e a mesma versão dos dados reutilizam o arquivo.
+    
+    Campos:
+        usuario_id: Quem solicitou (dono do job)
+        formato: pdf ou xlsx
+        filtros: JSON com os filtros normalizados
+        chave_cache: sha256 de (formato, filtros, escopo, versão dos dados)
+        status: pendente, processando, concluido, erro
+        arquivo: Caminho do arquivo gerado
+        tamanho_bytes: Tamanho do arquivo gerado
+        iniciado_em: Início da geração
+        concluido_em: Fim da geração
+        mensagem_erro: Erro da geração
+    """
+    
+    __tablename__ = "relatorio_jobs"
+    
+    usuario_id = Column(
+        String(36),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+        comment="Usuário que solicitou o relatório"
+    )
+    
+    formato = Column(
+        String(10),
+        nullable=False,
+        comment="pdf ou xlsx"
+    )
+    
+    filtros = Column(
+        Text,
+        nullable=True,
+        comment="JSON com os filtros normalizados"
+    )
+    
+    chave_cache = Column(
+        String(64),
+        nullable=False,
+        comment="sha256 de formato, filtros, escopo e versão dos dados"
+    )
+    
+    status = Column(
+        String(20),
+        nullable=False,
+        default=StatusRelatorioJob.PENDENTE.value,
+        comment="pendente, processando, concluido, erro"
+    )
+    
+    arquivo = Column(
+        String(500),
+        nullable=True,
+        comment="Caminho do arquivo gerado"
+    )
+    
+    tamanho_bytes = Column(
+        Integer,
+        nullable=True,
+        comment="Tamanho do arquivo gerado"
+    )
+    
+    iniciado_em = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="Início da geração"
+    )
+    
+    concluido_em = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="Fim da geração"
+    )
+    
+    mensagem_erro = Column(
+        Text,
+        nullable=True,
+        comment="Erro da geração"
+    )
+    
+    __table_args__ = (
+        # Reaproveitamento: WHERE chave_cache = ? AND status IN (...)
+        Index('idx_relatorio_jobs_chave_status', 'chave_cache', 'status'),
+    )
+    
+    def __repr__(self):
+        return f"<RelatorioJob(id={self.id}, formato={self.formato}, status={self.status})>"
+    
+    @property
+    def dados_filtros(self) -> dict:
+        """Filtros decodificados"""
+        return json.loads(self.filtros) if self.filtros else {}
+    
+    def to_status_dict(self) -> dict:
+        """Resposta do endpoint de status (sem caminho interno do arquivo)"""
+        return {
+            "id": self.id,
+            "formato": self.formato,
+            "status": self.status,
+            "filtros": self.dados_filtros,
+            "tamanho_bytes": self.tamanho_bytes,
+            "criado_em": self.created_at.isoformat() if self.created_at else None,
+            "concluido_em": self.concluido_em.isoformat() if self.concluido_em else None,
+            "mensagem_erro": self.mensagem_erro,
+            "download_url": (
+                f"/api/relatorios/jobs/{self.id}/arquivo"
+                if self.status == StatusRelatorioJob.CONCLUIDO.value else None
+            ),
+        }
@@ -0,0 +1,110 @@
+"""
+Modelo de Mapeamento Lista Trello → Status
+Define qual status da demanda corresponde a cada lista do board
+"""
+from sqlalchemy import Column, String, ForeignKey, UniqueConstraint
+from app.models.base import BaseModel
+
+
+class TrelloListaStatus(BaseModel):
+    """
+    Lista do Trello mapeada para um status do DeBrief
+    
+    Quando um card é movido para a lista, o webhook muda o status da
+    demanda. Cada configuração do Trello tem seu próprio mapeamento
+    (listas de outro board têm outros IDs). Lido pelo cache do Trello
+    (cache_trello.mapa_listas).
+    
+    Atributos:
+        configuracao_id: ID da configuração do Trello
+        lista_id: ID da lista no Trello
+        lista_nome: Nome da lista (cache para exibição)
+        status: Status da demanda (StatusDemanda)
+    
+    Exemplo:
+        ```python
+        mapeamento = TrelloListaStatus(
+            configuracao_id=config.id,
+            lista_id="68b82f29...",
+            lista_nome="EM DESENVOLVIMENTO",
+            status=StatusDemanda.EM_ANDAMENTO.value
+        )
+        ```
+    """
+    
+    __tablename__ = "trello_listas_status"
+    
+    configuracao_id = Column(
+        String(36),
+        ForeignKey('configuracoes_trello.id', ondelete='CASCADE'),
+        nullable=False,
+        comment="ID da configuração do Trello"
+    )
+    
+    lista_id = Column(
+        String(100),
+        nullable=False,
+        comment="ID da lista no Trello"
+    )
+    
+    lista_nome = Column(
+        String(200),
+        nullable=True,
+        comment="Nome da lista (cache)"
+    )
+    
+    status = Column(
+        String(50),
+        nullable=False,
+        comment="Status da demanda correspondente"
+    )
+    
+    __table_args__ = (
+        UniqueConstraint('configuracao_id', 'lista_id', name='uq_trello_lista_status_config_lista'),
+    )
+    
+    def __repr__(self):
+        return f"<TrelloListaStatus(lista={self.lista_nome or self.lista_id}, status={self.status})>"
+    
+    @classmethod
+    def mapa(cls, db, configuracao_id: str) -> dict:
+        """
+        Mapeamento lista_id → status de uma configuração
+        
+        Args:
+            db: Sessão do banco
+            configuracao_id: ID da configuração do Trello
+        
+        Returns:
+            Dicionário {lista_id: status}
+        """
+        return dict(
+            db.query(cls.lista_id, cls.status).filter(
+                cls.configuracao_id == configuracao_id
+            ).all()
+        )
+    
+    @classmethod
+    def copiar(cls, db, origem_id: str, destino_id: str) -> int:
+        """
+        Copia o mapeamento de uma configuração para outra (sem commit)
+        
+        Args:
+            db: Sessão do banco
+            origem_id: ID da configuração de origem
+            destino_id: ID da configuração de destino
+        
+        Returns:
+            Número de listas copiadas
+        """
+        itens = db.query(cls).filter(cls.configuracao_id == origem_id).all()
+        db.add_all([
+            cls(
+                configuracao_id=destino_id,
+                lista_id=item.lista_id,
+                lista_nome=item.lista_nome,
+                status=item.status
+            )
+            for item in itens
+        ])
+        return len(itens)
@@ -0,0 +1,123 @@
+"""
+Modelo de Evento de Webhook do Trello
+Fila de ações recebidas do Trello, processadas pelo worker
+"""
+import enum
+from sqlalchemy import Column, String, Text, DateTime, Index
+from app.models.base import BaseModel
+
+
+class StatusWebhookTrello(str, enum.Enum):
+    """Status de processamento de uma ação do Trello"""
+    PENDENTE = "pendente"
+    APLICADO = "aplicado"
+    IGNORADO = "ignorado"
+    FALHOU = "falhou"
+
+
+class TrelloWebhookEvento(BaseModel):
+    """
+    Ação do Trello recebida pelo webhook
+    
+    O endpoint só grava a ação e responde; o worker (`python -m app.workers`)
+    aplica as pendentes em lote. `action_id` é único: reenvios do Trello
+    da mesma ação são descartados na inserção.
+    
+    Campos:
+        action_id: ID da ação no Trello (único)
+        tipo: Tipo da ação (ex: updateCard)
+        card_id: ID do card
+        lista_antes_id: Lista de origem (movimentação)
+        lista_depois_id: Lista de destino (movimentação)
+        lista_depois_nome: Nome da lista de destino (para logs)
+        data_acao: Momento da ação no Trello (ordena ações do mesmo card)
+        status: pendente, aplicado, ignorado, falhou
+        resultado: Motivo/resultado do processamento (ex: coalescido)
+        processado_em: Momento do processamento
+        ultimo_erro: Mensagem de erro (status falhou)
+    
+    Exemplo:
+        ```python
+        TrelloWebhookService.registrar(db, payload["action"])
+        ```
+    """
+    
+    __tablename__ = "trello_webhook_eventos"
+    
+    action_id = Column(
+        String(64),
+        nullable=False,
+        unique=True,
+        comment="ID da ação no Trello"
+    )
+    
+    tipo = Column(
+        String(50),
+        nullable=False,
+        comment="Tipo da ação (ex: updateCard)"
+    )
+    
+    card_id = Column(
+        String(100),
+        nullable=True,
+        comment="ID do card no Trello"
+    )
+    
+    lista_antes_id = Column(
+        String(100),
+        nullable=True,
+        comment="Lista de origem"
+    )
+    
+    lista_depois_id = Column(
+        String(100),
+        nullable=True,
+        comment="Lista de destino"
+    )
+    
+    lista_depois_nome = Column(
+        String(200),
+        nullable=True,
+        comment="Nome da lista de destino"
+    )
+    
+    data_acao = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="Momento da ação no Trello"
+    )
+    
+    status = Column(
+        String(20),
+        nullable=False,
+        default=StatusWebhookTrello.PENDENTE.value,
+        comment="pendente, aplicado, ignorado, falhou"
+    )
+    
+    resultado = Column(
+        String(50),
+        nullable=True,
+        comment="Resultado do processamento"
+    )
+    
+    processado_em = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="Momento do processamento"
+    )
+    
+    ultimo_erro = Column(
+        Text,
+        nullable=True,
+        comment="Mensagem de erro"
+    )
+    
+    __table_args__ = (
+        # Reivindicação: WHERE status = 'pendente' ORDER BY created_at
+        Index('idx_trello_webhook_status_created', 'status', 'created_at'),
+        # Ações já aplicadas de um card (descartar ações atrasadas)
+        Index('idx_trello_webhook_card_data', 'card_id', 'data_acao'),
+    )
+    
+    def __repr__(self):
+        return f"<TrelloWebhookEvento(action_id={self.action_id}, tipo={self.tipo}, status={self.status})>"
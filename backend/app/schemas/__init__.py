@@ -47,6 +47,8 @@ from app.schemas.demanda import (
     DemandaCreate,
     DemandaUpdate,
     DemandaFilter,
+    DemandaBuscaItem,
+    DemandaBuscaResponse,
     DemandaResponse,
     DemandaDetalhada,
     DemandaListResponse,
@@ -73,6 +75,10 @@ from app.schemas.configuracao import (
     TesteConexaoResponse,
 )
 
+from app.schemas.relatorio import (
+    RelatorioJobCreate,
+)
+
 __all__ = [
     # User
     "UserLogin",
@@ -109,6 +115,8 @@ __all__ = [
     "DemandaCreate",
     "DemandaUpdate",
     "DemandaFilter",
+    "DemandaBuscaItem",
+    "DemandaBuscaResponse",
     "DemandaResponse",
     "DemandaDetalhada",
     "DemandaListResponse",
@@ -129,5 +137,7 @@ __all__ = [
     "ConfiguracaoResponseSimples",
     "ConfiguracaoPorTipo",
     "TesteConexaoResponse",
+    # Relatorio
+    "RelatorioJobCreate",
 ]
 
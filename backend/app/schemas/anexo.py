@@ -3,7 +3,7 @@ Schemas Pydantic para Anexo
 Validação de entrada/saída de dados
 """
 from pydantic import BaseModel, Field, validator
-from typing import Optional
+from typing import Dict, Optional
 from datetime import datetime
 
 
@@ -65,6 +65,8 @@ class AnexoResponse(AnexoBase):
     id: str
     demanda_id: str
     caminho: str
+    url: Optional[str] = None
+    variantes: Optional[Dict[str, str]] = Field(None, description="URLs das variantes de imagem (thumb, medio, webp)")
     created_at: datetime
     
     class Config:
@@ -2,10 +2,11 @@
 Schemas Pydantic para Configuração Trello
 Define modelos de validação para API de configuração do Trello
 """
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, validator
+from typing import List, Optional
 from datetime import datetime
 import uuid
+from app.schemas.demanda import StatusDemanda
 
 
 # ==================== CREATE ====================
@@ -93,6 +94,42 @@ class ConfiguracaoTrelloTest(BaseModel):
     board_id: Optional[str] = Field(None, description="ID do Board (opcional)")
 
 
+# ==================== MAPEAMENTO LISTA → STATUS ====================
+
+class TrelloListaStatusItem(BaseModel):
+    """Lista do Trello e o status da demanda correspondente"""
+    lista_id: str = Field(..., min_length=1, description="ID da lista no Trello")
+    lista_nome: Optional[str] = Field(None, description="Nome da lista (cache)")
+    status: StatusDemanda
+    
+    class Config:
+        from_attributes = True
+
+
+class TrelloListasStatusUpdate(BaseModel):
+    """
+    Schema para substituir o mapeamento de listas de uma configuração
+    
+    Exemplo:
+        ```json
+        {
+            "listas": [
+                {"lista_id": "6810f401...", "lista_nome": "ENVIOS DOS CLIENTES VIA DEBRIEF", "status": "aberta"},
+                {"lista_id": "68b82f29...", "lista_nome": "EM DESENVOLVIMENTO", "status": "em_andamento"}
+            ]
+        }
+        ```
+    """
+    listas: List[TrelloListaStatusItem]
+    
+    @validator('listas')
+    def listas_unicas(cls, v):
+        ids = [item.lista_id for item in v]
+        if len(ids) != len(set(ids)):
+            raise ValueError('Cada lista só pode ser mapeada uma vez')
+        return v
+
+
 # ==================== AUXILIARES ====================
 
 class TrelloBoardInfo(BaseModel):
@@ -62,12 +62,26 @@ class DemandaUpdate(BaseModel):
 
 
 class DemandaFilter(BaseModel):
-    """Schema para filtrar demandas"""
-    status: Optional[StatusDemanda] = None
-    prioridade: Optional[PrioridadeDemanda] = None
+    """
+    Schema para filtrar demandas (GET /api/demandas)
+    
+    Listas aceitam vários valores (combinados com OR); filtros diferentes
+    são combinados com AND. Intervalos de datas são inclusivos.
+    """
+    status: Optional[List[StatusDemanda]] = None
+    prioridade: Optional[str] = None
     usuario_id: Optional[str] = None
-    secretaria_id: Optional[str] = None
-    tipo_demanda_id: Optional[str] = None
+    cliente_id: Optional[List[str]] = None
+    secretaria_id: Optional[List[str]] = None
+    tipo_demanda_id: Optional[List[str]] = None
+    prioridade_id: Optional[List[str]] = None
+    prazo_de: Optional[date] = None
+    prazo_ate: Optional[date] = None
+    atrasadas: bool = False
+    criado_de: Optional[date] = None
+    criado_ate: Optional[date] = None
+    atualizado_de: Optional[date] = None
+    atualizado_ate: Optional[date] = None
     skip: int = Field(0, ge=0)
     limit: int = Field(20, ge=1, le=100)
 
@@ -159,6 +173,19 @@ class DemandaDetalhada(DemandaResponse):
         from_attributes = True
 
 
+class DemandaBuscaItem(DemandaDetalhada):
+    """Resultado da busca textual (com relevância)"""
+    relevancia: float = 0.0
+
+
+class DemandaBuscaResponse(BaseModel):
+    """Resposta paginada da busca textual de demandas"""
+    items: List[DemandaBuscaItem]
+    total: int
+    skip: int
+    limit: int
+
+
 class DemandaListResponse(BaseModel):
     """Schema para lista de demandas com paginação"""
     items: List[DemandaResponse]
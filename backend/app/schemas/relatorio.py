@@ -0,0 +1,20 @@
+"""
+Schemas Pydantic para Relatórios
+Validação de entrada/saída de dados
+"""
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from app.models.relatorio_job import FormatoRelatorio
+
+
+class RelatorioJobCreate(BaseModel):
+    """
+    Schema para solicitar um relatório assíncrono
+    """
+    formato: FormatoRelatorio = Field(..., description="pdf ou xlsx")
+    cliente_id: Optional[str] = Field(None, description="Filtrar por cliente")
+    secretaria_id: Optional[List[str]] = Field(None, description="Filtrar por secretaria (múltipla escolha)")
+    tipo_demanda_id: Optional[List[str]] = Field(None, description="Filtrar por tipo (múltipla escolha)")
+    status: Optional[str] = Field(None, description="Filtrar por status")
+    data_inicio: Optional[str] = Field(None, description="Data início (YYYY-MM-DD)")
+    data_fim: Optional[str] = Field(None, description="Data fim (YYYY-MM-DD)")
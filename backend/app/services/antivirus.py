@@ -0,0 +1,247 @@
+"""
+Serviço de Antivírus
+
+Verificação de uploads sem bloquear o event loop:
+
+- backend "clamd" (recomendado): envia o arquivo ao daemon clamd pelo
+  protocolo INSTREAM, via socket Unix ou TCP (ANTIVIRUS_CLAMD_ADDRESS). O
+  daemon já tem as assinaturas carregadas: cada verificação leva milissegundos.
+- backend "comando" (padrão, compatível com a configuração anterior):
+  executa ANTIVIRUS_COMMAND (ex.: clamscan) como subprocesso assíncrono.
+
+Vereditos (limpo/infectado) ficam em cache por SHA-256 do conteúdo
+durante ANTIVIRUS_CACHE_TTL_SECONDS: o mesmo arquivo enviado de novo não
+é verificado outra vez. Erros de comunicação nunca entram no cache.
+
+Para desenvolvimento há um daemon de teste em `backend/clamd_stub.py`.
+
+Autor: DeBrief Sistema
+"""
+import asyncio
+import logging
+import shlex
+import struct
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+import aiofiles
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bloco enviado por mensagem INSTREAM (deve ser menor que StreamMaxLength do clamd)
+TAMANHO_BLOCO_INSTREAM = 256 * 1024
+
+
+class AntivirusIndisponivel(Exception):
+    """Não foi possível verificar o arquivo (daemon fora do ar, timeout, erro)"""
+    pass
+
+
+class Veredito:
+    """Resultado de uma verificação"""
+    
+    def __init__(self, limpo: bool, assinatura: Optional[str] = None):
+        self.limpo = limpo
+        self.assinatura = assinatura
+    
+    def __repr__(self):
+        return "<Veredito(limpo)>" if self.limpo else f"<Veredito(infectado={self.assinatura})>"
+
+
+class _CacheVereditos:
+    """LRU com expiração: SHA-256 -> (Veredito, instante)"""
+    
+    def __init__(self, tamanho_maximo: int, ttl_segundos: float):
+        self._itens: "OrderedDict[str, Tuple[Veredito, float]]" = OrderedDict()
+        self._tamanho_maximo = tamanho_maximo
+        self._ttl = ttl_segundos
+    
+    def obter(self, sha256: str) -> Optional[Veredito]:
+        item = self._itens.get(sha256)
+        if item is None:
+            return None
+        veredito, instante = item
+        if time.monotonic() - instante > self._ttl:
+            del self._itens[sha256]
+            return None
+        self._itens.move_to_end(sha256)
+        return veredito
+    
+    def guardar(self, sha256: str, veredito: Veredito) -> None:
+        if self._tamanho_maximo <= 0:
+            return
+        self._itens[sha256] = (veredito, time.monotonic())
+        self._itens.move_to_end(sha256)
+        while len(self._itens) > self._tamanho_maximo:
+            self._itens.popitem(last=False)
+    
+    def limpar(self) -> None:
+        self._itens.clear()
+
+
+class ScannerAntivirus:
+    """
+    Verificação assíncrona de arquivos com cache de vereditos
+    
+    Exemplo de uso:
+        ```python
+        veredito = await obter_scanner().verificar(caminho, sha256)
+        if not veredito.limpo:
+            print(f"Infectado: {veredito.assinatura}")
+        ```
+    """
+    
+    def __init__(
+        self,
+        backend: str = "comando",
+        endereco: str = "unix:///var/run/clamav/clamd.ctl",
+        comando: str = "clamscan --no-summary --stdout",
+        timeout: float = 30.0,
+        cache_tamanho: int = 10000,
+        cache_ttl: float = 86400
+    ):
+        self.backend = backend
+        self.endereco = endereco
+        self.comando = comando
+        self.timeout = timeout
+        self.cache = _CacheVereditos(cache_tamanho, cache_ttl)
+    
+    async def verificar(self, caminho: Path, sha256: Optional[str] = None) -> Veredito:
+        """
+        Verificar um arquivo
+        
+        Args:
+            caminho: Arquivo a verificar
+            sha256: Hash do conteúdo (habilita o cache de vereditos)
+        
+        Returns:
+            Veredito
+        
+        Raises:
+            AntivirusIndisponivel: Se a verificação não pôde ser feita
+        """
+        if sha256:
+            veredito = self.cache.obter(sha256)
+            if veredito is not None:
+                logger.info(f"Veredito do antivírus em cache para {sha256[:12]}: {veredito}")
+                return veredito
+        
+        try:
+            if self.backend == "comando":
+                veredito = await asyncio.wait_for(self._verificar_comando(caminho), self.timeout)
+            else:
+                veredito = await asyncio.wait_for(self._verificar_clamd(caminho), self.timeout)
+        except asyncio.TimeoutError:
+            raise AntivirusIndisponivel(f"Tempo limite do antivírus excedido ({self.timeout:.0f}s)")
+        except OSError as e:
+            raise AntivirusIndisponivel(f"Erro de comunicação com o antivírus: {e}")
+        
+        if sha256:
+            self.cache.guardar(sha256, veredito)
+        return veredito
+    
+    async def _conectar(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """Abrir conexão com o clamd (unix:///caminho ou tcp://host:porta)"""
+        if self.endereco.startswith("unix://"):
+            return await asyncio.open_unix_connection(self.endereco[len("unix://"):])
+        
+        endereco = self.endereco[len("tcp://"):] if self.endereco.startswith("tcp://") else self.endereco
+        host, _, porta = endereco.rpartition(":")
+        return await asyncio.open_connection(host, int(porta))
+    
+    async def _verificar_clamd(self, caminho: Path) -> Veredito:
+        """
+        Protocolo INSTREAM do clamd
+        
+        zINSTREAM\\0, depois blocos <tamanho uint32 big-endian><dados> e um
+        bloco de tamanho zero. Resposta: "stream: OK", "stream: <nome> FOUND"
+        ou "... ERROR", terminada em \\0.
+        """
+        reader, writer = await self._conectar()
+        try:
+            writer.write(b"zINSTREAM\0")
+            async with aiofiles.open(caminho, "rb") as arquivo:
+                while True:
+                    bloco = await arquivo.read(TAMANHO_BLOCO_INSTREAM)
+                    if not bloco:
+                        break
+                    writer.write(struct.pack(">I", len(bloco)) + bloco)
+                    # Respeitar o ritmo do daemon (memória constante)
+                    await writer.drain()
+            writer.write(struct.pack(">I", 0))
+            await writer.drain()
+            
+            resposta = (await reader.readuntil(b"\0")).rstrip(b"\0").decode("utf-8", "replace").strip()
+        except asyncio.IncompleteReadError as e:
+            resposta = e.partial.decode("utf-8", "replace").strip()
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+        
+        return self._interpretar_clamd(resposta)
+    
+    @staticmethod
+    def _interpretar_clamd(resposta: str) -> Veredito:
+        """Converter a resposta do clamd em Veredito"""
+        if resposta.endswith("OK"):
+            return Veredito(limpo=True)
+        if resposta.endswith("FOUND"):
+            assinatura = resposta.split(":", 1)[-1].strip()[:-len("FOUND")].strip()
+            return Veredito(limpo=False, assinatura=assinatura)
+        # "INSTREAM size limit exceeded. ERROR" etc.
+        raise AntivirusIndisponivel(f"Resposta do clamd: {resposta or '(vazia)'}")
+    
+    async def _verificar_comando(self, caminho: Path) -> Veredito:
+        """Executar ANTIVIRUS_COMMAND (código 0 = limpo, 1 = infectado)"""
+        cmd = shlex.split(self.comando) + [str(caminho)]
+        try:
+            processo = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+        except FileNotFoundError:
+            raise AntivirusIndisponivel(f"Comando antivírus não encontrado: {self.comando}")
+        
+        try:
+            stdout, stderr = await processo.communicate()
+        except asyncio.CancelledError:
+            # Timeout (wait_for) ou cancelamento: matar e recolher o processo
+            processo.kill()
+            await processo.wait()
+            raise
+        
+        saida = (stdout or stderr).decode("utf-8", "replace").strip()
+        if processo.returncode == 0:
+            return Veredito(limpo=True)
+        if processo.returncode == 1:
+            return Veredito(limpo=False, assinatura=saida.splitlines()[0] if saida else None)
+        raise AntivirusIndisponivel(f"Antivírus retornou código {processo.returncode}: {saida}")
+
+
+_scanner: Optional[ScannerAntivirus] = None
+
+
+def obter_scanner() -> ScannerAntivirus:
+    """
+    Scanner compartilhado pelo processo (o cache vale para todas as requisições)
+    
+    Returns:
+        ScannerAntivirus configurado pelas settings ANTIVIRUS_*
+    """
+    global _scanner
+    if _scanner is None:
+        _scanner = ScannerAntivirus(
+            backend=settings.ANTIVIRUS_BACKEND,
+            endereco=settings.ANTIVIRUS_CLAMD_ADDRESS,
+            comando=settings.ANTIVIRUS_COMMAND,
+            timeout=settings.ANTIVIRUS_TIMEOUT_SECONDS,
+            cache_tamanho=settings.ANTIVIRUS_CACHE_SIZE,
+            cache_ttl=settings.ANTIVIRUS_CACHE_TTL_SECONDS
+        )
+    return _scanner
@@ -0,0 +1,159 @@
+"""
+Serviço de Armazenamento de Anexos
+
+Armazenamento endereçado por conteúdo: cada conteúdo distinto é gravado
+uma única vez em UPLOAD_DIR/blobs/ab/cd/<sha256>-<sufixo>.ext e os
+anexos apontam para ele (Anexo.blob_sha256).
+
+Fluxo de um upload:
+1. O SHA-256 é calculado lendo o buffer temporário do upload
+   (UploadService.calcular_hash) - nada é gravado no diretório de uploads
+2. Se o blob já existe (e o arquivo está no disco), o upload vira apenas
+   um novo registro de Anexo
+3. Senão o arquivo é gravado (temporário + os.replace) e o blob é
+   inserido; se outro upload simultâneo inseriu o mesmo conteúdo antes,
+   a cópia gravada aqui é descartada
+
+A contagem de referências é feita pelo listener de ArquivoBlob a cada
+flush de anexos; blobs sem referências têm o arquivo removido depois do
+commit.
+
+Autor: DeBrief Sistema
+"""
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from fastapi import UploadFile
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.models.arquivo_blob import ArquivoBlob, BLOBS_REMOVER_APOS_ROLLBACK, remover_arquivos_blob
+from app.services.upload import UploadService, tipo_mime_extensao
+
+logger = logging.getLogger(__name__)
+
+# Blobs sem nenhum anexo (upload cujo anexo não chegou a ser criado)
+# são coletados depois deste prazo
+RETENCAO_BLOB_ORFAO = timedelta(hours=24)
+
+
+class ArmazenamentoService:
+    """
+    Armazenar anexos com deduplicação por SHA-256
+    
+    Exemplo de uso:
+        ```python
+        blob = await ArmazenamentoService(db).armazenar(file)
+        db.add(Anexo(
+            demanda_id=demanda.id,
+            nome_arquivo=file.filename,
+            caminho=blob.caminho,
+            tamanho=blob.tamanho,
+            tipo_mime=tipo_mime_extensao(blob.caminho.rsplit(".", 1)[-1]),
+            blob_sha256=blob.sha256
+        ))
+        db.commit()
+        ```
+    """
+    
+    def __init__(self, db: Session, upload_service: Optional[UploadService] = None):
+        self.db = db
+        self.upload_service = upload_service or UploadService()
+    
+    @staticmethod
+    def caminho_blob(sha256: str, ext: str) -> str:
+        """
+        Caminho relativo de um novo blob
+        
+        O sufixo aleatório garante que um blob recriado logo depois de
+        excluído nunca use o arquivo que está sendo removido.
+        """
+        return f"blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}-{uuid.uuid4().hex[:8]}.{ext}"
+    
+    def _blob_existente(self, sha256: str) -> Optional[ArquivoBlob]:
+        """
+        Blob com o conteúdo, travado até o fim da transação (FOR SHARE)
+        
+        A trava impede que o blob seja excluído (última referência
+        removida em outra transação) antes de o novo anexo ser gravado.
+        """
+        return self.db.query(ArquivoBlob).filter(
+            ArquivoBlob.sha256 == sha256
+        ).with_for_update(read=True).populate_existing().first()
+    
+    async def armazenar(self, file: UploadFile) -> ArquivoBlob:
+        """
+        Obter o blob do conteúdo enviado, gravando-o só se for novo
+        
+        Args:
+            file: Arquivo enviado (FastAPI UploadFile)
+        
+        Returns:
+            ArquivoBlob (use sha256/caminho/tamanho no Anexo)
+        
+        Raises:
+            HTTPException: Se validação falhar ou erro ao salvar
+        """
+        ext, tamanho, sha256 = await self.upload_service.calcular_hash(file)
+        tipo_mime = tipo_mime_extensao(ext)
+        
+        with self.db.begin_nested():
+            blob = self._blob_existente(sha256)
+            if blob and self.upload_service.get_file_info(blob.caminho)["exists"]:
+                logger.info(f"Conteúdo já armazenado ({sha256[:12]}): {file.filename} sem gravação")
+                return blob
+            
+            if blob:
+                # Registro sem arquivo (disco restaurado sem ele): regravar
+                logger.warning(f"Arquivo do blob {sha256[:12]} ausente no disco; regravando")
+                await self.upload_service.gravar(file, blob.caminho, ext)
+                return blob
+            
+            arquivo = await self.upload_service.gravar(file, self.caminho_blob(sha256, ext), ext)
+            try:
+                inserido = self.db.execute(
+                    pg_insert(ArquivoBlob.__table__).values(
+                        sha256=sha256,
+                        caminho=arquivo.caminho,
+                        tamanho=tamanho,
+                        tipo_mime=tipo_mime,
+                        referencias=0
+                    ).on_conflict_do_nothing(index_elements=["sha256"]).returning(ArquivoBlob.sha256)
+                ).scalar()
+            except Exception:
+                remover_arquivos_blob([arquivo.caminho])
+                raise
+            
+            if inserido:
+                # Se a transação não for commitada, o arquivo é removido
+                self.db.info.setdefault(BLOBS_REMOVER_APOS_ROLLBACK, []).append(arquivo.caminho)
+                logger.info(f"Novo blob {sha256[:12]}: {file.filename} ({tamanho} bytes)")
+            else:
+                # Upload simultâneo do mesmo conteúdo venceu: usar o dele
+                remover_arquivos_blob([arquivo.caminho])
+            
+            return self._blob_existente(sha256)
+    
+    def coletar_orfaos(self, retencao: timedelta = RETENCAO_BLOB_ORFAO) -> int:
+        """
+        Excluir blobs sem anexos há mais que `retencao` (e seus arquivos)
+        
+        Returns:
+            Número de blobs removidos
+        """
+        limite = datetime.now(timezone.utc) - retencao
+        caminhos = self.db.execute(
+            text("""
+                DELETE FROM arquivos_blob b
+                WHERE b.referencias <= 0
+                  AND b.created_at < :limite
+                  AND NOT EXISTS (SELECT 1 FROM anexos a WHERE a.blob_sha256 = b.sha256)
+                RETURNING b.caminho
+            """),
+            {"limite": limite}
+        ).scalars().all()
+        self.db.commit()
+        
+        remover_arquivos_blob(caminhos)
+        return len(caminhos)
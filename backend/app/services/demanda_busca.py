@@ -0,0 +1,115 @@
+"""
+Busca textual de demandas
+
+Busca em nome, descrição e nomes do cliente e da secretaria, sem
+diferenciar acentos ("saude" encontra "Saúde"), usando a estrutura
+criada na migration 015:
+
+- demandas.busca_vetor (tsvector, configuração pt_unaccent) com índice GIN:
+  palavras completas com radical em português ("campanhas" -> "campanha")
+- f_unaccent(lower(nome)) com índice trigram (pg_trgm): trechos de
+  palavras no nome ("vacin" -> "Campanha de vacinação")
+
+A relevância soma ts_rank_cd (pesos: nome > descrição > cliente/secretaria)
+e a similaridade trigram do nome.
+
+Autor: DeBrief Sistema
+"""
+from typing import List, Optional, Tuple
+from sqlalchemy import func, literal, or_
+from sqlalchemy.orm import Session, joinedload
+from app.models.demanda import Demanda
+
+# Configuração de texto criada na migration (português + unaccent)
+CONFIG_BUSCA = "pt_unaccent"
+
+TAMANHO_MINIMO_TERMO = 2
+
+
+class DemandaBuscaService:
+    """
+    Busca ranqueada de demandas no escopo do usuário
+    
+    Exemplo de uso:
+        ```python
+        service = DemandaBuscaService(db)
+        resultados, total = service.buscar("vacinação", usuario_id=None, skip=0, limit=20)
+        for demanda, relevancia in resultados:
+            ...
+        ```
+    """
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    @staticmethod
+    def _escapar_like(termo: str) -> str:
+        """Escapar curingas do LIKE (o termo é literal; \\ é o escape padrão do PostgreSQL)"""
+        return termo.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    
+    def _condicoes(self, termo: str):
+        """(condição de busca, expressão de relevância) para o termo"""
+        consulta = func.websearch_to_tsquery(CONFIG_BUSCA, termo)
+        nome_normalizado = func.f_unaccent(func.lower(Demanda.nome))
+        termo_normalizado = func.f_unaccent(func.lower(literal(termo)))
+        padrao = func.f_unaccent(func.lower(literal(f"%{self._escapar_like(termo)}%")))
+        
+        condicao = or_(
+            Demanda.busca_vetor.bool_op("@@")(consulta),
+            nome_normalizado.like(padrao)
+        )
+        relevancia = (
+            func.coalesce(func.ts_rank_cd(Demanda.busca_vetor, consulta), 0)
+            + func.similarity(nome_normalizado, termo_normalizado)
+        )
+        return condicao, relevancia
+    
+    def buscar(
+        self,
+        termo: str,
+        usuario_id: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 20
+    ) -> Tuple[List[Tuple[Demanda, float]], int]:
+        """
+        Buscar demandas pelo termo
+        
+        Args:
+            termo: Texto digitado pelo usuário (aceita "aspas", OR e -exclusão)
+            usuario_id: Restringir às demandas do usuário (não master)
+            skip: Resultados para pular
+            limit: Máximo de resultados
+        
+        Returns:
+            ([(demanda, relevancia), ...], total de resultados)
+        
+        Raises:
+            ValueError: Se o termo for curto demais
+        """
+        termo = " ".join((termo or "").split())
+        if len(termo) < TAMANHO_MINIMO_TERMO:
+            raise ValueError(f"O termo de busca deve ter ao menos {TAMANHO_MINIMO_TERMO} caracteres")
+        
+        condicao, relevancia = self._condicoes(termo)
+        
+        base = self.db.query(Demanda).filter(condicao)
+        if usuario_id:
+            base = base.filter(Demanda.usuario_id == usuario_id)
+        
+        total = base.order_by(None).count()
+        if total == 0:
+            return [], 0
+        
+        linhas = base.with_entities(Demanda, relevancia.label("relevancia")).options(
+            joinedload(Demanda.cliente),
+            joinedload(Demanda.secretaria),
+            joinedload(Demanda.tipo_demanda),
+            joinedload(Demanda.prioridade),
+            joinedload(Demanda.usuario)
+        ).order_by(
+            relevancia.desc(),
+            Demanda.created_at.desc(),
+            Demanda.id.desc()
+        ).offset(skip).limit(limit).all()
+        
+        return [(demanda, float(valor or 0)) for demanda, valor in linhas], total
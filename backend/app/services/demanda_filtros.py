@@ -0,0 +1,118 @@
+"""
+Filtros da listagem de demandas
+
+Aplica um DemandaFilter a uma query de Demanda. Cada filtro vira uma
+condição simples sobre colunas de `demandas` (sem JOIN), para o
+planejador usar os índices compostos do modelo:
+
+- cliente_id / secretaria_id: idx_demanda_*_created_id (mesma ordenação
+  da paginação por cursor: created_at DESC, id DESC)
+- status, tipo_demanda_id, prioridade_id: índices das FKs / status
+- prazo: idx_demanda_prazo; atrasadas: idx_demanda_prazo_pendente (parcial)
+- atualizado: idx_demanda_updated_at
+
+Os planos podem ser conferidos em um banco real com
+`python explain_demandas_filtros.py`.
+
+Autor: DeBrief Sistema
+"""
+from datetime import timedelta
+from typing import Optional
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Query
+from app.models.demanda import Demanda, StatusDemanda
+from app.models.prioridade import Prioridade
+from app.schemas.demanda import DemandaFilter
+
+
+class DemandaFiltroService:
+    """
+    Filtros server-side de GET /api/demandas
+    
+    Exemplo de uso:
+        ```python
+        filtros = DemandaFilter(cliente_id=["..."], atrasadas=True)
+        query = DemandaFiltroService.aplicar(db.query(Demanda), filtros)
+        ```
+    """
+    
+    @staticmethod
+    def validar(filtros: DemandaFilter) -> None:
+        """
+        Validar intervalos de datas
+        
+        Raises:
+            ValueError: Se algum intervalo estiver invertido
+        """
+        intervalos = (
+            ("prazo", filtros.prazo_de, filtros.prazo_ate),
+            ("criado", filtros.criado_de, filtros.criado_ate),
+            ("atualizado", filtros.atualizado_de, filtros.atualizado_ate),
+        )
+        for nome, inicio, fim in intervalos:
+            if inicio and fim and inicio > fim:
+                raise ValueError(f"{nome}_de deve ser anterior ou igual a {nome}_ate")
+    
+    @staticmethod
+    def aplicar(query: Query, filtros: DemandaFilter, usuario_id: Optional[str] = None) -> Query:
+        """
+        Aplicar os filtros a uma query de Demanda
+        
+        Args:
+            query: Query base de Demanda
+            filtros: Filtros da requisição
+            usuario_id: Restringir às demandas do usuário (não master)
+        
+        Returns:
+            Query filtrada
+        
+        Raises:
+            ValueError: Se algum intervalo de datas for inválido
+        """
+        DemandaFiltroService.validar(filtros)
+        
+        usuario_id = usuario_id or filtros.usuario_id
+        if usuario_id:
+            query = query.filter(Demanda.usuario_id == usuario_id)
+        
+        # Listas: IN (...)
+        if filtros.status:
+            query = query.filter(Demanda.status.in_([StatusDemanda(s.value) for s in filtros.status]))
+        if filtros.cliente_id:
+            query = query.filter(Demanda.cliente_id.in_(filtros.cliente_id))
+        if filtros.secretaria_id:
+            query = query.filter(Demanda.secretaria_id.in_(filtros.secretaria_id))
+        if filtros.tipo_demanda_id:
+            query = query.filter(Demanda.tipo_demanda_id.in_(filtros.tipo_demanda_id))
+        if filtros.prioridade_id:
+            query = query.filter(Demanda.prioridade_id.in_(filtros.prioridade_id))
+        
+        # Compatibilidade: ?prioridade= aceita o ID ou o nome da prioridade
+        if filtros.prioridade:
+            prioridades = select(Prioridade.id).where(
+                or_(
+                    Prioridade.id == filtros.prioridade,
+                    func.lower(Prioridade.nome) == filtros.prioridade.lower()
+                )
+            )
+            query = query.filter(Demanda.prioridade_id.in_(prioridades))
+        
+        # Prazo (coluna DATE)
+        if filtros.prazo_de:
+            query = query.filter(Demanda.prazo_final >= filtros.prazo_de)
+        if filtros.prazo_ate:
+            query = query.filter(Demanda.prazo_final <= filtros.prazo_ate)
+        if filtros.atrasadas:
+            query = query.filter(Demanda.filtro_atrasada())
+        
+        # Timestamps: dia final inclusivo (< dia seguinte)
+        if filtros.criado_de:
+            query = query.filter(Demanda.created_at >= filtros.criado_de)
+        if filtros.criado_ate:
+            query = query.filter(Demanda.created_at < filtros.criado_ate + timedelta(days=1))
+        if filtros.atualizado_de:
+            query = query.filter(Demanda.updated_at >= filtros.atualizado_de)
+        if filtros.atualizado_ate:
+            query = query.filter(Demanda.updated_at < filtros.atualizado_ate + timedelta(days=1))
+        
+        return query
@@ -0,0 +1,387 @@
+"""
+Serviço de estatísticas de demandas
+
+Agrega as demandas filtradas em uma única passada (GROUPING SETS +
+FILTER), em vez de um count() por status, prioridade, tipo e mês.
+
+Consultas por chamada (independente do número de prioridades/tipos):
+1. Agregação: total, atrasadas, por status, prioridade, tipo e mês
+2. Referências: nomes de prioridades e tipos + os 12 meses (generate_series)
+
+Com ESTATISTICAS_ROLLUP_ENABLED, a agregação lê demandas_stats_daily
+(DemandaStatsDaily) em vez de varrer demandas; "atrasadas" depende da
+data de hoje e continua sendo contada na tabela (índice idx_demanda_prazo).
+"""
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import and_, func, literal, select, tuple_, union_all, text, cast, String
+from sqlalchemy.orm import Query, Session
+from app.core.config import settings
+from app.models.demanda import Demanda, StatusDemanda
+from app.models.demanda_stats_daily import DemandaStatsDaily, SEM_SECRETARIA
+from app.models.secretaria import Secretaria
+from app.models.tipo_demanda import TipoDemanda
+from app.models.prioridade import Prioridade
+
+
+# Bits de GROUPING(status, prioridade_id, tipo_demanda_id, mes):
+# 1 = coluna agregada (fora do conjunto), 0 = coluna agrupada
+_GRUPO_TOTAL = 0b1111
+_GRUPO_STATUS = 0b0111
+_GRUPO_PRIORIDADE = 0b1011
+_GRUPO_TIPO = 0b1101
+_GRUPO_MES = 0b1110
+
+
+class EstatisticasService:
+    """
+    Estatísticas de demandas para o dashboard
+    
+    Exemplo de uso:
+        ```python
+        query = db.query(Demanda).filter(...)
+        stats = EstatisticasService(db).calcular(query)
+        ```
+    """
+    
+    def __init__(self, db: Session):
+        """
+        Args:
+            db: Sessão do banco de dados
+        """
+        self.db = db
+    
+    def calcular(self, query: Query) -> Dict:
+        """
+        Calcular estatísticas das demandas da query (já filtrada)
+        
+        Args:
+            query: Query de Demanda com escopo e filtros aplicados
+        
+        Returns:
+            dict com total, por_status, por_prioridade, por_tipo,
+            atrasadas e por_mes (últimos 12 meses, mais recente primeiro)
+        """
+        mes = func.date_trunc('month', Demanda.created_at)
+        atrasada = self._filtro_atrasada()
+        
+        # Consulta 1: todos os agrupamentos em uma passada
+        agregacao = query.with_entities(
+            func.grouping(Demanda.status, Demanda.prioridade_id, Demanda.tipo_demanda_id, mes).label('grupo'),
+            Demanda.status,
+            Demanda.prioridade_id,
+            Demanda.tipo_demanda_id,
+            func.to_char(mes, 'YYYY-MM').label('mes'),
+            func.count().label('total'),
+            func.count().filter(atrasada).label('atrasadas'),
+        ).order_by(None).group_by(
+            func.grouping_sets(
+                tuple_(),
+                tuple_(Demanda.status),
+                tuple_(Demanda.prioridade_id),
+                tuple_(Demanda.tipo_demanda_id),
+                tuple_(mes),
+            )
+        ).all()
+        
+        return self._montar_resposta(agregacao)
+    
+    def calcular_rollup(
+        self,
+        query: Query,
+        cliente_id: Optional[str] = None,
+        secretaria_ids: Optional[List[str]] = None,
+        tipo_demanda_ids: Optional[List[str]] = None,
+        data_inicio: Optional[date] = None,
+        data_fim: Optional[date] = None
+    ) -> Dict:
+        """
+        Calcular estatísticas a partir do rollup diário
+        
+        Só vale para o escopo completo (usuário master): o rollup não
+        guarda o usuário solicitante. Os filtros seguem a query ao vivo.
+        
+        Args:
+            query: Mesma query filtrada usada por calcular() (para atrasadas)
+            cliente_id: Cliente (via secretarias do cliente, como na query ao vivo)
+            secretaria_ids: Secretarias
+            tipo_demanda_ids: Tipos de demanda
+            data_inicio: created_at >= data_inicio
+            data_fim: created_at <= data_fim (meia-noite, como na query ao vivo)
+        
+        Returns:
+            dict no mesmo formato de calcular()
+        """
+        R = DemandaStatsDaily
+        mes = func.date_trunc('month', R.dia)
+        
+        agregacao = self.db.query(
+            func.grouping(R.status, R.prioridade_id, R.tipo_demanda_id, mes).label('grupo'),
+            R.status,
+            R.prioridade_id,
+            R.tipo_demanda_id,
+            func.to_char(mes, 'YYYY-MM').label('mes'),
+            func.coalesce(func.sum(R.total), 0).label('total'),
+        )
+        
+        if cliente_id:
+            agregacao = agregacao.filter(R.secretaria_id.in_(
+                select(Secretaria.id).where(Secretaria.cliente_id == cliente_id)
+            ))
+        if secretaria_ids:
+            agregacao = agregacao.filter(R.secretaria_id.in_(secretaria_ids))
+        if tipo_demanda_ids:
+            agregacao = agregacao.filter(R.tipo_demanda_id.in_(tipo_demanda_ids))
+        if data_inicio:
+            agregacao = agregacao.filter(R.dia >= data_inicio)
+        if data_fim:
+            # created_at <= data_fim 00:00 - na granularidade de dia: dia < data_fim
+            agregacao = agregacao.filter(R.dia < data_fim)
+        
+        agregacao = agregacao.group_by(
+            func.grouping_sets(
+                tuple_(),
+                tuple_(R.status),
+                tuple_(R.prioridade_id),
+                tuple_(R.tipo_demanda_id),
+                tuple_(mes),
+            )
+        ).all()
+        
+        # Atrasadas dependem de "hoje": contagem ao vivo (idx_demanda_prazo)
+        atrasadas = query.filter(self._filtro_atrasada()).order_by(None).count()
+        
+        return self._montar_resposta(agregacao, atrasadas=atrasadas)
+    
+    def _montar_resposta(self, agregacao: Iterable, atrasadas: Optional[int] = None) -> Dict:
+        """
+        Converter as linhas do GROUPING SETS no formato da resposta
+        
+        Args:
+            agregacao: Linhas (grupo, status, prioridade_id, tipo_demanda_id, mes, total[, atrasadas])
+            atrasadas: Total de atrasadas, se não vier na linha de total
+        
+        Returns:
+            dict com total, por_status, por_prioridade, por_tipo, atrasadas e por_mes
+        """
+        # Consulta 2: nomes de referência e buckets de meses
+        referencias = self.db.execute(self._consulta_referencias()).all()
+        
+        total = 0
+        contagem_status: Dict[str, int] = {}
+        contagem_prioridade: Dict[str, int] = {}
+        contagem_tipo: Dict[str, int] = {}
+        contagem_mes: Dict[str, int] = {}
+        
+        for linha in agregacao:
+            if linha.grupo == _GRUPO_TOTAL:
+                total = int(linha.total)
+                if atrasadas is None:
+                    atrasadas = linha.atrasadas
+            elif linha.grupo == _GRUPO_STATUS:
+                chave = getattr(linha.status, 'value', linha.status)
+                contagem_status[chave] = int(linha.total)
+            elif linha.grupo == _GRUPO_PRIORIDADE:
+                contagem_prioridade[linha.prioridade_id] = int(linha.total)
+            elif linha.grupo == _GRUPO_TIPO:
+                contagem_tipo[linha.tipo_demanda_id] = int(linha.total)
+            elif linha.grupo == _GRUPO_MES:
+                contagem_mes[linha.mes] = int(linha.total)
+        
+        # Mesmo formato da resposta anterior: todas as chaves, com zero
+        stats_status = {s.value: contagem_status.get(s.value, 0) for s in StatusDemanda}
+        stats_prioridade = {}
+        stats_tipo = {}
+        stats_mes = {}
+        
+        for categoria, chave, nome in referencias:
+            if categoria == 'prioridade':
+                stats_prioridade[nome] = contagem_prioridade.get(chave, 0)
+            elif categoria == 'tipo':
+                stats_tipo[nome] = contagem_tipo.get(chave, 0)
+            else:
+                stats_mes[chave] = contagem_mes.get(chave, 0)
+        
+        # Mês mais recente primeiro (como na resposta anterior)
+        stats_mes = dict(sorted(stats_mes.items(), reverse=True))
+        
+        return {
+            "total": total,
+            "por_status": stats_status,
+            "por_prioridade": stats_prioridade,
+            "por_tipo": stats_tipo,
+            "atrasadas": atrasadas or 0,
+            "por_mes": stats_mes,
+        }
+    
+    @staticmethod
+    def _filtro_atrasada():
+        """Prazo vencido e demanda ainda aberta/em andamento"""
+        return and_(
+            Demanda.prazo_final < date.today(),
+            Demanda.status.in_([StatusDemanda.ABERTA, StatusDemanda.EM_ANDAMENTO])
+        )
+    
+    @staticmethod
+    def _consulta_referencias():
+        """
+        UNION ALL de prioridades, tipos e os últimos 12 meses
+        
+        Retorna linhas (categoria, chave, nome).
+        """
+        meses = func.generate_series(
+            func.date_trunc('month', func.current_date()) - text("interval '11 months'"),
+            func.date_trunc('month', func.current_date()),
+            text("interval '1 month'")
+        ).table_valued('mes').render_derived()
+        
+        return union_all(
+            select(literal('prioridade'), Prioridade.id, Prioridade.nome),
+            select(literal('tipo'), TipoDemanda.id, TipoDemanda.nome),
+            select(
+                literal('mes'),
+                func.to_char(meses.c.mes, 'YYYY-MM'),
+                cast(None, String)
+            ).select_from(meses)
+        )
+    
+    # ==================== ROLLUP: CONTAGENS E REPARO ====================
+    
+    def contar_por_status_cliente(self, cliente_id: str) -> Dict[str, int]:
+        """
+        Demandas de um cliente por status (Demanda.cliente_id)
+        
+        Args:
+            cliente_id: ID do cliente
+        
+        Returns:
+            {status: total} apenas com os status existentes
+        """
+        if settings.ESTATISTICAS_ROLLUP_ENABLED:
+            linhas = self.db.query(
+                DemandaStatsDaily.status,
+                func.sum(DemandaStatsDaily.total)
+            ).filter(
+                DemandaStatsDaily.cliente_id == cliente_id
+            ).group_by(DemandaStatsDaily.status).all()
+        else:
+            linhas = self.db.query(
+                Demanda.status,
+                func.count(Demanda.id)
+            ).filter(
+                Demanda.cliente_id == cliente_id
+            ).group_by(Demanda.status).all()
+        
+        return {getattr(s, 'value', s): int(total or 0) for s, total in linhas}
+    
+    def contar_por_secretaria(self, secretaria_ids: List[str]) -> Dict[str, int]:
+        """
+        Total de demandas por secretaria (uma consulta para a lista toda)
+        
+        Args:
+            secretaria_ids: IDs das secretarias
+        
+        Returns:
+            {secretaria_id: total} (secretarias sem demandas ficam de fora)
+        """
+        if not secretaria_ids:
+            return {}
+        
+        if settings.ESTATISTICAS_ROLLUP_ENABLED:
+            linhas = self.db.query(
+                DemandaStatsDaily.secretaria_id,
+                func.sum(DemandaStatsDaily.total)
+            ).filter(
+                DemandaStatsDaily.secretaria_id.in_(secretaria_ids)
+            ).group_by(DemandaStatsDaily.secretaria_id).all()
+        else:
+            linhas = self.db.query(
+                Demanda.secretaria_id,
+                func.count(Demanda.id)
+            ).filter(
+                Demanda.secretaria_id.in_(secretaria_ids)
+            ).group_by(Demanda.secretaria_id).all()
+        
+        return {secretaria_id: int(total or 0) for secretaria_id, total in linhas}
+    
+    def transferir_secretaria_rollup(self, secretaria_id: str) -> None:
+        """
+        Mover as contagens de uma secretaria para "sem secretaria"
+        
+        Para quando as demandas são desvinculadas com UPDATE em massa
+        (que não passa pelo listener de flush). Mesma transação da sessão.
+        
+        Args:
+            secretaria_id: Secretaria removida
+        """
+        if not settings.ESTATISTICAS_ROLLUP_ENABLED:
+            return
+        
+        conn = self.db.connection()
+        if conn.dialect.name != "postgresql":
+            return
+        
+        conn.execute(
+            text(SQL_TRANSFERIR_SECRETARIA_ROLLUP),
+            {"secretaria_id": secretaria_id, "sem_secretaria": SEM_SECRETARIA}
+        )
+    
+    def reconstruir_rollup(self) -> Optional[int]:
+        """
+        Reconstruir demandas_stats_daily a partir de demandas
+        
+        Executado todas as noites pelo worker para corrigir divergências
+        (alterações em massa que não passam pelo flush do ORM, falhas etc).
+        Bloqueia o rollup durante a reconstrução: flushes concorrentes
+        esperam e aplicam seus deltas sobre o resultado novo.
+        
+        Returns:
+            Número de linhas do rollup, ou None se outro worker já está reconstruindo
+        """
+        conn = self.db.connection()
+        
+        # Apenas um worker por vez (lock liberado no fim da transação)
+        if not conn.execute(text("SELECT pg_try_advisory_xact_lock(hashtext('demandas_stats_daily'))")).scalar():
+            self.db.rollback()
+            return None
+        
+        conn.execute(text("LOCK TABLE demandas_stats_daily IN EXCLUSIVE MODE"))
+        conn.execute(text("DELETE FROM demandas_stats_daily"))
+        resultado = conn.execute(
+            text(SQL_RECONSTRUIR_ROLLUP),
+            {"tz": settings.ESTATISTICAS_TIMEZONE, "sem_secretaria": SEM_SECRETARIA}
+        )
+        self.db.commit()
+        
+        return resultado.rowcount
+
+
+SQL_RECONSTRUIR_ROLLUP = """
+INSERT INTO demandas_stats_daily
+    (dia, cliente_id, secretaria_id, tipo_demanda_id, prioridade_id, status, total)
+SELECT
+    (created_at AT TIME ZONE :tz)::date,
+    cliente_id,
+    COALESCE(secretaria_id, :sem_secretaria),
+    tipo_demanda_id,
+    prioridade_id,
+    lower(status::text),
+    count(*)
+FROM demandas
+GROUP BY 1, 2, 3, 4, 5, 6
+"""
+
+SQL_TRANSFERIR_SECRETARIA_ROLLUP = """
+WITH movidas AS (
+    DELETE FROM demandas_stats_daily
+    WHERE secretaria_id = :secretaria_id
+    RETURNING dia, cliente_id, tipo_demanda_id, prioridade_id, status, total
+)
+INSERT INTO demandas_stats_daily
+    (dia, cliente_id, secretaria_id, tipo_demanda_id, prioridade_id, status, total)
+SELECT dia, cliente_id, :sem_secretaria, tipo_demanda_id, prioridade_id, status, sum(total)
+FROM movidas
+GROUP BY dia, cliente_id, tipo_demanda_id, prioridade_id, status
+ON CONFLICT (dia, cliente_id, secretaria_id, tipo_demanda_id, prioridade_id, status)
+DO UPDATE SET total = demandas_stats_daily.total + excluded.total
+"""
@@ -20,9 +20,9 @@ from typing import List, Optional
 from sqlalchemy.orm import Session
 from app.models.user import User
 from app.models.demanda import Demanda, StatusDemanda
-from app.models.notification_log import NotificationLog, TipoNotificacao, StatusNotificacao
 from app.services.whatsapp import WhatsAppService
-import json
+from app.services.whatsapp_fanout import WhatsAppFanout
+from app.services.notification_log_writer import NotificationLogWriter
 
 logger = logging.getLogger(__name__)
 
@@ -37,31 +37,46 @@ class NotificationService:
     Exemplo:
         ```python
         notification_service = NotificationService(db)
-        notification_service.notificar_nova_demanda(demanda)
+        await notification_service.notificar_nova_demanda(demanda)
         ```
     """
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, evento_id: Optional[str] = None):
         """
         Inicializar serviço de notificações
         
         Args:
             db: Sessão do banco de dados
+            evento_id: ID do evento da outbox (retomada sem reenviar)
         """
         self.db = db
+        self.evento_id = evento_id
         self.whatsapp_service = WhatsAppService()
     
     def _obter_usuarios_para_notificar(self, demanda: Demanda) -> List[User]:
         """
         Obter lista de usuários que devem receber notificação sobre uma demanda
         
+        Args:
+            demanda: Demanda relacionada à notificação
+        
+        Returns:
+            Lista de usuários que devem receber notificação
+        """
+        return self._obter_usuarios_por_cliente(demanda.id, demanda.cliente_id)
+    
+    def _obter_usuarios_por_cliente(self, demanda_id: str, cliente_id: str) -> List[User]:
+        """
+        Obter lista de usuários que devem receber notificação sobre uma demanda
+        
         Regras:
         - Usuários Master: recebem TODAS as notificações
         - Usuários comuns: recebem apenas notificações do seu cliente
         - Apenas usuários ativos com WhatsApp cadastrado e notificações ativadas
         
         Args:
-            demanda: Demanda relacionada à notificação
+            demanda_id: ID da demanda (para log)
+            cliente_id: Cliente da demanda
         
         Returns:
             Lista de usuários que devem receber notificação
@@ -76,90 +91,73 @@ class NotificationService:
         
         # Buscar usuários Master (recebem tudo) + usuários do mesmo cliente
         usuarios = query.filter(
-            (User.tipo == "master") | (User.cliente_id == demanda.cliente_id)
+            (User.tipo == "master") | (User.cliente_id == cliente_id)
         ).all()
         
         logger.info(
-            f"Notificação demanda {demanda.id}: "
+            f"Notificação demanda {demanda_id}: "
             f"{len(usuarios)} usuários para notificar "
-            f"(cliente: {demanda.cliente_id})"
+            f"(cliente: {cliente_id})"
         )
         
         return usuarios
     
-    def _enviar_notificacao_usuario(
+    async def _enviar_para_usuarios(
         self,
-        usuario: User,
+        usuarios: List[User],
         mensagem: str,
-        demanda: Demanda,
+        demanda_id: Optional[str],
         evento: str
-    ) -> bool:
+    ) -> dict:
         """
-        Enviar notificação individual para um usuário
+        Enviar notificação para vários usuários em paralelo (fan-out)
         
         Args:
-            usuario: Usuário destinatário
+            usuarios: Usuários destinatários
             mensagem: Texto da mensagem
-            demanda: Demanda relacionada
+            demanda_id: Demanda relacionada (None = sem NotificationLog)
             evento: Tipo de evento (criar, atualizar, excluir, etc)
         
         Returns:
-            True se enviado com sucesso
+            Dicionário com enviados, falhas, ja_enviados e total_usuarios
         """
-        try:
-            # Enviar mensagem individual
-            sucesso = self.whatsapp_service.enviar_mensagem_individual(
-                numero=usuario.whatsapp,
-                mensagem=mensagem
-            )
-            
-            # Registrar log
-            log_status = StatusNotificacao.ENVIADO if sucesso else StatusNotificacao.ERRO
-            log = NotificationLog(
-                demanda_id=demanda.id,
-                tipo=TipoNotificacao.WHATSAPP,
-                status=log_status,
-                mensagem_erro=None if sucesso else "Falha ao enviar mensagem",
-                tentativas="1",
-                dados_enviados=json.dumps({
-                    "usuario_id": usuario.id,
-                    "usuario_nome": usuario.nome_completo,
-                    "whatsapp": usuario.whatsapp,
-                    "evento": evento
-                })
-            )
-            self.db.add(log)
-            self.db.commit()
-            
-            if sucesso:
-                logger.info(f"Notificação enviada para {usuario.nome_completo} ({usuario.whatsapp})")
-            else:
-                logger.warning(f"Falha ao enviar notificação para {usuario.nome_completo}")
-            
-            return sucesso
-            
-        except Exception as e:
-            logger.error(f"Erro ao notificar {usuario.nome_completo}: {e}")
-            
-            # Registrar erro no log
-            log = NotificationLog(
-                demanda_id=demanda.id,
-                tipo=TipoNotificacao.WHATSAPP,
-                status=StatusNotificacao.ERRO,
-                mensagem_erro=str(e),
-                tentativas="1",
-                dados_enviados=json.dumps({
-                    "usuario_id": usuario.id,
-                    "whatsapp": usuario.whatsapp,
-                    "evento": evento
-                })
-            )
-            self.db.add(log)
-            self.db.commit()
-            
-            return False
+        total_usuarios = len(usuarios)
+        
+        # Retomada de evento da outbox: pular quem já recebeu
+        ja_enviados = NotificationLogWriter.usuarios_ja_notificados(self.evento_id)
+        if ja_enviados:
+            usuarios = [u for u in usuarios if u.id not in ja_enviados]
+            logger.info(f"{total_usuarios - len(usuarios)} usuários já notificados neste evento, pulando")
+        
+        # Logs PENDENTE gravados antes do envio (não se perdem se o processo cair)
+        writer = None
+        if demanda_id:
+            writer = NotificationLogWriter(demanda_id, evento, evento_id=self.evento_id)
+            writer.registrar_pendentes(usuarios)
+        
+        resultado = await WhatsAppFanout(self.whatsapp_service).enviar(
+            [(usuario.id, usuario.whatsapp) for usuario in usuarios],
+            mensagem
+        )
+        
+        if writer:
+            writer.concluir(resultado)
+        
+        for usuario in usuarios:
+            if not resultado["resultados"].get(usuario.id, False):
+                logger.warning(
+                    f"Falha ao enviar notificação para {usuario.nome_completo}: "
+                    f"{resultado['erros'].get(usuario.id)}"
+                )
+        
+        return {
+            "enviados": resultado["enviados"],
+            "falhas": resultado["falhas"],
+            "ja_enviados": total_usuarios - len(usuarios),
+            "total_usuarios": total_usuarios
+        }
     
-    def notificar_nova_demanda(self, demanda: Demanda) -> int:
+    async def notificar_nova_demanda(self, demanda: Demanda) -> dict:
         """
         Notificar sobre nova demanda criada
         
@@ -167,7 +165,7 @@ class NotificationService:
             demanda: Demanda criada
         
         Returns:
-            Número de notificações enviadas com sucesso
+            Dicionário com enviados, falhas e total_usuarios
         """
         logger.info(f"Iniciando notificações para nova demanda: {demanda.nome}")
         
@@ -179,7 +177,7 @@ class NotificationService:
         
         if not usuarios:
             logger.info("Nenhum usuário para notificar")
-            return 0
+            return {"enviados": 0, "falhas": 0, "total_usuarios": 0}
         
         # Emoji de prioridade
         emoji_prioridade = {
@@ -212,29 +210,26 @@ class NotificationService:
 _ID: {demanda.id}_
         """.strip()
         
-        # Enviar para cada usuário
-        enviados = 0
-        for usuario in usuarios:
-            if self._enviar_notificacao_usuario(usuario, mensagem, demanda, "criar"):
-                enviados += 1
+        # Enviar para todos os usuários em paralelo
+        resultado = await self._enviar_para_usuarios(usuarios, mensagem, demanda.id, "criar")
         
-        logger.info(f"Nova demanda: {enviados}/{len(usuarios)} notificações enviadas")
-        return enviados
+        logger.info(f"Nova demanda: {resultado['enviados']}/{len(usuarios)} notificações enviadas")
+        return resultado
     
-    def notificar_atualizacao_demanda(
+    async def notificar_atualizacao_demanda(
         self,
         demanda: Demanda,
-        campos_alterados: Optional[dict] = None
-    ) -> int:
+        campos_alterados: Optional[List[str]] = None
+    ) -> dict:
         """
         Notificar sobre atualização de demanda
         
         Args:
             demanda: Demanda atualizada
-            campos_alterados: Dicionário com campos alterados (opcional)
+            campos_alterados: Nomes dos campos alterados (opcional)
         
         Returns:
-            Número de notificações enviadas com sucesso
+            Dicionário com enviados, falhas e total_usuarios
         """
         logger.info(f"Iniciando notificações para atualização da demanda: {demanda.nome}")
         
@@ -245,7 +240,7 @@ _ID: {demanda.id}_
         usuarios = self._obter_usuarios_para_notificar(demanda)
         
         if not usuarios:
-            return 0
+            return {"enviados": 0, "falhas": 0, "total_usuarios": 0}
         
         # Obter URL do sistema
         from app.core.config import settings
@@ -266,21 +261,18 @@ _ID: {demanda.id}_
 _ID: {demanda.id}_
         """.strip()
         
-        # Enviar para cada usuário
-        enviados = 0
-        for usuario in usuarios:
-            if self._enviar_notificacao_usuario(usuario, mensagem, demanda, "atualizar"):
-                enviados += 1
+        # Enviar para todos os usuários em paralelo
+        resultado = await self._enviar_para_usuarios(usuarios, mensagem, demanda.id, "atualizar")
         
-        logger.info(f"Atualização: {enviados}/{len(usuarios)} notificações enviadas")
-        return enviados
+        logger.info(f"Atualização: {resultado['enviados']}/{len(usuarios)} notificações enviadas")
+        return resultado
     
-    def notificar_mudanca_status(
+    async def notificar_mudanca_status(
         self,
         demanda: Demanda,
         status_antigo: str,
         status_novo: str
-    ) -> int:
+    ) -> dict:
         """
         Notificar sobre mudança de status
         
@@ -290,7 +282,7 @@ _ID: {demanda.id}_
             status_novo: Novo status
         
         Returns:
-            Número de notificações enviadas com sucesso
+            Dicionário com enviados, falhas e total_usuarios
         """
         logger.info(f"Notificando mudança de status: {status_antigo} → {status_novo}")
         
@@ -301,7 +293,7 @@ _ID: {demanda.id}_
         usuarios = self._obter_usuarios_para_notificar(demanda)
         
         if not usuarios:
-            return 0
+            return {"enviados": 0, "falhas": 0, "total_usuarios": 0}
         
         # Emoji de status
         emoji_status = {
@@ -337,16 +329,13 @@ _ID: {demanda.id}_
 _ID: {demanda.id}_
         """.strip()
         
-        # Enviar para cada usuário
-        enviados = 0
-        for usuario in usuarios:
-            if self._enviar_notificacao_usuario(usuario, mensagem, demanda, f"status_{status_novo}"):
-                enviados += 1
+        # Enviar para todos os usuários em paralelo
+        resultado = await self._enviar_para_usuarios(usuarios, mensagem, demanda.id, f"status_{status_novo}")
         
-        logger.info(f"Mudança status: {enviados}/{len(usuarios)} notificações enviadas")
-        return enviados
+        logger.info(f"Mudança status: {resultado['enviados']}/{len(usuarios)} notificações enviadas")
+        return resultado
     
-    def notificar_exclusao_demanda(self, demanda: Demanda) -> int:
+    async def notificar_exclusao_demanda(self, demanda: Demanda) -> dict:
         """
         Notificar sobre exclusão de demanda
         
@@ -354,37 +343,71 @@ _ID: {demanda.id}_
             demanda: Demanda a ser excluída
         
         Returns:
-            Número de notificações enviadas com sucesso
+            Dicionário com enviados, falhas e total_usuarios
         """
-        logger.info(f"Iniciando notificações para exclusão da demanda: {demanda.nome}")
-        
         # Recarregar relacionamentos
         self.db.refresh(demanda)
         
+        return await self.notificar_exclusao_snapshot(self.snapshot_exclusao(demanda))
+    
+    @staticmethod
+    def snapshot_exclusao(demanda: Demanda) -> dict:
+        """
+        Dados da demanda necessários para notificar a exclusão
+        
+        Capturados antes do DELETE para que a notificação possa ser
+        enviada depois (pela outbox), quando a demanda já não existe.
+        
+        Args:
+            demanda: Demanda a ser excluída
+        
+        Returns:
+            Dicionário com id, nome, cliente e secretaria
+        """
+        return {
+            "demanda_id": demanda.id,
+            "nome": demanda.nome,
+            "cliente_id": demanda.cliente_id,
+            "cliente_nome": demanda.cliente.nome if demanda.cliente else "",
+            "secretaria_nome": demanda.secretaria.nome if demanda.secretaria else "",
+        }
+    
+    async def notificar_exclusao_snapshot(self, dados: dict) -> dict:
+        """
+        Notificar sobre exclusão de demanda a partir do snapshot
+        
+        Como a demanda já foi removida, não há NotificationLog
+        (demanda_id é FK) - o resultado fica apenas no log da aplicação.
+        
+        Args:
+            dados: Snapshot gerado por snapshot_exclusao()
+        
+        Returns:
+            Dicionário com enviados, falhas e total_usuarios
+        """
+        logger.info(f"Iniciando notificações para exclusão da demanda: {dados.get('nome')}")
+        
         # Obter usuários para notificar
-        usuarios = self._obter_usuarios_para_notificar(demanda)
+        usuarios = self._obter_usuarios_por_cliente(dados.get("demanda_id"), dados.get("cliente_id"))
         
         if not usuarios:
-            return 0
+            return {"enviados": 0, "falhas": 0, "total_usuarios": 0}
         
         # Construir mensagem
         mensagem = f"""
 🗑️ *Demanda Excluída*
 
-📋 *Demanda:* {demanda.nome}
-🏢 *Cliente:* {demanda.cliente.nome}
-🏛️ *Secretaria:* {demanda.secretaria.nome}
+📋 *Demanda:* {dados.get('nome')}
+🏢 *Cliente:* {dados.get('cliente_nome')}
+🏛️ *Secretaria:* {dados.get('secretaria_nome')}
 
 ⚠️ Esta demanda foi removida do sistema.
 
-_ID: {demanda.id}_
+_ID: {dados.get('demanda_id')}_
         """.strip()
         
-        # Enviar para cada usuário
-        enviados = 0
-        for usuario in usuarios:
-            if self._enviar_notificacao_usuario(usuario, mensagem, demanda, "excluir"):
-                enviados += 1
+        # Enviar para todos os usuários em paralelo (sem NotificationLog)
+        resultado = await self._enviar_para_usuarios(usuarios, mensagem, None, "excluir")
         
-        logger.info(f"Exclusão: {enviados}/{len(usuarios)} notificações enviadas")
-        return enviados
+        logger.info(f"Exclusão: {resultado['enviados']}/{len(usuarios)} notificações enviadas")
+        return resultado
@@ -0,0 +1,197 @@
+"""
+Gravação em lote de NotificationLog
+
+Um fan-out para N usuários gravava N logs com N commits, e ainda
+commitava a sessão da requisição no meio do caminho. Aqui os logs de um
+evento são gravados em duas etapas, numa conexão própria:
+
+1. Antes do envio: um INSERT em lote (ou COPY, para lotes grandes) com
+   todos os destinatários em PENDENTE - commitado imediatamente
+2. Depois do fan-out: UPDATE em lote marcando ENVIADO / ERRO
+
+Se o processo cair no meio, os registros ficam em PENDENTE (tentativa
+registrada, resultado desconhecido) em vez de sumirem. Com `evento_id`
+(evento da outbox), uma nova tentativa pula quem já está ENVIADO.
+
+Autor: DeBrief Sistema
+"""
+import csv
+import io
+import json
+import logging
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+from sqlalchemy import insert, select, update, func
+from app.core.config import settings
+from app.core.database import engine
+from app.models.notification_log import NotificationLog, TipoNotificacao, StatusNotificacao
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+_tabela = NotificationLog.__table__
+
+
+class NotificationLogWriter:
+    """
+    Registra os logs de um evento de notificação em lote
+    
+    Exemplo de uso:
+        ```python
+        writer = NotificationLogWriter(demanda.id, "criar", evento_id=evento.id)
+        writer.registrar_pendentes(usuarios)
+        resultado = await fanout.enviar(...)
+        writer.concluir(resultado)
+        ```
+    """
+    
+    def __init__(
+        self,
+        demanda_id: str,
+        evento: str,
+        evento_id: Optional[str] = None,
+        dados_extras: Optional[dict] = None
+    ):
+        """
+        Inicializar writer
+        
+        Args:
+            demanda_id: Demanda relacionada
+            evento: Tipo de evento (criar, atualizar, status_x, ...)
+            evento_id: ID do evento da outbox (permite retomar envios)
+            dados_extras: Campos adicionais gravados em dados_enviados
+        """
+        self.demanda_id = demanda_id
+        self.evento = evento
+        self.evento_id = evento_id
+        self.dados_extras = dados_extras or {}
+        self.ids_por_usuario: Dict[str, str] = {}
+    
+    @staticmethod
+    def usuarios_ja_notificados(evento_id: Optional[str]) -> Set[str]:
+        """
+        IDs dos usuários que já receberam a notificação deste evento da outbox
+        
+        Args:
+            evento_id: ID do evento da outbox
+        
+        Returns:
+            Conjunto de IDs de usuário com log ENVIADO
+        """
+        if not evento_id:
+            return set()
+        
+        with engine.connect() as conn:
+            rows = conn.execute(
+                select(_tabela.c.usuario_id).where(
+                    _tabela.c.evento_id == evento_id,
+                    _tabela.c.status == StatusNotificacao.ENVIADO
+                )
+            ).all()
+        
+        return {usuario_id for (usuario_id,) in rows}
+    
+    def registrar_pendentes(self, usuarios: List[User]) -> None:
+        """
+        Gravar um log PENDENTE por destinatário (commit imediato)
+        
+        Usa COPY quando o lote passa de NOTIFICATION_LOG_COPY_MINIMO linhas.
+        
+        Args:
+            usuarios: Destinatários do fan-out
+        """
+        if not usuarios:
+            return
+        
+        linhas = []
+        for usuario in usuarios:
+            log_id = str(uuid.uuid4())
+            self.ids_por_usuario[usuario.id] = log_id
+            linhas.append({
+                "id": log_id,
+                "demanda_id": self.demanda_id,
+                "usuario_id": usuario.id,
+                "evento_id": self.evento_id,
+                "tipo": TipoNotificacao.WHATSAPP,
+                "status": StatusNotificacao.PENDENTE,
+                "tentativas": "1",
+                "dados_enviados": json.dumps({
+                    "usuario_id": usuario.id,
+                    "usuario_nome": usuario.nome_completo,
+                    "whatsapp": usuario.whatsapp,
+                    "evento": self.evento,
+                    **self.dados_extras
+                }),
+            })
+        
+        with engine.begin() as conn:
+            if (
+                len(linhas) >= settings.NOTIFICATION_LOG_COPY_MINIMO
+                and conn.dialect.name == "postgresql"
+            ):
+                self._copiar(conn, linhas)
+            else:
+                conn.execute(insert(_tabela), linhas)
+        
+        logger.debug(f"{len(linhas)} logs PENDENTE gravados para demanda {self.demanda_id}")
+    
+    @staticmethod
+    def _copiar(conn, linhas: List[dict]) -> None:
+        """COPY ... FROM STDIN (CSV) na mesma transação da conexão"""
+        colunas = ["id", "demanda_id", "usuario_id", "evento_id", "tipo", "status", "tentativas", "dados_enviados"]
+        
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for linha in linhas:
+            writer.writerow([
+                # Colunas Enum persistem o NOME do membro (ex: WHATSAPP)
+                linha[c].name if c in ("tipo", "status") else (linha[c] if linha[c] is not None else "")
+                for c in colunas
+            ])
+        buffer.seek(0)
+        
+        cursor = conn.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {_tabela.name} ({', '.join(colunas)}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+        finally:
+            cursor.close()
+    
+    def concluir(self, resultado: dict) -> None:
+        """
+        Marcar logs como ENVIADO / ERRO conforme o resultado do fan-out
+        
+        Um UPDATE para os enviados e um por mensagem de erro distinta
+        (normalmente uma ou duas), todos na mesma transação.
+        
+        Args:
+            resultado: Retorno de WhatsAppFanout.enviar()
+        """
+        if not self.ids_por_usuario:
+            return
+        
+        enviados = []
+        erros = defaultdict(list)
+        for usuario_id, log_id in self.ids_por_usuario.items():
+            if resultado["resultados"].get(usuario_id, False):
+                enviados.append(log_id)
+            else:
+                erro = resultado["erros"].get(usuario_id) or "Falha ao enviar mensagem"
+                erros[erro].append(log_id)
+        
+        with engine.begin() as conn:
+            if enviados:
+                conn.execute(
+                    update(_tabela)
+                    .where(_tabela.c.id.in_(enviados))
+                    .values(status=StatusNotificacao.ENVIADO, updated_at=func.now())
+                )
+            for erro, ids in erros.items():
+                conn.execute(
+                    update(_tabela)
+                    .where(_tabela.c.id.in_(ids))
+                    .values(status=StatusNotificacao.ERRO, mensagem_erro=erro, updated_at=func.now())
+                )
@@ -8,10 +8,10 @@ from app.models.demanda import Demanda
 from app.models.user import User
 from app.models.configuracao_whatsapp import ConfiguracaoWhatsApp
 from app.models.template_mensagem import TemplateMensagem
-from app.models.notification_log import NotificationLog, TipoNotificacao, StatusNotificacao
 from app.services.whatsapp import WhatsAppService
+from app.services.whatsapp_fanout import WhatsAppFanout
+from app.services.notification_log_writer import NotificationLogWriter
 import logging
-from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
@@ -24,13 +24,13 @@ class NotificationWhatsAppService:
     1. Busca usuários que devem receber notificações
     2. Busca o template apropriado para o evento
     3. Renderiza o template com dados da demanda
-    4. Envia mensagem individual via WhatsApp
+    4. Envia as mensagens em paralelo (WhatsAppFanout)
     5. Registra log de notificação
     
     Exemplo de uso:
         ```python
         service = NotificationWhatsAppService(db)
-        service.notificar_demanda_criada(demanda)
+        await service.notificar_demanda_criada(demanda)
         ```
     """
     
@@ -110,71 +110,46 @@ class NotificationWhatsAppService:
         
         return usuarios
     
-    def _enviar_notificacao(
+    async def _enviar_notificacoes(
         self,
-        usuario: User,
+        usuarios: List[User],
         mensagem: str,
         demanda: Demanda,
         tipo_evento: str
-    ) -> bool:
+    ) -> dict:
         """
-        Enviar notificação para um usuário e registrar log
+        Enviar notificação para os usuários em paralelo e registrar logs
         
         Args:
-            usuario: Usuário destinatário
+            usuarios: Usuários destinatários
             mensagem: Mensagem renderizada
             demanda: Demanda relacionada
             tipo_evento: Tipo do evento
             
         Returns:
-            True se enviado com sucesso
+            Dicionário com enviados e falhas
         """
-        try:
-            # Enviar mensagem
-            sucesso = self.whatsapp_service.enviar_mensagem_individual(
-                numero=usuario.whatsapp,
-                mensagem=mensagem
-            )
-            
-            # Registrar log
-            log = NotificationLog(
-                demanda_id=demanda.id,
-                usuario_id=usuario.id,
-                tipo=TipoNotificacao.WHATSAPP,
-                destinatario=usuario.whatsapp,
-                mensagem=mensagem,
-                status=StatusNotificacao.ENVIADO if sucesso else StatusNotificacao.ERRO,
-                erro_mensagem=None if sucesso else "Falha ao enviar mensagem",
-                enviado_em=datetime.utcnow() if sucesso else None,
-                metadata=f'{{"tipo_evento": "{tipo_evento}"}}'
-            )
-            
-            self.db.add(log)
-            self.db.commit()
-            
-            return sucesso
-            
-        except Exception as e:
-            logger.error(f"Erro ao enviar notificação para usuário {usuario.id}: {str(e)}")
-            
-            # Registrar log de erro
-            log = NotificationLog(
-                demanda_id=demanda.id,
-                usuario_id=usuario.id,
-                tipo=TipoNotificacao.WHATSAPP,
-                destinatario=usuario.whatsapp,
-                mensagem=mensagem,
-                status=StatusNotificacao.ERRO,
-                erro_mensagem=str(e),
-                metadata=f'{{"tipo_evento": "{tipo_evento}"}}'
-            )
-            
-            self.db.add(log)
-            self.db.commit()
-            
-            return False
+        # Logs PENDENTE gravados antes do envio, atualizados em lote depois
+        writer = NotificationLogWriter(
+            demanda.id,
+            tipo_evento,
+            dados_extras={"tipo_evento": tipo_evento, "mensagem": mensagem}
+        )
+        writer.registrar_pendentes(usuarios)
+        
+        resultado = await WhatsAppFanout(self.whatsapp_service).enviar(
+            [(usuario.id, usuario.whatsapp) for usuario in usuarios],
+            mensagem
+        )
+        
+        writer.concluir(resultado)
+        
+        return {
+            "enviados": resultado["enviados"],
+            "falhas": resultado["falhas"]
+        }
     
-    def notificar_evento(
+    async def notificar_evento(
         self,
         demanda: Demanda,
         tipo_evento: str
@@ -228,22 +203,15 @@ class NotificationWhatsAppService:
         # Renderizar mensagem
         mensagem = template.renderizar(dados)
         
-        # Enviar para cada usuário
-        enviados = 0
-        falhas = 0
-        
-        for usuario in usuarios:
-            sucesso = self._enviar_notificacao(
-                usuario=usuario,
-                mensagem=mensagem,
-                demanda=demanda,
-                tipo_evento=tipo_evento
-            )
-            
-            if sucesso:
-                enviados += 1
-            else:
-                falhas += 1
+        # Enviar para todos os usuários em paralelo
+        resultado = await self._enviar_notificacoes(
+            usuarios=usuarios,
+            mensagem=mensagem,
+            demanda=demanda,
+            tipo_evento=tipo_evento
+        )
+        enviados = resultado["enviados"]
+        falhas = resultado["falhas"]
         
         logger.info(f"Notificações enviadas: {enviados} sucesso, {falhas} falhas")
         
@@ -255,7 +223,7 @@ class NotificationWhatsAppService:
             "total_usuarios": len(usuarios)
         }
     
-    def notificar_demanda_criada(self, demanda: Demanda) -> dict:
+    async def notificar_demanda_criada(self, demanda: Demanda) -> dict:
         """
         Notificar sobre criação de demanda
         
@@ -265,9 +233,9 @@ class NotificationWhatsAppService:
         Returns:
             Estatísticas de envio
         """
-        return self.notificar_evento(demanda, "demanda_criada")
+        return await self.notificar_evento(demanda, "demanda_criada")
     
-    def notificar_demanda_atualizada(self, demanda: Demanda) -> dict:
+    async def notificar_demanda_atualizada(self, demanda: Demanda) -> dict:
         """
         Notificar sobre atualização de demanda
         
@@ -277,9 +245,9 @@ class NotificationWhatsAppService:
         Returns:
             Estatísticas de envio
         """
-        return self.notificar_evento(demanda, "demanda_atualizada")
+        return await self.notificar_evento(demanda, "demanda_atualizada")
     
-    def notificar_demanda_concluida(self, demanda: Demanda) -> dict:
+    async def notificar_demanda_concluida(self, demanda: Demanda) -> dict:
         """
         Notificar sobre conclusão de demanda
         
@@ -289,9 +257,9 @@ class NotificationWhatsAppService:
         Returns:
             Estatísticas de envio
         """
-        return self.notificar_evento(demanda, "demanda_concluida")
+        return await self.notificar_evento(demanda, "demanda_concluida")
     
-    def notificar_demanda_cancelada(self, demanda: Demanda) -> dict:
+    async def notificar_demanda_cancelada(self, demanda: Demanda) -> dict:
         """
         Notificar sobre cancelamento de demanda
         
@@ -301,7 +269,7 @@ class NotificationWhatsAppService:
         Returns:
             Estatísticas de envio
         """
-        return self.notificar_evento(demanda, "demanda_cancelada")
+        return await self.notificar_evento(demanda, "demanda_cancelada")
     
     async def notificar_mudanca_status(
         self,
@@ -370,22 +338,15 @@ class NotificationWhatsAppService:
 _ID: {demanda.id}_
         """.strip()
         
-        # Enviar para cada usuário
-        enviados = 0
-        falhas = 0
-        
-        for usuario in usuarios:
-            sucesso = self._enviar_notificacao(
-                usuario=usuario,
-                mensagem=mensagem,
-                demanda=demanda,
-                tipo_evento="mudanca_status"
-            )
-            
-            if sucesso:
-                enviados += 1
-            else:
-                falhas += 1
+        # Enviar para todos os usuários em paralelo
+        resultado = await self._enviar_notificacoes(
+            usuarios=usuarios,
+            mensagem=mensagem,
+            demanda=demanda,
+            tipo_evento="mudanca_status"
+        )
+        enviados = resultado["enviados"]
+        falhas = resultado["falhas"]
         
         logger.info(f"Notificações de mudança de status enviadas: {enviados} sucesso, {falhas} falhas")
         
@@ -0,0 +1,435 @@
+"""
+Serviço de Outbox Transacional
+
+Executa, fora do ciclo de requisição, os efeitos colaterais registrados
+junto com as alterações de demandas (tabela outbox_eventos).
+
+Fluxo:
+1. Endpoint altera a demanda e chama OutboxEvento.registrar(...) na mesma sessão
+2. Um único commit grava demanda + eventos
+3. O worker (`python -m app.workers`) reivindica eventos com
+   SELECT ... FOR UPDATE SKIP LOCKED, executa o handler do tipo
+   e marca como concluído ou reagenda com backoff exponencial
+
+Tipos suportados:
+- trello_criar_card
+- trello_atualizar_card
+- trello_deletar_card
+- whatsapp_nova_demanda
+- whatsapp_atualizacao_demanda
+- whatsapp_mudanca_status
+- whatsapp_exclusao_demanda
+
+Autor: DeBrief Sistema
+"""
+import asyncio
+import inspect
+import logging
+import random
+import socket
+import os
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import and_, or_, func
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.demanda import Demanda
+from app.models.outbox_evento import OutboxEvento, StatusOutbox
+
+logger = logging.getLogger(__name__)
+
+
+# ==================== HANDLERS ====================
+
+async def _trello_criar_card(db: Session, evento: OutboxEvento) -> None:
+    """Criar card no Trello para a demanda (idempotente)"""
+    from app.models.configuracao_trello import ConfiguracaoTrello
+    from app.services.trello import TrelloService
+    from app.services.trello_limites import PRIORIDADE_SEGUNDO_PLANO
+    
+    demanda = db.query(Demanda).filter(Demanda.id == evento.demanda_id).first()
+    if not demanda:
+        logger.info(f"Demanda {evento.demanda_id} não existe mais, card não será criado")
+        return
+    
+    if demanda.trello_card_id:
+        logger.info(f"Demanda {demanda.id} já possui card {demanda.trello_card_id}")
+        return
+    
+    if not ConfiguracaoTrello.get_ativa(db):
+        logger.info("Trello não configurado, criação de card ignorada")
+        return
+    
+    trello_service = TrelloService(db, prioridade=PRIORIDADE_SEGUNDO_PLANO)
+    card_info = await trello_service.criar_card(demanda, db)
+    
+    demanda.trello_card_id = card_info.get('id')
+    demanda.trello_card_url = card_info.get('url')
+    demanda.trello_card_hash = card_info.get('hash')
+    
+    logger.info(f"Card criado no Trello: {card_info.get('url')}")
+
+
+async def _trello_atualizar_card(db: Session, evento: OutboxEvento) -> None:
+    """Sincronizar card existente com o estado atual da demanda"""
+    from app.services.trello import TrelloService
+    from app.services.trello_limites import PRIORIDADE_SEGUNDO_PLANO
+    
+    demanda = db.query(Demanda).filter(Demanda.id == evento.demanda_id).first()
+    if not demanda or not demanda.trello_card_id:
+        return
+    
+    trello_service = TrelloService(db, prioridade=PRIORIDADE_SEGUNDO_PLANO)
+    await trello_service.atualizar_card(demanda, db)
+    logger.info(f"Card Trello atualizado para demanda {demanda.id}")
+
+
+async def _trello_deletar_card(db: Session, evento: OutboxEvento) -> None:
+    """Deletar card de uma demanda já excluída (ID do card vem no payload)"""
+    from app.services.trello import TrelloService
+    from app.services.trello_limites import PRIORIDADE_SEGUNDO_PLANO
+    
+    card_id = evento.dados.get('trello_card_id')
+    if not card_id:
+        return
+    
+    trello_service = TrelloService(db, prioridade=PRIORIDADE_SEGUNDO_PLANO)
+    if not await trello_service.deletar_card_por_id(card_id):
+        raise Exception(f"Falha ao deletar card {card_id} do Trello")
+
+
+def _verificar_envio(resultado: dict, descricao: str, retomavel: bool = True) -> None:
+    """
+    Falhar o evento (e tentar de novo depois) se houve falhas de envio
+    
+    Com logs por evento (retomavel=True) a nova tentativa só reenvia para
+    quem falhou. Sem logs (exclusão), falhas parciais não geram nova
+    tentativa: reenviaria para quem já recebeu.
+    """
+    logger.info(
+        f"Notificações de {descricao}: {resultado['enviados']} enviadas, "
+        f"{resultado['falhas']} falhas"
+    )
+    if resultado["falhas"] and (retomavel or not resultado["enviados"]):
+        raise Exception(f"{resultado['falhas']} notificações de {descricao} não foram enviadas")
+
+
+async def _whatsapp_nova_demanda(db: Session, evento: OutboxEvento) -> None:
+    """Notificar usuários sobre nova demanda"""
+    from app.services.notification import NotificationService
+    
+    demanda = db.query(Demanda).filter(Demanda.id == evento.demanda_id).first()
+    if not demanda:
+        return
+    
+    resultado = await NotificationService(db, evento_id=evento.id).notificar_nova_demanda(demanda)
+    _verificar_envio(resultado, "nova demanda")
+
+
+async def _whatsapp_atualizacao_demanda(db: Session, evento: OutboxEvento) -> None:
+    """Notificar usuários sobre atualização genérica de demanda"""
+    from app.services.notification import NotificationService
+    
+    demanda = db.query(Demanda).filter(Demanda.id == evento.demanda_id).first()
+    if not demanda:
+        return
+    
+    resultado = await NotificationService(db, evento_id=evento.id).notificar_atualizacao_demanda(
+        demanda=demanda,
+        campos_alterados=evento.dados.get('campos_alterados')
+    )
+    _verificar_envio(resultado, "atualização")
+
+
+async def _whatsapp_mudanca_status(db: Session, evento: OutboxEvento) -> None:
+    """Notificar usuários sobre mudança de status"""
+    from app.services.notification import NotificationService
+    
+    demanda = db.query(Demanda).filter(Demanda.id == evento.demanda_id).first()
+    if not demanda:
+        return
+    
+    dados = evento.dados
+    resultado = await NotificationService(db, evento_id=evento.id).notificar_mudanca_status(
+        demanda=demanda,
+        status_antigo=dados.get('status_antigo'),
+        status_novo=dados.get('status_novo')
+    )
+    _verificar_envio(resultado, "mudança de status")
+
+
+async def _whatsapp_exclusao_demanda(db: Session, evento: OutboxEvento) -> None:
+    """Notificar usuários sobre exclusão (dados vêm do snapshot no payload)"""
+    from app.services.notification import NotificationService
+    
+    resultado = await NotificationService(db).notificar_exclusao_snapshot(evento.dados)
+    _verificar_envio(resultado, "exclusão", retomavel=False)
+
+
+HANDLERS: Dict[str, Callable] = {
+    "trello_criar_card": _trello_criar_card,
+    "trello_atualizar_card": _trello_atualizar_card,
+    "trello_deletar_card": _trello_deletar_card,
+    "whatsapp_nova_demanda": _whatsapp_nova_demanda,
+    "whatsapp_atualizacao_demanda": _whatsapp_atualizacao_demanda,
+    "whatsapp_mudanca_status": _whatsapp_mudanca_status,
+    "whatsapp_exclusao_demanda": _whatsapp_exclusao_demanda,
+}
+
+
+# ==================== SERVIÇO ====================
+
+class OutboxService:
+    """
+    Reivindica e processa eventos da outbox
+    
+    Exemplo de uso:
+        ```python
+        service = OutboxService()
+        ids = service.reivindicar(limite=20)
+        for evento_id in ids:
+            await service.processar(evento_id)
+        ```
+    """
+    
+    def __init__(self, worker_id: Optional[str] = None):
+        """
+        Inicializar serviço
+        
+        Args:
+            worker_id: Identificador do worker (padrão: hostname:pid)
+        """
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.max_tentativas = settings.OUTBOX_MAX_TENTATIVAS
+        self.lock_timeout = settings.OUTBOX_LOCK_TIMEOUT_SECONDS
+    
+    def reivindicar(self, limite: int) -> List[str]:
+        """
+        Reivindicar eventos prontos para processamento
+        
+        Usa FOR UPDATE SKIP LOCKED para que vários workers possam
+        trabalhar em paralelo sem pegar o mesmo evento. Eventos presos
+        em "processando" além do lock_timeout (worker morto) são retomados.
+        
+        Args:
+            limite: Número máximo de eventos
+        
+        Returns:
+            Lista de IDs reivindicados
+        """
+        db = SessionLocal()
+        try:
+            eventos = db.query(OutboxEvento).filter(
+                or_(
+                    and_(
+                        OutboxEvento.status == StatusOutbox.PENDENTE.value,
+                        OutboxEvento.proxima_tentativa_em <= func.now()
+                    ),
+                    and_(
+                        OutboxEvento.status == StatusOutbox.PROCESSANDO.value,
+                        OutboxEvento.bloqueado_em < func.now() - timedelta(seconds=self.lock_timeout)
+                    )
+                )
+            ).order_by(
+                OutboxEvento.created_at
+            ).limit(limite).with_for_update(skip_locked=True).all()
+            
+            ids = []
+            for evento in eventos:
+                evento.status = StatusOutbox.PROCESSANDO.value
+                evento.bloqueado_por = self.worker_id
+                evento.bloqueado_em = func.now()
+                evento.tentativas = (evento.tentativas or 0) + 1
+                ids.append(evento.id)
+            
+            db.commit()
+            return ids
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
+    def _calcular_backoff(self, tentativas: int) -> float:
+        """Backoff exponencial com jitter, limitado por OUTBOX_BACKOFF_MAX_SECONDS"""
+        base = settings.OUTBOX_BACKOFF_BASE_SECONDS * (2 ** max(tentativas - 1, 0))
+        base = min(base, settings.OUTBOX_BACKOFF_MAX_SECONDS)
+        return base * random.uniform(0.8, 1.2)
+    
+    async def processar(self, evento_id: str) -> bool:
+        """
+        Processar um evento reivindicado
+        
+        Cada evento usa sua própria sessão: o efeito (ex: gravar
+        trello_card_id) e a conclusão do evento são commitados juntos.
+        
+        Se o evento foi retomado por outro worker (lock_timeout vencido
+        durante um handler lento), a conclusão não encontra a reivindicação
+        deste worker e o trabalho é descartado (rollback).
+        
+        Args:
+            evento_id: ID do evento
+        
+        Returns:
+            True se concluído com sucesso
+        """
+        db = SessionLocal()
+        try:
+            evento = db.query(OutboxEvento).filter(OutboxEvento.id == evento_id).first()
+            if (
+                not evento
+                or evento.status != StatusOutbox.PROCESSANDO.value
+                or evento.bloqueado_por != self.worker_id
+            ):
+                return False
+            
+            handler = HANDLERS.get(evento.tipo)
+            if handler is None:
+                raise ValueError(f"Tipo de evento desconhecido: {evento.tipo}")
+            
+            if inspect.iscoroutinefunction(handler):
+                await handler(db, evento)
+            else:
+                # Handlers síncronos (requests) não podem bloquear o loop do worker
+                await asyncio.to_thread(handler, db, evento)
+            
+            concluidos = db.query(OutboxEvento).filter(
+                OutboxEvento.id == evento_id,
+                OutboxEvento.status == StatusOutbox.PROCESSANDO.value,
+                OutboxEvento.bloqueado_por == self.worker_id
+            ).update({
+                OutboxEvento.status: StatusOutbox.CONCLUIDO.value,
+                OutboxEvento.processado_em: func.now(),
+                OutboxEvento.bloqueado_por: None,
+                OutboxEvento.ultimo_erro: None
+            }, synchronize_session=False)
+            
+            if not concluidos:
+                db.rollback()
+                logger.warning(f"Evento {evento_id} retomado por outro worker; resultado descartado")
+                return False
+            
+            db.commit()
+            
+            logger.info(f"Evento {evento_id} ({evento.tipo}) concluído")
+            return True
+        
+        except Exception as e:
+            db.rollback()
+            self._registrar_falha(db, evento_id, e)
+            return False
+        finally:
+            db.close()
+    
+    def _registrar_falha(self, db: Session, evento_id: str, erro: Exception) -> None:
+        """Reagendar evento com backoff ou marcar como falhou"""
+        try:
+            evento = db.query(OutboxEvento).filter(
+                OutboxEvento.id == evento_id,
+                OutboxEvento.bloqueado_por == self.worker_id
+            ).with_for_update().first()
+            if not evento:
+                # Retomado por outro worker: a falha não é deste
+                return
+            
+            evento.ultimo_erro = str(erro)[:2000]
+            evento.bloqueado_por = None
+            
+            if evento.tentativas >= self.max_tentativas:
+                evento.status = StatusOutbox.FALHOU.value
+                logger.error(
+                    f"Evento {evento_id} ({evento.tipo}) falhou definitivamente "
+                    f"após {evento.tentativas} tentativas: {erro}"
+                )
+            else:
+                atraso = self._calcular_backoff(evento.tentativas)
+                evento.status = StatusOutbox.PENDENTE.value
+                evento.proxima_tentativa_em = func.now() + timedelta(seconds=atraso)
+                logger.warning(
+                    f"Evento {evento_id} ({evento.tipo}) falhou "
+                    f"(tentativa {evento.tentativas}), nova tentativa em {atraso:.0f}s: {erro}"
+                )
+            
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Erro ao registrar falha do evento {evento_id}: {e}")
+    
+    @staticmethod
+    def obter_estado(db: Session) -> dict:
+        """
+        Estado atual da outbox (para monitoramento)
+        
+        Args:
+            db: Sessão do banco
+        
+        Returns:
+            Dicionário com contagem por status, atraso do evento pendente
+            mais antigo, workers ativos e últimas falhas
+        """
+        por_status = {s.value: 0 for s in StatusOutbox}
+        for status_evento, total in db.query(
+            OutboxEvento.status,
+            func.count(OutboxEvento.id)
+        ).group_by(OutboxEvento.status).all():
+            por_status[status_evento] = total
+        
+        atraso_segundos = db.query(
+            func.extract('epoch', func.now() - func.min(OutboxEvento.created_at))
+        ).filter(
+            OutboxEvento.status == StatusOutbox.PENDENTE.value
+        ).scalar()
+        
+        workers = [
+            worker for (worker,) in db.query(OutboxEvento.bloqueado_por).filter(
+                OutboxEvento.status == StatusOutbox.PROCESSANDO.value,
+                OutboxEvento.bloqueado_por.isnot(None)
+            ).distinct().all()
+        ]
+        
+        falhas = db.query(OutboxEvento).filter(
+            OutboxEvento.status == StatusOutbox.FALHOU.value
+        ).order_by(OutboxEvento.updated_at.desc()).limit(10).all()
+        
+        return {
+            "por_status": por_status,
+            "atraso_pendente_segundos": float(atraso_segundos) if atraso_segundos is not None else 0.0,
+            "workers_ativos": workers,
+            "ultimas_falhas": [
+                {
+                    "id": f.id,
+                    "tipo": f.tipo,
+                    "demanda_id": f.demanda_id,
+                    "tentativas": f.tentativas,
+                    "ultimo_erro": f.ultimo_erro,
+                    "updated_at": f.updated_at.isoformat() if f.updated_at else None,
+                }
+                for f in falhas
+            ],
+        }
+    
+    @staticmethod
+    def reprocessar(db: Session, evento_id: str) -> Optional[OutboxEvento]:
+        """
+        Recolocar um evento que falhou na fila
+        
+        Args:
+            db: Sessão do banco
+            evento_id: ID do evento
+        
+        Returns:
+            Evento reagendado ou None se não encontrado
+        """
+        evento = db.query(OutboxEvento).filter(OutboxEvento.id == evento_id).first()
+        if not evento:
+            return None
+        
+        evento.status = StatusOutbox.PENDENTE.value
+        evento.tentativas = 0
+        evento.proxima_tentativa_em = func.now()
+        evento.bloqueado_por = None
+        evento.ultimo_erro = None
+        db.commit()
+        db.refresh(evento)
+        return evento
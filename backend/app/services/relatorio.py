@@ -1,19 +1,25 @@
 """
 Serviço para geração de relatórios PDF e Excel
 """
+import tempfile
 from io import BytesIO
 from datetime import datetime
-from typing import List, Optional, Dict
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
 from reportlab.lib.units import inch
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from reportlab.pdfbase.pdfdoc import PDFArray, PDFName, PDFStream, PDFZCompress
+from reportlab.pdfgen.canvas import Canvas
 from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
 from openpyxl.utils import get_column_letter
-from app.models.demanda import Demanda
+from sqlalchemy import func
+from sqlalchemy.orm import Query, joinedload
+from app.models.demanda import Demanda, StatusDemanda
 from app.models.cliente import Cliente
 from app.models.secretaria import Secretaria
 from app.models.tipo_demanda import TipoDemanda
@@ -21,31 +27,294 @@ from app.models.prioridade import Prioridade
 from app.models.user import User
 
 
+class _FlowablesSobDemanda(list):
+    """
+    Lista de flowables abastecida sob demanda
+    
+    O ReportLab consome a lista pelo início (flowables[0], del flowables[0]
+    e reinsere as partes de tabelas quebradas). Mantendo só uma janela de
+    `folga` itens, a história inteira nunca fica em memória.
+    """
+    
+    def __init__(self, gerador: Iterator, folga: int = 20):
+        super().__init__()
+        self._gerador = gerador
+        self._folga = folga
+    
+    def _abastecer(self) -> None:
+        while self._gerador is not None and list.__len__(self) < self._folga:
+            try:
+                self.append(next(self._gerador))
+            except StopIteration:
+                self._gerador = None
+    
+    def __len__(self) -> int:
+        self._abastecer()
+        return list.__len__(self)
+    
+    def __getitem__(self, indice):
+        self._abastecer()
+        return list.__getitem__(self, indice)
+
+
+class _CanvasCompacto(Canvas):
+    """
+    Canvas que comprime o conteúdo de cada página ao fechá-la
+    
+    O ReportLab guarda o stream de todas as páginas (texto, ~17 KB cada)
+    até o save(); comprimindo na hora, relatórios com milhares de páginas
+    retêm só alguns KB por página.
+    """
+    
+    def showPage(self):
+        super().showPage()
+        pagina = self._doc.Pages.pages[-1]
+        if pagina.stream and not pagina.Contents:
+            conteudo = PDFStream(content=PDFZCompress.encode(pagina.stream))
+            conteudo.dictionary["Filter"] = PDFArray([PDFName(PDFZCompress.pdfname)])
+            conteudo.__Comment__ = "page stream"
+            pagina.Contents = conteudo
+            pagina.stream = None
+
+
 class RelatorioService:
     """
     Gerador de relatórios PDF e Excel
     """
     
+    @staticmethod
+    def normalizar_filtros(
+        cliente_id: Optional[str] = None,
+        secretaria_id: Optional[List[str]] = None,
+        tipo_demanda_id: Optional[List[str]] = None,
+        status: Optional[str] = None,
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None
+    ) -> Dict:
+        """
+        Validar e normalizar os filtros de relatório
+        
+        A forma normalizada (listas ordenadas, status em minúsculo) é
+        estável: mesmos filtros geram o mesmo JSON (chave de cache).
+        
+        Raises:
+            ValueError: Status ou data inválidos (mensagem pronta para o usuário)
+        """
+        if status:
+            try:
+                status = StatusDemanda(status.lower()).value
+            except ValueError:
+                raise ValueError(f"Status inválido. Valores válidos: {[s.value for s in StatusDemanda]}")
+        
+        for nome, valor in (("data_inicio", data_inicio), ("data_fim", data_fim)):
+            if valor:
+                try:
+                    datetime.strptime(valor, "%Y-%m-%d")
+                except ValueError:
+                    raise ValueError(f"Formato de {nome} inválido. Use YYYY-MM-DD")
+        
+        return {
+            "cliente_id": cliente_id or None,
+            "secretaria_id": sorted(set(secretaria_id)) if secretaria_id else None,
+            "tipo_demanda_id": sorted(set(tipo_demanda_id)) if tipo_demanda_id else None,
+            "status": status or None,
+            "data_inicio": data_inicio or None,
+            "data_fim": data_fim or None
+        }
+    
+    @staticmethod
+    def filtrar_demandas(query: Query, filtros: Dict, usuario_id: Optional[str] = None) -> Query:
+        """
+        Aplicar filtros normalizados (normalizar_filtros) a uma query de Demanda
+        
+        Args:
+            query: Query base de Demanda
+            filtros: Filtros normalizados
+            usuario_id: Restringir às demandas do usuário (não master)
+        
+        Returns:
+            Query filtrada
+        """
+        if usuario_id:
+            query = query.filter(Demanda.usuario_id == usuario_id)
+        if filtros.get("cliente_id"):
+            query = query.join(Secretaria).filter(Secretaria.cliente_id == filtros["cliente_id"])
+        if filtros.get("secretaria_id"):
+            query = query.filter(Demanda.secretaria_id.in_(filtros["secretaria_id"]))
+        if filtros.get("tipo_demanda_id"):
+            query = query.filter(Demanda.tipo_demanda_id.in_(filtros["tipo_demanda_id"]))
+        if filtros.get("status"):
+            query = query.filter(Demanda.status == StatusDemanda(filtros["status"]))
+        if filtros.get("data_inicio"):
+            query = query.filter(Demanda.created_at >= datetime.strptime(filtros["data_inicio"], "%Y-%m-%d").date())
+        if filtros.get("data_fim"):
+            query = query.filter(Demanda.created_at <= datetime.strptime(filtros["data_fim"], "%Y-%m-%d").date())
+        return query
+    
+    @staticmethod
+    def carregar_relacionamentos(query: Query) -> Query:
+        """Tipo, prioridade, secretaria/cliente e usuário no mesmo SELECT"""
+        return query.options(
+            joinedload(Demanda.tipo_demanda),
+            joinedload(Demanda.prioridade),
+            joinedload(Demanda.secretaria).joinedload(Secretaria.cliente),
+            joinedload(Demanda.usuario)
+        )
+    
+    @staticmethod
+    def resumo_por_status(query: Query) -> Dict[str, int]:
+        """
+        Total e contagem por status da query do relatório (um GROUP BY)
+        
+        Permite escrever o resumo no início do PDF sem materializar as
+        demandas (que são lidas depois, em lotes).
+        
+        Returns:
+            {"total": n, "aberta": n, "em_andamento": n, ...}
+        """
+        linhas = query.with_entities(
+            Demanda.status,
+            func.count(Demanda.id)
+        ).order_by(None).group_by(Demanda.status).all()
+        
+        resumo = {s.value: 0 for s in StatusDemanda}
+        for status_demanda, total in linhas:
+            resumo[getattr(status_demanda, 'value', status_demanda)] = total
+        resumo["total"] = sum(total for _, total in linhas)
+        return resumo
+    
     def gerar_pdf(
         self,
-        demandas: List[Demanda],
+        demandas: Iterable[Demanda],
         filtros: Dict[str, Optional[str]],
-        usuario: User
-    ) -> BytesIO:
+        usuario: User,
+        resumo: Optional[Dict[str, int]] = None
+    ) -> BinaryIO:
         """
-        Gerar relatório PDF
+        Gerar relatório PDF em arquivo temporário
         
         Args:
-            demandas: Lista de demandas
+            demandas: Demandas (lista ou iterável - ver escrever_pdf)
             filtros: Filtros aplicados (para mostrar no relatório)
             usuario: Usuário que gerou o relatório
+            resumo: Contagens por status (resumo_por_status)
         
         Returns:
-            BytesIO com conteúdo do PDF
+            Arquivo temporário com o PDF, posicionado no início
+            (removido do disco ao ser fechado)
         """
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch)
-        elements = []
+        arquivo = tempfile.TemporaryFile()
+        try:
+            self.escrever_pdf(demandas, filtros, usuario.nome_completo or usuario.username, arquivo, resumo)
+        except Exception:
+            arquivo.close()
+            raise
+        arquivo.seek(0)
+        return arquivo
+    
+    def escrever_pdf(
+        self,
+        demandas: Iterable[Demanda],
+        filtros: Dict[str, Optional[str]],
+        gerado_por: str,
+        destino: BinaryIO,
+        resumo: Optional[Dict[str, int]] = None
+    ) -> None:
+        """
+        Escrever relatório PDF com memória limitada
+        
+        - A lista de demandas é dividida em tabelas de PDF_LINHAS_POR_TABELA
+          linhas (cabeçalho repetido em cada tabela e em cada quebra de
+          página): o layout de cada tabela é pequeno e o tempo cresce de
+          forma linear com o número de demandas
+        - Os flowables são criados sob demanda enquanto o ReportLab
+          consome o início da lista (_FlowablesSobDemanda): `demandas`
+          pode ser uma query com yield_per
+        - Rodapé com o número real da página (callback do page template)
+        - Páginas comprimidas assim que fechadas (_CanvasCompacto)
+        
+        Args:
+            demandas: Demandas com tipo, prioridade e secretaria/cliente carregados
+            filtros: Filtros aplicados
+            gerado_por: Nome de quem gerou o relatório
+            destino: Arquivo de saída (ou caminho)
+            resumo: Contagens por status; se omitido, `demandas` é
+                materializado para contar (só para listas pequenas)
+        """
+        if resumo is None:
+            demandas = list(demandas)
+            resumo = {s.value: 0 for s in StatusDemanda}
+            for demanda in demandas:
+                resumo[demanda.status.value] += 1
+            resumo["total"] = len(demandas)
+        
+        doc = SimpleDocTemplate(
+            destino,
+            pagesize=A4,
+            topMargin=0.5*inch,
+            bottomMargin=0.75*inch,
+            title="Relatório de Demandas",
+            author=gerado_por
+        )
+        
+        flowables = _FlowablesSobDemanda(self._flowables_pdf(demandas, filtros, gerado_por, resumo))
+        doc.build(
+            flowables,
+            onFirstPage=self._rodape_pdf,
+            onLaterPages=self._rodape_pdf,
+            canvasmaker=_CanvasCompacto
+        )
+    
+    # Linhas de demanda por tabela do PDF (par: mantém a alternância de cores)
+    PDF_LINHAS_POR_TABELA = 200
+    
+    CABECALHO_PDF = ['ID', 'Nome', 'Tipo', 'Prioridade', 'Status', 'Prazo', 'Cliente']
+    
+    LARGURAS_PDF = [0.8*inch, 2.2*inch, 1*inch, 0.9*inch, 1*inch, 0.9*inch, 1.2*inch]
+    
+    ESTILO_TABELA_PDF = TableStyle([
+        # Cabeçalho
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3B82F6')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 9),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+        ('TOPPADDING', (0, 0), (-1, 0), 10),
+        
+        # Dados
+        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+        ('ALIGN', (0, 1), (-1, -1), 'LEFT'),
+        ('ALIGN', (0, 1), (0, -1), 'CENTER'),  # ID centralizado
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 8),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F9FAFB')]),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ])
+    
+    @staticmethod
+    def _rodape_pdf(canvas, doc) -> None:
+        """Rodapé de todas as páginas, com o número da página"""
+        canvas.saveState()
+        canvas.setFont('Helvetica', 8)
+        canvas.setFillColor(colors.grey)
+        canvas.drawCentredString(
+            doc.pagesize[0] / 2,
+            0.4*inch,
+            f"DeBrief Sistema - Página {canvas.getPageNumber()}"
+        )
+        canvas.restoreState()
+    
+    def _flowables_pdf(
+        self,
+        demandas: Iterable[Demanda],
+        filtros: Dict[str, Optional[str]],
+        gerado_por: str,
+        resumo: Dict[str, int]
+    ) -> Iterator:
+        """Gerar os flowables do relatório na ordem do documento"""
         styles = getSampleStyleSheet()
         
         # Estilo personalizado para título
@@ -60,9 +329,8 @@ class RelatorioService:
         )
         
         # Título
-        title = Paragraph("Relatório de Demandas", title_style)
-        elements.append(title)
-        elements.append(Spacer(1, 10))
+        yield Paragraph("Relatório de Demandas", title_style)
+        yield Spacer(1, 10)
         
         # Data de geração
         date_style = ParagraphStyle(
@@ -72,10 +340,9 @@ class RelatorioService:
             textColor=colors.grey,
             alignment=TA_CENTER
         )
-        date_text = f"Gerado em: {datetime.now().strftime('%d/%m/%Y às %H:%M')}"
-        elements.append(Paragraph(date_text, date_style))
-        elements.append(Paragraph(f"Gerado por: {usuario.nome_completo or usuario.username}", date_style))
-        elements.append(Spacer(1, 20))
+        yield Paragraph(f"Gerado em: {datetime.now().strftime('%d/%m/%Y às %H:%M')}", date_style)
+        yield Paragraph(f"Gerado por: {gerado_por}", date_style)
+        yield Spacer(1, 20)
         
         # Resumo
         summary_style = ParagraphStyle(
@@ -86,21 +353,14 @@ class RelatorioService:
             spaceAfter=10,
             fontName='Helvetica-Bold'
         )
-        elements.append(Paragraph("<b>Resumo</b>", summary_style))
-        
-        # Estatísticas rápidas
-        total = len(demandas)
-        abertas = sum(1 for d in demandas if d.status.value == 'aberta')
-        em_andamento = sum(1 for d in demandas if d.status.value == 'em_andamento')
-        concluidas = sum(1 for d in demandas if d.status.value == 'concluida')
-        canceladas = sum(1 for d in demandas if d.status.value == 'cancelada')
+        yield Paragraph("<b>Resumo</b>", summary_style)
         
         summary_data = [
-            ['Total de Demandas', str(total)],
-            ['Abertas', str(abertas)],
-            ['Em Andamento', str(em_andamento)],
-            ['Concluídas', str(concluidas)],
-            ['Canceladas', str(canceladas)]
+            ['Total de Demandas', str(resumo.get('total', 0))],
+            ['Abertas', str(resumo.get('aberta', 0))],
+            ['Em Andamento', str(resumo.get('em_andamento', 0))],
+            ['Concluídas', str(resumo.get('concluida', 0))],
+            ['Canceladas', str(resumo.get('cancelada', 0))]
         ]
         
         summary_table = Table(summary_data, colWidths=[3*inch, 2*inch])
@@ -116,109 +376,86 @@ class RelatorioService:
             ('TOPPADDING', (0, 0), (-1, -1), 8),
             ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
         ]))
-        elements.append(summary_table)
-        elements.append(Spacer(1, 20))
+        yield summary_table
+        yield Spacer(1, 20)
         
         # Filtros aplicados
         filtros_aplicados = {k: v for k, v in filtros.items() if v is not None}
         if filtros_aplicados:
-            elements.append(Paragraph("<b>Filtros Aplicados</b>", summary_style))
+            yield Paragraph("<b>Filtros Aplicados</b>", summary_style)
             filtros_text = []
             for key, value in filtros_aplicados.items():
                 filtros_text.append(f"• {key.replace('_', ' ').title()}: {value}")
-            elements.append(Paragraph("<br/>".join(filtros_text), styles['Normal']))
-            elements.append(Spacer(1, 20))
+            yield Paragraph("<br/>".join(filtros_text), styles['Normal'])
+            yield Spacer(1, 20)
         
-        # Tabela de demandas
-        if demandas:
-            elements.append(Paragraph("<b>Lista de Demandas</b>", summary_style))
-            elements.append(Spacer(1, 10))
-            
-            # Cabeçalho da tabela
-            headers = ['ID', 'Nome', 'Tipo', 'Prioridade', 'Status', 'Prazo', 'Cliente']
-            data = [headers]
-            
-            # Dados das demandas
-            for demanda in demandas:
-                # Obter relacionamentos
-                tipo_nome = demanda.tipo_demanda.nome if demanda.tipo_demanda else 'N/A'
-                prioridade_nome = demanda.prioridade.nome if demanda.prioridade else 'N/A'
-                status_nome = demanda.status.value.replace('_', ' ').title()
-                prazo = demanda.prazo_final.strftime('%d/%m/%Y') if demanda.prazo_final else 'N/A'
-                
-                # Obter cliente via secretaria
-                cliente_nome = 'N/A'
-                if demanda.secretaria and demanda.secretaria.cliente:
-                    cliente_nome = demanda.secretaria.cliente.nome
-                
-                # Truncar nome se muito longo
-                nome = demanda.nome[:40] + '...' if len(demanda.nome) > 40 else demanda.nome
-                
-                data.append([
-                    demanda.id[:8] + '...',  # Primeiros 8 caracteres do UUID
-                    nome,
-                    tipo_nome,
-                    prioridade_nome,
-                    status_nome,
-                    prazo,
-                    cliente_nome[:30] if len(cliente_nome) > 30 else cliente_nome
-                ])
-            
-            # Criar tabela
-            table = Table(data, colWidths=[0.8*inch, 2.2*inch, 1*inch, 0.9*inch, 1*inch, 0.9*inch, 1.2*inch])
-            table.setStyle(TableStyle([
-                # Cabeçalho
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3B82F6')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 9),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-                ('TOPPADDING', (0, 0), (-1, 0), 10),
-                
-                # Dados
-                ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-                ('ALIGN', (0, 1), (-1, -1), 'LEFT'),
-                ('ALIGN', (0, 1), (0, -1), 'CENTER'),  # ID centralizado
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F9FAFB')]),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ]))
-            
-            elements.append(table)
-        else:
-            elements.append(Paragraph("<i>Nenhuma demanda encontrada com os filtros aplicados.</i>", styles['Normal']))
-        
-        # Rodapé
-        elements.append(Spacer(1, 20))
-        footer_style = ParagraphStyle(
-            'FooterStyle',
-            parent=styles['Normal'],
-            fontSize=8,
-            textColor=colors.grey,
-            alignment=TA_CENTER
-        )
-        elements.append(Paragraph(f"DeBrief Sistema - Página 1", footer_style))
+        # Tabela de demandas, em blocos
+        if not resumo.get('total'):
+            yield Paragraph("<i>Nenhuma demanda encontrada com os filtros aplicados.</i>", styles['Normal'])
+            return
         
-        # Construir PDF
-        doc.build(elements)
-        buffer.seek(0)
-        return buffer
+        yield Paragraph("<b>Lista de Demandas</b>", summary_style)
+        yield Spacer(1, 10)
+        
+        bloco = []
+        for demanda in demandas:
+            bloco.append(self._linha_pdf(demanda))
+            if len(bloco) >= self.PDF_LINHAS_POR_TABELA:
+                yield self._tabela_pdf(bloco)
+                bloco = []
+        if bloco:
+            yield self._tabela_pdf(bloco)
+    
+    def _tabela_pdf(self, linhas: List[list]) -> Table:
+        """Tabela de um bloco de demandas (cabeçalho repetido ao quebrar página)"""
+        return Table(
+            [self.CABECALHO_PDF] + linhas,
+            colWidths=self.LARGURAS_PDF,
+            repeatRows=1,
+            style=self.ESTILO_TABELA_PDF
+        )
+    
+    @staticmethod
+    def _linha_pdf(demanda: Demanda) -> list:
+        """Linha da tabela de demandas"""
+        # Obter relacionamentos
+        tipo_nome = demanda.tipo_demanda.nome if demanda.tipo_demanda else 'N/A'
+        prioridade_nome = demanda.prioridade.nome if demanda.prioridade else 'N/A'
+        status_nome = demanda.status.value.replace('_', ' ').title()
+        prazo = demanda.prazo_final.strftime('%d/%m/%Y') if demanda.prazo_final else 'N/A'
+        
+        # Obter cliente via secretaria
+        cliente_nome = 'N/A'
+        if demanda.secretaria and demanda.secretaria.cliente:
+            cliente_nome = demanda.secretaria.cliente.nome
+        
+        # Truncar nome se muito longo
+        nome = demanda.nome[:40] + '...' if len(demanda.nome) > 40 else demanda.nome
+        
+        return [
+            demanda.id[:8] + '...',  # Primeiros 8 caracteres do UUID
+            nome,
+            tipo_nome,
+            prioridade_nome,
+            status_nome,
+            prazo,
+            cliente_nome[:30] if len(cliente_nome) > 30 else cliente_nome
+        ]
     
     def gerar_excel(
         self,
-        demandas: List[Demanda],
+        demandas: Iterable[Demanda],
         filtros: Dict[str, Optional[str]],
         usuario: User
     ) -> BytesIO:
         """
-        Gerar relatório Excel
+        Gerar relatório Excel em memória
+        
+        Para exportações grandes prefira escrever_excel() com
+        transmitir_de_thread (app.core.streaming).
         
         Args:
-            demandas: Lista de demandas
+            demandas: Demandas (lista ou iterável)
             filtros: Filtros aplicados
             usuario: Usuário que gerou o relatório
         
@@ -226,86 +463,60 @@ class RelatorioService:
             BytesIO com conteúdo do Excel
         """
         buffer = BytesIO()
-        wb = Workbook()
-        
-        # ========== ABA: RESUMO ==========
-        ws_resumo = wb.active
-        ws_resumo.title = "Resumo"
-        
-        # Título
-        ws_resumo['A1'] = 'Relatório de Demandas'
-        ws_resumo['A1'].font = Font(size=16, bold=True, color="3B82F6")
-        ws_resumo.merge_cells('A1:B1')
-        
-        # Data de geração
-        ws_resumo['A2'] = f"Gerado em: {datetime.now().strftime('%d/%m/%Y às %H:%M')}"
-        ws_resumo['A2'].font = Font(size=10, italic=True)
-        ws_resumo['A3'] = f"Gerado por: {usuario.nome_completo or usuario.username}"
-        ws_resumo['A3'].font = Font(size=10, italic=True)
+        self.escrever_excel(demandas, filtros, usuario.nome_completo or usuario.username, buffer)
+        buffer.seek(0)
+        return buffer
+    
+    def escrever_excel(
+        self,
+        demandas: Iterable[Demanda],
+        filtros: Dict[str, Optional[str]],
+        gerado_por: str,
+        destino: BinaryIO
+    ) -> None:
+        """
+        Escrever relatório Excel em modo write-only
         
-        # Estatísticas
-        ws_resumo['A5'] = 'Total de Demandas:'
-        ws_resumo['B5'] = len(demandas)
-        ws_resumo['B5'].font = Font(bold=True)
-        
-        abertas = sum(1 for d in demandas if d.status.value == 'aberta')
-        em_andamento = sum(1 for d in demandas if d.status.value == 'em_andamento')
-        concluidas = sum(1 for d in demandas if d.status.value == 'concluida')
-        canceladas = sum(1 for d in demandas if d.status.value == 'cancelada')
-        
-        ws_resumo['A6'] = 'Abertas:'
-        ws_resumo['B6'] = abertas
-        ws_resumo['A7'] = 'Em Andamento:'
-        ws_resumo['B7'] = em_andamento
-        ws_resumo['A8'] = 'Concluídas:'
-        ws_resumo['B8'] = concluidas
-        ws_resumo['A9'] = 'Canceladas:'
-        ws_resumo['B9'] = canceladas
+        As linhas são escritas à medida que `demandas` é percorrido (pode
+        ser uma query com yield_per): a memória não cresce com o número de
+        demandas. Estilos são NamedStyles aplicados na criação da célula,
+        sem segunda passada sobre a planilha.
         
-        # Filtros aplicados
-        filtros_aplicados = {k: v for k, v in filtros.items() if v is not None}
-        if filtros_aplicados:
-            ws_resumo['A11'] = 'Filtros Aplicados:'
-            ws_resumo['A11'].font = Font(bold=True)
-            row = 12
-            for key, value in filtros_aplicados.items():
-                ws_resumo[f'A{row}'] = f"• {key.replace('_', ' ').title()}: {value}"
-                row += 1
+        Args:
+            demandas: Demandas com tipo, prioridade, secretaria/cliente e usuário carregados
+            filtros: Filtros aplicados
+            gerado_por: Nome de quem gerou o relatório
+            destino: Arquivo de saída (aceita streams sem seek)
+        """
+        wb = Workbook(write_only=True)
+        for estilo in self._estilos_excel():
+            wb.add_named_style(estilo)
         
-        # Ajustar largura das colunas
-        ws_resumo.column_dimensions['A'].width = 25
-        ws_resumo.column_dimensions['B'].width = 20
+        # Abas na ordem final; o resumo é preenchido depois dos dados
+        ws_resumo = wb.create_sheet(title="Resumo")
+        ws_dados = wb.create_sheet(title="Dados Detalhados")
         
         # ========== ABA: DADOS DETALHADOS ==========
-        ws_dados = wb.create_sheet(title="Dados Detalhados")
+        for col, width in self.LARGURAS_EXCEL.items():
+            ws_dados.column_dimensions[col].width = width
         
-        # Cabeçalho
-        headers = ['ID', 'Nome', 'Descrição', 'Tipo', 'Prioridade', 'Status', 'Prazo Final', 'Cliente', 'Secretaria', 'Solicitante', 'Criado em']
-        ws_dados.append(headers)
+        # Congelar primeira linha
+        ws_dados.freeze_panes = 'A2'
         
-        # Formatar cabeçalho
-        header_fill = PatternFill(start_color="3B82F6", end_color="3B82F6", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF", size=11)
-        header_alignment = Alignment(horizontal="center", vertical="center")
-        border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
+        ws_dados.append([self._celula(ws_dados, titulo, 'cabecalho') for titulo in self.CABECALHO_EXCEL])
         
-        for cell in ws_dados[1]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = header_alignment
-            cell.border = border
+        total = 0
+        por_status: Dict[str, int] = {}
         
-        # Dados
         for demanda in demandas:
+            total += 1
+            status_valor = demanda.status.value
+            por_status[status_valor] = por_status.get(status_valor, 0) + 1
+            
             # Obter relacionamentos
             tipo_nome = demanda.tipo_demanda.nome if demanda.tipo_demanda else 'N/A'
             prioridade_nome = demanda.prioridade.nome if demanda.prioridade else 'N/A'
-            status_nome = demanda.status.value.replace('_', ' ').title()
+            status_nome = status_valor.replace('_', ' ').title()
             prazo = demanda.prazo_final.strftime('%d/%m/%Y') if demanda.prazo_final else 'N/A'
             criado_em = demanda.created_at.strftime('%d/%m/%Y %H:%M') if demanda.created_at else 'N/A'
             
@@ -325,57 +536,116 @@ class RelatorioService:
             # Descrição (truncar se muito longa)
             descricao = demanda.descricao[:100] + '...' if demanda.descricao and len(demanda.descricao) > 100 else (demanda.descricao or 'N/A')
             
+            # Alternar cores de fundo (linha 2 = primeira linha de dados)
+            estilo = 'dado_par' if total % 2 == 1 else 'dado_impar'
+            
             ws_dados.append([
-                demanda.id,
-                demanda.nome,
-                descricao,
-                tipo_nome,
-                prioridade_nome,
-                status_nome,
-                prazo,
-                cliente_nome,
-                secretaria_nome,
-                solicitante,
-                criado_em
+                self._celula(ws_dados, valor, estilo)
+                for valor in (
+                    demanda.id,
+                    demanda.nome,
+                    descricao,
+                    tipo_nome,
+                    prioridade_nome,
+                    status_nome,
+                    prazo,
+                    cliente_nome,
+                    secretaria_nome,
+                    solicitante,
+                    criado_em
+                )
             ])
         
-        # Formatar células de dados
-        data_fill_white = PatternFill(start_color="FFFFFF", end_color="FFFFFF", fill_type="solid")
-        data_fill_grey = PatternFill(start_color="F9FAFB", end_color="F9FAFB", fill_type="solid")
-        data_alignment = Alignment(horizontal="left", vertical="center", wrap_text=True)
+        # ========== ABA: RESUMO ==========
+        ws_resumo.column_dimensions['A'].width = 25
+        ws_resumo.column_dimensions['B'].width = 20
         
-        for row_idx, row in enumerate(ws_dados.iter_rows(min_row=2, max_row=ws_dados.max_row), start=2):
-            for cell in row:
-                cell.border = border
-                cell.alignment = data_alignment
-                # Alternar cores de fundo
-                if row_idx % 2 == 0:
-                    cell.fill = data_fill_white
-                else:
-                    cell.fill = data_fill_grey
-        
-        # Ajustar largura das colunas
-        column_widths = {
-            'A': 15,  # ID
-            'B': 30,  # Nome
-            'C': 40,  # Descrição
-            'D': 15,  # Tipo
-            'E': 15,  # Prioridade
-            'F': 15,  # Status
-            'G': 12,  # Prazo Final
-            'H': 20,  # Cliente
-            'I': 20,  # Secretaria
-            'J': 20,  # Solicitante
-            'K': 18   # Criado em
-        }
-        for col, width in column_widths.items():
-            ws_dados.column_dimensions[col].width = width
+        ws_resumo.append([self._celula(ws_resumo, 'Relatório de Demandas', 'titulo')])
+        ws_resumo.append([self._celula(ws_resumo, f"Gerado em: {datetime.now().strftime('%d/%m/%Y às %H:%M')}", 'nota')])
+        ws_resumo.append([self._celula(ws_resumo, f"Gerado por: {gerado_por}", 'nota')])
+        ws_resumo.append([])
         
-        # Congelar primeira linha
-        ws_dados.freeze_panes = 'A2'
+        # Estatísticas
+        ws_resumo.append(['Total de Demandas:', self._celula(ws_resumo, total, 'destaque')])
+        ws_resumo.append(['Abertas:', por_status.get('aberta', 0)])
+        ws_resumo.append(['Em Andamento:', por_status.get('em_andamento', 0)])
+        ws_resumo.append(['Concluídas:', por_status.get('concluida', 0)])
+        ws_resumo.append(['Canceladas:', por_status.get('cancelada', 0)])
         
-        # Salvar no buffer
-        wb.save(buffer)
-        buffer.seek(0)
-        return buffer
-
+        # Filtros aplicados
+        filtros_aplicados = {k: v for k, v in filtros.items() if v is not None}
+        if filtros_aplicados:
+            ws_resumo.append([])
+            ws_resumo.append([self._celula(ws_resumo, 'Filtros Aplicados:', 'destaque')])
+            for key, value in filtros_aplicados.items():
+                ws_resumo.append([f"• {key.replace('_', ' ').title()}: {value}"])
+        
+        wb.save(destino)
+    
+    CABECALHO_EXCEL = ['ID', 'Nome', 'Descrição', 'Tipo', 'Prioridade', 'Status', 'Prazo Final', 'Cliente', 'Secretaria', 'Solicitante', 'Criado em']
+    
+    LARGURAS_EXCEL = {
+        'A': 15,  # ID
+        'B': 30,  # Nome
+        'C': 40,  # Descrição
+        'D': 15,  # Tipo
+        'E': 15,  # Prioridade
+        'F': 15,  # Status
+        'G': 12,  # Prazo Final
+        'H': 20,  # Cliente
+        'I': 20,  # Secretaria
+        'J': 20,  # Solicitante
+        'K': 18   # Criado em
+    }
+    
+    @staticmethod
+    def _celula(ws, valor, estilo: str) -> WriteOnlyCell:
+        """Célula write-only com NamedStyle"""
+        celula = WriteOnlyCell(ws, value=valor)
+        celula.style = estilo
+        return celula
+    
+    @staticmethod
+    def _estilos_excel() -> List[NamedStyle]:
+        """NamedStyles do relatório (registrados uma vez por workbook)"""
+        border = Border(
+            left=Side(style='thin'),
+            right=Side(style='thin'),
+            top=Side(style='thin'),
+            bottom=Side(style='thin')
+        )
+        data_alignment = Alignment(horizontal="left", vertical="center", wrap_text=True)
+        
+        return [
+            NamedStyle(
+                name='titulo',
+                font=Font(size=16, bold=True, color="3B82F6")
+            ),
+            NamedStyle(
+                name='nota',
+                font=Font(size=10, italic=True)
+            ),
+            NamedStyle(
+                name='destaque',
+                font=Font(bold=True)
+            ),
+            NamedStyle(
+                name='cabecalho',
+                font=Font(bold=True, color="FFFFFF", size=11),
+                fill=PatternFill(start_color="3B82F6", end_color="3B82F6", fill_type="solid"),
+                alignment=Alignment(horizontal="center", vertical="center"),
+                border=border
+            ),
+            NamedStyle(
+                name='dado_par',
+                fill=PatternFill(start_color="FFFFFF", end_color="FFFFFF", fill_type="solid"),
+                alignment=data_alignment,
+                border=border
+            ),
+            NamedStyle(
+                name='dado_impar',
+                fill=PatternFill(start_color="F9FAFB", end_color="F9FAFB", fill_type="solid"),
+                alignment=data_alignment,
+                border=border
+            ),
+        ]
@@ -0,0 +1,309 @@
+"""
+Serviço de Jobs de Relatório
+
+Relatórios PDF/Excel grandes travavam o event loop da API enquanto o
+ReportLab/openpyxl trabalhavam. Aqui a geração vira um job:
+
+1. POST /api/relatorios/jobs valida os filtros e calcula a chave de cache
+   sha256(formato, filtros, escopo do usuário, versão dos dados)
+2. Se já existe um arquivo para essa chave, o job concluído é reutilizado;
+   se já existe um job em andamento, ele é devolvido
+3. Senão um job novo é criado e executado no pool de processos
+4. GET /api/relatorios/jobs/{id} consulta o status e
+   GET /api/relatorios/jobs/{id}/arquivo baixa o arquivo
+
+A versão dos dados é (quantidade, maior updated_at) das demandas no
+escopo do relatório e das tabelas cujos nomes o relatório imprime
+(clientes, secretarias, tipos e prioridades): qualquer inclusão,
+alteração ou exclusão dentro dos filtros, ou renomeação/exclusão de um
+cadastro, muda a chave e invalida o cache.
+
+Autor: DeBrief Sistema
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.process_pool import executar_em_processo
+from app.models.cliente import Cliente
+from app.models.demanda import Demanda
+from app.models.prioridade import Prioridade
+from app.models.secretaria import Secretaria
+from app.models.tipo_demanda import TipoDemanda
+from app.models.relatorio_job import RelatorioJob, StatusRelatorioJob, FormatoRelatorio
+from app.models.user import User
+from app.services.relatorio import RelatorioService
+
+logger = logging.getLogger(__name__)
+
+# Demandas buscadas por lote no cursor do servidor
+YIELD_PER = 500
+
+# Cadastros cujos nomes aparecem no relatório (entram na versão dos dados)
+MODELOS_REFERENCIA = (Cliente, Secretaria, TipoDemanda, Prioridade)
+
+# Jobs em execução na API (referência para as tasks não serem coletadas)
+_tarefas: set = set()
+
+
+class RelatorioJobService:
+    """
+    Criação, reaproveitamento e consulta de jobs de relatório
+    
+    Exemplo de uso:
+        ```python
+        service = RelatorioJobService(db)
+        job, enfileirar = service.solicitar(usuario, "pdf", filtros)
+        if enfileirar:
+            RelatorioJobService.enfileirar(job.id)
+        ```
+    """
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    @staticmethod
+    def caminho_arquivo(chave_cache: str, formato: str) -> str:
+        """Caminho do arquivo em cache para a chave"""
+        return os.path.join(settings.RELATORIOS_DIR, f"{chave_cache}.{formato}")
+    
+    def versao_dados(self, filtros: Dict, usuario_id: Optional[str]) -> str:
+        """
+        Versão das demandas no escopo do relatório
+        
+        Uma agregação (count, max(updated_at)) sobre a mesma query do
+        relatório - muito mais barata que gerá-lo - e sobre os cadastros
+        de MODELOS_REFERENCIA. Renomear uma secretaria não altera as
+        demandas, e excluí-la só zera secretaria_id (UPDATE em massa, sem
+        updated_at): a contagem e o max(updated_at) do cadastro cobrem isso.
+        """
+        query = RelatorioService.filtrar_demandas(self.db.query(Demanda), filtros, usuario_id)
+        valores = list(query.with_entities(
+            func.count(Demanda.id),
+            func.max(Demanda.updated_at)
+        ).order_by(None).one())
+        
+        valores += self.db.execute(select(*[
+            coluna
+            for modelo in MODELOS_REFERENCIA
+            for coluna in (
+                select(func.count(modelo.id)).scalar_subquery(),
+                select(func.max(modelo.updated_at)).scalar_subquery(),
+            )
+        ])).one()
+        
+        return ":".join(
+            valor.isoformat() if isinstance(valor, datetime) else str(valor if valor is not None else "-")
+            for valor in valores
+        )
+    
+    def chave_cache(self, formato: str, filtros: Dict, usuario_id: Optional[str]) -> str:
+        """
+        sha256 de (formato, filtros, escopo, versão dos dados)
+        
+        Args:
+            formato: pdf ou xlsx
+            filtros: Filtros normalizados (RelatorioService.normalizar_filtros)
+            usuario_id: None para master (todas as demandas), senão o usuário
+        """
+        conteudo = json.dumps(
+            {
+                "formato": formato,
+                "filtros": filtros,
+                "escopo": usuario_id or "master",
+                "versao": self.versao_dados(filtros, usuario_id),
+            },
+            sort_keys=True
+        )
+        return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+    
+    def solicitar(self, usuario: User, formato: str, filtros: Dict) -> Tuple[RelatorioJob, bool]:
+        """
+        Obter um job para o relatório pedido
+        
+        Args:
+            usuario: Usuário solicitante
+            formato: pdf ou xlsx
+            filtros: Filtros normalizados
+        
+        Returns:
+            (job, enfileirar) - enfileirar=True quando o job é novo e
+            precisa ser executado
+        """
+        usuario_id = None if usuario.is_master() else usuario.id
+        chave = self.chave_cache(formato, filtros, usuario_id)
+        
+        # Mesma chave = mesmo escopo: o job pode ser de outro master
+        existentes = self.db.query(RelatorioJob).filter(
+            RelatorioJob.chave_cache == chave,
+            RelatorioJob.status.in_([
+                StatusRelatorioJob.CONCLUIDO.value,
+                StatusRelatorioJob.PENDENTE.value,
+                StatusRelatorioJob.PROCESSANDO.value,
+            ])
+        ).order_by(RelatorioJob.created_at.desc()).all()
+        
+        limite = datetime.now(timezone.utc) - timedelta(seconds=settings.RELATORIO_JOB_TIMEOUT_SECONDS)
+        
+        for job in existentes:
+            if job.status == StatusRelatorioJob.CONCLUIDO.value:
+                if job.arquivo and os.path.exists(job.arquivo):
+                    logger.info(f"Relatório {chave[:12]} reutilizado do cache (job {job.id})")
+                    return job, False
+            elif job.created_at and job.created_at >= limite:
+                return job, False
+            else:
+                # Processo morreu (restart da API) - não esperar por ele
+                job.status = StatusRelatorioJob.ERRO.value
+                job.mensagem_erro = "Tempo limite de geração excedido"
+        
+        job = RelatorioJob(
+            usuario_id=usuario.id,
+            formato=formato,
+            filtros=json.dumps(filtros),
+            chave_cache=chave,
+            status=StatusRelatorioJob.PENDENTE.value
+        )
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        
+        return job, True
+    
+    def obter(self, job_id: str, usuario: User) -> Optional[RelatorioJob]:
+        """Job visível para o usuário (dono ou master)"""
+        job = self.db.query(RelatorioJob).filter(RelatorioJob.id == job_id).first()
+        if not job:
+            return None
+        if not usuario.is_master() and job.usuario_id != usuario.id:
+            return None
+        return job
+    
+    @staticmethod
+    def enfileirar(job_id: str) -> None:
+        """
+        Executar o job no pool de processos (sem aguardar)
+        
+        Deve ser chamado dentro do event loop da API.
+        """
+        async def _executar():
+            try:
+                await executar_em_processo(executar_job, job_id)
+            except Exception as e:
+                logger.error(f"Erro ao executar job de relatório {job_id}: {e}")
+        
+        tarefa = asyncio.get_running_loop().create_task(_executar())
+        _tarefas.add(tarefa)
+        tarefa.add_done_callback(_tarefas.discard)
+    
+    @staticmethod
+    def limpar_artefatos(retencao_horas: Optional[int] = None) -> int:
+        """
+        Remover arquivos de relatório mais antigos que a retenção
+        
+        Returns:
+            Número de arquivos removidos
+        """
+        retencao_horas = retencao_horas or settings.RELATORIO_ARTEFATO_RETENCAO_HORAS
+        if not os.path.isdir(settings.RELATORIOS_DIR):
+            return 0
+        
+        limite = time.time() - retencao_horas * 3600
+        removidos = 0
+        for entrada in os.scandir(settings.RELATORIOS_DIR):
+            if entrada.is_file() and entrada.stat().st_mtime < limite:
+                try:
+                    os.remove(entrada.path)
+                    removidos += 1
+                except OSError as e:
+                    logger.warning(f"Não foi possível remover {entrada.path}: {e}")
+        
+        return removidos
+
+
+def executar_job(job_id: str) -> None:
+    """
+    Gerar o arquivo de um job (executado em um processo do pool)
+    
+    Escreve em um arquivo temporário e faz os.replace no final: quem lê o
+    cache nunca vê um arquivo pela metade.
+    
+    Args:
+        job_id: ID do RelatorioJob
+    """
+    db = SessionLocal()
+    try:
+        job = db.query(RelatorioJob).filter(RelatorioJob.id == job_id).first()
+        if not job or job.status != StatusRelatorioJob.PENDENTE.value:
+            return
+        
+        job.status = StatusRelatorioJob.PROCESSANDO.value
+        job.iniciado_em = func.now()
+        db.commit()
+        
+        usuario = db.query(User).filter(User.id == job.usuario_id).first()
+        filtros = job.dados_filtros
+        base = RelatorioService.filtrar_demandas(
+            db.query(Demanda),
+            filtros,
+            None if usuario.is_master() else usuario.id
+        )
+        query = RelatorioService.carregar_relacionamentos(base).order_by(Demanda.created_at)
+        
+        os.makedirs(settings.RELATORIOS_DIR, exist_ok=True)
+        destino = RelatorioJobService.caminho_arquivo(job.chave_cache, job.formato)
+        temporario = f"{destino}.{job.id}.tmp"
+        
+        service = RelatorioService()
+        try:
+            with open(temporario, "wb") as arquivo:
+                if job.formato == FormatoRelatorio.PDF.value:
+                    service.escrever_pdf(
+                        query.yield_per(YIELD_PER),
+                        filtros,
+                        usuario.nome_completo or usuario.username,
+                        arquivo,
+                        resumo=RelatorioService.resumo_por_status(base)
+                    )
+                else:
+                    service.escrever_excel(
+                        query.yield_per(YIELD_PER),
+                        filtros,
+                        usuario.nome_completo or usuario.username,
+                        arquivo
+                    )
+            os.replace(temporario, destino)
+        finally:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+        
+        job.status = StatusRelatorioJob.CONCLUIDO.value
+        job.arquivo = destino
+        job.tamanho_bytes = os.path.getsize(destino)
+        job.concluido_em = func.now()
+        db.commit()
+        
+        logger.info(f"Relatório {job.id} gerado: {job.tamanho_bytes} bytes")
+        
+        # Aproveitar o processo para expirar arquivos antigos do cache
+        RelatorioJobService.limpar_artefatos()
+    
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Erro ao gerar relatório {job_id}: {e}")
+        job = db.query(RelatorioJob).filter(RelatorioJob.id == job_id).first()
+        if job:
+            job.status = StatusRelatorioJob.ERRO.value
+            job.mensagem_erro = str(e)
+            job.concluido_em = func.now()
+            db.commit()
+    finally:
+        db.close()
@@ -12,16 +12,23 @@ Funcionalidades:
 - Definir labels e due dates
 
 Dependências:
-- requests: Para comunicação HTTP direta com Trello API
+- httpx: Cliente assíncrono compartilhado (pool keep-alive "trello")
+- trello_limites: Limites de taxa do Trello (baldes compartilhados, 429)
 - SQLAlchemy: Para acessar relacionamentos da demanda
 
 Autor: DeBrief Sistema
 """
-import requests
+import asyncio
+import hashlib
+import json
+import httpx
 from sqlalchemy.orm import Session
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from app.core.config import settings
+from app.core.http_clients import obter_cliente_http
 from app.models.demanda import Demanda
+from app.services.trello_cache import cache_trello
+from app.services.trello_limites import PRIORIDADE_INTERATIVA, agendador_trello
 import logging
 from datetime import datetime
 
@@ -29,6 +36,11 @@ from datetime import datetime
 logger = logging.getLogger(__name__)
 
 
+def hash_card(campos: Dict[str, str]) -> str:
+    """Impressão digital (SHA-256) dos campos visíveis do card"""
+    return hashlib.sha256(json.dumps(campos, sort_keys=True).encode()).hexdigest()
+
+
 class TrelloService:
     """
     Wrapper para Trello API
@@ -44,27 +56,27 @@ class TrelloService:
         ```
     """
     
-    def __init__(self, db: Session = None):
+    def __init__(self, db: Session = None, prioridade: str = PRIORIDADE_INTERATIVA):
         """
         Inicializar cliente Trello
         
-        Conecta com a API do Trello usando credenciais do banco de dados
-        (tabela configuracoes_trello) e carrega o board e lista configurados.
+        Usa as credenciais da tabela configuracoes_trello (em cache no
+        processo, ver trello_cache). Não faz nenhuma chamada ao Trello.
         
         Args:
             db: Sessão do banco (obrigatório para carregar configuração)
+            prioridade: Prioridade das chamadas no agendador (a outbox usa
+                PRIORIDADE_SEGUNDO_PLANO)
         
         Raises:
-            Exception: Se credenciais inválidas, board não encontrado ou config não existe
+            Exception: Se config não existe
         """
         if db is None:
             raise Exception("TrelloService requer sessão do banco (db)")
         
         try:
-            # Carregar configuração ativa do banco
-            from app.models.configuracao_trello import ConfiguracaoTrello
-            
-            config = ConfiguracaoTrello.get_ativa(db)
+            # Configuração ativa (cache do processo)
+            config = cache_trello.configuracao(db)
             
             if not config:
                 raise Exception("Trello não configurado. Configure em Configurações Master.")
@@ -75,13 +87,12 @@ class TrelloService:
             self.board_id = config.board_id
             self.lista_id = config.lista_id
             self.base_url = "https://api.trello.com/1"
+            self.prioridade = prioridade
             
             # Armazenar sessão do banco
             self.db = db
             
-            # Verificar conexão
-            board_info = self._get_board_info()
-            logger.info(f"TrelloService inicializado - Board: {board_info.get('name', 'N/A')}")
+            logger.info(f"TrelloService inicializado - Board: {config.board_nome or self.board_id}")
             
         except Exception as e:
             logger.error(f"Erro ao inicializar TrelloService: {e}")
@@ -94,23 +105,152 @@ class TrelloService:
             'token': self.token
         }
     
-    def _request(self, method: str, url: str, params: Optional[dict] = None, **kwargs) -> requests.Response:
-        """Wrapper centralizado para chamadas HTTP com validação."""
+    async def _request(self, method: str, url: str, params: Optional[dict] = None, **kwargs) -> httpx.Response:
+        """
+        Wrapper centralizado para chamadas HTTP com validação
+        
+        Usa o pool keep-alive compartilhado ("trello") sem bloquear o
+        event loop. Cada tentativa aguarda uma ficha do agendador; 429 pausa
+        o token (Retry-After ou backoff) e a requisição é repetida.
+        
+        Raises:
+            httpx.HTTPError: Falha de rede ou status de erro (HTTPStatusError)
+        """
         merged_params = params.copy() if params else {}
         merged_params.update(self._get_auth_params())
+        client = obter_cliente_http("trello")
+        tentativa = 0
         try:
-            response = requests.request(method, url, params=merged_params, timeout=15, **kwargs)
-            response.raise_for_status()
-            return response
-        except requests.exceptions.RequestException as exc:
+            while True:
+                await agendador_trello.adquirir(self.api_key, self.token, self.prioridade)
+                response = await client.request(method.upper(), url, params=merged_params, **kwargs)
+                
+                if response.status_code == 429 and tentativa < settings.TRELLO_MAX_TENTATIVAS_429:
+                    tentativa += 1
+                    pausa = await agendador_trello.registrar_429(
+                        self.api_key, self.token, response.headers.get("Retry-After"), tentativa
+                    )
+                    logger.warning(
+                        f"Trello 429 em {method.upper()} {url} "
+                        f"(tentativa {tentativa}), nova tentativa em {pausa:.1f}s"
+                    )
+                    continue
+                
+                response.raise_for_status()
+                return response
+        except httpx.HTTPError as exc:
             logger.error("Erro Trello %s %s: %s", method.upper(), url, exc)
             raise
     
-    def _get_board_info(self) -> dict:
-        """Obter informações do board"""
+    async def _get_board_info(self, forcar: bool = False) -> dict:
+        """Obter informações do board (cache)"""
         url = f"{self.base_url}/boards/{self.board_id}"
-        response = self._request("get", url)
-        return response.json()
+        return await cache_trello.obter(self.board_id, "board", lambda: self._get_json(url), forcar=forcar)
+    
+    async def _get_listas(self, forcar: bool = False) -> List[dict]:
+        """Listas abertas do board (cache)"""
+        url = f"{self.base_url}/boards/{self.board_id}/lists"
+        return await cache_trello.obter(self.board_id, "listas", lambda: self._get_json(url), forcar=forcar)
+    
+    async def _get_etiquetas(self, forcar: bool = False) -> List[dict]:
+        """Etiquetas do board (cache)"""
+        url = f"{self.base_url}/boards/{self.board_id}/labels"
+        return await cache_trello.obter(self.board_id, "etiquetas", lambda: self._get_json(url), forcar=forcar)
+    
+    async def listar_cards_board(self) -> List[dict]:
+        """
+        Todos os cards do board, inclusive arquivados, em uma chamada
+        
+        Returns:
+            Lista de {id, idList, closed, name, shortUrl}
+        """
+        url = f"{self.base_url}/boards/{self.board_id}/cards/all"
+        params = {'fields': 'id,idList,closed,name,shortUrl'}
+        return (await self._request("get", url, params=params)).json()
+    
+    async def _get_json(self, url: str):
+        """GET e corpo JSON"""
+        return (await self._request("get", url)).json()
+    
+    def _montar_card(self, demanda: Demanda) -> Dict[str, str]:
+        """
+        Campos do card (name, desc e due) a partir da demanda
+        
+        Usado na criação e na atualização; hash_card(campos) é a impressão
+        digital guardada em demanda.trello_card_hash.
+        """
+        # ========== CONSTRUIR TÍTULO DO CARD ==========
+        # Formato: NOME DO CLIENTE - SECRETARIA - NOME DA DEMANDA
+        card_name = f"{demanda.cliente.nome} - {demanda.secretaria.nome} - {demanda.nome}"
+        
+        # ========== CONSTRUIR DESCRIÇÃO DO CARD ==========
+        card_desc_parts = []
+        
+        # Nome do Cliente
+        card_desc_parts.append(f"**NOME DO CLIENTE:** {demanda.cliente.nome}")
+        card_desc_parts.append("")
+        
+        # Secretaria
+        card_desc_parts.append(f"**SECRETARIA:** {demanda.secretaria.nome}")
+        card_desc_parts.append("")
+        
+        # Tipo da Demanda
+        card_desc_parts.append(f"**TIPO DA DEMANDA:** {demanda.tipo_demanda.nome}")
+        card_desc_parts.append("")
+        
+        # Título da Demanda
+        card_desc_parts.append(f"**TÍTULO DA DEMANDA:** {demanda.nome}")
+        card_desc_parts.append("")
+        
+        # Prioridade
+        card_desc_parts.append(f"**PRIORIDADE:** {demanda.prioridade.nome}")
+        card_desc_parts.append("")
+        
+        # Prazo Final
+        if demanda.prazo_final:
+            card_desc_parts.append(f"**PRAZO FINAL:** {demanda.prazo_final.strftime('%d/%m/%Y')}")
+        else:
+            card_desc_parts.append("**PRAZO FINAL:** Não definido")
+        card_desc_parts.append("")
+        
+        # Descrição da Demanda
+        card_desc_parts.append("**DESCRIÇÃO DA DEMANDA:**")
+        card_desc_parts.append(demanda.descricao)
+        card_desc_parts.append("")
+        
+        # Links de referência (se houver)
+        if demanda.links_referencia:
+            try:
+                links = json.loads(demanda.links_referencia) if isinstance(demanda.links_referencia, str) else demanda.links_referencia
+                if links and len(links) > 0:
+                    card_desc_parts.append("**LINKS DE REFERÊNCIA:**")
+                    for link in links:
+                        if isinstance(link, dict) and 'url' in link:
+                            titulo = link.get('titulo', 'Link')
+                            url = link.get('url', '')
+                            if url:
+                                card_desc_parts.append(f"- {titulo}: {url}")
+                            else:
+                                card_desc_parts.append(f"- {titulo}")
+                        elif isinstance(link, str):
+                            card_desc_parts.append(f"- {link}")
+                    card_desc_parts.append("")
+            except Exception as e:
+                logger.warning(f"Erro ao processar links de referência: {e}")
+        
+        # Informações complementares
+        card_desc_parts.append("---")
+        card_desc_parts.append(f"**Solicitante:** {demanda.usuario.nome_completo} ({demanda.usuario.email})")
+        card_desc_parts.append(f"**ID da Demanda:** {demanda.id}")
+        card_desc_parts.append(f"**Status:** {demanda.status.value}")
+        
+        # Juntar tudo
+        card_desc = "\n".join(card_desc_parts)
+        
+        campos = {'name': card_name, 'desc': card_desc}
+        if demanda.prazo_final:
+            campos['due'] = demanda.prazo_final.isoformat()
+        return campos
     
     async def criar_card(self, demanda: Demanda, db: Session) -> Dict:
         """
@@ -143,74 +283,30 @@ class TrelloService:
             # Carregar relacionamentos necessários
             db.refresh(demanda)
             
-            # ========== CONSTRUIR TÍTULO DO CARD ==========
-            # Formato: NOME DO CLIENTE - SECRETARIA - NOME DA DEMANDA
-            card_name = f"{demanda.cliente.nome} - {demanda.secretaria.nome} - {demanda.nome}"
+            campos = self._montar_card(demanda)
             
-            # ========== CONSTRUIR DESCRIÇÃO DO CARD ==========
-            card_desc_parts = []
-            
-            # Nome do Cliente
-            card_desc_parts.append(f"**NOME DO CLIENTE:** {demanda.cliente.nome}")
-            card_desc_parts.append("")
-            
-            # Secretaria
-            card_desc_parts.append(f"**SECRETARIA:** {demanda.secretaria.nome}")
-            card_desc_parts.append("")
+            # ========== ETIQUETAS E MEMBRO (ENVIADOS JUNTO COM O CARD) ==========
+            from app.models.etiqueta_trello_cliente import EtiquetaTrelloCliente
             
-            # Tipo da Demanda
-            card_desc_parts.append(f"**TIPO DA DEMANDA:** {demanda.tipo_demanda.nome}")
-            card_desc_parts.append("")
+            etiquetas_ids = []
             
-            # Título da Demanda
-            card_desc_parts.append(f"**TÍTULO DA DEMANDA:** {demanda.nome}")
-            card_desc_parts.append("")
+            etiqueta_cliente = EtiquetaTrelloCliente.get_by_cliente(self.db, demanda.cliente_id)
+            if etiqueta_cliente and etiqueta_cliente.ativo:
+                etiquetas_ids.append(etiqueta_cliente.etiqueta_trello_id)
+            else:
+                logger.warning(f"Cliente {demanda.cliente.nome} sem etiqueta configurada")
             
-            # Prioridade
-            card_desc_parts.append(f"**PRIORIDADE:** {demanda.prioridade.nome}")
-            card_desc_parts.append("")
+            # Label de prioridade (opcional) - etiquetas do board em cache
+            try:
+                prioridade_nome = demanda.prioridade.nome
+                for label in await self._get_etiquetas():
+                    if label.get('name', '').lower() == prioridade_nome.lower():
+                        etiquetas_ids.append(label['id'])
+                        break
+            except Exception as e:
+                logger.warning(f"Não foi possível obter label de prioridade: {e}")
             
-            # Prazo Final
-            if demanda.prazo_final:
-                card_desc_parts.append(f"**PRAZO FINAL:** {demanda.prazo_final.strftime('%d/%m/%Y')}")
-            else:
-                card_desc_parts.append("**PRAZO FINAL:** Não definido")
-            card_desc_parts.append("")
-            
-            # Descrição da Demanda
-            card_desc_parts.append("**DESCRIÇÃO DA DEMANDA:**")
-            card_desc_parts.append(demanda.descricao)
-            card_desc_parts.append("")
-            
-            # Links de referência (se houver)
-            if demanda.links_referencia:
-                import json
-                try:
-                    links = json.loads(demanda.links_referencia) if isinstance(demanda.links_referencia, str) else demanda.links_referencia
-                    if links and len(links) > 0:
-                        card_desc_parts.append("**LINKS DE REFERÊNCIA:**")
-                        for link in links:
-                            if isinstance(link, dict) and 'url' in link:
-                                titulo = link.get('titulo', 'Link')
-                                url = link.get('url', '')
-                                if url:
-                                    card_desc_parts.append(f"- {titulo}: {url}")
-                                else:
-                                    card_desc_parts.append(f"- {titulo}")
-                            elif isinstance(link, str):
-                                card_desc_parts.append(f"- {link}")
-                        card_desc_parts.append("")
-                except Exception as e:
-                    logger.warning(f"Erro ao processar links de referência: {e}")
-            
-            # Informações complementares
-            card_desc_parts.append("---")
-            card_desc_parts.append(f"**Solicitante:** {demanda.usuario.nome_completo} ({demanda.usuario.email})")
-            card_desc_parts.append(f"**ID da Demanda:** {demanda.id}")
-            card_desc_parts.append(f"**Status:** {demanda.status.value}")
-            
-            # Juntar tudo
-            card_desc = "\n".join(card_desc_parts)
+            membro_id = getattr(demanda.cliente, 'trello_member_id', None)
             
             logger.info(f"Criando card no Trello para demanda {demanda.id}")
             
@@ -218,88 +314,56 @@ class TrelloService:
             url = f"{self.base_url}/cards"
             params = {
                 'idList': self.lista_id,
-                'name': card_name,
-                'desc': card_desc,
-                'pos': 'top'
+                'pos': 'top',
+                **campos
             }
             
-            # Adicionar due date se houver
-            if demanda.prazo_final:
-                params['due'] = demanda.prazo_final.isoformat()
+            extras = {}
+            if etiquetas_ids:
+                extras['idLabels'] = ",".join(dict.fromkeys(etiquetas_ids))
+            if membro_id:
+                extras['idMembers'] = membro_id
             
-            card_data = self._request("post", url, params=params).json()
+            try:
+                card_data = (await self._request("post", url, params={**params, **extras})).json()
+            except httpx.HTTPStatusError as e:
+                if not extras or e.response.status_code != 400:
+                    raise
+                # Etiqueta/membro inválido (removido no Trello): criar sem eles
+                logger.warning(f"Trello recusou etiquetas/membro {extras}; criando card sem eles")
+                cache_trello.invalidar(self.board_id, configuracao=False)
+                card_data = (await self._request("post", url, params=params)).json()
             
             card_id = card_data['id']
             card_url = card_data['url']
             
             logger.info(f"Card criado: {card_url}")
             
-            # ========== APLICAR ETIQUETA DO CLIENTE ==========
-            from app.models.etiqueta_trello_cliente import EtiquetaTrelloCliente
-            
-            etiqueta_cliente = EtiquetaTrelloCliente.get_by_cliente(self.db, demanda.cliente_id)
-            
-            if etiqueta_cliente and etiqueta_cliente.ativo:
-                try:
-                    # Adicionar label ao card
-                    label_url = f"{self.base_url}/cards/{card_id}/idLabels"
-                    label_params = {'value': etiqueta_cliente.etiqueta_trello_id}
-                    self._request("post", label_url, params=label_params)
-                    logger.info(f"Etiqueta '{etiqueta_cliente.etiqueta_nome}' aplicada ao card")
-                except Exception as e:
-                    logger.warning(f"Erro ao aplicar etiqueta do cliente: {e}")
-            else:
-                logger.warning(f"Cliente {demanda.cliente.nome} sem etiqueta configurada")
-            
-            # ========== LABEL DE PRIORIDADE (OPCIONAL) ==========
-            try:
-                # Buscar labels do board
-                labels_url = f"{self.base_url}/boards/{self.board_id}/labels"
-                labels = self._request("get", labels_url).json()
-                
-                prioridade_nome = demanda.prioridade.nome
-                for label in labels:
-                    if label.get('name', '').lower() == prioridade_nome.lower():
-                        label_url = f"{self.base_url}/cards/{card_id}/idLabels"
-                        label_params = {'value': label['id']}
-                        self._request("post", label_url, params=label_params)
-                        logger.info(f"Label '{prioridade_nome}' adicionado ao card")
-                        break
-            except Exception as e:
-                logger.warning(f"Não foi possível adicionar label de prioridade: {e}")
-            
-            # ========== MEMBER (CLIENTE - OPCIONAL) ==========
-            if hasattr(demanda.cliente, 'trello_member_id') and demanda.cliente.trello_member_id:
-                try:
-                    member_url = f"{self.base_url}/cards/{card_id}/idMembers"
-                    member_params = {'value': demanda.cliente.trello_member_id}
-                    self._request("post", member_url, params=member_params)
-                    logger.info(f"Membro {demanda.cliente.trello_member_id} atribuído ao card")
-                except Exception as e:
-                    logger.warning(f"Não foi possível adicionar membro: {e}")
-            
-            # ========== ANEXAR IMAGENS ==========
+            # ========== ANEXAR ARQUIVOS (EM PARALELO) ==========
             if demanda.anexos:
-                for anexo in demanda.anexos:
+                attach_url = f"{self.base_url}/cards/{card_id}/attachments"
+                
+                async def anexar(anexo):
                     try:
                         # Construir URL pública do anexo
-                        anexo_url = f"{settings.FRONTEND_URL}/uploads/{anexo.caminho}"
-                        attach_url = f"{self.base_url}/cards/{card_id}/attachments"
                         attach_params = {
-                            'url': anexo_url,
+                            'url': f"{settings.FRONTEND_URL}/uploads/{anexo.caminho}",
                             'name': anexo.nome_arquivo
                         }
-                        self._request("post", attach_url, params=attach_params)
+                        await self._request("post", attach_url, params=attach_params)
                         logger.info(f"Anexo '{anexo.nome_arquivo}' adicionado ao card")
                     except Exception as e:
                         logger.warning(f"Erro ao anexar arquivo '{anexo.nome_arquivo}': {e}")
+                
+                await asyncio.gather(*(anexar(anexo) for anexo in demanda.anexos))
             
             logger.info(f"Card criado com sucesso: {card_url}")
             
             return {
                 'id': card_id,
                 'url': card_url,
-                'short_url': card_data.get('shortUrl', card_url)
+                'short_url': card_data.get('shortUrl', card_url),
+                'hash': hash_card(campos)
             }
             
         except Exception as e:
@@ -310,15 +374,17 @@ class TrelloService:
         """
         Atualizar card existente no Trello
         
-        Atualiza as informações do card quando a demanda é modificada,
-        incluindo nome, descrição, prazo e labels.
+        Atualiza nome, descrição e prazo quando a demanda é modificada.
+        O PUT só é enviado se os campos renderizados mudaram desde a última
+        sincronização (demanda.trello_card_hash).
         
         Args:
             demanda: Objeto Demanda do SQLAlchemy (com trello_card_id preenchido)
             db: Sessão do banco (para carregar relacionamentos)
         
         Returns:
-            True se atualizado com sucesso, False caso contrário
+            True se o card está sincronizado (atualizado ou já igual),
+            False se a demanda não tem card
         
         Raises:
             Exception: Se falhar ao atualizar card
@@ -337,50 +403,21 @@ class TrelloService:
             return False
         
         try:
-            logger.info(f"Atualizando card {demanda.trello_card_id} para demanda {demanda.id}")
+            # Relacionamentos são carregados sob demanda pela sessão
+            campos = self._montar_card(demanda)
+            impressao = hash_card(campos)
             
-            # Carregar relacionamentos
-            db.refresh(demanda)
+            if demanda.trello_card_hash == impressao:
+                logger.info(f"Card {demanda.trello_card_id} sem alterações visíveis, atualização ignorada")
+                return True
             
-            # Atualizar nome
-            card_name = f"{demanda.cliente.nome} - {demanda.secretaria.nome} - {demanda.nome}"
-            
-            # Atualizar descrição (mesmo formato do criar_card)
-            card_desc_parts = []
-            card_desc_parts.append(f"**NOME DO CLIENTE:** {demanda.cliente.nome}")
-            card_desc_parts.append("")
-            card_desc_parts.append(f"**SECRETARIA:** {demanda.secretaria.nome}")
-            card_desc_parts.append("")
-            card_desc_parts.append(f"**TIPO DA DEMANDA:** {demanda.tipo_demanda.nome}")
-            card_desc_parts.append("")
-            card_desc_parts.append(f"**TÍTULO DA DEMANDA:** {demanda.nome}")
-            card_desc_parts.append("")
-            card_desc_parts.append(f"**PRIORIDADE:** {demanda.prioridade.nome}")
-            card_desc_parts.append("")
-            if demanda.prazo_final:
-                card_desc_parts.append(f"**PRAZO FINAL:** {demanda.prazo_final.strftime('%d/%m/%Y')}")
-            else:
-                card_desc_parts.append("**PRAZO FINAL:** Não definido")
-            card_desc_parts.append("")
-            card_desc_parts.append("**DESCRIÇÃO DA DEMANDA:**")
-            card_desc_parts.append(demanda.descricao)
-            card_desc_parts.append("")
-            card_desc_parts.append("---")
-            card_desc_parts.append(f"**Solicitante:** {demanda.usuario.nome_completo} ({demanda.usuario.email})")
-            card_desc_parts.append(f"**ID da Demanda:** {demanda.id}")
-            card_desc_parts.append(f"**Status:** {demanda.status.value}")
-            card_desc_parts.append(f"**Última atualização:** {demanda.updated_at.strftime('%d/%m/%Y %H:%M')}")
-            
-            card_desc = "\n".join(card_desc_parts)
-            
-            # Fazer requisição de atualização
-            url = f"{self.base_url}/cards/{demanda.trello_card_id}"
-            params = {'name': card_name, 'desc': card_desc}
+            logger.info(f"Atualizando card {demanda.trello_card_id} para demanda {demanda.id}")
             
-            if demanda.prazo_final:
-                params['due'] = demanda.prazo_final.isoformat()
+            url = f"{self.base_url}/cards/{demanda.trello_card_id}"
+            await self._request("put", url, params=campos)
             
-            self._request("put", url, params=params)
+            # Commitado pelo chamador (junto com a conclusão do evento da outbox)
+            demanda.trello_card_hash = impressao
             
             logger.info(f"Card atualizado com sucesso")
             return True
@@ -416,7 +453,7 @@ class TrelloService:
             url = f"{self.base_url}/cards/{demanda.trello_card_id}/actions/comments"
             params = {'text': texto_final}
             
-            self._request("post", url, params=params)
+            await self._request("post", url, params=params)
             
             logger.info(f"Comentário adicionado ao card {demanda.trello_card_id}")
             return True
@@ -425,7 +462,7 @@ class TrelloService:
             logger.error(f"Erro ao adicionar comentário: {e}")
             return False
     
-    def _obter_lista_por_status(self, status: str):
+    async def _obter_lista_por_status(self, status: str):
         """
         Obter lista do Trello baseada no status da demanda
         
@@ -453,14 +490,11 @@ class TrelloService:
             if not lista_nome:
                 return None
             
-            # Buscar listas do board
-            url = f"{self.base_url}/boards/{self.board_id}/lists"
-            listas = self._request("get", url).json()
-            
-            # Buscar lista pelo nome
-            for lista in listas:
-                if lista.get('name', '').lower() == lista_nome.lower():
-                    return lista['id']
+            # Buscar lista pelo nome (cache; recarregar uma vez se não achar)
+            for forcar in (False, True):
+                for lista in await self._get_listas(forcar=forcar):
+                    if lista.get('name', '').lower() == lista_nome.lower():
+                        return lista['id']
             
             logger.warning(f"Lista '{lista_nome}' não encontrada no board")
             return None
@@ -487,7 +521,7 @@ class TrelloService:
         try:
             url = f"{self.base_url}/cards/{demanda.trello_card_id}"
             params = {'closed': 'true'}
-            self._request("put", url, params=params)
+            await self._request("put", url, params=params)
             
             logger.info(f"Card {demanda.trello_card_id} arquivado")
             return True
@@ -521,16 +555,31 @@ class TrelloService:
             logger.info("Demanda não possui card no Trello para deletar")
             return False
         
+        return await self.deletar_card_por_id(demanda.trello_card_id)
+    
+    async def deletar_card_por_id(self, card_id: str) -> bool:
+        """
+        Deletar card permanentemente do Trello pelo ID
+        
+        Usado pela outbox, quando a demanda já foi removida do banco
+        e só resta o ID do card.
+        
+        Args:
+            card_id: ID do card no Trello
+        
+        Returns:
+            True se deletado (ou já inexistente), False caso contrário
+        """
         try:
-            url = f"{self.base_url}/cards/{demanda.trello_card_id}"
-            self._request("delete", url)
+            url = f"{self.base_url}/cards/{card_id}"
+            await self._request("delete", url)
             
-            logger.info(f"Card {demanda.trello_card_id} deletado permanentemente do Trello")
+            logger.info(f"Card {card_id} deletado permanentemente do Trello")
             return True
             
-        except requests.exceptions.HTTPError as e:
+        except httpx.HTTPStatusError as e:
             if e.response.status_code == 404:
-                logger.warning(f"Card {demanda.trello_card_id} já foi deletado do Trello")
+                logger.warning(f"Card {card_id} já foi deletado do Trello")
                 return True  # Considerar sucesso se já foi deletado
             logger.error(f"Erro HTTP ao deletar card do Trello: {e}")
             return False
@@ -0,0 +1,276 @@
+"""
+Cache de configuração e metadados do Trello
+
+Cada TrelloService(db) recarregava a configuração ativa e fazia
+GET /boards/{id}; criar_card buscava todas as etiquetas do board e a
+troca de lista buscava todas as listas - duas ou três idas ao Trello a
+cada operação de demanda.
+
+O cache é do processo (API e worker da outbox têm o seu):
+
+- configuração ativa e mapeamento lista → status (trello_listas_status):
+  TRELLO_CONFIG_CACHE_TTL_SECONDS
+- board, listas e etiquetas por board: TRELLO_CACHE_TTL_SECONDS
+- card → demanda (webhook, sincronização): LRU de TRELLO_CARDS_CACHE_TAMANHO
+  entradas, conferido a cada uso (a demanda ainda tem aquele card)
+
+Invalidação:
+- alterações em /api/trello-config, inclusive no mapeamento de listas
+  (invalidar_cache_trello)
+- webhook do Trello com mudança de estrutura (listas, etiquetas, board)
+- lista não encontrada pelo nome: recarregada uma vez antes de desistir
+
+invalidar_cache_trello publica a invalidação no canal TRELLO_CACHE_CANAL;
+API e worker escutam o canal (iniciar_escuta) e descartam o seu cache na
+hora. Sem REDIS_URL, em outro processo a mudança aparece em no máximo um TTL.
+
+Autor: DeBrief Sistema
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.redis_cliente import escutar_canal, obter_redis_sincrono
+
+logger = logging.getLogger(__name__)
+
+# Ações do webhook que alteram board, listas ou etiquetas
+ACOES_ESTRUTURA_TRELLO = {
+    "updateBoard",
+    "createList",
+    "updateList",
+    "moveListToBoard",
+    "moveListFromBoard",
+    "createLabel",
+    "updateLabel",
+    "deleteLabel",
+}
+
+
+@dataclass(frozen=True)
+class CredenciaisTrello:
+    """Cópia da configuração ativa (independente da sessão do banco)"""
+    config_id: str
+    api_key: str
+    token: str
+    board_id: str
+    lista_id: str
+    board_nome: Optional[str] = None
+
+
+class CacheTrello:
+    """
+    Cache com expiração da configuração ativa e dos metadados de boards
+    
+    Exemplo de uso:
+        ```python
+        credenciais = cache_trello.configuracao(db)
+        listas = await cache_trello.obter(board_id, "listas", buscar_listas)
+        status = cache_trello.mapa_listas(db).get(lista_id)
+        demanda = cache_trello.demanda_por_card(db, card_id)
+        ```
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._configuracao: Optional[Tuple[float, Optional[CredenciaisTrello]]] = None
+        self._metadados: Dict[Tuple[str, str], Tuple[float, Any]] = {}
+        self._mapa_listas: Optional[Tuple[float, str, Dict[str, str]]] = None
+        self._cards: "OrderedDict[str, str]" = OrderedDict()
+        self._escuta: Optional[asyncio.Task] = None
+    
+    def configuracao(self, db: Session) -> Optional[CredenciaisTrello]:
+        """
+        Configuração ativa (None se o Trello não estiver configurado)
+        
+        Args:
+            db: Sessão usada para recarregar quando o cache expirar
+        """
+        with self._lock:
+            item = self._configuracao
+        if item and time.monotonic() < item[0]:
+            return item[1]
+        
+        from app.models.configuracao_trello import ConfiguracaoTrello
+        config = ConfiguracaoTrello.get_ativa(db)
+        credenciais = CredenciaisTrello(
+            config_id=config.id,
+            api_key=config.api_key,
+            token=config.token,
+            board_id=config.board_id,
+            lista_id=config.lista_id,
+            board_nome=config.board_nome
+        ) if config else None
+        
+        with self._lock:
+            self._configuracao = (time.monotonic() + settings.TRELLO_CONFIG_CACHE_TTL_SECONDS, credenciais)
+        return credenciais
+    
+    def mapa_listas(self, db: Session) -> Dict[str, str]:
+        """
+        Mapeamento lista_id → status da configuração ativa
+        
+        Args:
+            db: Sessão usada para recarregar quando o cache expirar
+        
+        Returns:
+            Dicionário {lista_id: status} (vazio sem configuração)
+        """
+        credenciais = self.configuracao(db)
+        if credenciais is None:
+            return {}
+        
+        with self._lock:
+            item = self._mapa_listas
+        if item and item[1] == credenciais.config_id and time.monotonic() < item[0]:
+            return item[2]
+        
+        from app.models.trello_lista_status import TrelloListaStatus
+        mapa = TrelloListaStatus.mapa(db, credenciais.config_id)
+        
+        with self._lock:
+            self._mapa_listas = (
+                time.monotonic() + settings.TRELLO_CONFIG_CACHE_TTL_SECONDS,
+                credenciais.config_id,
+                mapa
+            )
+        return mapa
+    
+    def demanda_por_card(self, db: Session, card_id: str):
+        """
+        Demanda vinculada a um card do Trello
+        
+        Com o ID em cache a busca é pela chave primária; a demanda só é
+        devolvida se ainda tiver o mesmo trello_card_id.
+        
+        Args:
+            db: Sessão do banco
+            card_id: ID do card no Trello
+        
+        Returns:
+            Demanda ou None
+        """
+        from app.models.demanda import Demanda
+        
+        with self._lock:
+            demanda_id = self._cards.get(card_id)
+            if demanda_id is not None:
+                self._cards.move_to_end(card_id)
+        
+        if demanda_id is not None:
+            demanda = db.get(Demanda, demanda_id)
+            if demanda is not None and demanda.trello_card_id == card_id:
+                return demanda
+        
+        demanda = db.query(Demanda).filter(Demanda.trello_card_id == card_id).first()
+        with self._lock:
+            if demanda is None:
+                self._cards.pop(card_id, None)
+            else:
+                self._cards[card_id] = demanda.id
+                self._cards.move_to_end(card_id)
+                while len(self._cards) > settings.TRELLO_CARDS_CACHE_TAMANHO:
+                    self._cards.popitem(last=False)
+        return demanda
+    
+    async def obter(
+        self,
+        board_id: str,
+        tipo: str,
+        carregar: Callable[[], Awaitable[Any]],
+        forcar: bool = False
+    ) -> Any:
+        """
+        Metadado de um board ("board", "listas", "etiquetas")
+        
+        Args:
+            board_id: ID do board
+            tipo: Tipo do metadado
+            carregar: Corrotina que busca o valor no Trello (em caso de falta)
+            forcar: Ignorar o valor em cache
+        
+        Returns:
+            Valor em cache ou recém-carregado
+        """
+        chave = (board_id, tipo)
+        if not forcar:
+            with self._lock:
+                item = self._metadados.get(chave)
+            if item and time.monotonic() < item[0]:
+                return item[1]
+        
+        valor = await carregar()
+        with self._lock:
+            self._metadados[chave] = (time.monotonic() + settings.TRELLO_CACHE_TTL_SECONDS, valor)
+        return valor
+    
+    def invalidar(self, board_id: Optional[str] = None, configuracao: bool = True) -> None:
+        """
+        Descartar entradas do cache
+        
+        Args:
+            board_id: Só os metadados deste board (None = todos)
+            configuracao: Descartar também a configuração ativa, o
+                mapeamento de listas e os cards
+        """
+        with self._lock:
+            if configuracao:
+                self._configuracao = None
+                self._mapa_listas = None
+                self._cards.clear()
+            if board_id is None:
+                self._metadados.clear()
+            else:
+                for chave in [c for c in self._metadados if c[0] == board_id]:
+                    del self._metadados[chave]
+    
+    # ==================== ESCUTA DE INVALIDAÇÕES ====================
+    
+    def _aplicar_invalidacao(self, mensagem: str) -> None:
+        try:
+            dados = json.loads(mensagem)
+            self.invalidar(dados.get("board_id"), dados.get("configuracao", True))
+        except (ValueError, AttributeError) as e:
+            logger.warning(f"Invalidação do cache do Trello inválida ignorada: {e}")
+    
+    def iniciar_escuta(self) -> None:
+        """Iniciar a escuta do canal (startup da API e dos workers; sem REDIS_URL, nada a fazer)"""
+        if settings.REDIS_URL and self._escuta is None:
+            self._escuta = asyncio.create_task(escutar_canal(
+                settings.TRELLO_CACHE_CANAL,
+                ao_receber=self._aplicar_invalidacao,
+                ao_conectar=self.invalidar
+            ))
+    
+    async def parar_escuta(self) -> None:
+        """Encerrar a escuta do canal"""
+        if self._escuta is not None:
+            self._escuta.cancel()
+            try:
+                await self._escuta
+            except asyncio.CancelledError:
+                pass
+            self._escuta = None
+
+
+cache_trello = CacheTrello()
+
+
+def invalidar_cache_trello(board_id: Optional[str] = None, configuracao: bool = True, motivo: str = "") -> None:
+    """Invalidar o cache do Trello deste processo e publicar para os demais"""
+    cache_trello.invalidar(board_id, configuracao)
+    logger.info(f"Cache do Trello invalidado{f' ({motivo})' if motivo else ''}")
+    
+    redis = obter_redis_sincrono()
+    if redis is None:
+        return
+    try:
+        redis.publish(settings.TRELLO_CACHE_CANAL, json.dumps({"board_id": board_id, "configuracao": configuracao}))
+    except Exception as e:
+        logger.error(f"Erro ao publicar invalidação do cache do Trello (demais processos esperam o TTL): {e}")
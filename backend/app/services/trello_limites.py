@@ -0,0 +1,350 @@
+"""
+Agendador de chamadas ao Trello (limites de taxa)
+
+O Trello limita cada API key a 300 requisições a cada 10 s e cada token
+a 100 a cada 10 s; acima disso responde 429. Operações em lote (excluir
+as demandas de um cliente, rajada de criações) falhavam no meio.
+
+Cada chamada de TrelloService._request passa antes por aqui:
+
+- dois baldes de fichas (key e token), com reposição contínua:
+  TRELLO_LIMITE_POR_CHAVE / TRELLO_LIMITE_POR_TOKEN por
+  TRELLO_JANELA_LIMITE_SECONDS
+- com REDIS_URL, os baldes ficam no Redis (script Lua atômico) e são
+  compartilhados por API e workers; sem Redis, ou com o Redis fora do
+  ar, cada processo usa baldes em memória
+- prioridade: chamadas em segundo plano (outbox, sincronização) não
+  usam a fração TRELLO_RESERVA_INTERATIVA do balde e, no processo,
+  esperam enquanto houver chamadas interativas na fila
+- 429: todas as chamadas com o mesmo token pausam pelo Retry-After (ou
+  backoff exponencial com jitter) e a requisição é repetida até
+  TRELLO_MAX_TENTATIVAS_429 vezes
+
+A profundidade da fila (chamadas aguardando ficha) é exposta em
+GET /api/outbox/trello.
+
+Autor: DeBrief Sistema
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import random
+import socket
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+from app.core.config import settings
+from app.core.redis_cliente import obter_redis
+
+logger = logging.getLogger(__name__)
+
+PRIORIDADE_INTERATIVA = "interativa"
+PRIORIDADE_SEGUNDO_PLANO = "segundo_plano"
+
+# Intervalo entre verificações de quem espera chamadas interativas
+ESPERA_PRIORIDADE_SECONDS = 0.05
+
+# Depois de uma falha do Redis, usar só a memória por este tempo
+REDIS_QUARENTENA_SECONDS = 30.0
+
+# Entradas da fila de outros processos mais antigas que isto são ignoradas
+FILA_VALIDADE_SECONDS = 60.0
+
+# KEYS: balde da key, balde do token, pausa (429)
+# ARGV: capacidade da key, capacidade do token, janela (ms), fração reservada
+# Retorna 0 se a ficha foi consumida, senão a espera em ms
+_SCRIPT_BALDES = """
+local pausa = redis.call('PTTL', KEYS[3])
+if pausa > 0 then
+    return pausa
+end
+
+local relogio = redis.call('TIME')
+local agora = tonumber(relogio[1]) * 1000 + math.floor(tonumber(relogio[2]) / 1000)
+local janela = tonumber(ARGV[3])
+local reserva = tonumber(ARGV[4])
+local saldos = {}
+local espera = 0
+
+for i = 1, 2 do
+    local capacidade = tonumber(ARGV[i])
+    local estado = redis.call('HMGET', KEYS[i], 'saldo', 'ts')
+    local saldo = tonumber(estado[1]) or capacidade
+    local ts = tonumber(estado[2]) or agora
+    saldo = math.min(capacidade, saldo + math.max(agora - ts, 0) * capacidade / janela)
+    saldos[i] = saldo
+    
+    local necessario = 1 + reserva * capacidade
+    if saldo < necessario then
+        espera = math.max(espera, math.ceil((necessario - saldo) * janela / capacidade))
+    end
+end
+
+for i = 1, 2 do
+    local saldo = saldos[i]
+    if espera == 0 then
+        saldo = saldo - 1
+    end
+    redis.call('HSET', KEYS[i], 'saldo', tostring(saldo), 'ts', agora)
+    redis.call('PEXPIRE', KEYS[i], janela * 2)
+end
+
+return espera
+"""
+
+# Referências das publicações da fila (para as tasks não serem coletadas)
+_tarefas: set = set()
+
+
+def _digest(valor: str) -> str:
+    """Identificador curto de uma credencial (não vai em claro para o Redis)"""
+    return hashlib.sha256(valor.encode()).hexdigest()[:16]
+
+
+def _segundos_retry_after(valor: Optional[str]) -> Optional[float]:
+    """Retry-After em segundos (número ou data HTTP), None se ausente/inválido"""
+    if not valor:
+        return None
+    try:
+        return max(float(valor), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(valor).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class _BaldesMemoria:
+    """Mesmo algoritmo do script Lua, no processo (sem Redis)"""
+    
+    def __init__(self):
+        self._baldes: Dict[str, Tuple[float, float]] = {}
+        self._pausas: Dict[str, float] = {}
+    
+    def tentar(self, chaves: Tuple[str, str, str], capacidades: Tuple[int, int], janela: float, reserva: float) -> float:
+        agora = time.monotonic()
+        pausa = self._pausas.get(chaves[2], 0.0) - agora
+        if pausa > 0:
+            return pausa
+        
+        saldos = []
+        espera = 0.0
+        for chave, capacidade in zip(chaves[:2], capacidades):
+            saldo, ts = self._baldes.get(chave, (capacidade, agora))
+            saldo = min(capacidade, saldo + max(agora - ts, 0.0) * capacidade / janela)
+            saldos.append(saldo)
+            
+            necessario = 1 + reserva * capacidade
+            if saldo < necessario:
+                espera = max(espera, (necessario - saldo) * janela / capacidade)
+        
+        for chave, saldo in zip(chaves[:2], saldos):
+            self._baldes[chave] = (saldo - 1 if espera == 0 else saldo, agora)
+        return espera
+    
+    def pausar(self, chave: str, segundos: float) -> None:
+        self._pausas[chave] = max(self._pausas.get(chave, 0.0), time.monotonic() + segundos)
+
+
+class AgendadorTrello:
+    """
+    Limites de taxa do Trello compartilhados entre processos
+    
+    Exemplo de uso:
+        ```python
+        await agendador_trello.adquirir(api_key, token, PRIORIDADE_SEGUNDO_PLANO)
+        response = await client.request(...)
+        if response.status_code == 429:
+            await agendador_trello.registrar_429(api_key, token, response.headers.get("Retry-After"), 1)
+        ```
+    """
+    
+    def __init__(self):
+        self._memoria = _BaldesMemoria()
+        self._redis_indisponivel_ate = 0.0
+        self._fila: Dict[str, int] = {PRIORIDADE_INTERATIVA: 0, PRIORIDADE_SEGUNDO_PLANO: 0}
+        self._fila_publicada_em = 0.0
+        self._respostas_429 = 0
+        self._processo = f"{socket.gethostname()}:{os.getpid()}"
+    
+    def _chaves(self, api_key: str, token: str) -> Tuple[str, str, str]:
+        prefixo = settings.TRELLO_RATE_LIMIT_PREFIX
+        return (
+            f"{prefixo}:key:{_digest(api_key)}",
+            f"{prefixo}:token:{_digest(token)}",
+            f"{prefixo}:pausa:{_digest(token)}",
+        )
+    
+    def _redis(self):
+        """Cliente Redis, ou None (não configurado ou em quarentena)"""
+        if time.monotonic() < self._redis_indisponivel_ate:
+            return None
+        return obter_redis()
+    
+    def _falha_redis(self, erro: Exception) -> None:
+        self._redis_indisponivel_ate = time.monotonic() + REDIS_QUARENTENA_SECONDS
+        logger.warning(
+            f"Redis indisponível para os limites do Trello ({erro}); "
+            f"usando baldes em memória por {REDIS_QUARENTENA_SECONDS:.0f}s"
+        )
+    
+    async def _tentar(self, api_key: str, token: str, reserva: float) -> float:
+        """Consumir uma ficha dos dois baldes; retorna a espera em segundos (0 = liberado)"""
+        chaves = self._chaves(api_key, token)
+        capacidades = (settings.TRELLO_LIMITE_POR_CHAVE, settings.TRELLO_LIMITE_POR_TOKEN)
+        janela = settings.TRELLO_JANELA_LIMITE_SECONDS
+        
+        redis = self._redis()
+        if redis is not None:
+            try:
+                espera_ms = await redis.eval(
+                    _SCRIPT_BALDES, 3, *chaves,
+                    capacidades[0], capacidades[1], int(janela * 1000), reserva
+                )
+                return int(espera_ms) / 1000
+            except Exception as e:
+                self._falha_redis(e)
+        
+        return self._memoria.tentar(chaves, capacidades, janela, reserva)
+    
+    async def adquirir(self, api_key: str, token: str, prioridade: str = PRIORIDADE_INTERATIVA) -> None:
+        """
+        Aguardar até que a chamada possa ser feita sem exceder os limites
+        
+        Args:
+            api_key: API key do Trello
+            token: Token do Trello
+            prioridade: PRIORIDADE_INTERATIVA ou PRIORIDADE_SEGUNDO_PLANO
+        """
+        interativa = prioridade == PRIORIDADE_INTERATIVA
+        reserva = 0.0 if interativa else settings.TRELLO_RESERVA_INTERATIVA
+        
+        self._fila[prioridade] += 1
+        try:
+            while True:
+                self._fila_alterada()
+                if not interativa and self._fila[PRIORIDADE_INTERATIVA]:
+                    await asyncio.sleep(ESPERA_PRIORIDADE_SECONDS)
+                    continue
+                
+                espera = await self._tentar(api_key, token, reserva)
+                if espera <= 0:
+                    return
+                # Jitter: quem acordou junto não disputa a mesma ficha
+                await asyncio.sleep(espera * random.uniform(1.0, 1.2))
+        finally:
+            self._fila[prioridade] -= 1
+            self._fila_alterada()
+    
+    async def registrar_429(
+        self,
+        api_key: str,
+        token: str,
+        retry_after: Optional[str],
+        tentativa: int
+    ) -> float:
+        """
+        Pausar as chamadas com este token depois de um 429
+        
+        Args:
+            api_key: API key do Trello
+            token: Token do Trello
+            retry_after: Cabeçalho Retry-After da resposta (se houver)
+            tentativa: Número desta repetição (1, 2, ...) para o backoff
+        
+        Returns:
+            Pausa aplicada, em segundos
+        """
+        self._respostas_429 += 1
+        
+        segundos = _segundos_retry_after(retry_after)
+        if segundos is None:
+            base = min(
+                settings.TRELLO_BACKOFF_BASE_SECONDS * (2 ** max(tentativa - 1, 0)),
+                settings.TRELLO_BACKOFF_MAX_SECONDS
+            )
+            segundos = base / 2 + random.uniform(0, base / 2)
+        else:
+            segundos += random.uniform(0, 0.5)
+        
+        chave_pausa = self._chaves(api_key, token)[2]
+        redis = self._redis()
+        if redis is not None:
+            try:
+                await redis.set(chave_pausa, "1", px=max(int(segundos * 1000), 1))
+                return segundos
+            except Exception as e:
+                self._falha_redis(e)
+        
+        self._memoria.pausar(chave_pausa, segundos)
+        return segundos
+    
+    def _fila_alterada(self) -> None:
+        """Publicar a profundidade da fila no Redis (no máximo 1x/s, sempre ao esvaziar)"""
+        agora = time.monotonic()
+        vazia = not any(self._fila.values())
+        if not vazia and agora - self._fila_publicada_em < 1.0:
+            return
+        self._fila_publicada_em = agora
+        
+        redis = self._redis()
+        if redis is None:
+            return
+        
+        valor = f"{self._fila[PRIORIDADE_INTERATIVA]},{self._fila[PRIORIDADE_SEGUNDO_PLANO]},{time.time():.0f}"
+        
+        async def _publicar():
+            try:
+                chave = f"{settings.TRELLO_RATE_LIMIT_PREFIX}:fila"
+                await redis.hset(chave, self._processo, valor)
+                await redis.expire(chave, int(FILA_VALIDADE_SECONDS * 5))
+            except Exception as e:
+                logger.debug(f"Não foi possível publicar a fila do Trello: {e}")
+        
+        tarefa = asyncio.get_running_loop().create_task(_publicar())
+        _tarefas.add(tarefa)
+        tarefa.add_done_callback(_tarefas.discard)
+    
+    async def estado(self) -> dict:
+        """
+        Profundidade da fila e contadores (para monitoramento)
+        
+        Returns:
+            Fila deste processo, fila somada de todos os processos que
+            publicaram no último minuto (com Redis) e 429 recebidos
+        """
+        resultado = {
+            "backend": "redis" if self._redis() is not None else "memoria",
+            "fila": dict(self._fila),
+            "respostas_429": self._respostas_429,
+        }
+        
+        redis = self._redis()
+        if redis is not None:
+            try:
+                publicadas = await redis.hgetall(f"{settings.TRELLO_RATE_LIMIT_PREFIX}:fila")
+            except Exception as e:
+                self._falha_redis(e)
+                return resultado
+            
+            total = {PRIORIDADE_INTERATIVA: 0, PRIORIDADE_SEGUNDO_PLANO: 0}
+            processos = {}
+            for processo, valor in publicadas.items():
+                try:
+                    interativa, segundo_plano, publicado_em = (int(v) for v in valor.split(","))
+                except ValueError:
+                    continue
+                if time.time() - publicado_em > FILA_VALIDADE_SECONDS:
+                    continue
+                processos[processo] = {PRIORIDADE_INTERATIVA: interativa, PRIORIDADE_SEGUNDO_PLANO: segundo_plano}
+                total[PRIORIDADE_INTERATIVA] += interativa
+                total[PRIORIDADE_SEGUNDO_PLANO] += segundo_plano
+            resultado["fila_total"] = total
+            resultado["fila_por_processo"] = processos
+        
+        return resultado
+
+
+agendador_trello = AgendadorTrello()
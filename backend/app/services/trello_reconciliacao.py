@@ -0,0 +1,216 @@
+"""
+Serviço de Reconciliação com o Trello
+
+Cards e demandas se desencontram quando o webhook perde eventos ou a
+criação do card falha de vez na outbox: a demanda fica sem
+trello_card_id, com um card que não existe mais ou com status antigo.
+
+Uma reconciliação:
+1. Lê as demandas (só as colunas necessárias) e os eventos de criação de
+   card ainda pendentes na outbox
+2. Busca todos os cards do board (inclusive arquivados) em uma chamada,
+   pelo agendador de limites do Trello (prioridade de segundo plano)
+3. Compara em memória, pelo ID do card:
+   - card não existe mais no board -> vínculo removido
+   - demanda em aberto sem card (há mais de TRELLO_RECONCILIACAO_CARENCIA_SECONDS
+     e sem criação pendente) -> trello_criar_card na outbox
+   - card em lista mapeada para outro status -> status da demanda atualizado
+     (sem notificação: o evento perdido já passou)
+   - cards do board sem demanda -> só no relatório
+4. Sem dry_run, aplica tudo em uma transação (vínculos removidos em
+   UPDATE em lote; status pelo ORM, para o rollup de estatísticas)
+
+As demandas são lidas ANTES dos cards: um card criado durante a
+reconciliação aparece como "sem demanda", nunca como inexistente.
+
+Uso:
+    python reconciliar_trello.py            # relatório (dry run)
+    python reconciliar_trello.py --aplicar
+    POST /api/trello-config/reconciliar?dry_run=false
+
+Autor: DeBrief Sistema
+"""
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.demanda import Demanda, StatusDemanda
+from app.models.outbox_evento import OutboxEvento, StatusOutbox
+from app.services.trello import TrelloService
+from app.services.trello_cache import cache_trello
+from app.services.trello_limites import PRIORIDADE_SEGUNDO_PLANO
+
+logger = logging.getLogger(__name__)
+
+# Demandas nestes status não ganham card novo
+STATUS_FINAIS = {StatusDemanda.CONCLUIDA.value, StatusDemanda.CANCELADA.value}
+
+
+class ReconciliacaoEmAndamento(Exception):
+    """Outra reconciliação está aplicando alterações"""
+    pass
+
+
+class ReconciliacaoTrelloService:
+    """
+    Reconciliação entre demandas e cards do board configurado
+    
+    Exemplo de uso:
+        ```python
+        service = ReconciliacaoTrelloService(db)
+        relatorio = await service.reconciliar(dry_run=True)
+        print(relatorio["totais"])
+        ```
+    """
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def _ler_demandas(self):
+        """Colunas necessárias de todas as demandas e criações pendentes"""
+        demandas = self.db.query(
+            Demanda.id,
+            Demanda.trello_card_id,
+            Demanda.status,
+            Demanda.created_at
+        ).all()
+        
+        criacao_pendente = {
+            demanda_id for (demanda_id,) in self.db.query(OutboxEvento.demanda_id).filter(
+                OutboxEvento.tipo == "trello_criar_card",
+                OutboxEvento.status.in_([StatusOutbox.PENDENTE.value, StatusOutbox.PROCESSANDO.value])
+            ).distinct()
+        }
+        return demandas, criacao_pendente
+    
+    @staticmethod
+    def _comparar(demandas, criacao_pendente: set, cards: List[dict], mapa_listas: Dict[str, str]) -> dict:
+        """Diferenças entre demandas e cards (sem acesso ao banco ou ao Trello)"""
+        cards_por_id = {card['id']: card for card in cards}
+        limite_criacao = datetime.now(timezone.utc) - timedelta(seconds=settings.TRELLO_RECONCILIACAO_CARENCIA_SECONDS)
+        
+        status_atualizados = []
+        cards_removidos = []
+        cards_criados = []
+        vinculados = set()
+        
+        for demanda in demandas:
+            status_atual = getattr(demanda.status, 'value', demanda.status)
+            card = cards_por_id.get(demanda.trello_card_id) if demanda.trello_card_id else None
+            
+            if demanda.trello_card_id and card is None:
+                cards_removidos.append({"demanda_id": demanda.id, "card_id": demanda.trello_card_id})
+            elif card is not None:
+                vinculados.add(card['id'])
+                status_lista = None if card.get('closed') else mapa_listas.get(card.get('idList'))
+                if status_lista and status_lista != status_atual:
+                    status_atualizados.append({
+                        "demanda_id": demanda.id,
+                        "card_id": card['id'],
+                        "status_antigo": status_atual,
+                        "status_novo": status_lista,
+                    })
+                continue
+            
+            # Sem card (nunca criado ou removido acima)
+            if (
+                status_atual not in STATUS_FINAIS
+                and demanda.id not in criacao_pendente
+                and demanda.created_at is not None
+                and demanda.created_at < limite_criacao
+            ):
+                cards_criados.append(demanda.id)
+        
+        cards_sem_demanda = [
+            {"card_id": card['id'], "nome": card.get('name'), "url": card.get('shortUrl')}
+            for card in cards
+            if card['id'] not in vinculados and not card.get('closed')
+        ]
+        
+        return {
+            "status_atualizados": status_atualizados,
+            "cards_removidos": cards_removidos,
+            "cards_criados": cards_criados,
+            "cards_sem_demanda": cards_sem_demanda,
+        }
+    
+    def _aplicar(self, diferencas: dict) -> None:
+        """Aplicar as correções em uma transação"""
+        conn = self.db.connection()
+        
+        # Apenas uma reconciliação aplica por vez (lock liberado no fim da transação)
+        if not conn.execute(text("SELECT pg_try_advisory_xact_lock(hashtext('trello_reconciliacao'))")).scalar():
+            self.db.rollback()
+            raise ReconciliacaoEmAndamento()
+        
+        try:
+            if diferencas["cards_removidos"]:
+                self.db.query(Demanda).filter(
+                    Demanda.id.in_([item["demanda_id"] for item in diferencas["cards_removidos"]]),
+                    Demanda.trello_card_id.in_([item["card_id"] for item in diferencas["cards_removidos"]])
+                ).update({
+                    Demanda.trello_card_id: None,
+                    Demanda.trello_card_url: None,
+                    Demanda.trello_card_hash: None,
+                }, synchronize_session=False)
+            
+            # Status pelo ORM (não UPDATE em lote): o listener after_flush do
+            # rollup de estatísticas (demandas_stats_daily) calcula os deltas
+            status_novos = {item["demanda_id"]: item["status_novo"] for item in diferencas["status_atualizados"]}
+            if status_novos:
+                for demanda in self.db.query(Demanda).filter(Demanda.id.in_(list(status_novos))):
+                    demanda.status = status_novos[demanda.id]
+            
+            for demanda_id in diferencas["cards_criados"]:
+                OutboxEvento.registrar(self.db, "trello_criar_card", demanda_id=demanda_id)
+            
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+    
+    async def reconciliar(self, dry_run: bool = True) -> dict:
+        """
+        Comparar demandas e cards e, sem dry_run, corrigir
+        
+        Args:
+            dry_run: Apenas relatar (nada é alterado)
+        
+        Returns:
+            Relatório com totais e as listas de diferenças
+        
+        Raises:
+            Exception: Trello não configurado ou falha ao buscar os cards
+            ReconciliacaoEmAndamento: Outra reconciliação aplicando
+        """
+        inicio = time.monotonic()
+        
+        demandas, criacao_pendente = self._ler_demandas()
+        trello_service = TrelloService(self.db, prioridade=PRIORIDADE_SEGUNDO_PLANO)
+        mapa_listas = cache_trello.mapa_listas(self.db)
+        cards = await trello_service.listar_cards_board()
+        
+        diferencas = self._comparar(demandas, criacao_pendente, cards, mapa_listas)
+        if not dry_run:
+            self._aplicar(diferencas)
+        
+        relatorio = {
+            "dry_run": dry_run,
+            "board_id": trello_service.board_id,
+            "totais": {
+                "demandas": len(demandas),
+                "cards_no_board": len(cards),
+                **{chave: len(valor) for chave, valor in diferencas.items()},
+            },
+            **diferencas,
+            "duracao_segundos": round(time.monotonic() - inicio, 3),
+        }
+        
+        logger.info(
+            f"Reconciliação Trello {'(dry run) ' if dry_run else ''}concluída: "
+            + ", ".join(f"{chave}={valor}" for chave, valor in relatorio["totais"].items())
+        )
+        return relatorio
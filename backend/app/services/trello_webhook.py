@@ -0,0 +1,247 @@
+"""
+Serviço de Webhook do Trello
+
+O endpoint POST /api/trello/webhook fazia todo o trabalho antes de
+responder (demanda, commit, WhatsApp). Ao arrastar vários cards, os
+reenvios do Trello se acumulavam e a mesma ação era aplicada mais de uma vez.
+
+Fluxo:
+1. O endpoint grava a movimentação em trello_webhook_eventos
+   (INSERT ... ON CONFLICT (action_id) DO NOTHING) e responde
+2. O worker (`python -m app.workers`) reivindica as pendentes com mais de
+   TRELLO_WEBHOOK_ATRASO_SECONDS (FOR UPDATE SKIP LOCKED)
+3. Ações do mesmo card no lote são reduzidas à última (estado final);
+   ações mais antigas que uma já aplicada são descartadas. A lista de
+   destino vira status pelo mapeamento da configuração (trello_listas_status)
+4. O status da demanda muda e a notificação vai para a outbox
+   (whatsapp_mudanca_status), na mesma transação
+
+Autor: DeBrief Sistema
+"""
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.outbox_evento import OutboxEvento
+from app.models.trello_webhook_evento import StatusWebhookTrello, TrelloWebhookEvento
+from app.services.trello_cache import cache_trello
+
+logger = logging.getLogger(__name__)
+
+
+# ==================== MAPEAMENTO LISTA → STATUS ====================
+
+def mapear_lista_para_status(db: Session, lista_id: str) -> Optional[str]:
+    """
+    Mapeia o ID de uma lista do Trello para um status do DeBrief
+    
+    Usa o mapeamento da configuração ativa (trello_listas_status, em
+    cache no processo), sem chamadas à API do Trello.
+    
+    Args:
+        db: Sessão do banco
+        lista_id: ID da lista do Trello
+    
+    Returns:
+        Status correspondente ou None
+    """
+    status = cache_trello.mapa_listas(db).get(lista_id)
+    
+    if status:
+        logger.info(f"Lista ID '{lista_id}' mapeada para status '{status}'")
+        return status
+    else:
+        logger.warning(f"Lista ID '{lista_id}' não encontrada no mapeamento")
+        return None
+
+
+def _data_acao(valor: Optional[str]) -> Optional[datetime]:
+    """Data da ação do Trello (ISO 8601 com Z)"""
+    if not valor:
+        return None
+    try:
+        return datetime.fromisoformat(valor)
+    except ValueError:
+        return None
+
+
+class TrelloWebhookService:
+    """
+    Fila de ações do webhook do Trello
+    
+    Exemplo de uso:
+        ```python
+        # Endpoint
+        novo = TrelloWebhookService.registrar(db, payload["action"])
+        
+        # Worker
+        processados = TrelloWebhookService.processar_lote(settings.TRELLO_WEBHOOK_LOTE)
+        ```
+    """
+    
+    @staticmethod
+    def registrar(db: Session, action: dict) -> bool:
+        """
+        Gravar uma movimentação de card (commit incluído)
+        
+        Args:
+            db: Sessão do banco
+            action: Objeto "action" do payload do Trello
+        
+        Returns:
+            True se a ação é nova, False se é reenvio (action.id já gravado)
+        """
+        data = action.get('data', {})
+        lista_depois = data.get('listAfter') or {}
+        
+        inserido = db.execute(
+            pg_insert(TrelloWebhookEvento.__table__).values(
+                id=str(uuid.uuid4()),
+                action_id=action['id'],
+                tipo=action.get('type'),
+                card_id=data.get('card', {}).get('id'),
+                lista_antes_id=(data.get('listBefore') or {}).get('id'),
+                lista_depois_id=lista_depois.get('id'),
+                lista_depois_nome=(lista_depois.get('name') or '')[:200] or None,
+                data_acao=_data_acao(action.get('date')),
+                status=StatusWebhookTrello.PENDENTE.value
+            ).on_conflict_do_nothing(index_elements=["action_id"]).returning(TrelloWebhookEvento.id)
+        ).scalar()
+        db.commit()
+        return inserido is not None
+    
+    @staticmethod
+    def _aplicar(db: Session, evento: TrelloWebhookEvento) -> str:
+        """
+        Aplicar a movimentação final de um card
+        
+        Returns:
+            Resultado ("aplicado" ou o motivo para ignorar)
+        """
+        if evento.data_acao is not None:
+            mais_recente = db.query(TrelloWebhookEvento.id).filter(
+                TrelloWebhookEvento.card_id == evento.card_id,
+                TrelloWebhookEvento.status == StatusWebhookTrello.APLICADO.value,
+                TrelloWebhookEvento.data_acao > evento.data_acao
+            ).first()
+            if mais_recente:
+                return "obsoleto"
+        
+        demanda = cache_trello.demanda_por_card(db, evento.card_id)
+        if not demanda:
+            logger.warning(f"Demanda não encontrada para card {evento.card_id}")
+            return "demanda_nao_encontrada"
+        
+        novo_status = mapear_lista_para_status(db, evento.lista_depois_id)
+        if not novo_status:
+            return "sem_mapeamento"
+        
+        status_antigo = demanda.status.value if demanda.status else None
+        if status_antigo == novo_status:
+            return "sem_mudanca"
+        
+        demanda.status = novo_status
+        OutboxEvento.registrar(
+            db,
+            "whatsapp_mudanca_status",
+            demanda_id=demanda.id,
+            payload={"status_antigo": status_antigo, "status_novo": novo_status}
+        )
+        
+        logger.info(
+            f"Demanda {demanda.id} atualizada pelo Trello "
+            f"(lista '{evento.lista_depois_nome}'): {status_antigo} → {novo_status}"
+        )
+        return "aplicado"
+    
+    @staticmethod
+    def processar_lote(limite: int) -> int:
+        """
+        Reivindicar e aplicar ações pendentes (síncrono, roda em thread)
+        
+        Várias réplicas do worker podem rodar juntas (SKIP LOCKED). Cada
+        card é aplicado em um savepoint: erro em um não desfaz os outros.
+        
+        Args:
+            limite: Número máximo de ações
+        
+        Returns:
+            Número de ações reivindicadas
+        """
+        db = SessionLocal()
+        try:
+            eventos = db.query(TrelloWebhookEvento).filter(
+                TrelloWebhookEvento.status == StatusWebhookTrello.PENDENTE.value,
+                TrelloWebhookEvento.created_at <= func.now() - timedelta(seconds=settings.TRELLO_WEBHOOK_ATRASO_SECONDS)
+            ).order_by(
+                TrelloWebhookEvento.created_at
+            ).limit(limite).with_for_update(skip_locked=True).all()
+            
+            if not eventos:
+                return 0
+            
+            por_card: Dict[str, List[TrelloWebhookEvento]] = {}
+            for evento in eventos:
+                por_card.setdefault(evento.card_id, []).append(evento)
+            
+            for card_id, acoes in por_card.items():
+                acoes.sort(key=lambda e: e.data_acao or e.created_at)
+                *anteriores, final = acoes
+                
+                for evento in anteriores:
+                    evento.status = StatusWebhookTrello.IGNORADO.value
+                    evento.resultado = "coalescido"
+                    evento.processado_em = func.now()
+                
+                try:
+                    with db.begin_nested():
+                        resultado = TrelloWebhookService._aplicar(db, final)
+                    final.status = (
+                        StatusWebhookTrello.APLICADO.value if resultado == "aplicado"
+                        else StatusWebhookTrello.IGNORADO.value
+                    )
+                    final.resultado = resultado
+                except Exception as e:
+                    logger.error(f"Erro ao aplicar ação {final.action_id} do card {card_id}: {e}")
+                    final.status = StatusWebhookTrello.FALHOU.value
+                    final.ultimo_erro = str(e)[:2000]
+                final.processado_em = func.now()
+            
+            db.commit()
+            
+            if len(eventos) > len(por_card):
+                logger.info(f"Webhook Trello: {len(eventos)} ações reduzidas a {len(por_card)} cards")
+            return len(eventos)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
+    @staticmethod
+    def limpar_antigos() -> int:
+        """
+        Remover ações processadas há mais de TRELLO_WEBHOOK_RETENCAO_DIAS
+        (síncrono, roda em thread)
+        
+        Returns:
+            Número de ações removidas
+        """
+        db = SessionLocal()
+        try:
+            removidos = db.query(TrelloWebhookEvento).filter(
+                TrelloWebhookEvento.status != StatusWebhookTrello.PENDENTE.value,
+                TrelloWebhookEvento.created_at < func.now() - timedelta(days=settings.TRELLO_WEBHOOK_RETENCAO_DIAS)
+            ).delete(synchronize_session=False)
+            db.commit()
+            return removidos
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
@@ -6,27 +6,57 @@ incluindo validação, armazenamento, organização e exclusão.
 
 Funcionalidades:
 - Validar tamanho e extensão de arquivos
-- Salvar arquivos organizados por cliente/demanda
+- Salvar arquivos organizados por cliente/demanda, em blocos (streaming):
+  o arquivo nunca fica inteiro em memória, o limite de tamanho é aplicado
+  durante a cópia e o SHA-256 é calculado enquanto os bytes chegam
 - Gerar nomes únicos (UUID)
 - Deletar arquivos
 - Gerenciar thumbnails (futuro)
 
 Autor: DeBrief Sistema
 """
+import hashlib
 import os
 import uuid
 import aiofiles
 import imghdr
-import shlex
-import subprocess
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Tuple
 from fastapi import UploadFile, HTTPException, status
 from app.core.config import settings
+from app.services.antivirus import AntivirusIndisponivel, obter_scanner
+from app.services.variantes_imagem import caminhos_variantes
 import logging
 
 # Configurar logger
 logger = logging.getLogger(__name__)
 
+# Bytes do início do arquivo usados na validação da assinatura
+TAMANHO_ASSINATURA = 4096
+
+# Tipo MIME gravado no anexo, pela extensão validada (o content_type
+# enviado pelo cliente não é confiável)
+TIPOS_MIME = {
+    "pdf": "application/pdf",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+}
+
+
+def tipo_mime_extensao(ext: str) -> str:
+    """Tipo MIME de uma extensão validada (application/octet-stream se desconhecida)"""
+    return TIPOS_MIME.get(ext.lower(), "application/octet-stream")
+
+
+@dataclass
+class ArquivoSalvo:
+    """Resultado de UploadService.salvar_stream"""
+    caminho: str
+    tamanho: int
+    sha256: str
+
 
 class UploadService:
     """
@@ -54,26 +84,32 @@ class UploadService:
         """
         self.upload_dir = Path(settings.UPLOAD_DIR)
         self.max_size = settings.MAX_UPLOAD_SIZE
+        self.chunk_size = settings.UPLOAD_CHUNK_SIZE
         self.allowed_extensions = settings.ALLOWED_EXTENSIONS
         self.antivirus_enabled = getattr(settings, "ANTIVIRUS_ENABLED", False)
-        self.antivirus_command = getattr(settings, "ANTIVIRUS_COMMAND", "clamscan --no-summary --stdout")
         
         # Criar diretório base se não existir
         self.upload_dir.mkdir(parents=True, exist_ok=True)
         
         logger.info(f"UploadService inicializado (dir: {self.upload_dir})")
     
-    def validate_file(self, file: UploadFile) -> None:
+    def validate_file(self, file: UploadFile) -> str:
         """
         Validar arquivo antes de salvar
         
         Validações:
-        - Tamanho máximo (padrão: 50MB)
+        - Tamanho máximo declarado (padrão: 50MB), quando conhecido
         - Extensão permitida (pdf, jpg, jpeg, png)
         
+        O conteúdo não é lido aqui: o tamanho real e a assinatura são
+        verificados durante a cópia (salvar_stream).
+        
         Args:
             file: Arquivo enviado via FastAPI
         
+        Returns:
+            Extensão do arquivo (minúscula)
+        
         Raises:
             HTTPException 413: Se arquivo muito grande
             HTTPException 400: Se extensão não permitida
@@ -87,23 +123,10 @@ class UploadService:
                 print(f"Arquivo inválido: {e.detail}")
             ```
         """
-        # Verificar se file tem tamanho
-        if not hasattr(file, 'size') or file.size is None:
-            # Tentar ler para obter tamanho
-            file.file.seek(0, 2)  # Ir para o final
-            file_size = file.file.tell()
-            file.file.seek(0)  # Voltar ao início
-        else:
-            file_size = file.size
-        
-        # Verificar tamanho
-        if file_size > self.max_size:
-            max_mb = self.max_size / 1024 / 1024
-            logger.warning(f"Arquivo muito grande: {file_size} bytes (max: {max_mb}MB)")
-            raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail=f"Arquivo muito grande. Máximo: {max_mb:.0f}MB"
-            )
+        # Tamanho declarado (o real é conferido durante a cópia)
+        file_size = getattr(file, 'size', None)
+        if file_size is not None and file_size > self.max_size:
+            self._arquivo_muito_grande(file_size)
         
         # Verificar se tem nome de arquivo
         if not file.filename:
@@ -122,13 +145,17 @@ class UploadService:
                 detail=f"Extensão não permitida. Permitidos: {', '.join(self.allowed_extensions)}"
             )
         
-        # Validar assinatura/mime básica
-        head = file.file.read(4096)
-        file.file.seek(0)
-        self._validate_magic(head, ext)
-        
-        logger.info(f"Arquivo validado: {file.filename} ({file_size} bytes)")
-
+        return ext
+    
+    def _arquivo_muito_grande(self, file_size: int) -> None:
+        """Levantar 413 para arquivo acima de MAX_UPLOAD_SIZE"""
+        max_mb = self.max_size / 1024 / 1024
+        logger.warning(f"Arquivo muito grande: {file_size} bytes (max: {max_mb}MB)")
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Arquivo muito grande. Máximo: {max_mb:.0f}MB"
+        )
+    
     def _validate_magic(self, head: bytes, ext: str) -> None:
         """Validação simples de conteúdo baseado em cabeçalho."""
         if not head:
@@ -187,37 +214,133 @@ class UploadService:
             # file_path = "cli-123/dem-456/uuid-123.pdf"
             ```
         """
-        # Validar arquivo
-        self.validate_file(file)
+        arquivo = await self.salvar_stream(file, cliente_id, demanda_id)
+        return arquivo.caminho
+    
+    async def salvar_stream(
+        self,
+        file: UploadFile,
+        cliente_id: str,
+        demanda_id: str
+    ) -> ArquivoSalvo:
+        """
+        Salvar arquivo em blocos, sem carregá-lo inteiro em memória
         
-        try:
-            # Criar estrutura de pastas: uploads/{cliente_id}/{demanda_id}/
-            dir_path = self.upload_dir / cliente_id / demanda_id
-            dir_path.mkdir(parents=True, exist_ok=True)
+        Copia UPLOAD_CHUNK_SIZE bytes por vez para um arquivo temporário
+        na pasta de destino:
+        - a assinatura (magic bytes) é validada no primeiro bloco
+        - o limite MAX_UPLOAD_SIZE é aplicado durante a cópia
+        - o SHA-256 é calculado enquanto os bytes chegam
+        
+        Só depois da cópia (e do antivírus, se habilitado) o temporário é
+        renomeado para o nome final (os.replace, atômico). Em qualquer
+        falha o temporário é removido: nunca fica arquivo pela metade.
+        
+        Args:
+            file: Arquivo enviado (FastAPI UploadFile)
+            cliente_id: ID do cliente (para organizar pastas)
+            demanda_id: ID da demanda
+        
+        Returns:
+            ArquivoSalvo com caminho relativo, tamanho real e SHA-256
+        
+        Raises:
+            HTTPException: Se validação falhar ou erro ao salvar
+        """
+        ext = self.validate_file(file)
+        
+        # Estrutura de pastas: uploads/{cliente_id}/{demanda_id}/{uuid}.ext
+        relative_path = f"{cliente_id}/{demanda_id}/{uuid.uuid4()}.{ext}"
+        return await self.gravar(file, relative_path, ext)
+    
+    async def _copiar_blocos(self, file: UploadFile, ext: str, destino=None) -> Tuple[int, str]:
+        """
+        Ler o upload em blocos validando assinatura e tamanho
+        
+        Args:
+            file: Arquivo enviado (lido a partir da posição atual)
+            ext: Extensão validada
+            destino: Arquivo aiofiles aberto para escrita (None = só calcular o hash)
+        
+        Returns:
+            (tamanho, sha256 hexadecimal)
+        """
+        sha256 = hashlib.sha256()
+        tamanho = 0
+        
+        while True:
+            bloco = await file.read(self.chunk_size)
+            if not bloco:
+                break
             
-            # Gerar nome único para arquivo
-            ext = file.filename.split('.')[-1]
-            unique_filename = f"{uuid.uuid4()}.{ext}"
-            file_path = dir_path / unique_filename
+            if tamanho == 0:
+                self._validate_magic(bloco[:TAMANHO_ASSINATURA], ext)
             
-            logger.info(f"Salvando arquivo: {file_path}")
+            tamanho += len(bloco)
+            if tamanho > self.max_size:
+                self._arquivo_muito_grande(tamanho)
             
-            # Salvar arquivo usando aiofiles (assíncrono)
-            async with aiofiles.open(file_path, 'wb') as f:
-                # Ler conteúdo do arquivo
-                content = await file.read()
-                # Escrever no disco
-                await f.write(content)
+            sha256.update(bloco)
+            if destino is not None:
+                await destino.write(bloco)
+        
+        if tamanho == 0:
+            self._validate_magic(b"", ext)
+        
+        return tamanho, sha256.hexdigest()
+    
+    async def calcular_hash(self, file: UploadFile) -> Tuple[str, int, str]:
+        """
+        Validar o upload e calcular o SHA-256 sem gravar nada no disco
+        
+        O arquivo é lido do buffer temporário do upload (em blocos) e
+        volta para o início, pronto para gravar() se necessário.
+        
+        Returns:
+            (extensão, tamanho, sha256)
+        
+        Raises:
+            HTTPException: Se validação falhar
+        """
+        ext = self.validate_file(file)
+        await file.seek(0)
+        tamanho, sha256 = await self._copiar_blocos(file, ext)
+        await file.seek(0)
+        return ext, tamanho, sha256
+    
+    async def gravar(self, file: UploadFile, relative_path: str, ext: str) -> ArquivoSalvo:
+        """
+        Gravar o upload em `relative_path` (relativo a UPLOAD_DIR)
+        
+        Copia em blocos para um temporário na pasta de destino e o
+        renomeia (os.replace) só depois do antivírus.
+        
+        Args:
+            file: Arquivo enviado (lido a partir da posição atual)
+            relative_path: Caminho final relativo ao diretório de uploads
+            ext: Extensão validada (validate_file)
+        
+        Returns:
+            ArquivoSalvo com caminho relativo, tamanho real e SHA-256
+        """
+        file_path = self.upload_dir / relative_path
+        temp_path = file_path.with_name(f".{file_path.name}.{uuid.uuid4().hex[:8]}.part")
+        
+        try:
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            logger.info(f"Salvando arquivo: {file_path}")
             
-            # Verificar antivírus se habilitado
-            self._scan_antivirus(file_path)
+            async with aiofiles.open(temp_path, 'wb') as f:
+                tamanho, sha256 = await self._copiar_blocos(file, ext, destino=f)
             
-            # Retornar caminho relativo (sem o diretório base)
-            relative_path = f"{cliente_id}/{demanda_id}/{unique_filename}"
+            # Verificar antivírus se habilitado (antes de publicar o arquivo)
+            await self._scan_antivirus(temp_path, sha256)
             
-            logger.info(f"Arquivo salvo com sucesso: {relative_path}")
-            return relative_path
+            os.replace(temp_path, file_path)
             
+            logger.info(f"Arquivo salvo com sucesso: {relative_path} ({tamanho} bytes)")
+            return ArquivoSalvo(caminho=relative_path, tamanho=tamanho, sha256=sha256)
+        
         except HTTPException:
             # Re-raise validation errors
             raise
@@ -227,32 +350,35 @@ class UploadService:
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Erro ao salvar arquivo: {str(e)}"
             )
+        finally:
+            # Falha em qualquer ponto: descartar o arquivo parcial
+            temp_path.unlink(missing_ok=True)
     
-    def _scan_antivirus(self, file_path: Path) -> None:
-        """Executa comando antivírus (ex.: clamscan) caso habilitado."""
+    async def _scan_antivirus(self, file_path: Path, sha256: str) -> None:
+        """
+        Verificar o arquivo no antivírus, caso habilitado
+        
+        A verificação é assíncrona (clamd via socket ou subprocesso) e o
+        veredito fica em cache pelo SHA-256 do conteúdo.
+        """
         if not self.antivirus_enabled:
             return
         
-        cmd = shlex.split(self.antivirus_command) + [str(file_path)]
-        logger.info(f"Verificando arquivo com antivírus: {' '.join(cmd)}")
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-        except FileNotFoundError:
-            logger.error("Comando antivirus não encontrado: %s", self.antivirus_command)
+            veredito = await obter_scanner().verificar(file_path, sha256)
+        except AntivirusIndisponivel as e:
+            logger.error(f"Antivírus indisponível: {e}")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Antivírus não disponível no servidor"
             )
         
-        if result.returncode != 0:
-            logger.warning("Antivírus bloqueou arquivo: %s", result.stdout or result.stderr)
-            try:
-                file_path.unlink(missing_ok=True)
-            finally:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Arquivo reprovado na verificação de vírus"
-                )
+        if not veredito.limpo:
+            logger.warning(f"Antivírus bloqueou arquivo ({sha256[:12]}): {veredito.assinatura}")
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Arquivo reprovado na verificação de vírus"
+            )
     
     def delete_file(self, file_path: str) -> bool:
         """
@@ -265,24 +391,28 @@ class UploadService:
             True se deletado com sucesso, False se arquivo não existe
         
         Raises:
+            ValueError: Se o caminho está em blobs/ (arquivo compartilhado)
             Exception: Se erro ao deletar
         
-        Exemplo:
-            ```python
-            # Deletar anexo ao cancelar demanda
-            for anexo in demanda.anexos:
-                upload_service.delete_file(anexo.caminho)
-            ```
+        Arquivos de anexos não passam por aqui: o arquivo de um blob pode
+        ser usado por outros anexos. Exclua o Anexo (db.delete); a contagem
+        de referências de ArquivoBlob remove o arquivo depois do commit,
+        quando nenhum anexo o usa mais.
         """
+        full_path = self.upload_dir / file_path
+        if full_path.resolve().is_relative_to((self.upload_dir / "blobs").resolve()):
+            logger.error(f"Exclusão direta de arquivo de blob recusada: {file_path}")
+            raise ValueError(f"Arquivo de blob compartilhado não pode ser excluído diretamente: {file_path}")
+        
         try:
-            full_path = self.upload_dir / file_path
-            
             if not full_path.exists():
                 logger.warning(f"Arquivo não encontrado para deletar: {file_path}")
                 return False
             
-            # Deletar arquivo
+            # Deletar arquivo e variantes de imagem (se houver)
             full_path.unlink()
+            for variante in caminhos_variantes(file_path):
+                (self.upload_dir / variante).unlink(missing_ok=True)
             logger.info(f"Arquivo deletado: {file_path}")
             
             # Tentar deletar pastas vazias
@@ -295,7 +425,7 @@ class UploadService:
                 pass
             
             return True
-            
+        
         except Exception as e:
             logger.error(f"Erro ao deletar arquivo {file_path}: {e}")
             raise
@@ -0,0 +1,183 @@
+"""
+Serviço de Variantes de Imagem
+
+Anexos de imagem (até 50 MB) eram exibidos sempre no tamanho original.
+Cada imagem ganha variantes WebP gravadas ao lado do original:
+
+- thumb: lado maior até 320 px (listagens, miniaturas)
+- medio: lado maior até 1280 px (pré-visualização)
+- webp:  dimensões originais, em WebP
+    
+    cliente/demanda/abc.jpg -> cliente/demanda/abc.thumb.webp
+    blobs/ab/cd/<sha>-x.png -> blobs/ab/cd/<sha>-x.medio.webp
+
+As variantes são geradas no pool de processos logo depois do upload e,
+para arquivos antigos, na primeira requisição de
+GET /uploads/{caminho}?variante=thumb.
+
+Autor: DeBrief Sistema
+"""
+import asyncio
+import logging
+import os
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.core.process_pool import executar_em_processo
+
+logger = logging.getLogger(__name__)
+
+# Variante -> lado maior em pixels (None = dimensões originais)
+VARIANTES: Dict[str, Optional[int]] = {
+    "thumb": 320,
+    "medio": 1280,
+    "webp": None,
+}
+QUALIDADE_WEBP = 80
+
+TIPOS_IMAGEM = {"image/jpeg", "image/jpg", "image/png", "image/gif", "image/webp"}
+
+# Geração em andamento por caminho (requisições simultâneas aguardam a mesma)
+_em_andamento: Dict[str, asyncio.Task] = {}
+
+# Gerações enfileiradas (referência para as tasks não serem coletadas)
+_tarefas: set = set()
+
+
+def caminho_variante(caminho: str, variante: str) -> str:
+    """Caminho relativo da variante (mesma pasta do original)"""
+    original = PurePosixPath(caminho)
+    return str(original.with_name(f"{original.stem}.{variante}.webp"))
+
+
+def caminhos_variantes(caminho: str) -> List[str]:
+    """Caminhos relativos de todas as variantes de um arquivo"""
+    return [caminho_variante(caminho, variante) for variante in VARIANTES]
+
+
+def gerar_variantes(caminho_absoluto: str) -> List[str]:
+    """
+    Gerar as variantes que ainda não existem (executado no pool de processos)
+    
+    A imagem é decodificada uma única vez; cada variante é gravada em um
+    temporário e renomeada, então nunca é servida pela metade.
+    
+    Returns:
+        Variantes geradas
+    """
+    from PIL import Image, ImageOps
+    
+    original = Path(caminho_absoluto)
+    pendentes = {
+        variante: lado for variante, lado in VARIANTES.items()
+        if not (original.parent / caminho_variante(original.name, variante)).exists()
+    }
+    if not pendentes:
+        return []
+    
+    with Image.open(original) as imagem:
+        imagem = ImageOps.exif_transpose(imagem)
+        transparente = imagem.mode in ("RGBA", "LA", "PA") or "transparency" in imagem.info
+        imagem = imagem.convert("RGBA" if transparente else "RGB")
+        
+        # Maiores primeiro: cada redução parte da anterior (menos pixels)
+        geradas = []
+        for variante, lado in sorted(pendentes.items(), key=lambda item: -(item[1] or 1 << 30)):
+            if lado:
+                imagem.thumbnail((lado, lado), Image.LANCZOS)
+            destino = original.parent / caminho_variante(original.name, variante)
+            temporario = destino.with_name(f".{destino.name}.{os.getpid()}.part")
+            try:
+                imagem.save(temporario, "WEBP", quality=QUALIDADE_WEBP, method=4)
+                os.replace(temporario, destino)
+            finally:
+                temporario.unlink(missing_ok=True)
+            geradas.append(variante)
+    
+    return geradas
+
+
+class VariantesImagemService:
+    """
+    Variantes reduzidas (WebP) de anexos de imagem
+    
+    Exemplo de uso:
+        ```python
+        # Depois do commit do upload
+        if VariantesImagemService.suporta(anexo.tipo_mime):
+            VariantesImagemService.enfileirar(anexo.caminho)
+        
+        # Ao servir (gera na hora para arquivos antigos)
+        caminho = await VariantesImagemService.obter(anexo.caminho, "thumb")
+        ```
+    """
+    
+    @staticmethod
+    def suporta(tipo_mime: Optional[str]) -> bool:
+        """Tipo MIME tem variantes"""
+        return (tipo_mime or "").lower() in TIPOS_IMAGEM
+    
+    @staticmethod
+    def urls(caminho: str) -> Dict[str, str]:
+        """URL de cada variante"""
+        return {variante: f"/uploads/{caminho}?variante={variante}" for variante in VARIANTES}
+    
+    @staticmethod
+    async def gerar(caminho: str) -> None:
+        """
+        Gerar as variantes de um arquivo (relativo a UPLOAD_DIR)
+        
+        Chamadas simultâneas para o mesmo arquivo aguardam a mesma geração.
+        
+        Raises:
+            Exception: Se a imagem não puder ser lida (Pillow)
+        """
+        tarefa = _em_andamento.get(caminho)
+        if tarefa is None:
+            caminho_absoluto = str(Path(settings.UPLOAD_DIR) / caminho)
+            tarefa = asyncio.get_running_loop().create_task(
+                executar_em_processo(gerar_variantes, caminho_absoluto)
+            )
+            _em_andamento[caminho] = tarefa
+            tarefa.add_done_callback(lambda _: _em_andamento.pop(caminho, None))
+        
+        geradas = await asyncio.shield(tarefa)
+        if geradas:
+            logger.info(f"Variantes geradas para {caminho}: {', '.join(geradas)}")
+    
+    @staticmethod
+    def enfileirar(caminho: str) -> None:
+        """
+        Gerar as variantes em segundo plano (sem aguardar)
+        
+        Deve ser chamado dentro do event loop da API.
+        """
+        async def _executar():
+            try:
+                await VariantesImagemService.gerar(caminho)
+            except Exception as e:
+                logger.warning(f"Não foi possível gerar variantes de {caminho}: {e}")
+        
+        tarefa = asyncio.get_running_loop().create_task(_executar())
+        _tarefas.add(tarefa)
+        tarefa.add_done_callback(_tarefas.discard)
+    
+    @staticmethod
+    async def obter(caminho: str, variante: str) -> Optional[str]:
+        """
+        Caminho relativo da variante, gerando-a se ainda não existir
+        
+        Returns:
+            Caminho relativo a UPLOAD_DIR, ou None se a imagem não pôde
+            ser convertida (servir o original)
+        """
+        relativo = caminho_variante(caminho, variante)
+        if (Path(settings.UPLOAD_DIR) / relativo).is_file():
+            return relativo
+        
+        try:
+            await VariantesImagemService.gerar(caminho)
+        except Exception as e:
+            logger.warning(f"Não foi possível gerar a variante {variante} de {caminho}: {e}")
+            return None
+        return relativo
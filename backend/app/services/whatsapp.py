@@ -12,16 +12,19 @@ Funcionalidades:
 
 Dependências:
 - requests: Para chamadas HTTP à Z-API
+- httpx: Para envios assíncronos (pool compartilhado)
 - SQLAlchemy: Para acessar relacionamentos
 
 API: Z-API (https://www.z-api.io/)
 Autor: DeBrief Sistema
 """
 import requests
+import httpx
 from sqlalchemy.orm import Session
 from typing import Optional
 from datetime import datetime, timedelta
 from app.core.config import settings
+from app.core.http_clients import obter_cliente_http
 from app.models.demanda import Demanda
 import logging
 
@@ -187,6 +190,83 @@ class WhatsAppService:
         # Usar o método principal de envio (agora já adaptado para Z-API)
         return self.enviar_mensagem_sync(chat_id, mensagem)
     
+    async def enviar_mensagem_individual_async(
+        self,
+        numero: str,
+        mensagem: str
+    ) -> bool:
+        """
+        Versão assíncrona do enviar_mensagem_individual
+        
+        Usa o pool keep-alive compartilhado ("zapi") em vez de abrir
+        uma conexão por mensagem. Respeita o circuit breaker.
+        
+        Args:
+            numero: Número WhatsApp (formato: 5511999999999)
+            mensagem: Texto da mensagem
+        
+        Returns:
+            True se enviado com sucesso
+        """
+        if not self._can_send():
+            logger.warning("Circuit breaker WhatsApp ativo — tentativa bloqueada.")
+            return False
+        
+        numero_limpo = ''.join(filter(str.isdigit, numero))
+        url = f"{self.base_url}/send-text"
+        payload = {
+            "phone": numero_limpo,
+            "message": mensagem
+        }
+        
+        try:
+            logger.info(f"Enviando mensagem WhatsApp via Z-API para {numero_limpo}")
+            
+            client = obter_cliente_http("zapi")
+            response = await client.post(
+                url,
+                json=payload,
+                headers=self.headers,
+                timeout=settings.WHATSAPP_HTTP_TIMEOUT_SECONDS
+            )
+            return self._processar_resposta(response, numero_limpo)
+        
+        except httpx.TimeoutException:
+            logger.error("⏱️ Timeout ao enviar mensagem Z-API")
+            self._register_failure()
+            return False
+        except Exception as e:
+            logger.error(f"❌ Exceção ao enviar Z-API: {e}")
+            self._register_failure()
+            return False
+    
+    def _processar_resposta(self, response, numero: str) -> bool:
+        """
+        Interpretar resposta da Z-API (requests ou httpx) e atualizar circuit breaker
+        
+        Args:
+            response: Resposta HTTP
+            numero: Número de destino (para log)
+        
+        Returns:
+            True se a Z-API confirmou o envio
+        """
+        if response.status_code in (200, 201):
+            result = response.json()
+            if result.get("messageId") or result.get("success") or result.get("key"):
+                message_id = result.get("messageId") or result.get("key", {}).get("id", "")
+                logger.info(f"✅ Mensagem Z-API enviada com sucesso para {numero}: {message_id}")
+                self._reset_circuit()
+                return True
+            else:
+                logger.error(f"❌ Erro Z-API: {result}")
+                self._register_failure()
+                return False
+        else:
+            logger.error("❌ Erro Z-API (status %s): %.200s", response.status_code, response.text)
+            self._register_failure()
+            return False
+    
     def enviar_mensagem_sync(self, chat_id: str, mensagem: str) -> bool:
         """
         Versão síncrona do enviar_mensagem (para uso sem async)
@@ -229,21 +309,7 @@ class WhatsAppService:
                 timeout=30
             )
             
-            if response.status_code in (200, 201):
-                result = response.json()
-                if result.get("messageId") or result.get("success") or result.get("key"):
-                    message_id = result.get("messageId") or result.get("key", {}).get("id", "")
-                    logger.info(f"✅ Mensagem Z-API enviada com sucesso para {numero}: {message_id}")
-                    self._reset_circuit()
-                    return True
-                else:
-                    logger.error(f"❌ Erro Z-API: {result}")
-                    self._register_failure()
-                    return False
-            else:
-                logger.error("❌ Erro Z-API (status %s): %.200s", response.status_code, response.text)
-                self._register_failure()
-                return False
+            return self._processar_resposta(response, numero)
                 
         except requests.exceptions.Timeout:
             logger.error("⏱️ Timeout ao enviar mensagem Z-API")
@@ -0,0 +1,138 @@
+"""
+Fan-out de mensagens WhatsApp
+
+Envia a mesma notificação para vários destinatários em paralelo,
+com limite de concorrência e prazo máximo por evento.
+
+- Concorrência: WHATSAPP_FANOUT_CONCORRENCIA envios simultâneos
+- Prazo: WHATSAPP_FANOUT_PRAZO_SECONDS para o evento inteiro; envios
+  não concluídos no prazo são cancelados e contados como falha
+- Circuit breaker do WhatsAppService: com o circuito aberto os envios
+  restantes falham imediatamente, sem chamada HTTP
+
+Autor: DeBrief Sistema
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.services.whatsapp import WhatsAppService
+
+logger = logging.getLogger(__name__)
+
+
+class WhatsAppFanout:
+    """
+    Envio paralelo e limitado de mensagens WhatsApp
+    
+    Exemplo de uso:
+        ```python
+        fanout = WhatsAppFanout()
+        resultado = await fanout.enviar(
+            [(usuario.id, usuario.whatsapp) for usuario in usuarios],
+            mensagem
+        )
+        print(resultado["enviados"], resultado["falhas"])
+        ```
+    """
+    
+    def __init__(
+        self,
+        whatsapp_service: Optional[WhatsAppService] = None,
+        concorrencia: Optional[int] = None,
+        prazo_segundos: Optional[float] = None
+    ):
+        """
+        Inicializar fan-out
+        
+        Args:
+            whatsapp_service: Serviço de envio (padrão: novo WhatsAppService)
+            concorrencia: Envios simultâneos (padrão: WHATSAPP_FANOUT_CONCORRENCIA)
+            prazo_segundos: Prazo do evento (padrão: WHATSAPP_FANOUT_PRAZO_SECONDS)
+        """
+        self.whatsapp_service = whatsapp_service or WhatsAppService()
+        self.concorrencia = max(1, concorrencia or settings.WHATSAPP_FANOUT_CONCORRENCIA)
+        self.prazo_segundos = prazo_segundos or settings.WHATSAPP_FANOUT_PRAZO_SECONDS
+    
+    async def enviar(
+        self,
+        destinatarios: List[Tuple[str, str]],
+        mensagem: str
+    ) -> dict:
+        """
+        Enviar mensagem para todos os destinatários
+        
+        Args:
+            destinatarios: Lista de (chave, numero) - a chave identifica o
+                destinatário no resultado (ex: ID do usuário)
+            mensagem: Texto da mensagem
+        
+        Returns:
+            Dicionário com:
+                enviados: Envios confirmados pela Z-API
+                falhas: Envios com erro, bloqueados ou expirados
+                expirados: Envios cancelados pelo prazo
+                resultados: {chave: True/False}
+                erros: {chave: mensagem de erro}
+                duracao_segundos: Tempo total do fan-out
+        """
+        inicio = time.monotonic()
+        semaforo = asyncio.Semaphore(self.concorrencia)
+        erros: Dict[str, str] = {}
+        
+        async def _enviar_um(chave: str, numero: str) -> bool:
+            async with semaforo:
+                try:
+                    sucesso = await self.whatsapp_service.enviar_mensagem_individual_async(
+                        numero=numero,
+                        mensagem=mensagem
+                    )
+                    if not sucesso:
+                        erros[chave] = "Falha ao enviar mensagem"
+                    return sucesso
+                except Exception as e:
+                    erros[chave] = str(e)
+                    return False
+        
+        tarefas = {
+            asyncio.create_task(_enviar_um(chave, numero)): chave
+            for chave, numero in destinatarios
+        }
+        
+        resultados: Dict[str, bool] = {}
+        expirados = 0
+        
+        if tarefas:
+            concluidas, pendentes = await asyncio.wait(tarefas.keys(), timeout=self.prazo_segundos)
+            
+            for tarefa in pendentes:
+                tarefa.cancel()
+            if pendentes:
+                await asyncio.gather(*pendentes, return_exceptions=True)
+            
+            for tarefa, chave in tarefas.items():
+                if tarefa in concluidas:
+                    resultados[chave] = tarefa.result()
+                else:
+                    resultados[chave] = False
+                    erros[chave] = f"Prazo de {self.prazo_segundos:.0f}s excedido"
+                    expirados += 1
+        
+        enviados = sum(1 for sucesso in resultados.values() if sucesso)
+        falhas = len(resultados) - enviados
+        duracao = time.monotonic() - inicio
+        
+        logger.info(
+            f"Fan-out WhatsApp: {enviados} enviados, {falhas} falhas "
+            f"({expirados} expirados) em {duracao:.1f}s"
+        )
+        
+        return {
+            "enviados": enviados,
+            "falhas": falhas,
+            "expirados": expirados,
+            "resultados": resultados,
+            "erros": erros,
+            "duracao_segundos": duracao,
+        }
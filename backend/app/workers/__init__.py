@@ -0,0 +1,19 @@
+"""
+Workers em segundo plano
+Processos separados da API, executados com `python -m app.workers`
+
+Workers disponíveis:
+- OutboxWorker: Processa eventos da outbox (Trello, WhatsApp)
+- ManutencaoWorker: Tarefas periódicas (reparo do rollup de estatísticas)
+- TrelloWebhookWorker: Aplica as ações recebidas pelo webhook do Trello
+"""
+
+from app.workers.manutencao import ManutencaoWorker
+from app.workers.outbox import OutboxWorker
+from app.workers.trello_webhook import TrelloWebhookWorker
+
+__all__ = [
+    'OutboxWorker',
+    'ManutencaoWorker',
+    'TrelloWebhookWorker',
+]
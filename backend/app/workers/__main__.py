@@ -0,0 +1,51 @@
+"""
+Ponto de entrada dos workers
+
+Uso:
+    python -m app.workers
+"""
+import asyncio
+import logging
+import signal
+from app.core.config import settings
+from app.core.http_clients import fechar_clientes_http
+from app.core.redis_cliente import fechar_redis
+from app.services.trello_cache import cache_trello
+from app.workers.manutencao import ManutencaoWorker
+from app.workers.outbox import OutboxWorker
+from app.workers.trello_webhook import TrelloWebhookWorker
+
+
+async def main() -> None:
+    worker = OutboxWorker()
+    manutencao = ManutencaoWorker()
+    webhook_trello = TrelloWebhookWorker()
+    
+    def parar() -> None:
+        worker.parar()
+        manutencao.parar()
+        webhook_trello.parar()
+    
+    # SIGTERM/SIGINT (docker stop, Ctrl+C): terminar o lote atual e sair
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, parar)
+    
+    # Mapeamento de listas/configuração alterados na API valem na hora
+    cache_trello.iniciar_escuta()
+    
+    try:
+        await asyncio.gather(worker.executar(), manutencao.executar(), webhook_trello.executar())
+    finally:
+        await cache_trello.parar_escuta()
+        await fechar_clientes_http()
+        await fechar_redis()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.DEBUG if settings.DEBUG else logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+    print(f"⚙️  {settings.APP_NAME} worker iniciando...")
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+"""
+Worker de Manutenção
+Tarefas periódicas noturnas: reconstrução do rollup de estatísticas,
+coleta de blobs de anexos órfãos e limpeza das ações do webhook do Trello
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.armazenamento import ArmazenamentoService
+from app.services.estatisticas import EstatisticasService
+from app.services.trello_webhook import TrelloWebhookService
+
+logger = logging.getLogger(__name__)
+
+
+class ManutencaoWorker:
+    """
+    Worker de Manutenção
+    
+    Todos os dias, na hora ESTATISTICAS_REPARO_HORA (fuso
+    ESTATISTICAS_TIMEZONE), reconstrói demandas_stats_daily a partir de
+    demandas (com várias réplicas, apenas uma executa - advisory lock) e
+    remove blobs de anexos que ficaram sem nenhum anexo e as ações do
+    webhook do Trello além de TRELLO_WEBHOOK_RETENCAO_DIAS.
+    
+    Exemplo:
+        ```python
+        worker = ManutencaoWorker()
+        await worker.executar()
+        ```
+    """
+    
+    def __init__(self):
+        self._parar = asyncio.Event()
+    
+    def parar(self) -> None:
+        """Solicitar parada"""
+        self._parar.set()
+    
+    @staticmethod
+    def segundos_ate_reparo(agora: datetime = None) -> float:
+        """Segundos até a próxima ESTATISTICAS_REPARO_HORA"""
+        fuso = ZoneInfo(settings.ESTATISTICAS_TIMEZONE)
+        agora = agora or datetime.now(fuso)
+        proximo = agora.replace(hour=settings.ESTATISTICAS_REPARO_HORA, minute=0, second=0, microsecond=0)
+        if proximo <= agora:
+            proximo += timedelta(days=1)
+        return (proximo - agora).total_seconds()
+    
+    @staticmethod
+    def reconstruir_rollup() -> None:
+        """Reconstruir o rollup de estatísticas (síncrono, roda em thread)"""
+        db = SessionLocal()
+        try:
+            linhas = EstatisticasService(db).reconstruir_rollup()
+            if linhas is None:
+                logger.info("Reconstrução do rollup em andamento em outro worker")
+            else:
+                logger.info(f"Rollup de estatísticas reconstruído: {linhas} linhas")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Erro ao reconstruir rollup de estatísticas: {e}")
+        finally:
+            db.close()
+    
+    @staticmethod
+    def coletar_blobs_orfaos() -> None:
+        """Remover blobs de anexos sem referências (síncrono, roda em thread)"""
+        db = SessionLocal()
+        try:
+            removidos = ArmazenamentoService(db).coletar_orfaos()
+            if removidos:
+                logger.info(f"Blobs de anexos órfãos removidos: {removidos}")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Erro ao coletar blobs de anexos órfãos: {e}")
+        finally:
+            db.close()
+    
+    @staticmethod
+    def limpar_webhooks_trello() -> None:
+        """Remover ações antigas do webhook do Trello (síncrono, roda em thread)"""
+        try:
+            removidos = TrelloWebhookService.limpar_antigos()
+            if removidos:
+                logger.info(f"Ações antigas do webhook do Trello removidas: {removidos}")
+        except Exception as e:
+            logger.error(f"Erro ao limpar ações do webhook do Trello: {e}")
+    
+    async def executar(self) -> None:
+        """Laço principal até parar() ser chamado"""
+        while not self._parar.is_set():
+            try:
+                await asyncio.wait_for(self._parar.wait(), timeout=self.segundos_ate_reparo())
+            except asyncio.TimeoutError:
+                if settings.ESTATISTICAS_ROLLUP_ENABLED:
+                    await asyncio.to_thread(self.reconstruir_rollup)
+                await asyncio.to_thread(self.coletar_blobs_orfaos)
+                await asyncio.to_thread(self.limpar_webhooks_trello)
@@ -0,0 +1,75 @@
+"""
+Worker da Outbox
+Laço que reivindica e processa eventos da tabela outbox_eventos
+"""
+import asyncio
+import logging
+from typing import Optional
+from app.core.config import settings
+from app.services.outbox import OutboxService
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxWorker:
+    """
+    Worker da Outbox
+    
+    Vários workers podem rodar ao mesmo tempo (SKIP LOCKED garante que
+    cada evento é reivindicado por apenas um). Eventos de um lote são
+    processados em ordem de criação.
+    
+    Exemplo:
+        ```python
+        worker = OutboxWorker()
+        await worker.executar()
+        ```
+    """
+    
+    def __init__(self, worker_id: Optional[str] = None):
+        self.service = OutboxService(worker_id)
+        self._parar = asyncio.Event()
+    
+    def parar(self) -> None:
+        """Solicitar parada após o lote atual"""
+        logger.info(f"Worker {self.service.worker_id}: parada solicitada")
+        self._parar.set()
+    
+    async def executar_lote(self) -> int:
+        """
+        Reivindicar e processar um lote
+        
+        Returns:
+            Número de eventos reivindicados
+        """
+        ids = await asyncio.to_thread(self.service.reivindicar, settings.OUTBOX_BATCH_SIZE)
+        
+        for evento_id in ids:
+            await self.service.processar(evento_id)
+        
+        return len(ids)
+    
+    async def executar(self) -> None:
+        """Laço principal até parar() ser chamado"""
+        logger.info(f"Worker da outbox iniciado: {self.service.worker_id}")
+        
+        while not self._parar.is_set():
+            try:
+                processados = await self.executar_lote()
+            except Exception as e:
+                logger.error(f"Erro no laço da outbox: {e}")
+                processados = 0
+            
+            # Lote cheio: provavelmente há mais eventos, não esperar
+            if processados >= settings.OUTBOX_BATCH_SIZE:
+                continue
+            
+            try:
+                await asyncio.wait_for(
+                    self._parar.wait(),
+                    timeout=settings.OUTBOX_POLL_INTERVAL_SECONDS
+                )
+            except asyncio.TimeoutError:
+                pass
+        
+        logger.info(f"Worker da outbox finalizado: {self.service.worker_id}")
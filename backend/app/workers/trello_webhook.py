@@ -0,0 +1,61 @@
+"""
+Worker do Webhook do Trello
+Laço que aplica as ações do Trello gravadas em trello_webhook_eventos
+"""
+import asyncio
+import logging
+from app.core.config import settings
+from app.services.trello_webhook import TrelloWebhookService
+
+logger = logging.getLogger(__name__)
+
+
+class TrelloWebhookWorker:
+    """
+    Worker do Webhook do Trello
+    
+    Vários workers podem rodar ao mesmo tempo (SKIP LOCKED). Ações só
+    são reivindicadas depois de TRELLO_WEBHOOK_ATRASO_SECONDS, para que
+    movimentações seguidas do mesmo card caiam no mesmo lote.
+    
+    Exemplo:
+        ```python
+        worker = TrelloWebhookWorker()
+        await worker.executar()
+        ```
+    """
+    
+    def __init__(self):
+        self._parar = asyncio.Event()
+    
+    def parar(self) -> None:
+        """Solicitar parada após o lote atual"""
+        self._parar.set()
+    
+    async def executar(self) -> None:
+        """Laço principal até parar() ser chamado"""
+        logger.info("Worker do webhook do Trello iniciado")
+        
+        while not self._parar.is_set():
+            try:
+                processados = await asyncio.to_thread(
+                    TrelloWebhookService.processar_lote,
+                    settings.TRELLO_WEBHOOK_LOTE
+                )
+            except Exception as e:
+                logger.error(f"Erro no laço do webhook do Trello: {e}")
+                processados = 0
+            
+            # Lote cheio: provavelmente há mais ações, não esperar
+            if processados >= settings.TRELLO_WEBHOOK_LOTE:
+                continue
+            
+            try:
+                await asyncio.wait_for(
+                    self._parar.wait(),
+                    timeout=settings.TRELLO_WEBHOOK_POLL_INTERVAL_SECONDS
+                )
+            except asyncio.TimeoutError:
+                pass
+        
+        logger.info("Worker do webhook do Trello finalizado")
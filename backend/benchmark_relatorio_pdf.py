@@ -0,0 +1,123 @@
+"""
+Benchmark do relatório PDF
+Mede tempo, páginas, tamanho e pico de memória (RSS) do RelatorioService.escrever_pdf
+
+Não usa o banco: as demandas são geradas em memória, uma a uma (como a
+query com yield_per do job de relatório). Cada tamanho roda em um
+processo separado para o pico de RSS não ser herdado do anterior.
+
+Execute:
+    python benchmark_relatorio_pdf.py                  # 1.000, 10.000 e 50.000 demandas
+    python benchmark_relatorio_pdf.py 50000 100000     # tamanhos escolhidos
+    python benchmark_relatorio_pdf.py --legado 5000    # compara com tabela única em memória
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+from app.models.demanda import StatusDemanda
+from app.services.relatorio import RelatorioService
+
+TAMANHOS_PADRAO = [1000, 10000, 50000]
+
+
+def _rss_mb() -> float:
+    """Pico de RSS do processo atual (MB)"""
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KB / macOS: bytes
+    return pico / 1024 / 1024 if sys.platform == "darwin" else pico / 1024
+
+
+def _demandas(quantidade: int):
+    """Demandas falsas com os relacionamentos usados pelo relatório"""
+    statuses = list(StatusDemanda)
+    cliente = SimpleNamespace(nome="Prefeitura Municipal de Exemplo")
+    secretaria = SimpleNamespace(nome="Secretaria de Comunicação", cliente=cliente)
+    tipos = [SimpleNamespace(nome=n) for n in ("Design", "Desenvolvimento", "Social Media", "Vídeo")]
+    prioridades = [SimpleNamespace(nome=n) for n in ("Baixa", "Média", "Alta", "Urgente")]
+    hoje = date.today()
+    
+    for i in range(quantidade):
+        yield SimpleNamespace(
+            id=f"{i:08x}-0000-4000-8000-000000000000",
+            nome=f"Demanda de teste número {i} com um nome razoavelmente longo",
+            status=statuses[i % len(statuses)],
+            tipo_demanda=tipos[i % len(tipos)],
+            prioridade=prioridades[i % len(prioridades)],
+            prazo_final=hoje + timedelta(days=i % 60),
+            created_at=datetime.now(),
+            secretaria=secretaria,
+        )
+
+
+def _executar(quantidade: int, legado: bool, fila) -> None:
+    """Gerar um relatório (processo filho) e devolver as medições"""
+    service = RelatorioService()
+    rss_inicial = _rss_mb()
+    inicio = time.perf_counter()
+    
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as arquivo:
+        if legado:
+            # Comportamento anterior: lista inteira + uma única tabela
+            service.PDF_LINHAS_POR_TABELA = quantidade or 1
+            service.escrever_pdf(list(_demandas(quantidade)), {}, "Benchmark", arquivo)
+        else:
+            resumo = {s.value: 0 for s in StatusDemanda}
+            for i in range(quantidade):
+                resumo[list(StatusDemanda)[i % len(StatusDemanda)].value] += 1
+            resumo["total"] = quantidade
+            service.escrever_pdf(_demandas(quantidade), {}, "Benchmark", arquivo, resumo=resumo)
+        
+        arquivo.flush()
+        duracao = time.perf_counter() - inicio
+        tamanho = os.path.getsize(arquivo.name)
+        arquivo.seek(0)
+        paginas = arquivo.read().count(b"/Type /Page\n")
+    
+    fila.put({
+        "quantidade": quantidade,
+        "segundos": duracao,
+        "paginas": paginas,
+        "tamanho_mb": tamanho / 1024 / 1024,
+        "rss_inicial_mb": rss_inicial,
+        "rss_pico_mb": _rss_mb(),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do relatório PDF")
+    parser.add_argument("tamanhos", nargs="*", type=int, default=TAMANHOS_PADRAO)
+    parser.add_argument("--legado", action="store_true", help="Também medir a tabela única (lenta)")
+    args = parser.parse_args()
+    
+    print("=" * 78)
+    print("📄 BENCHMARK DO RELATÓRIO PDF")
+    print("=" * 78)
+    print(f"{'modo':<10}{'demandas':>10}{'tempo (s)':>12}{'páginas':>10}{'arquivo (MB)':>14}{'RSS pico (MB)':>15}{'Δ RSS':>8}")
+    
+    modos = [("blocos", False)] + ([("legado", True)] if args.legado else [])
+    contexto = multiprocessing.get_context("fork" if sys.platform != "win32" else "spawn")
+    
+    for quantidade in args.tamanhos:
+        for nome, legado in modos:
+            fila = contexto.Queue()
+            processo = contexto.Process(target=_executar, args=(quantidade, legado, fila))
+            processo.start()
+            r = fila.get()
+            processo.join()
+            print(
+                f"{nome:<10}{r['quantidade']:>10}{r['segundos']:>12.1f}{r['paginas']:>10}"
+                f"{r['tamanho_mb']:>14.1f}{r['rss_pico_mb']:>15.0f}{r['rss_pico_mb'] - r['rss_inicial_mb']:>8.0f}"
+            )
+    
+    print()
+
+
+if __name__ == "__main__":
+    main()
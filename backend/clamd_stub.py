@@ -0,0 +1,104 @@
+"""
+Daemon clamd de teste (desenvolvimento)
+
+Implementa o suficiente do protocolo do clamd para exercitar o
+ScannerAntivirus sem instalar o ClamAV: PING, VERSION e INSTREAM
+(prefixos "z" e "n"). Qualquer stream que contenha a assinatura de
+teste EICAR é reportado como infectado.
+
+Uso:
+    python clamd_stub.py                       # tcp://127.0.0.1:3310
+    python clamd_stub.py tcp://0.0.0.0:3310
+    python clamd_stub.py unix:///tmp/clamd.sock
+
+Depois, no .env:
+    ANTIVIRUS_ENABLED=true
+    ANTIVIRUS_BACKEND=clamd
+    ANTIVIRUS_CLAMD_ADDRESS=tcp://127.0.0.1:3310
+
+Autor: DeBrief Sistema
+"""
+import asyncio
+import logging
+import struct
+import sys
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger("clamd_stub")
+
+EICAR = b"EICAR-STANDARD-ANTIVIRUS-TEST-FILE"
+STREAM_MAX_LENGTH = 100 * 1024 * 1024
+
+
+async def ler_comando(reader: asyncio.StreamReader) -> tuple:
+    """Ler o comando (zCMD\\0 ou nCMD\\n) e devolver (comando, terminador)"""
+    prefixo = await reader.readexactly(1)
+    if prefixo == b"z":
+        return (await reader.readuntil(b"\0"))[:-1].decode(), b"\0"
+    if prefixo == b"n":
+        return (await reader.readuntil(b"\n"))[:-1].decode(), b"\n"
+    # Formato antigo, sem prefixo (terminado em \n)
+    return (prefixo + await reader.readuntil(b"\n"))[:-1].decode(), b"\n"
+
+
+async def instream(reader: asyncio.StreamReader) -> str:
+    """Receber os blocos do INSTREAM e devolver a resposta"""
+    total = 0
+    cauda = b""
+    infectado = False
+    while True:
+        tamanho = struct.unpack(">I", await reader.readexactly(4))[0]
+        if tamanho == 0:
+            break
+        bloco = await reader.readexactly(tamanho)
+        total += tamanho
+        if total > STREAM_MAX_LENGTH:
+            return "INSTREAM size limit exceeded. ERROR"
+        # A assinatura pode cruzar a fronteira entre blocos
+        if EICAR in cauda + bloco:
+            infectado = True
+        cauda = (cauda + bloco)[-len(EICAR):]
+    
+    if infectado:
+        return "stream: Eicar-Test-Signature FOUND"
+    return "stream: OK"
+
+
+async def atender(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Atender uma conexão (um comando por conexão)"""
+    try:
+        comando, terminador = await ler_comando(reader)
+        if comando == "PING":
+            resposta = "PONG"
+        elif comando == "VERSION":
+            resposta = "ClamAV 0.0.0-stub/0/Thu Jan  1 00:00:00 1970"
+        elif comando == "INSTREAM":
+            resposta = await instream(reader)
+        else:
+            resposta = "UNKNOWN COMMAND"
+        logger.info(f"{comando}: {resposta}")
+        writer.write(resposta.encode() + terminador)
+        await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError) as e:
+        logger.warning(f"Conexão encerrada pelo cliente: {e}")
+    finally:
+        writer.close()
+
+
+async def main(endereco: str) -> None:
+    if endereco.startswith("unix://"):
+        server = await asyncio.start_unix_server(atender, path=endereco[len("unix://"):])
+    else:
+        host, _, porta = endereco[len("tcp://"):].rpartition(":")
+        server = await asyncio.start_server(atender, host, int(porta))
+    
+    logger.info(f"clamd de teste escutando em {endereco}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else "tcp://127.0.0.1:3310"))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,96 @@
+"""
+EXPLAIN dos filtros da listagem de demandas
+Mostra o plano do PostgreSQL e os índices usados por GET /api/demandas
+
+Monta a mesma query do endpoint (DemandaFiltroService + ORDER BY
+created_at DESC, id DESC + LIMIT) para combinações comuns de filtros,
+usando IDs reais do banco configurado em DATABASE_URL.
+
+Execute:
+    python explain_demandas_filtros.py             # EXPLAIN
+    python explain_demandas_filtros.py --analyze   # EXPLAIN (ANALYZE, BUFFERS)
+"""
+import argparse
+import re
+from datetime import date, timedelta
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from app.core.database import SessionLocal
+from app.models.demanda import Demanda
+from app.schemas.demanda import DemandaFilter
+from app.services.demanda_filtros import DemandaFiltroService
+
+LIMITE = 21
+
+
+def _cenarios(db):
+    """Filtros a explicar (nome, DemandaFilter, usuario_id)"""
+    amostra = db.query(
+        Demanda.usuario_id,
+        Demanda.cliente_id,
+        Demanda.secretaria_id,
+        Demanda.tipo_demanda_id,
+        Demanda.prioridade_id
+    ).order_by(Demanda.created_at.desc()).first()
+    if not amostra:
+        return []
+    
+    hoje = date.today()
+    return [
+        ("sem filtros (master)", DemandaFilter(), None),
+        ("usuário", DemandaFilter(), amostra.usuario_id),
+        ("cliente", DemandaFilter(cliente_id=[amostra.cliente_id]), None),
+        ("secretaria", DemandaFilter(secretaria_id=[amostra.secretaria_id]), None),
+        ("tipo + prioridade", DemandaFilter(
+            tipo_demanda_id=[amostra.tipo_demanda_id],
+            prioridade_id=[amostra.prioridade_id]
+        ), None),
+        ("status (vários)", DemandaFilter(status=["aberta", "em_andamento"]), None),
+        ("prazo (próximos 7 dias)", DemandaFilter(prazo_de=hoje, prazo_ate=hoje + timedelta(days=7)), None),
+        ("atrasadas", DemandaFilter(atrasadas=True), None),
+        ("atrasadas do usuário", DemandaFilter(atrasadas=True), amostra.usuario_id),
+        ("criadas no último mês", DemandaFilter(criado_de=hoje - timedelta(days=30)), None),
+        ("atualizadas hoje", DemandaFilter(atualizado_de=hoje, atualizado_ate=hoje), None),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN dos filtros de demandas")
+    parser.add_argument("--analyze", action="store_true", help="Executar as queries (EXPLAIN ANALYZE)")
+    args = parser.parse_args()
+    
+    explain = "EXPLAIN (ANALYZE, BUFFERS)" if args.analyze else "EXPLAIN"
+    db = SessionLocal()
+    
+    try:
+        cenarios = _cenarios(db)
+        if not cenarios:
+            print("⚠️  Nenhuma demanda no banco - nada a explicar")
+            return
+        
+        for nome, filtros, usuario_id in cenarios:
+            query = DemandaFiltroService.aplicar(db.query(Demanda.id), filtros, usuario_id)
+            query = query.order_by(Demanda.created_at.desc(), Demanda.id.desc()).limit(LIMITE)
+            sql = str(query.statement.compile(
+                dialect=postgresql.dialect(),
+                compile_kwargs={"literal_binds": True}
+            ))
+            
+            plano = [linha[0] for linha in db.execute(text(f"{explain} {sql}"))]
+            indices = sorted({
+                a or b for a, b in re.findall(r"Scan(?: Backward)? using (\w+)|Bitmap Index Scan on (\w+)", "\n".join(plano))
+            })
+            
+            print("=" * 78)
+            print(f"🔍 {nome}")
+            print(f"   índices: {', '.join(indices) or 'nenhum (Seq Scan)'}")
+            print("-" * 78)
+            for linha in plano:
+                print(linha)
+            print()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
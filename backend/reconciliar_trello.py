@@ -0,0 +1,64 @@
+"""
+Reconciliação das demandas com o board do Trello
+Compara as demandas com os cards do board configurado e, com --aplicar,
+corrige as diferenças (ver app/services/trello_reconciliacao.py)
+
+Execute:
+    python reconciliar_trello.py              # relatório (dry run)
+    python reconciliar_trello.py --aplicar    # aplica as correções
+    python reconciliar_trello.py --json       # relatório completo em JSON
+"""
+import argparse
+import asyncio
+import json
+from app.core.database import SessionLocal
+from app.core.http_clients import fechar_clientes_http
+from app.core.redis_cliente import fechar_redis
+from app.services.trello_reconciliacao import ReconciliacaoTrelloService
+
+
+async def _executar(aplicar: bool) -> dict:
+    db = SessionLocal()
+    try:
+        return await ReconciliacaoTrelloService(db).reconciliar(dry_run=not aplicar)
+    finally:
+        db.close()
+        await fechar_clientes_http()
+        await fechar_redis()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconciliação das demandas com o Trello")
+    parser.add_argument("--aplicar", action="store_true", help="Aplicar as correções (padrão: dry run)")
+    parser.add_argument("--json", action="store_true", help="Imprimir o relatório completo em JSON")
+    args = parser.parse_args()
+    
+    relatorio = asyncio.run(_executar(args.aplicar))
+    
+    if args.json:
+        print(json.dumps(relatorio, indent=2, ensure_ascii=False, default=str))
+        return
+    
+    print("=" * 78)
+    print(f"🔄 Reconciliação Trello - board {relatorio['board_id']}"
+          f"{' (dry run)' if relatorio['dry_run'] else ''}")
+    print("-" * 78)
+    for chave, valor in relatorio["totais"].items():
+        print(f"   {chave}: {valor}")
+    print(f"   duração: {relatorio['duracao_segundos']}s")
+    
+    for item in relatorio["status_atualizados"]:
+        print(f"   status   {item['demanda_id']}: {item['status_antigo']} → {item['status_novo']}")
+    for item in relatorio["cards_removidos"]:
+        print(f"   removido {item['demanda_id']}: card {item['card_id']} não existe no board")
+    for demanda_id in relatorio["cards_criados"]:
+        print(f"   criar    {demanda_id}: demanda sem card")
+    for item in relatorio["cards_sem_demanda"]:
+        print(f"   órfão    card {item['card_id']}: {item['nome']}")
+    
+    if relatorio["dry_run"]:
+        print("\nNada foi alterado. Use --aplicar para corrigir.")
+
+
+if __name__ == "__main__":
+    main()